@@ -5,10 +5,53 @@ import numpy as np
 from PIL import Image
 import math
 import random
+from game_clock import *
+from input_source import *
+from asset_cache import *
+from dirty_screen import *
+from trail import *
 
-knight_trail = []
 trail_length = 10
+knight_trail = Trail(trail_length)
 trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
+scene_layers = {}  # name -> (background, key, composite Surface, rects compose drew), see blit_scene_layer()
+
+def blit_scene_layer(screen, name, background, key, compose):
+    """
+    Blits the static part of a scene from one composite Surface: the background, then what compose(layer)
+    draws on it (fountain and party). compose runs again only when key changes, i.e. when one of the frames
+    shown moves on every 8-16 ticks, so most frames cost a single blit. key should hold the Surfaces drawn.
+    """
+    cached = scene_layers.get(name)
+    # On a DirtyScreen the layer records what compose draws, so only the sprites that changed are presented
+    tracked = isinstance(screen, DirtyScreen)
+    same_layer = (cached is not None and cached[0] is background and cached[2].get_size() == screen.get_size()
+                  and isinstance(cached[2], DirtySurface) == tracked)
+    if same_layer and cached[1] == key:
+        changed = []
+    else:
+        if same_layer:
+            layer, changed = cached[2], list(cached[3])
+        else:
+            layer, changed = DirtySurface(screen.get_size(), screen) if tracked else screen.copy(), None
+        layer.blit(scaled_background(background, layer), (0, 0))
+        if tracked:
+            layer.take_dirty()
+        compose(layer)
+        drawn = layer.take_dirty()[0] if tracked else []
+        if changed is not None:
+            changed += drawn
+        scene_layers[name] = cached = (background, key, layer, drawn)
+    if tracked:
+        screen.blit_base(cached[2], changed)
+    else:
+        screen.blit(cached[2], (0, 0))
+
+def scaled_background(bg_img, surface):
+    # The background is loaded at screen size already, only rescale it if the screen differs
+    if bg_img.get_size() != surface.get_size():
+        return pygame.transform.scale(bg_img, surface.get_size())
+    return bg_img
 
 def draw_main_scene(
     screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
@@ -18,44 +61,46 @@ def draw_main_scene(
     battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
     heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
     knight_idle_img=None, show_knight_idle=True, clock=None,
-    knight_idle_left=None, knight_idle_centery=None
+    knight_idle_left=None, knight_idle_centery=None, game_clock=None
 ):  
+    game_clock = game_clock or RealClock()
     if not hasattr(draw_main_scene, "music_started"):
-        pygame.mixer.music.load(os.path.join('black_knife.ogg'))
+        ASSETS.load_music(os.path.join(GAME_DIR, 'black_knife.ogg'))
         pygame.mixer.music.play(-1)  
         draw_main_scene.music_started = True
     global knight_trail, trail_length, trail_alphas
-    # Draw background
-    bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
-    screen.blit(bg_img_scaled, (0, 0))
-    # Draw Kris
     kris_img = kris_idle_frames[kris_frame_idx]
     kris_rect_draw = kris_rect.copy()
-    screen.blit(kris_img, kris_rect_draw)
-    # Draw fountain
     fountain_img = fountain_scaled_frames[fountain_frame_idx]
-    fountain_rect = fountain_img.get_rect()
-    fountain_rect.left = kris_rect.left + kris_img.get_width() + 100
-    fountain_rect.top = 0
-    screen.blit(fountain_img, fountain_rect)
-    # Draw Susie
     susie_img = susie_idle_frames[susie_frame_idx]
-    susie_rect_draw = susie_img.get_rect()
-    susie_rect_draw.left = kris_rect_draw.left - 120
-    susie_rect_draw.centery = kris_rect_draw.centery + 100  
-    screen.blit(susie_img, susie_rect_draw)
-    # Draw Ralsei
     ralsei_img = ralsei_idle_frames[ralsei_frame_idx]
-    ralsei_rect_draw = ralsei_img.get_rect()
-    ralsei_rect_draw.left = susie_rect_draw.left - 10
-    ralsei_rect_draw.centery = susie_rect_draw.centery + 100
-    screen.blit(ralsei_img, ralsei_rect_draw)
+
+    def compose(layer):
+        # Draw Kris
+        layer.blit(kris_img, kris_rect_draw)
+        # Draw fountain
+        fountain_rect = fountain_img.get_rect()
+        fountain_rect.left = kris_rect.left + kris_img.get_width() + 100
+        fountain_rect.top = 0
+        layer.blit(fountain_img, fountain_rect)
+        # Draw Susie
+        susie_rect_draw = susie_img.get_rect()
+        susie_rect_draw.left = kris_rect_draw.left - 120
+        susie_rect_draw.centery = kris_rect_draw.centery + 100
+        layer.blit(susie_img, susie_rect_draw)
+        # Draw Ralsei
+        ralsei_rect_draw = ralsei_img.get_rect()
+        ralsei_rect_draw.left = susie_rect_draw.left - 10
+        ralsei_rect_draw.centery = susie_rect_draw.centery + 100
+        layer.blit(ralsei_img, ralsei_rect_draw)
+
+    blit_scene_layer(screen, 'main', bg_img, (kris_img, tuple(kris_rect), fountain_img, susie_img, ralsei_img), compose)
     # Draw battle box
     pygame.draw.rect(screen, battle_box_color, battle_box_rect)
     pygame.draw.rect(screen, battle_box_border_color, battle_box_rect, battle_box_border)
     # Draw player heart (flashing if invincible)
     if invincible:
-        if ((pygame.time.get_ticks() // 100) % 2) == 0:
+        if ((game_clock.get_ticks() // 100) % 2) == 0:
             heart_draw_img = heart_img_0
         else:
             heart_draw_img = heart_img_1
@@ -68,7 +113,7 @@ def draw_main_scene(
         screen.blit(lives_surf, (50, 50))
     # Draw Knight idle animation and trail if enabled
     if show_knight_idle and knight_idle_img is not None:
-        float_offset = int(20 * math.sin(pygame.time.get_ticks() / 267))
+        float_offset = int(20 * math.sin(game_clock.get_ticks() / 267))
         knight_idle_rect = knight_idle_img.get_rect()
         if knight_idle_left is not None and knight_idle_centery is not None:
             knight_idle_rect.left = knight_idle_left
@@ -77,67 +122,57 @@ def draw_main_scene(
             knight_idle_rect.centery = kris_rect_draw.centery + 20
             knight_idle_rect.left = battle_box_rect.right + 40
         knight_idle_rect.top += float_offset
-        trail_img = knight_idle_img.copy()
-        trail_img.set_alpha(50)
         trail_rect = knight_idle_rect.copy()
         trail_rect.left += 40
-        screen.blit(trail_img, trail_rect)
-        # Insert the current state at the start of the trail
-        knight_trail.insert(0, (knight_idle_img.copy(), knight_idle_rect.copy()))
-        if len(knight_trail) > trail_length:
-            knight_trail.pop()
-        # Draw the trail (oldest last, most faded)
-        for i, (img, rect) in enumerate(reversed(knight_trail)):
-            img = img.copy()
-            img.set_alpha(trail_alphas[i])
-            rect = rect.copy()
-            rect.left += 40 + i * 10
-            screen.blit(img, rect)
+        screen.blit(ASSETS.translucent(knight_idle_img, 50), trail_rect)
+        # Add the current state to the trail and draw it (oldest last, most faded)
+        knight_trail.add(knight_idle_img, knight_idle_rect)
+        knight_trail.draw(screen, trail_alphas)
         # Draw the main Knight sprite LAST
         screen.blit(knight_idle_img, knight_idle_rect)
 
 
-def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx, kris_idle_frames, kris_rect, susie_idle_frames, susie_rect, ralsei_idle_frames, ralsei_rect, battle_box_rect, base_dir, kris_target_size, susie_target_size, ralsei_target_size, kris_frame_idx, susie_frame_idx, ralsei_frame_idx, battle_box_color, battle_box_border_color, battle_box_border, heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, fountain_anim_speed, fountain_frame_count, kris_anim_speed, kris_frame_count, susie_anim_speed, susie_frame_count, ralsei_anim_speed, ralsei_frame_count, fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer):
+def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx, kris_idle_frames, kris_rect, susie_idle_frames, susie_rect, ralsei_idle_frames, ralsei_rect, battle_box_rect, base_dir, kris_target_size, susie_target_size, ralsei_target_size, kris_frame_idx, susie_frame_idx, ralsei_frame_idx, battle_box_color, battle_box_border_color, battle_box_border, heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, fountain_anim_speed, fountain_frame_count, kris_anim_speed, kris_frame_count, susie_anim_speed, susie_frame_count, ralsei_anim_speed, ralsei_frame_count, fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer, game_clock=None, input_source=None, preloader=None):
+    game_clock = game_clock or RealClock()
+    input_source = input_source or KeyboardInput()
+    # preloader (an AssetPreloader) gets the idle part of every intro frame to load the battle's sprites
     # Load intro animations
     def load_anim(folder, numeric_sort=False):
         files = [
-            os.path.join(folder, f) for f in os.listdir(folder)
+            os.path.join(folder, f) for f in ASSETS.list_dir(folder)
             if f.lower().endswith(('.png', '.jpg', '.jpeg'))
         ]
         if numeric_sort:
             files.sort(key=lambda x: int(''.join(filter(str.isdigit, os.path.basename(x))) or 0))
         else:
             files = sorted(files)
-        return [pygame.image.load(f).convert_alpha() for f in files]
+        return files
 
-    kris_intro_frames = load_anim(os.path.join(base_dir, 'sprites', 'spr_krisb_intro'))
-    susie_intro_frames = load_anim(os.path.join(base_dir, 'sprites', 'spr_susieb_attack'))
-    ralsei_intro_frames = load_anim(os.path.join(base_dir, 'sprites', 'spr_ralsei_battleintro'))
-    knight_intro_frames = load_anim(os.path.join(base_dir, 'sprites', 'spr_roaringknight_sword_appear_new'), numeric_sort=True)
-    knight_idle_img = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png')).convert_alpha()
+    kris_intro_files = load_anim(os.path.join(base_dir, 'sprites', 'spr_krisb_intro'))
+    susie_intro_files = load_anim(os.path.join(base_dir, 'sprites', 'spr_susieb_attack'))
+    ralsei_intro_files = load_anim(os.path.join(base_dir, 'sprites', 'spr_ralsei_battleintro'))
+    knight_intro_files = load_anim(os.path.join(base_dir, 'sprites', 'spr_roaringknight_sword_appear_new'), numeric_sort=True)
+    knight_idle_path = os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png')
 
     # Scale all intro frames to match idle frame sizes
     def scale_all_to_target(frames, target_size):
         return [pygame.transform.smoothscale(f, target_size) for f in frames]
 
+    # Kris and Susie intro frames are scaled a further 1.5x to visually match the idle sprites
     # Kris
-    kris_intro_frames = scale_all_to_target(kris_intro_frames, kris_target_size)
+    kris_intro_frames = ASSETS.load_frames(kris_intro_files, (int(kris_target_size[0] * 1.5), int(kris_target_size[1] * 1.5)))
     kris_idle_frames = scale_all_to_target(kris_idle_frames, kris_target_size)
     # Susie
-    susie_intro_frames = scale_all_to_target(susie_intro_frames, susie_target_size)
+    susie_intro_frames = ASSETS.load_frames(susie_intro_files, (int(susie_target_size[0] * 1.5), int(susie_target_size[1] * 1.5)))
     susie_idle_frames = scale_all_to_target(susie_idle_frames, susie_target_size)
     # Ralsei
-    ralsei_intro_frames = scale_all_to_target(ralsei_intro_frames, ralsei_target_size)
+    ralsei_intro_frames = ASSETS.load_frames(ralsei_intro_files, ralsei_target_size)
     ralsei_idle_frames = scale_all_to_target(ralsei_idle_frames, ralsei_target_size)
     # Knight (4x idle size)
-    knight_idle_orig_size = (knight_idle_img.get_width(), knight_idle_img.get_height())
+    knight_idle_orig_size = ASSETS.image_size(knight_idle_path)
     knight_target_size = (int(knight_idle_orig_size[0] * 3), int(knight_idle_orig_size[1] * 3))
-    knight_intro_frames = scale_all_to_target(knight_intro_frames, knight_target_size)
-    knight_idle_img = pygame.transform.smoothscale(knight_idle_img, knight_target_size)
-
-    # After scaling to target size, manually scale up intro frames to visually match idle sprites
-    kris_intro_frames = [pygame.transform.smoothscale(f, (int(f.get_width() * 1.5), int(f.get_height() * 1.5))) for f in kris_intro_frames]
-    susie_intro_frames = [pygame.transform.smoothscale(f, (int(f.get_width() * 1.5), int(f.get_height() * 1.5))) for f in susie_intro_frames]
+    knight_intro_frames = ASSETS.load_frames(knight_intro_files, knight_target_size)
+    knight_idle_img = ASSETS.load(knight_idle_path, knight_target_size)
 
     # Animation lengths
     knight_len = len(knight_intro_frames)
@@ -163,9 +198,11 @@ def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx
 
     clock = pygame.time.Clock()
     # Prepare sound effect for knight intro
-    battle_start_sfx = pygame.mixer.Sound(os.path.join(base_dir, 'sprites', 'sound_effects', 'battle_start.wav'))
+    battle_start_sfx = ASSETS.sound(os.path.join(base_dir, 'sprites', 'sound_effects', 'battle_start.wav'))
     battle_start_sfx_played = False
     for i in range(max_frames):
+        if preloader is not None:
+            preloader.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -211,12 +248,14 @@ def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx
             screen.blit(knight_intro_frames[i - knight_pause_duration], knight_rect)
         else:
             # Idle, float up and down
-            float_offset = int(20 * math.sin(pygame.time.get_ticks() / 267))
+            float_offset = int(20 * math.sin(game_clock.get_ticks() / 267))
             idle_rect = knight_rect.copy()
             idle_rect.top = knight_idle_base_y + float_offset
             screen.blit(knight_idle_img, idle_rect)
-        pygame.display.flip()
-        clock.tick(16)  # 16 FPS for cutscene
+        present(screen)
+        if preloader is not None:
+            preloader.fill_frame(16)
+        game_clock.tick(clock, 16)  # 16 FPS for cutscene
 
     # Draw the main scene after the intro
     draw_main_scene(
@@ -225,21 +264,23 @@ def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx
         susie_idle_frames, susie_frame_idx, susie_rect,
         ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
         battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False
+        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False, game_clock=game_clock
     )
-    pygame.display.flip()
+    present(screen)
 
     # Idle animation loop before Attack1
     idle_duration = 500  # milliseconds (3 seconds)
-    idle_start = pygame.time.get_ticks()
+    idle_start = game_clock.get_ticks()
     player_speed = 5  # Ensure player_speed is defined here
-    while pygame.time.get_ticks() - idle_start < idle_duration:
+    while game_clock.get_ticks() - idle_start < idle_duration:
+        if preloader is not None:
+            preloader.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
                 sys.exit()
         # Handle player movement (copied from main loop)
-        keys = pygame.key.get_pressed()
+        keys = input_source.get_keys()
         if keys[pygame.K_LEFT]:
             player_x -= player_speed
         if keys[pygame.K_RIGHT]:
@@ -276,10 +317,12 @@ def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx
             ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False,
-            knight_idle_img, True, clock
+            knight_idle_img, True, clock, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        if preloader is not None:
+            preloader.fill_frame(60)
+        game_clock.tick(clock, 60)
 
     # Draw the main scene after the first attack to clear leftovers
     draw_main_scene(
@@ -289,9 +332,9 @@ def play_battle_intro(screen, bg_img, fountain_scaled_frames, fountain_frame_idx
         ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
         battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
         heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False,
-        knight_idle_img, True, clock
+        knight_idle_img, True, clock, game_clock=game_clock
     )
-    pygame.display.flip()
+    present(screen)
     return player_x, player_y
 
 def PreAttack1(
@@ -301,8 +344,10 @@ def PreAttack1(
     heart_img_0, heart_img_1, player_x, player_y, heart_size,
     kris_idle_frames, kris_frame_idx, kris_rect_in, susie_idle_frames, susie_frame_idx, susie_rect_in,
     ralsei_idle_frames, ralsei_frame_idx, ralsei_rect_in,
-    player_speed=5
+    player_speed=5, game_clock=None, input_source=None
 ):
+    game_clock = game_clock or RealClock()
+    input_source = input_source or KeyboardInput()
     global knight_trail, trail_length, trail_alphas
     # Input lockout for 200ms to prevent accidental movement from held keys
         # Animation frame/timer setup for animating fountain, Kris, Susie, Ralsei
@@ -311,23 +356,22 @@ def PreAttack1(
     local_kris_frame_idx = kris_frame_idx
     local_susie_frame_idx = susie_frame_idx
     local_ralsei_frame_idx = ralsei_frame_idx
-    local_fountain_anim_timer = pygame.time.get_ticks()
+    local_fountain_anim_timer = game_clock.get_ticks()
     local_kris_anim_timer = 0
     local_susie_anim_timer = 0
     local_ralsei_anim_timer = 0
 
     input_lockout_duration = 200  # ms
-    attack1_start_time = pygame.time.get_ticks()
+    attack1_start_time = game_clock.get_ticks()
     movement_keys_released = False
     # Load Knight point animation frames
     knight_point_dir = os.path.join(os.path.dirname(__file__), 'sprites', 'spr_roaringknight_point_ol')
     knight_point_files = sorted([
-        os.path.join(knight_point_dir, f) for f in os.listdir(knight_point_dir)
+        os.path.join(knight_point_dir, f) for f in ASSETS.list_dir(knight_point_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    knight_point_frames = [pygame.image.load(f).convert_alpha() for f in knight_point_files]
     # Scale to match idle size
-    knight_point_frames = [pygame.transform.smoothscale(f, knight_idle_img.get_size()) for f in knight_point_frames]
+    knight_point_frames = ASSETS.load_frames(knight_point_files, knight_idle_img.get_size())
 
     # Start and end positions
     start_x = battle_box_rect.right + 40
@@ -336,10 +380,10 @@ def PreAttack1(
     end_y = battle_box_rect.centery
     move_duration = 1000  # ms
     anim_duration = 1000  # ms for 5 frames
-    start_time = pygame.time.get_ticks()
+    start_time = game_clock.get_ticks()
     running = True
     while running:
-        now = pygame.time.get_ticks()
+        now = game_clock.get_ticks()
         t = min((now - start_time) / move_duration, 1.0)
         # Interpolate position
         knight_x = int(start_x + (end_x - start_x) * t)
@@ -351,7 +395,7 @@ def PreAttack1(
         knight_rect.left = knight_x
         knight_rect.centery = knight_y
         # Only allow player movement after input lockout and after all movement keys are released
-        keys = pygame.key.get_pressed()
+        keys = input_source.get_keys()
         movement_keys = [keys[pygame.K_LEFT], keys[pygame.K_RIGHT], keys[pygame.K_UP], keys[pygame.K_DOWN]]
         if now - attack1_start_time > input_lockout_duration:
             if not movement_keys_released:
@@ -371,9 +415,7 @@ def PreAttack1(
         player_x = max(playable_rect.left, min(player_x, playable_rect.right - heart_size))
         player_y = max(playable_rect.top, min(player_y, playable_rect.bottom - heart_size))
         # Trail logic
-        knight_trail.insert(0, (knight_img.copy(), knight_rect.copy()))
-        if len(knight_trail) > trail_length:
-            knight_trail.pop()
+        knight_trail.add(knight_img, knight_rect)
         # --- Animate all idle/backgrounds ---
         
         local_kris_anim_timer += 1
@@ -420,32 +462,27 @@ def PreAttack1(
             ralsei_idle_frames, local_ralsei_frame_idx, ralsei_rect_dyn,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, None, 0, False,
-            None, False, clock
+            None, False, clock, game_clock=game_clock
         )
         # Draw trail and knight on top
-        for i, (img, rect) in enumerate(reversed(knight_trail)):
-            img = img.copy()
-            img.set_alpha(trail_alphas[i])
-            rect = rect.copy()
-            rect.left += 40 + i * 10
-            screen.blit(img, rect)
+        knight_trail.draw(screen, trail_alphas)
         screen.blit(knight_img, knight_rect)
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
         # End condition: when movement and animation are done
         if t >= 1.0 and frame_idx == len(knight_point_frames) - 1:
             running = False
 
     # Hold the final pose for 0.5 seconds (500 ms)
     hold_time = 500  # ms
-    hold_start = pygame.time.get_ticks()
-    while pygame.time.get_ticks() - hold_start < hold_time:
+    hold_start = game_clock.get_ticks()
+    while game_clock.get_ticks() - hold_start < hold_time:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
         # Handle player movement
-        keys = pygame.key.get_pressed()
+        keys = input_source.get_keys()
         if keys[pygame.K_LEFT]:
             player_x -= player_speed
         if keys[pygame.K_RIGHT]:
@@ -472,20 +509,15 @@ def PreAttack1(
         screen.blit(kris_idle_frames[local_kris_frame_idx], kris_rect_in)
         screen.blit(susie_idle_frames[local_susie_frame_idx], susie_rect_in)
         screen.blit(ralsei_idle_frames[local_ralsei_frame_idx], ralsei_rect_in)
-        for i, (img, rect) in enumerate(reversed(knight_trail)):
-            img = img.copy()
-            img.set_alpha(trail_alphas[i])
-            rect = rect.copy()
-            rect.left += 40 + i * 10
-            screen.blit(img, rect)
+        knight_trail.draw(screen, trail_alphas)
         screen.blit(knight_point_frames[-1], knight_rect)
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
 
     # Define variables for return
     triangle_knight_img = knight_point_frames[-1]
     triangle_knight_rect = knight_rect
-    triangle_start_time = pygame.time.get_ticks()
+    triangle_start_time = game_clock.get_ticks()
     knight_reverse_duration = 500  # ms, adjust as needed
 
     return knight_point_frames[-1], knight_rect, knight_point_frames, player_x, player_y, \
@@ -503,14 +535,16 @@ def PreAttack2(
     heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
     knight_idle_img, show_knight_idle, clock,
     knight_idle_left, knight_idle_centery,
-    anim_duration=2000, player_speed=5
+    anim_duration=2000, player_speed=5, game_clock=None, input_source=None
 ):
     """
     Smoothly move and resize the battle box to its original center and make it a perfect square (width=height)
     over anim_duration ms, while drawing the idle scene and allowing player movement.
     Returns the updated battle box rect and player position.
     """
-    start_time = pygame.time.get_ticks()
+    game_clock = game_clock or RealClock()
+    input_source = input_source or KeyboardInput()
+    start_time = game_clock.get_ticks()
     start_rect = battle_box_rect.copy()
     end_center = original_battle_box_rect.center
     target_size = (start_rect.height, start_rect.height)  # perfect square
@@ -520,7 +554,7 @@ def PreAttack2(
     susie_anim_timer = 0
     ralsei_anim_timer = 0
     while running:
-        now = pygame.time.get_ticks()
+        now = game_clock.get_ticks()
         t = min((now - start_time) / anim_duration, 1.0)
         # Advance animation frames
         fountain_anim_timer += 1
@@ -555,7 +589,7 @@ def PreAttack2(
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
                 sys.exit()
-        keys = pygame.key.get_pressed()
+        keys = input_source.get_keys()
         if keys[pygame.K_LEFT]:
             player_x -= player_speed
         if keys[pygame.K_RIGHT]:
@@ -577,10 +611,10 @@ def PreAttack2(
             new_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            knight_idle_left, knight_idle_centery
+            knight_idle_left, knight_idle_centery, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
         if t >= 1.0:
             running = False
     return new_rect, player_x, player_y
@@ -594,13 +628,15 @@ def PreAttack3(
     heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
     knight_idle_img, show_knight_idle, clock,
     knight_idle_left=None, knight_idle_centery=None,
-    anim_duration=2000, player_speed=5
+    anim_duration=2000, player_speed=5, game_clock=None, input_source=None
 ):
     """
     Smoothly resize the battle box back to 450x300 px and center, over anim_duration ms, updating the idle scene.
     Returns the updated battle box rect and player position.
     """
-    start_time = pygame.time.get_ticks()
+    game_clock = game_clock or RealClock()
+    input_source = input_source or KeyboardInput()
+    start_time = game_clock.get_ticks()
     start_rect = battle_box_rect.copy()
     # Target: 450x300 px, centered as in original setup
     screen_width, screen_height = screen.get_width(), screen.get_height()
@@ -614,7 +650,7 @@ def PreAttack3(
     susie_anim_timer = 0
     ralsei_anim_timer = 0
     while running:
-        now = pygame.time.get_ticks()
+        now = game_clock.get_ticks()
         t = min((now - start_time) / anim_duration, 1.0)
         # Advance animation frames
         fountain_anim_timer += 1
@@ -644,7 +680,7 @@ def PreAttack3(
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
                 sys.exit()
-        keys = pygame.key.get_pressed()
+        keys = input_source.get_keys()
         if keys[pygame.K_LEFT]:
             player_x -= player_speed
         if keys[pygame.K_RIGHT]:
@@ -666,10 +702,10 @@ def PreAttack3(
             new_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            knight_idle_left, knight_idle_centery
+            knight_idle_left, knight_idle_centery, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
         if t >= 1.0:
             running = False
     return new_rect, player_x, player_y
@@ -683,14 +719,16 @@ def PreAttack5(
     heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
     knight_idle_img, show_knight_idle, clock,
     knight_idle_left=None, knight_idle_centery=None,
-    anim_duration=2000, player_speed=5
+    anim_duration=2000, player_speed=5, game_clock=None, input_source=None
 ):
     """
     Smoothly resize the battle box to a perfect square (width=height) and center it,
     over anim_duration ms, updating the idle scene.
     Returns the updated battle box rect and player position.
     """
-    start_time = pygame.time.get_ticks()
+    game_clock = game_clock or RealClock()
+    input_source = input_source or KeyboardInput()
+    start_time = game_clock.get_ticks()
     start_rect = battle_box_rect.copy()
     # Target: perfect square, centered
     screen_width, screen_height = screen.get_width(), screen.get_height()
@@ -704,7 +742,7 @@ def PreAttack5(
     susie_anim_timer = 0
     ralsei_anim_timer = 0
     while running:
-        now = pygame.time.get_ticks()
+        now = game_clock.get_ticks()
         t = min((now - start_time) / anim_duration, 1.0)
         # Advance animation frames
         fountain_anim_timer += 1
@@ -734,7 +772,7 @@ def PreAttack5(
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
                 sys.exit()
-        keys = pygame.key.get_pressed()
+        keys = input_source.get_keys()
         if keys[pygame.K_LEFT]:
             player_x -= player_speed
         if keys[pygame.K_RIGHT]:
@@ -756,10 +794,10 @@ def PreAttack5(
             new_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            knight_idle_left, knight_idle_centery
+            knight_idle_left, knight_idle_centery, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
         if t >= 1.0:
             running = False
     return new_rect, player_x, player_y
\ No newline at end of file
@@ -0,0 +1,825 @@
+import collections
+import contextlib
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+# One place every sprite is loaded through.
+# Surfaces are loaded, converted and scaled once per (path, size, filter) and then shared, so
+# building an attack a second time (from the menu, or reset()) touches neither the disk nor smoothscale.
+# Shared Surfaces must not be drawn on or given set_alpha(), copy() them first.
+# When build_atlas.py has packed the sprites, unscaled sprites are subsurfaces of a few atlas pages
+# and folder listings come from the atlas index instead of the disk.
+# Scaled sprites are also kept on disk in sprites/scaled_cache/ as raw RGBA blobs named after the
+# source file's hash, the size and the filter, so later launches map them in instead of rescaling.
+# Editing a sprite changes its hash, so stale blobs are simply never looked up again.
+# track() records which sprites each attack loads, so asset_prefetch.py can decode them ahead of time.
+# When build_pack.py has written assets.pack, sprites, sounds and music are read from that one
+# memory-mapped file instead of hundreds of loose ones, falling back to the loose file for anything
+# it doesn't have. Paths are resolved against the game folder, not the working directory.
+# The pack and the atlas index record each source file's modification time and size, and a sprite
+# edited since they were built is read from its loose file instead, so it is never served stale.
+# Sprites whose pixels turn out identical to one already loaded (the same frame under another
+# name, or the same scale reached twice) share that Surface instead of keeping a second copy.
+# Only sprites of the same size and format can match, so pixels are hashed only once a second
+# sprite of a size turns up.
+# With a budget_bytes, the least recently used scaled Surfaces are dropped from the cache once the
+# scaled ones take more than that; they are loaded again (from the scaled cache) if asked for.
+# load_frames() decodes the frames it is missing on a thread pool, one worker per core (pygame's
+# decoder releases the GIL), and converts them on the calling thread.
+# rotations() hands out RotationBanks, rotated copies of a sprite at fixed angle steps made once,
+# for sprites that spin every frame, and scale_ladder() ScaleLadders, copies at fixed scale steps
+# for sprites that shrink or grow every frame. translucent() keeps the faded copies trails are drawn with.
+# These are kept with the cache key of the sprite they were made from, count towards budget_bytes
+# and are dropped along with it.
+# With a profiler attached (startup_profiler.py), every read, decode, conversion, scale and sound
+# load is timed and reported to it along with the track() group it happened in.
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+SPRITES_DIR = os.path.join(GAME_DIR, 'sprites')
+ATLAS_DIR = os.path.join(SPRITES_DIR, 'atlas')
+ATLAS_INDEX = 'atlas.json'
+SCALED_CACHE_DIR = os.path.join(SPRITES_DIR, 'scaled_cache')
+MANIFESTS_PATH = os.path.join(SCALED_CACHE_DIR, 'manifests.json')
+PACK_PATH = os.path.join(GAME_DIR, 'assets.pack')
+PACK_MAGIC = b'RKPACK2\n'
+
+SCALE_FILTERS = {
+    'smooth': pygame.transform.smoothscale,
+    'scale': pygame.transform.scale,
+}
+
+def surface_format(surface):
+    return surface.get_size(), surface.get_bitsize(), surface.get_masks()
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+def derived_bytes(derived):
+    # A RotationBank, a ScaleLadder or a translucent copy
+    return surface_bytes(derived) if isinstance(derived, pygame.Surface) else derived.bytes()
+
+@contextlib.contextmanager
+def atomic_write(path, mode='wb'):
+    """
+    Opens a fresh temporary file next to path and renames it over path when the with block ends,
+    so readers never see half a file and concurrent writers (threads or processes) never share one.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class AssetPack:
+    """
+    Read side of the pack written by build_pack.py: PACK_MAGIC, the length of the JSON index as a
+    little-endian uint32, the index, then every payload back to back. The index is
+    {'entries': {name: [offset, length, format, mtime_ns]}, 'folders': {folder: [names]}}, with names relative
+    to the game folder using '/' separators, offsets counted from the end of the index and the source
+    file's modification time when it was packed.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = len(PACK_MAGIC) + 4
+        if self.mapped[:len(PACK_MAGIC)] != PACK_MAGIC:
+            self.mapped.close()
+            raise ValueError(f"{path} is not an asset pack")
+        index_length, = struct.unpack('<I', self.mapped[len(PACK_MAGIC):header_end])
+        index = json.loads(self.mapped[header_end:header_end + index_length])
+        self.data_start = header_end + index_length
+        self.entries = index['entries']
+        self.folders = index['folders']
+
+    def read(self, name, length=None):
+        """The payload of an entry, or its first length bytes."""
+        offset, size, format, mtime_ns = self.entries[name]
+        if length is not None:
+            size = min(size, length)
+        start = self.data_start + offset
+        return self.mapped[start:start + size]
+
+
+class RotationBank:
+    """
+    Copies of image rotated with pygame.transform.rotate() at angles rounded to step degrees
+    (the exact angle with step=None), made on first use or all at once with prerender().
+    crop=(w, h) keeps only the centered w x h part of each frame, for sprites drawn clipped to a box
+    around their center, trim=True also cuts off the transparent border (not for sprites whose rect
+    is used as a hitbox), and max_frames keeps only the most recently used frames.
+    """
+    def __init__(self, image, step=1, crop=None, trim=False, max_frames=None):
+        self.image = image
+        self.step = step
+        self.crop = crop
+        self.trim = trim
+        self.max_frames = max_frames
+        self.frames = collections.OrderedDict()  # angle -> (Surface, its rect in the whole rotated one, whole size)
+        self.nbytes = 0
+        self.on_resize = None  # called with the change in bytes, set by the AssetCache holding the bank
+
+    def quantize(self, angle):
+        if self.step is None:
+            return angle % 360
+        return round(angle / self.step) * self.step % 360
+
+    def render(self, angle):
+        rotated = pygame.transform.rotate(self.image, angle)
+        whole = rotated.get_rect()
+        area = whole.copy()
+        if self.crop is not None:
+            area.size = (min(self.crop[0], whole.width), min(self.crop[1], whole.height))
+            area.topleft = (whole.width // 2 - area.width // 2, whole.height // 2 - area.height // 2)
+        if self.trim:
+            bounds = rotated.subsurface(area).get_bounding_rect()
+            if bounds.width and bounds.height:
+                area = bounds.move(area.topleft)
+        if area != whole:
+            rotated = rotated.subsurface(area).copy()
+        return rotated, area, whole.size
+
+    def frame(self, angle, center):
+        """(Surface, rect) for angle, the rect placed as rotate(image, angle).get_rect(center=center) would be."""
+        angle = self.quantize(angle)
+        frame = self.frames.get(angle)
+        if frame is None:
+            frame = self.frames[angle] = self.render(angle)
+            added = surface_bytes(frame[0])
+            if self.max_frames is not None and len(self.frames) > self.max_frames:
+                added -= surface_bytes(self.frames.popitem(last=False)[1][0])
+            self.nbytes += added
+            if self.on_resize is not None:
+                self.on_resize(added)
+        else:
+            self.frames.move_to_end(angle)
+        surface, area, size = frame
+        whole = pygame.Rect((0, 0), size)
+        whole.center = center
+        return surface, area.move(whole.topleft)
+
+    def prerender(self):
+        """Makes every frame of the bank now, e.g. while the attack loads, and returns the bank."""
+        for i in range(int(round(360 / self.step))):
+            self.frame(i * self.step, (0, 0))
+        return self
+
+    def bytes(self):
+        return self.nbytes
+
+
+class ScaleLadder:
+    """
+    Copies of image smoothscaled at steps evenly spaced scales from min_scale to max_scale, sizes rounded
+    down like int(w * scale), for sprites that shrink or grow every frame. frame(scale) is the nearest one.
+    """
+    def __init__(self, image, min_scale, max_scale, steps=64):
+        self.image = image
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.steps = steps
+        w, h = image.get_size()
+        self.frames = []
+        for i in range(steps):
+            # Weighted this way both ends are exact, min + (max - min) * 1 can fall just short of max
+            t = i / (steps - 1)
+            scale = min_scale * (1 - t) + max_scale * t
+            self.frames.append(pygame.transform.smoothscale(image, (int(w * scale), int(h * scale))))
+        self.nbytes = sum(surface_bytes(surface) for surface in self.frames)
+
+    def frame(self, scale):
+        i = round((scale - self.min_scale) / (self.max_scale - self.min_scale) * (self.steps - 1))
+        return self.frames[min(max(i, 0), self.steps - 1)]
+
+    def bytes(self):
+        return self.nbytes
+
+
+class AssetCache:
+    """
+    Converted and scaled Surfaces keyed by (path, size, filter), with hit and miss counts.
+    scaled_cache_dir=None turns the on-disk cache of scaled sprites off.
+    budget_bytes caps the memory of the scaled Surfaces and what rotations(), scale_ladder() and
+    translucent() made from them, None keeps everything.
+    workers is the number of decoding threads for load_frames(), 1 decodes on the calling thread.
+    """
+    def __init__(self, atlas_dir=ATLAS_DIR, scaled_cache_dir=SCALED_CACHE_DIR, manifests_path=MANIFESTS_PATH,
+                 pack_path=PACK_PATH, dedup=True, budget_bytes=None, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None  # ThreadPoolExecutor, started on first use
+        self.surfaces = collections.OrderedDict()  # least recently used first
+        self.budget_bytes = budget_bytes
+        self.scaled_bytes = 0  # scaled Surfaces in the cache, shared ones counted once
+        self.derived_held_bytes = 0  # everything in derived, kept up to date as rotation banks fill
+        self.key_counts = {}  # id(scaled Surface) -> how many keys hold it
+        self.digests = {}  # id(Surface) -> its content digest, to forget it in by_content
+        self.evictions = 0
+        self.sounds = {}
+        self.dedup = dedup
+        self.by_content = {}  # content digest -> first Surface loaded with those pixels
+        self.by_format = {}  # surface_format() -> {id(Surface): Surface} of that format not hashed yet
+        self.dedup_hits = 0
+        self.dedup_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.prefetch_hits = 0
+        self.scaled_cache_dir = scaled_cache_dir
+        self.source_hashes = {}
+        self.changed_sources = {}  # path -> whether the loose file differs from its pack or atlas entry
+        self.manifests_path = manifests_path
+        self.manifests = None  # saved manifests, read on first use
+        self.tracked = {}  # group -> keys loaded under track(group) this session, in order
+        self.tracking = None
+        self.group = None  # group of the innermost track() block
+        self.profiler = None  # StartupProfiler, see startup_profiler.py
+        self.prefetched = {}  # key -> decoded but unconverted Surface, filled by AssetPrefetcher
+        self.atlas_dir = atlas_dir
+        self.atlas = None  # index from build_atlas.py, read on first use
+        self.atlas_pages = {}
+        self.pack_path = pack_path
+        self.pack = None  # AssetPack, opened on first use (False when there is none)
+        self.source_keys = {}  # id(Surface) -> (key it was first loaded under, Surface) while the cache holds it
+        self.derived = {}  # source key -> {params: RotationBank, ScaleLadder or translucent copy}
+
+    @property
+    def held_bytes(self):
+        """Bytes counted against budget_bytes: the scaled Surfaces and everything derived from cached ones."""
+        return self.scaled_bytes + self.derived_held_bytes
+
+    def asset_pack(self):
+        if self.pack is None:
+            self.pack = False
+            if self.pack_path and os.path.exists(self.pack_path):
+                try:
+                    self.pack = AssetPack(self.pack_path)
+                except (OSError, ValueError):
+                    pass
+        return self.pack or None
+
+    def pack_name(self, path):
+        # Pack names are paths relative to the game folder with '/' separators
+        return os.path.relpath(os.path.abspath(path), GAME_DIR).replace(os.sep, '/')
+
+    def in_pack(self, path):
+        """Whether the pack has path, as it is on disk now."""
+        pack = self.asset_pack()
+        if pack is None:
+            return False
+        entry = pack.entries.get(self.pack_name(path))
+        return entry is not None and not self.source_changed(path, entry[3], entry[1])
+
+    def source_changed(self, path, mtime_ns, size):
+        """Whether the loose file at path was changed after a pack or atlas entry was made from it (checked once)."""
+        path = os.path.abspath(path)
+        changed = self.changed_sources.get(path)
+        if changed is None:
+            try:
+                stat = os.stat(path)
+                changed = (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size)
+            except OSError:
+                changed = False  # only the pack has it
+            self.changed_sources[path] = changed
+        return changed
+
+    def timed(self, category, path):
+        """Context timing one loading step for the profiler, a no-op without one."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.timed(category, path, self.group)
+
+    def read_bytes(self, path, length=None):
+        """Contents of the file at path (or its first length bytes), from the pack when it has it."""
+        with self.timed('io', path):
+            if self.in_pack(path):
+                return self.pack.read(self.pack_name(path), length)
+            with open(path, 'rb') as f:
+                return f.read() if length is None else f.read(length)
+
+    def image(self, path):
+        """The image at path decoded but not converted."""
+        if self.profiler is not None:
+            # Read first, so the profile tells the file I/O and the decoding apart
+            data = self.read_bytes(path)
+            with self.timed('decode', path):
+                return pygame.image.load(io.BytesIO(data), os.path.basename(path))
+        if self.in_pack(path):
+            name = self.pack_name(path)
+            return pygame.image.load(io.BytesIO(self.pack.read(name)), name)
+        return pygame.image.load(path)
+
+    def convert(self, surface, alpha, path):
+        with self.timed('convert', path):
+            return surface.convert_alpha() if alpha else surface.convert()
+
+    def scale(self, surface, size, filter, path):
+        with self.timed('scale', path):
+            return SCALE_FILTERS[filter](surface, size)
+
+    def sound(self, path):
+        """pygame.mixer.Sound for the file at path, shared like the Surfaces."""
+        path = os.path.abspath(path)
+        sound = self.sounds.get(path)
+        if sound is None:
+            with self.timed('sound', path):
+                if self.in_pack(path):
+                    sound = pygame.mixer.Sound(file=io.BytesIO(self.pack.read(self.pack_name(path))))
+                else:
+                    sound = pygame.mixer.Sound(path)
+            self.sounds[path] = sound
+        return sound
+
+    def load_music(self, path):
+        """pygame.mixer.music.load() for path, streaming from the pack when it has it."""
+        with self.timed('music', path):
+            if self.in_pack(path):
+                name = self.pack_name(path)
+                pygame.mixer.music.load(io.BytesIO(self.pack.read(name)), os.path.splitext(name)[1][1:])
+            else:
+                pygame.mixer.music.load(os.path.abspath(path))
+
+    def atlas_index(self):
+        if self.atlas is None:
+            index_path = os.path.join(self.atlas_dir, ATLAS_INDEX) if self.atlas_dir else None
+            if index_path and (self.in_pack(index_path) or os.path.exists(index_path)):
+                self.atlas = json.loads(self.read_bytes(index_path))
+            else:
+                self.atlas = {'pages': [], 'frames': {}, 'folders': {}}
+        return self.atlas
+
+    def atlas_key(self, path):
+        # Index keys are paths relative to sprites/ with '/' separators
+        return os.path.relpath(os.path.abspath(path), SPRITES_DIR).replace(os.sep, '/')
+
+    def atlas_entry(self, path):
+        """[page, x, y, w, h, mtime_ns, file size] of the sprite at path, None if the atlas doesn't have it as it is now."""
+        entry = self.atlas_index()['frames'].get(self.atlas_key(path))
+        if entry is None or len(entry) < 7 or self.source_changed(path, entry[5], entry[6]):
+            return None
+        return entry
+
+    def atlas_frame(self, path):
+        """The sprite at path as a subsurface of its atlas page, or None if it isn't in the atlas."""
+        entry = self.atlas_entry(path)
+        if entry is None:
+            return None
+        page_idx, x, y, w, h = entry[:5]
+        page = self.atlas_pages.get(page_idx)
+        if page is None:
+            page_path = os.path.join(self.atlas_dir, self.atlas['pages'][page_idx])
+            page = self.atlas_pages[page_idx] = self.convert(self.image(page_path), True, page_path)
+        return page.subsurface((x, y, w, h))
+
+    def list_dir(self, folder):
+        """File names in a sprites folder, like os.listdir(), from the atlas or pack index when it has the folder."""
+        names = self.atlas_index()['folders'].get(self.atlas_key(folder))
+        if names is None and self.asset_pack() is not None:
+            names = self.pack.folders.get(self.pack_name(folder))
+        if names is None:
+            return os.listdir(folder)
+        return list(names)
+
+    def image_size(self, path):
+        """(w, h) of the image at path without decoding it, from the atlas index or the PNG header."""
+        path = os.path.abspath(path)
+        entry = self.atlas_entry(path)
+        if entry is not None:
+            return tuple(entry[3:5])
+        header = self.read_bytes(path, 24)
+        if header[:8] != b'\x89PNG\r\n\x1a\n':
+            return self.load(path).get_size()
+        return struct.unpack('>II', header[16:24])
+
+    def source_hash(self, path):
+        digest = self.source_hashes.get(path)
+        if digest is None:
+            digest = self.source_hashes[path] = hashlib.sha1(self.read_bytes(path)).hexdigest()
+        return digest
+
+    def scaled_blob_path(self, path, size, filter, alpha):
+        name = f"{self.source_hash(path)}_{size[0]}x{size[1]}_{filter}_{'a' if alpha else 'o'}.rgba"
+        return os.path.join(self.scaled_cache_dir, name)
+
+    def read_scaled_blob(self, blob_path, size, alpha):
+        """The blob as a converted Surface, or None if it's missing or truncated."""
+        try:
+            with open(blob_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size != size[0] * size[1] * 4:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    # frombuffer() shares the mapped pixels, the converted copy owns its own
+                    # (the pages are only read in during the conversion, so it counts as 'convert')
+                    mapped_surface = pygame.image.frombuffer(mapped, size, 'RGBA')
+                    surface = self.convert(mapped_surface, alpha, blob_path)
+                    del mapped_surface
+                    return surface
+        except (OSError, ValueError):
+            return None
+
+    def write_scaled_blob(self, blob_path, surface):
+        # Written under a temporary name and renamed, so other processes never map half a blob
+        try:
+            os.makedirs(self.scaled_cache_dir, exist_ok=True)
+            with self.timed('io', blob_path):
+                with atomic_write(blob_path) as f:
+                    f.write(pygame.image.tobytes(surface, 'RGBA'))
+        except OSError:
+            pass
+
+    def load_scaled_from_disk(self, path, size, filter, alpha):
+        """Scaled sprite from the disk cache, scaling and storing it on a miss."""
+        if size[0] <= 0 or size[1] <= 0:
+            return self.scale(self.load_key((path, None, None, alpha)), size, filter, path)
+        blob_path = self.scaled_blob_path(path, size, filter, alpha)
+        surface = self.read_scaled_blob(blob_path, size, alpha)
+        if surface is not None:
+            self.disk_hits += 1
+            return surface
+        surface = self.scale(self.load_key((path, None, None, alpha)), size, filter, path)
+        self.write_scaled_blob(blob_path, surface)
+        return surface
+
+    def manifest_index(self):
+        if self.manifests is None:
+            self.manifests = {}
+            if self.manifests_path and os.path.exists(self.manifests_path):
+                try:
+                    with open(self.manifests_path) as f:
+                        self.manifests = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self.manifests
+
+    def manifest(self, group):
+        """Cache keys group loaded the last time it was tracked, [] if it never was."""
+        keys = []
+        for rel_path, w, h, filter, alpha in self.manifest_index().get(group, []):
+            size = (w, h) if w is not None else None
+            keys.append((os.path.abspath(os.path.join(SPRITES_DIR, rel_path)), size, filter, alpha))
+        return keys
+
+    def save_manifest(self, group, keys):
+        manifests = self.manifest_index()
+        manifests[group] = [[self.atlas_key(path), *(size or (None, None)), filter, alpha]
+                            for path, size, filter, alpha in keys]
+        if not self.manifests_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.manifests_path), exist_ok=True)
+            with atomic_write(self.manifests_path, 'w') as f:
+                json.dump(manifests, f)
+        except OSError:
+            pass
+
+    @contextlib.contextmanager
+    def track(self, group, save=True):
+        """
+        Records every sprite loaded inside the with block as group's manifest, saved for later launches
+        unless save=False. Several blocks with the same group add up within one session.
+        """
+        previous, self.tracking = self.tracking, self.tracked.setdefault(group, {})
+        previous_group, self.group = self.group, group
+        try:
+            yield
+        finally:
+            self.tracking = previous
+            self.group = previous_group
+            if save:
+                self.save_manifest(group, list(self.tracked[group]))
+
+    def decode(self, key):
+        """
+        The Surface for a cache key, decoded and scaled but not converted.
+        Doesn't touch the display or the cache, so it can run off the main thread.
+        """
+        path, size, filter, alpha = key
+        if size is None:
+            return self.image(path)
+        blob_path = None
+        if self.scaled_cache_dir and size[0] > 0 and size[1] > 0:
+            blob_path = self.scaled_blob_path(path, size, filter, alpha)
+            try:
+                with self.timed('io', blob_path):
+                    with open(blob_path, 'rb') as f:
+                        data = f.read()
+                if len(data) == size[0] * size[1] * 4:
+                    return pygame.image.frombytes(data, size, 'RGBA')
+            except OSError:
+                pass
+        surface = self.scale(self.image(path), size, filter, path)
+        if blob_path:
+            self.write_scaled_blob(blob_path, surface)
+        return surface
+
+    def load(self, path, size=None, filter='smooth', alpha=True):
+        """
+        The image at path, converted with convert_alpha() (or convert() with alpha=False)
+        and scaled to size with the 'smooth' or 'scale' filter when a size is given.
+        """
+        key = self.cache_key(path, size, filter, alpha)
+        if self.tracking is not None:
+            self.tracking[key] = None
+        return self.load_key(key)
+
+    def cache_key(self, path, size=None, filter='smooth', alpha=True):
+        path = os.path.abspath(path)
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        return (path, size, filter if size is not None else None, alpha)
+
+    def load_key(self, key):
+        path, size, filter, alpha = key
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        decoded = self.prefetched.pop(key, None)
+        if decoded is not None:
+            # Decoded ahead of time by AssetPrefetcher, only the conversion is left for the main thread
+            self.prefetch_hits += 1
+            surface = self.convert(decoded, alpha, path)
+        elif size is None:
+            surface = self.atlas_frame(path) if alpha else None
+            if surface is None:
+                surface = self.convert(self.image(path), alpha, path)
+        elif self.scaled_cache_dir:
+            surface = self.load_scaled_from_disk(path, size, filter, alpha)
+        else:
+            surface = self.scale(self.load_key((path, None, None, alpha)), size, filter, path)
+        if self.dedup:
+            surface = self.shared_copy(surface)
+        self.surfaces[key] = surface
+        self.source_keys.setdefault(id(surface), (key, surface))
+        # Taken over from a prefetch worker that decoded the key while this thread was loading it
+        self.prefetched.pop(key, None)
+        if size is not None:
+            count = self.key_counts.get(id(surface), 0)
+            if not count:
+                self.scaled_bytes += surface_bytes(surface)
+            self.key_counts[id(surface)] = count + 1
+            if self.budget_bytes is not None:
+                self.evict(keep=key)
+        return surface
+
+    def drop(self, key):
+        """
+        Removes a scaled key from the cache, forgetting its Surface and what was derived from it once no
+        other key holds it. Unscaled sprites stay (they are mostly atlas subsurfaces), only their derived ones go.
+        """
+        surface = self.surfaces[key]
+        if key[1] is None:
+            self.drop_derived(surface)
+            return
+        del self.surfaces[key]
+        count = self.key_counts.pop(id(surface)) - 1
+        if count:
+            self.key_counts[id(surface)] = count
+            return
+        self.scaled_bytes -= surface_bytes(surface)
+        self.drop_derived(surface)
+        self.source_keys.pop(id(surface), None)
+        self.by_format.get(surface_format(surface), {}).pop(id(surface), None)
+        digest = self.digests.pop(id(surface), None)
+        if digest is not None and self.by_content.get(digest) is surface:
+            del self.by_content[digest]
+
+    def drop_derived(self, surface):
+        """Forgets the rotation banks, scale ladders and translucent copies made from surface, returns whether there were any."""
+        source = self.source_keys.get(id(surface))
+        made = self.derived.pop(source[0], None) if source is not None else None
+        if made is None:
+            return False
+        for derived in made.values():
+            self.forget_derived(derived)
+        return True
+
+    def forget_derived(self, derived):
+        self.derived_held_bytes -= derived_bytes(derived)
+        if isinstance(derived, RotationBank):
+            # A bank the attack still holds keeps working, it just isn't counted any more
+            derived.on_resize = None
+
+    def resize_derived(self, delta):
+        self.derived_held_bytes += delta
+
+    def evict(self, keep=None):
+        """Drops the least recently used scaled Surfaces, and what was derived from any sprite, until they fit in budget_bytes."""
+        for key in list(self.surfaces):
+            if self.held_bytes <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            if key[1] is not None:
+                self.drop(key)
+                self.evictions += 1
+            elif self.drop_derived(self.surfaces[key]):
+                self.evictions += 1
+
+    def has_room(self):
+        return self.budget_bytes is None or self.held_bytes < self.budget_bytes
+
+    def release(self, group):
+        """
+        Drops group's scaled Surfaces, and what was derived from its sprites, that no other group has
+        loaded or lists in its manifest, e.g. the intro's animations once it is over.
+        """
+        needed = set()
+        for other in set(self.tracked) | set(self.manifest_index()):
+            if other != group:
+                needed.update(self.tracked.get(other, ()))
+                needed.update(self.manifest(other))
+        for key in self.tracked.get(group, ()):
+            if key in self.surfaces and key not in needed:
+                self.drop(key)
+
+    def content_digest(self, surface):
+        pixels = hashlib.sha1(pygame.image.tobytes(surface, 'RGBA')).digest()
+        return surface_format(surface) + (pixels,)
+
+    def shared_copy(self, surface):
+        """An already loaded Surface with the same size, format and pixels as surface, else surface itself."""
+        format = surface_format(surface)
+        unhashed = self.by_format.get(format)
+        if unhashed is None:
+            # The first of its size and format, nothing to compare it with yet
+            self.by_format[format] = {id(surface): surface}
+            return surface
+        for other in unhashed.values():
+            digest = self.digests[id(other)] = self.content_digest(other)
+            self.by_content.setdefault(digest, other)
+        unhashed.clear()
+        digest = self.content_digest(surface)
+        shared = self.by_content.setdefault(digest, surface)
+        if shared is surface:
+            self.digests[id(surface)] = digest
+        else:
+            self.dedup_hits += 1
+            self.dedup_bytes += surface_bytes(surface)
+        return shared
+
+    def memory_report(self):
+        """
+        Per track() group: the sprites it loaded, the bytes they would take as separate Surfaces
+        and the bytes actually held once identical ones are shared.
+        """
+        report = {}
+        for group, keys in self.tracked.items():
+            surfaces = [self.surfaces[key] for key in keys if key in self.surfaces]
+            unique = list({id(surface): surface for surface in surfaces}.values())
+            loaded_bytes = sum(surface_bytes(surface) for surface in surfaces)
+            held_bytes = sum(surface_bytes(surface) for surface in unique)
+            report[group] = {
+                'sprites': len(surfaces),
+                'unique': len(unique),
+                'bytes': loaded_bytes,
+                'held_bytes': held_bytes,
+                'saved_bytes': loaded_bytes - held_bytes,
+            }
+        return report
+
+    def load_scaled(self, path, factor, filter='smooth', alpha=True):
+        """The image at path scaled by factor, sizes rounded down like int(w * factor)."""
+        w, h = self.image_size(path)
+        return self.load(path, (int(w * factor), int(h * factor)), filter, alpha)
+
+    def derive(self, image, params, make):
+        """
+        make()'s result for image, a Surface loaded through the cache, kept under image's cache key and params
+        so rebuilding an attack (reset()) doesn't make it again. Looking it up counts as using image for
+        the LRU. Surfaces the cache doesn't hold get a new one every call.
+        """
+        source = self.source_keys.get(id(image))
+        if source is None or source[1] is not image:
+            return make()
+        key = source[0]
+        if key in self.surfaces:
+            self.surfaces.move_to_end(key)
+        made = self.derived.setdefault(key, {})
+        derived = made.get(params)
+        if derived is None:
+            derived = made[params] = make()
+            self.derived_held_bytes += derived_bytes(derived)
+            if isinstance(derived, RotationBank):
+                derived.on_resize = self.resize_derived
+            if self.budget_bytes is not None:
+                self.evict(keep=key)
+        return derived
+
+    def rotations(self, image, step=1, crop=None, trim=False, max_frames=None, prerender=False):
+        """The RotationBank for image, with every frame made now if prerender (e.g. while the attack loads)."""
+        def make():
+            bank = RotationBank(image, step, crop, trim, max_frames)
+            return bank.prerender() if prerender else bank
+        return self.derive(image, ('rotations', step, crop, trim, max_frames, prerender), make)
+
+    def scale_ladder(self, image, min_scale, max_scale, steps=64):
+        """The ScaleLadder for image, kept like rotations()."""
+        return self.derive(image, ('scale_ladder', min_scale, max_scale, steps),
+                           lambda: ScaleLadder(image, min_scale, max_scale, steps))
+
+    def translucent(self, image, alpha):
+        """A copy of image with set_alpha(alpha), kept like rotations(), e.g. for afterimage trails."""
+        def make():
+            copy = image.copy()
+            copy.set_alpha(alpha)
+            return copy
+        return self.derive(image, ('translucent', alpha), make)
+
+    def load_frames(self, paths, size=None, filter='smooth'):
+        keys = [self.cache_key(path, size, filter) for path in paths]
+        if self.tracking is not None:
+            self.tracking.update(dict.fromkeys(keys))
+        self.decode_many(keys)
+        return [self.load_key(key) for key in keys]
+
+    def needs_decode(self, key):
+        """Whether decode(key) ahead of load_key() would help: not loaded or decoded yet, and not served by the atlas."""
+        if key in self.surfaces or key in self.prefetched:
+            return False
+        path, size, filter, alpha = key
+        return not (size is None and alpha and self.atlas_entry(path) is not None)
+
+    def decode_many(self, keys):
+        """
+        Decodes the keys that aren't loaded yet on the thread pool and leaves them in prefetched,
+        for load_key() to convert on this thread. Unscaled sprites in the atlas are left alone.
+        """
+        keys = [key for key in dict.fromkeys(keys) if self.needs_decode(key)]
+        if self.workers < 2 or len(keys) < 2:
+            return
+        self.asset_pack()  # opened here rather than by several workers at once
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='asset-decode')
+        futures = [(key, self.pool.submit(self.decode, key)) for key in keys]
+        for key, future in futures:
+            try:
+                self.prefetched[key] = future.result()
+            except (pygame.error, OSError, ValueError):
+                pass  # load_key() tries again and raises it here
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'surfaces': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'prefetch_hits': self.prefetch_hits,
+            'dedup_hits': self.dedup_hits,
+            'dedup_bytes': self.dedup_bytes,
+            'held_bytes': self.held_bytes,
+            'evictions': self.evictions,
+            'rotation_bytes': self.derived_total(RotationBank),
+            'ladder_bytes': self.derived_total(ScaleLadder),
+            'translucent_bytes': self.derived_total(pygame.Surface),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def derived_total(self, kind):
+        return sum(derived_bytes(derived) for made in self.derived.values() for derived in made.values()
+                   if isinstance(derived, kind))
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sounds.clear()
+        self.by_content.clear()
+        self.by_format.clear()
+        self.key_counts.clear()
+        self.digests.clear()
+        self.scaled_bytes = 0
+        self.atlas = None
+        self.atlas_pages.clear()
+        self.pack = None
+        self.source_hashes.clear()
+        self.changed_sources.clear()
+        self.prefetched.clear()
+        self.source_keys.clear()
+        for made in self.derived.values():
+            for derived in made.values():
+                self.forget_derived(derived)
+        self.derived.clear()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.prefetch_hits = 0
+        self.dedup_hits = 0
+        self.dedup_bytes = 0
+        self.evictions = 0
+
+
+# The cache shared by the menu, the full game, the pre-attacks and every attack
+ASSETS = AssetCache()
@@ -0,0 +1,113 @@
+import collections
+import queue
+import threading
+import time
+import pygame
+from asset_cache import ASSETS
+
+# Loads the next attack's sprites while the current one is playing.
+# A worker thread decodes and scales everything the attack loaded last time (its manifest,
+# recorded by AssetCache.track()) and leaves the results in cache.prefetched. The attack's
+# constructor then only has to convert them, which has to happen on the main thread anyway.
+# AssetPreloader does the same on the main thread in small slices, for loops with idle time per frame.
+# Without a manifest yet (first launch) neither does anything and the attack loads as before.
+
+class AssetPrefetcher:
+    """
+    Worker thread decoding upcoming manifest groups, e.g.
+        prefetcher.prefetch('Attack2')
+        attack1.run()
+        with ASSETS.track('Attack2'):
+            attack2 = Attack2(...)
+    """
+    def __init__(self, cache=ASSETS):
+        self.cache = cache
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.work, name='asset-prefetch', daemon=True)
+        self.thread.start()
+
+    def prefetch(self, group):
+        """Queues group's sprites for decoding, returns how many were queued."""
+        # The pack and the atlas index are opened here, not by the worker while the main thread may be opening them too
+        self.cache.asset_pack()
+        self.cache.atlas_index()
+        keys = [key for key in self.cache.manifest(group) if self.cache.needs_decode(key)]
+        for key in keys:
+            self.queue.put(key)
+        return len(keys)
+
+    def work(self):
+        while True:
+            key = self.queue.get()
+            try:
+                if key is None:
+                    return
+                if self.cache.needs_decode(key):
+                    decoded = self.cache.decode(key)
+                    self.cache.prefetched[key] = decoded
+                    # The main thread may have loaded the key meanwhile. load_key() drops prefetched entries after
+                    # caching the key, so whichever side comes second removes the stale decode
+                    if key in self.cache.surfaces:
+                        self.cache.prefetched.pop(key, None)
+            except (pygame.error, OSError, ValueError):
+                pass  # left for the main thread, which loads it as usual and reports the error
+            finally:
+                self.queue.task_done()
+
+    def wait(self):
+        """Blocks until everything queued so far is decoded."""
+        self.queue.join()
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+class AssetPreloader:
+    """
+    Loads manifest groups into the cache a few sprites at a time on the main thread, e.g. from the
+    16 FPS battle intro. Call begin_frame() at the top of each frame and fill_frame(fps) after the flip:
+    it loads until the frame's time is used up (minus slack_ms), and never for more than budget_ms.
+    It also stops while the cache is at its memory budget, rather than evicting what it just loaded.
+    """
+    def __init__(self, groups=(), cache=ASSETS, budget_ms=40, slack_ms=4):
+        self.cache = cache
+        self.budget_ms = budget_ms
+        self.slack_ms = slack_ms
+        self.pending = collections.deque()
+        self.frame_start = None
+        for group in groups:
+            self.add(group)
+
+    def add(self, group):
+        self.pending.extend(key for key in self.cache.manifest(group) if key not in self.cache.surfaces)
+
+    def step(self, budget_ms):
+        """Loads pending sprites for up to budget_ms (the last one may run over), returns how many."""
+        deadline = time.perf_counter() + budget_ms / 1000
+        loaded = 0
+        while self.pending and time.perf_counter() < deadline and self.cache.has_room():
+            key = self.pending.popleft()
+            if key not in self.cache.surfaces:  # groups share sprites
+                self.cache.load_key(key)
+                loaded += 1
+        return loaded
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+
+    def fill_frame(self, fps):
+        if self.frame_start is None:
+            return 0
+        spare_ms = 1000 / fps - (time.perf_counter() - self.frame_start) * 1000 - self.slack_ms
+        return self.step(min(spare_ms, self.budget_ms))
+
+    def done(self):
+        return not self.pending
+
+    def finish(self):
+        """Loads everything still pending at once, or until the cache is at its memory budget."""
+        while self.pending and self.cache.has_room():
+            key = self.pending.popleft()
+            if key not in self.cache.surfaces:
+                self.cache.load_key(key)
@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+
+# Builds every attack headless and reports the sprite memory each one uses, and how much of it
+# is saved by sharing Surfaces with identical pixels (AssetCache.shared_copy).
+# Usage: python asset_report.py [--json report.json]
+# An attack's numbers include the battle scene (party, fountain, heart) that make_attack_for_debug sets up.
+
+ATTACK_NAMES = ['Attack1', 'Attack2', 'Attack3', 'Attack4', 'Attack5', 'Attack6',
+                'Attack7', 'Attack8', 'Attack9', 'Attack10', 'Final']
+
+def build_report(attack_names=ATTACK_NAMES):
+    from classes import make_attack_for_debug, ASSETS, surface_bytes
+    for name in attack_names:
+        with ASSETS.track(name, save=False):
+            make_attack_for_debug(name, headless=True)
+    report = ASSETS.memory_report()
+    surfaces = list(ASSETS.surfaces.values())
+    unique = list({id(surface): surface for surface in surfaces}.values())
+    loaded_bytes = sum(surface_bytes(surface) for surface in surfaces)
+    held_bytes = sum(surface_bytes(surface) for surface in unique)
+    report['all'] = {
+        'sprites': len(surfaces),
+        'unique': len(unique),
+        'bytes': loaded_bytes,
+        'held_bytes': held_bytes,
+        'saved_bytes': loaded_bytes - held_bytes,
+    }
+    return report
+
+def format_report(report):
+    lines = [f"{'attack':<10} {'sprites':>8} {'unique':>7} {'loaded MB':>10} {'held MB':>8} {'saved MB':>9}"]
+    for group, row in report.items():
+        lines.append(f"{group:<10} {row['sprites']:>8} {row['unique']:>7} {row['bytes'] / 1e6:>10.2f} "
+                     f"{row['held_bytes'] / 1e6:>8.2f} {row['saved_bytes'] / 1e6:>9.2f}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report sprite memory per attack and what deduplication saves.")
+    parser.add_argument('--json', default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+    report = build_report()
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import argparse
+import json
+import math
+import os
+import sys
+from PIL import Image
+from asset_cache import SPRITES_DIR, ATLAS_DIR, ATLAS_INDEX
+
+# Packs the PNGs of each folder under sprites/ into an atlas page plus a JSON index of frame rectangles.
+# AssetCache then opens and decodes one page per animation instead of every frame on its own,
+# and only for the folders that are actually used.
+# Usage: python build_atlas.py [--page-size 2048]
+# Rerun it after adding or changing sprites (changed ones are loaded from the loose PNGs until then),
+# or delete sprites/atlas/ to go back to loose files.
+
+def collect_sprites(sprites_dir, atlas_dir):
+    """
+    (key, path) for every PNG in the folders under sprites_dir, keys relative to it with '/' separators.
+    The loose PNGs directly in sprites_dir (backgrounds and one-off sprites) are left out.
+    """
+    sprites = []
+    for root, dirs, files in os.walk(sprites_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != atlas_dir)
+        if root == sprites_dir:
+            continue
+        for name in sorted(files):
+            if name.lower().endswith('.png'):
+                path = os.path.join(root, name)
+                sprites.append((os.path.relpath(path, sprites_dir).replace(os.sep, '/'), path))
+    return sprites
+
+def pack_shelves(sizes, page_size):
+    """
+    Shelf packing, tallest sprites first: fills rows left to right and starts a new page when one is full.
+    Rows are about as wide as the sprites are tall in total, so pages come out roughly square.
+    Returns (page, x, y) per size in the order given.
+    """
+    area = sum(w * h for w, h in sizes)
+    row_w = min(page_size, max(max(w for w, h in sizes), int(math.sqrt(area) * 1.2)))
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    placements = [None] * len(sizes)
+    page, x, y, shelf_h = 0, 0, 0, 0
+    for i in order:
+        w, h = sizes[i]
+        if w > page_size or h > page_size:
+            raise ValueError(f"sprite of {w}x{h} doesn't fit on a {page_size}px page")
+        if x + w > row_w:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        if y + h > page_size:
+            page, x, y, shelf_h = page + 1, 0, 0, 0
+        placements[i] = (page, x, y)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return placements
+
+def build_atlas(sprites_dir=SPRITES_DIR, atlas_dir=ATLAS_DIR, page_size=2048):
+    by_folder = {}
+    for key, path in collect_sprites(sprites_dir, atlas_dir):
+        folder, _, name = key.rpartition('/')
+        stat = os.stat(path)
+        by_folder.setdefault(folder, []).append((key, name, Image.open(path).convert('RGBA'), (stat.st_mtime_ns, stat.st_size)))
+    os.makedirs(atlas_dir, exist_ok=True)
+    page_names = []
+    frames = {}
+    folders = {}
+    for folder, sprites in by_folder.items():
+        folders[folder] = [name for key, name, img, stamp in sprites]
+        placements = pack_shelves([img.size for key, name, img, stamp in sprites], page_size)
+        for page in range(max(p[0] for p in placements) + 1):
+            on_page = [(img, x, y, key, stamp) for (key, name, img, stamp), (p, x, y) in zip(sprites, placements) if p == page]
+            page_img = Image.new('RGBA', (max(x + img.width for img, x, y, key, stamp in on_page),
+                                          max(y + img.height for img, x, y, key, stamp in on_page)), (0, 0, 0, 0))
+            page_idx = len(page_names)
+            for img, x, y, key, stamp in on_page:
+                page_img.paste(img, (x, y))
+                # With the source's modification time and size, so AssetCache notices it being edited later
+                frames[key] = [page_idx, x, y, img.width, img.height, *stamp]
+            name = f'atlas_{page_idx}.png'
+            page_img.save(os.path.join(atlas_dir, name))
+            page_names.append(name)
+    index = {'pages': page_names, 'frames': frames, 'folders': folders}
+    with open(os.path.join(atlas_dir, ATLAS_INDEX), 'w') as f:
+        json.dump(index, f, indent=1)
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the sprites into atlas pages with a JSON frame index.")
+    parser.add_argument('--page-size', type=int, default=2048, help="max atlas page width and height in px")
+    parser.add_argument('--out', default=ATLAS_DIR, help="output folder (default sprites/atlas)")
+    args = parser.parse_args(argv)
+    index = build_atlas(atlas_dir=os.path.abspath(args.out), page_size=args.page_size)
+    print(f"Packed {len(index['frames'])} sprites from {len(index['folders'])} folders into {len(index['pages'])} pages -> {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
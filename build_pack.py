@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import struct
+import sys
+from asset_cache import GAME_DIR, SPRITES_DIR, SCALED_CACHE_DIR, PACK_PATH, PACK_MAGIC, atomic_write
+
+# Concatenates every sprite and sound into one assets.pack with a JSON index up front.
+# AssetCache memory-maps the pack and decodes entries on demand, so a cold start opens one file
+# instead of several hundred, and folder listings come from the index instead of the disk.
+# Usage: python build_pack.py
+# Run build_atlas.py first to have the atlas pages packed as well. Rerun after adding or changing
+# sprites or sounds (changed ones are read from the loose files until then), or delete assets.pack
+# to go back to loose files.
+
+AUDIO_EXTENSIONS = ('.ogg', '.wav')
+
+def collect_assets(game_dir=GAME_DIR, sprites_dir=SPRITES_DIR):
+    """
+    (name, path) for every file under sprites_dir (without the scaled sprite cache) and every
+    sound file directly in game_dir, names relative to game_dir with '/' separators.
+    """
+    paths = []
+    for root, dirs, files in os.walk(sprites_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != SCALED_CACHE_DIR)
+        paths.extend(os.path.join(root, name) for name in sorted(files))
+    paths.extend(os.path.join(game_dir, name) for name in sorted(os.listdir(game_dir))
+                 if name.lower().endswith(AUDIO_EXTENSIONS))
+    return [(os.path.relpath(path, game_dir).replace(os.sep, '/'), path) for path in paths]
+
+def build_pack(out=PACK_PATH, game_dir=GAME_DIR, sprites_dir=SPRITES_DIR):
+    entries = {}
+    folders = {}
+    payloads = []
+    offset = 0
+    for name, path in collect_assets(game_dir, sprites_dir):
+        with open(path, 'rb') as f:
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            data = f.read()
+        folder, _, file_name = name.rpartition('/')
+        entries[name] = [offset, len(data), os.path.splitext(name)[1][1:].lower(), mtime_ns]
+        folders.setdefault(folder, []).append(file_name)
+        payloads.append(data)
+        offset += len(data)
+    index = json.dumps({'entries': entries, 'folders': folders}).encode()
+    # Written under a temporary name and renamed, so a running game never maps half a pack
+    with atomic_write(out) as f:
+        f.write(PACK_MAGIC)
+        f.write(struct.pack('<I', len(index)))
+        f.write(index)
+        for data in payloads:
+            f.write(data)
+    return entries, offset
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the sprites and sounds into one memory-mappable file.")
+    parser.add_argument('--out', default=PACK_PATH, help="pack file (default assets.pack next to the game)")
+    args = parser.parse_args(argv)
+    entries, payload_bytes = build_pack(os.path.abspath(args.out))
+    print(f"Packed {len(entries)} files ({payload_bytes / 1e6:.1f} MB) -> {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,15 @@
 # Quick debug runner for a single attack from game.py
-from classes import make_attack_for_debug
+from classes import make_attack_for_debug, run_headless
 
 # Choose which attack to debug here:
 ATTACK_NAME = 'Final' 
+# Step the attack at a fixed timestep with no window, as fast as possible
+HEADLESS = False
 
 if __name__ == '__main__':
-    attack = make_attack_for_debug(ATTACK_NAME)
-    attack.run()
\ No newline at end of file
+    attack = make_attack_for_debug(ATTACK_NAME, headless=HEADLESS)
+    if HEADLESS:
+        frames = run_headless(attack)
+        print(f"{ATTACK_NAME}: {frames} frames, done={attack.is_done()}")
+    else:
+        attack.run()
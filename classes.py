@@ -6,8 +6,117 @@ from PIL import Image
 import math
 import random
 from PreAttacks import *
+from game_clock import *
+from input_source import *
+from asset_cache import *
+
+# Pregenerated random schedules of seeded attacks, keyed by BaseAttack.pattern_key()
+PATTERN_CACHE = {}
+
+# Values snapshot() keeps by reference: immutable ones, and assets and devices the attacks never change.
+# Tuples count as immutable, the attacks only ever replace them.
+SHARED_STATE_TYPES = (int, float, bool, str, type(None), tuple, pygame.Surface, pygame.mixer.Sound,
+                      pygame.mixer.Channel, pygame.font.Font, pygame.time.Clock, RealClock, ScaledClock, VirtualClock,
+                      RotationBank, ScaleLadder)
+# Exact-type lookup for the common case, isinstance() is only the fallback
+SHARED_EXACT_TYPES = frozenset(SHARED_STATE_TYPES)
+# Pixels of a per-pixel hazard (the spin slashes) above this alpha hurt the heart
+HIT_ALPHA = 100
+
+def clone_state(value, memo):
+    """
+    Copy of an attack's mutable state: lists, dicts, Rects, arrays, Trails and bullet objects are copied,
+    everything in SHARED_STATE_TYPES is referenced. memo maps id() to copies already made (like deepcopy).
+    """
+    cls = type(value)
+    if cls in SHARED_EXACT_TYPES:
+        return value
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    if cls is list:
+        new = memo[key] = []
+        new.extend([v if type(v) in SHARED_EXACT_TYPES else clone_state(v, memo) for v in value])
+    elif cls is dict:
+        new = memo[key] = value.copy()
+        for k, v in value.items():
+            if type(v) not in SHARED_EXACT_TYPES:
+                new[k] = clone_state(v, memo)
+    elif cls is pygame.Rect or cls is np.ndarray or cls is Trail:
+        new = memo[key] = value.copy()
+    elif isinstance(value, SHARED_STATE_TYPES):
+        return value
+    elif isinstance(value, BaseAttack):
+        # Inner attacks (Attack7's Attack3, Attack10's Attack9) are copied like the outer one
+        new = memo[key] = object.__new__(cls)
+        new.__dict__.update(value.snapshot_state(memo))
+    elif hasattr(value, '__dict__') and not isinstance(value, type):
+        # Bullet objects: swords, stars, starchilds
+        new = memo[key] = object.__new__(cls)
+        state = new.__dict__
+        state.update(value.__dict__)
+        for k, v in state.items():
+            if type(v) not in SHARED_EXACT_TYPES:
+                state[k] = clone_state(v, memo)
+    else:
+        return value
+    return new
+
+def copy_bullets(bullets, memo):
+    """
+    Copy of a bullet list an attack names in snapshot_flat: one dict copy per bullet (a dict, or an
+    object's __dict__), with only the attributes its class lists in snapshot_copied copied further.
+    Dict bullets belong to their list alone, so only objects go through memo.
+    """
+    key = id(bullets)
+    if key in memo:
+        return memo[key]
+    new = memo[key] = []
+    append = new.append
+    for bullet in bullets:
+        if type(bullet) is dict:
+            append(bullet.copy())
+            continue
+        copy = memo.get(id(bullet))
+        if copy is None:
+            copy = memo[id(bullet)] = object.__new__(type(bullet))
+            state = copy.__dict__
+            state.update(bullet.__dict__)
+            for name in bullet.snapshot_copied:
+                state[name] = clone_state(state[name], memo)
+        append(copy)
+    return new
 
 class BaseAttack:
+    # Environment defaults, the attacks set their own state in __init__
+    reward = 0
+    action = None
+    step_dt = 1000 / 60
+    seed = None
+    # Rows in the observation's bullet table, extra bullets are left out
+    max_bullets = 64
+    observation = None
+    # Set to e.g. (84, 84) to have reset()/step() return get_pixel_observation() instead
+    pixel_size = None
+    pixel_margin = 60  # px of screen around the battle box that the pixels cover
+    pixel_surface = None
+    pixel_array = None
+    # Attributes snapshot() references instead of copying: constructor arguments, the pattern, the input
+    # source, observation buffers, the RNG (patterns are drawn in __init__, nothing uses it afterwards),
+    # and the party's idle animations and trail alphas, which are only read
+    snapshot_shared = frozenset(('init_args', 'pattern', 'rng', 'input_source', 'observation', 'pixel_size', 'pixel_margin', 'pixel_surface', 'pixel_array',
+                                 'fountain_scaled_frames', 'kris_idle_frames', 'susie_idle_frames', 'ralsei_idle_frames', 'trail_alphas'))
+    # Bullet lists snapshot() copies with copy_bullets() instead of clone_state(), they hold dicts of
+    # numbers and Surfaces, or objects whose class says which attributes need copying in snapshot_copied
+    snapshot_flat = frozenset()
+
+    def __new__(cls, *args, **kwargs):
+        # Remember the constructor arguments so reset() can rebuild the attack from scratch.
+        # Rects get copied because some attacks move the battle box they were given.
+        self = super().__new__(cls)
+        self.init_args = ([a.copy() if isinstance(a, pygame.Rect) else a for a in args], dict(kwargs))
+        return self
+
     def __init__(self):
         # Base variables used in many attacks, if any
         self.state = 'start'
@@ -16,18 +125,220 @@ class BaseAttack:
 
     def get_observation(self):
         """
-        Override this in each subclass.
-        Should return a dict, list, or tensor representing the current state.
+        Fixed-shape float32 arrays, written in place into buffers allocated on the first call:
+        'heart' is [x, y, lives, invincible], 'box' is [left, top, width, height] and 'bullets' has
+        max_bullets rows of [center x, center y, vx, vy, hitbox w, hitbox h, active] (velocities in
+        px per frame), zero padded. The same arrays come back every call, copy them to keep a frame.
         """
-        raise NotImplementedError("Each attack must implement its own observation logic.")
+        obs = self.observation
+        if obs is None:
+            obs = self.observation = {
+                'heart': np.zeros(4, dtype=np.float32),
+                'box': np.zeros(4, dtype=np.float32),
+                'bullets': np.zeros((self.max_bullets, 7), dtype=np.float32),
+            }
+        heart = obs['heart']
+        heart[0] = self.player_x
+        heart[1] = self.player_y
+        heart[2] = self.current_lives()
+        heart[3] = self.game_clock.get_ticks() < getattr(self, 'invincible_until', 0)
+        obs['box'][:] = self.battle_box_rect
+        bullets = obs['bullets']
+        n = 0
+        for row in self.iter_bullets():
+            if n >= self.max_bullets:
+                break
+            bullets[n] = row
+            n += 1
+        bullets[n:] = 0
+        return obs
 
-    def reset(self):
+    def iter_bullets(self):
         """
-        Reset to initial state if needed.
+        Override this in each subclass: yield (x, y, vx, vy, w, h, active) for every bullet and hitbox.
         """
-        self.state = 'start'
-        self.done = False
+        return iter(())
+
+    def iter_hazard_shapes(self):
+        """
+        Override this in attacks with hazards hit-tested per pixel: yield (Surface, rect) for each one
+        doing damage, whose iter_bullets() row is rect's center and size. Pixel observations draw their
+        opaque pixels instead of the whole rect.
+        """
+        return iter(())
+
+    def get_pixel_observation(self, size=None):
+        """
+        The battle box region drawn at low resolution into a reused (height, width, 3) uint8 array.
+        Only the box, the bullet hitboxes (white, grey while harmless) and the heart (red) are drawn,
+        straight from get_observation(), so none of draw_main_scene's full-screen pass runs.
+        Hazards from iter_hazard_shapes() are drawn by their shape instead of their bounds.
+        """
+        size = tuple(size or self.pixel_size or (84, 84))
+        if self.pixel_surface is None or self.pixel_surface.get_size() != size:
+            self.pixel_surface = pygame.Surface(size)
+            self.pixel_array = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        obs = self.get_observation()
+        surface = self.pixel_surface
+        # Screen px -> pixel observation px
+        left, top, width, height = obs['box'].tolist()
+        margin = self.pixel_margin
+        sx = size[0] / (width + 2 * margin)
+        sy = size[1] / (height + 2 * margin)
+        ox = left - margin
+        oy = top - margin
+        surface.fill((0, 0, 0))
+        pygame.draw.rect(surface, (0, 255, 0), (margin * sx, margin * sy, width * sx, height * sy), 1)
+        shaped = set()
+        for image, rect in self.iter_hazard_shapes():
+            shaped.add((rect.centerx, rect.centery, rect.width, rect.height))
+            # Shrunk to observation pixels first, so only the small copy is thresholded
+            small = pygame.transform.scale(image, (max(1, round(rect.width * sx)), max(1, round(rect.height * sy))))
+            shape = pygame.mask.from_surface(small, HIT_ALPHA).to_surface(setcolor=(255, 255, 255), unsetcolor=None)
+            surface.blit(shape, ((rect.left - ox) * sx, (rect.top - oy) * sy))
+        for x, y, vx, vy, w, h, active in obs['bullets'].tolist():
+            if w == 0:
+                break
+            if active and (x, y, w, h) in shaped:
+                continue
+            color = (255, 255, 255) if active else (96, 96, 96)
+            rect = pygame.Rect(0, 0, max(1, w * sx), max(1, h * sy))
+            rect.center = ((x - ox) * sx, (y - oy) * sy)
+            surface.fill(color, rect)
+        hx, hy = obs['heart'][:2].tolist()
+        heart = max(1, self.heart_size * sx)
+        surface.fill((255, 0, 0), ((hx - ox) * sx, (hy - oy) * sy, heart, heart))
+        pixels = pygame.surfarray.pixels3d(surface)
+        np.copyto(self.pixel_array, pixels.transpose(1, 0, 2))
+        del pixels  # unlock the surface
+        return self.pixel_array
+
+    def observe(self):
+        if self.pixel_size is not None:
+            return self.get_pixel_observation()
+        return self.get_observation()
+
+    def current_lives(self):
+        return self.player_lives
+
+    def set_action(self, action):
+        # None hands control back to the input source
+        if isinstance(action, int):
+            action = ACTIONS[action]
+        self.action = action
+
+    def get_keys(self):
+        """
+        Key state for the heart movement: the action from step() when one is set, otherwise the input source.
+        """
+        if self.action is None:
+            return self.input_source.get_keys(self)
+        return action_keys(self.action)
+
+    def pattern_key(self):
+        """
+        PATTERN_CACHE key: the seed plus everything else generate_pattern() reads (the battle box, the
+        screen size, counts), so attacks built with other geometry don't share a pattern.
+        """
+        return (type(self).__name__, self.seed)
+
+    def generate_pattern(self):
+        """
+        Override this in attacks with random choices: draw the whole bullet schedule from self.rng,
+        and extend pattern_key() with what it reads besides the rng.
+        Patterns are shared through PATTERN_CACHE, so they should only hold tuples and numbers.
+        """
+        return None
+
+    def get_pattern(self):
+        """
+        The attack's pattern for its seed, generated once per (attack, seed). Unseeded attacks always get a fresh one.
+        """
+        if self.seed is None:
+            return self.generate_pattern()
+        key = self.pattern_key()
+        if key not in PATTERN_CACHE:
+            PATTERN_CACHE[key] = self.generate_pattern()
+        return PATTERN_CACHE[key]
+
+    def snapshot_state(self, memo):
+        state = {}
+        shared = self.snapshot_shared
+        flat = self.snapshot_flat
+        for name, value in self.__dict__.items():
+            if type(value) in SHARED_EXACT_TYPES or name in shared:
+                state[name] = value
+            elif name in flat:
+                state[name] = copy_bullets(value, memo)
+            else:
+                state[name] = clone_state(value, memo)
+        return state
+
+    def snapshot(self):
+        """
+        Capture the attack's full state (timers, phase, bullets, heart, invincibility) for restore().
+        Surfaces and other assets are shared with the live attack, not copied.
+        """
+        clock_time = self.game_clock.time if isinstance(self.game_clock, VirtualClock) else None
+        return self.snapshot_state({id(self): self}), clock_time
+
+    def restore(self, snapshot):
+        """
+        Put the attack back to a snapshot(). The same snapshot can be restored any number of times.
+        """
+        state, clock_time = snapshot
+        memo = {id(self): self}
+        shared = self.snapshot_shared
+        flat = self.snapshot_flat
+        live = self.__dict__
+        live.clear()
+        for name, value in state.items():
+            if type(value) in SHARED_EXACT_TYPES or name in shared:
+                live[name] = value
+            elif name in flat:
+                live[name] = copy_bullets(value, memo)
+            else:
+                live[name] = clone_state(value, memo)
+        if clock_time is not None:
+            self.game_clock.time = clock_time
+
+    def reset(self, seed=None):
+        """
+        Rebuild the attack with its original constructor arguments and return the first observation.
+        A new seed replaces the one it was built with.
+        """
+        # Start every episode at the same virtual time so frame timings line up between runs
+        if isinstance(getattr(self, 'game_clock', None), VirtualClock):
+            self.game_clock.time = 0
+        args, kwargs = self.init_args
+        if seed is not None:
+            kwargs = dict(kwargs, seed=seed)
+        # Drop everything from the last episode, some attacks check hasattr() for state they set later.
+        # Observation settings and buffers are kept.
+        kept = {name: self.__dict__[name] for name in ('observation', 'pixel_size', 'pixel_margin', 'pixel_surface', 'pixel_array')
+                if name in self.__dict__}
+        self.__dict__.clear()
+        self.__dict__.update(kept)
+        self.init_args = (args, kwargs)
+        self.__init__(*[a.copy() if isinstance(a, pygame.Rect) else a for a in args], **kwargs)
         self.reward = 0
+        return self.observe()
+
+    def step(self, action, render=False):
+        """
+        Advance the attack one fixed frame with the given action and return (observation, reward, done).
+        The reward is minus the lives lost this frame. Nothing is drawn unless render=True.
+        """
+        lives_before = self.current_lives()
+        self.set_action(action)
+        self.update(self.step_dt)
+        if isinstance(self.game_clock, VirtualClock):
+            self.game_clock.advance(self.step_dt)
+        if render:
+            self.draw()
+            present(self.screen)
+        self.reward = self.current_lives() - lives_before
+        return self.observe(), self.reward, self.is_done()
 
     def is_done(self):
         return self.done
@@ -36,7 +347,9 @@ class BaseAttack:
         return self.reward
 
 # Move the triangle, star, and starchild attack logic from main() into a new class called Attack1
-class Attack1:
+class Attack1(BaseAttack):
+    max_bullets = 160  # 20 star bullets and their 120 starchilds
+    snapshot_flat = frozenset(('star_bullets', 'starchilds'))
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
     kris_idle_frames, kris_frame_idx, kris_rect,
     susie_idle_frames, susie_frame_idx, susie_rect,
@@ -52,8 +365,12 @@ class Attack1:
     ralsei_anim_speed, ralsei_frame_count,
     fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer,
     invincible_until, triangle_start_time, triangle_knight_img, triangle_knight_rect, 
-    knight_reverse_duration, knight_idle_img,starchild_scale=1.0):
+    knight_reverse_duration, knight_idle_img,starchild_scale=1.0, game_clock=None, seed=None, input_source=None):
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.fountain_scaled_frames = fountain_scaled_frames
         self.fountain_frame_idx = fountain_frame_idx
@@ -108,11 +425,11 @@ class Attack1:
         # Initialize attack state
         self.attack_phase = 'triangle'
         self.triangle_active = True
-        self.triangle_start_time = pygame.time.get_ticks()
-        self.triangle_knight_img = self.knight_point_img.copy()
+        self.triangle_start_time = self.game_clock.get_ticks()
+        self.triangle_knight_img = self.knight_point_img  # only blitted, so no copy (its faded trail copies stay cached with the shared one)
         self.triangle_knight_rect = self.knight_point_rect.copy()
         self.knight_point_trail.clear()
-        self.knight_point_trail.append((self.triangle_knight_img.copy(), self.triangle_knight_rect.copy()))
+        self.knight_point_trail.add(self.triangle_knight_img, self.triangle_knight_rect)
         self.knight_reverse_anim = False
         self.knight_reverse_start = 0
         self.knight_reverse_idx = 0
@@ -123,6 +440,20 @@ class Attack1:
         
         # Load assets
         self.load_assets()
+        self.pattern = self.get_pattern()
+
+    def pattern_key(self):
+        return super().pattern_key() + (self.num_star_bullets, self.screen_height)
+
+    def generate_pattern(self):
+        # Star bullets: (spawn_time, target_y, speed_factor), in spawn order
+        spawn_times = sorted([self.rng.uniform(0, 3000) for _ in range(self.num_star_bullets)])
+        stars = []
+        for st in spawn_times:
+            target_y = self.rng.uniform(-100, self.screen_height + 100)
+            speed_factor = self.rng.uniform(1, 1.75)
+            stars.append((st, target_y, speed_factor))
+        return {'stars': tuple(stars)}
         
     def load_assets(self):
         # Triangle effect setup
@@ -138,7 +469,7 @@ class Attack1:
         triangle_height = triangle_max_y - triangle_min_y
         
         # Create fill surface
-        flow0 = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_purple_star_flow', 'spr_knight_bullet_flow_0.png')).convert_alpha()
+        flow0 = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_purple_star_flow', 'spr_knight_bullet_flow_0.png')).copy()
         flow0.set_alpha(150)
         stretched_img = pygame.transform.smoothscale(flow0, (triangle_width, triangle_height))
         fill_surf = pygame.Surface((triangle_width, triangle_height), pygame.SRCALPHA)
@@ -148,34 +479,32 @@ class Attack1:
         pygame.draw.polygon(mask_surf, (255, 255, 255, 255), tri_points)
         fill_surf.blit(mask_surf, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
         self.triangle_fill_surf = fill_surf
+        self.triangle_fill_pos = (triangle_min_x, triangle_min_y)
+        self.triangle_tip = triangle_tip
+        self.triangle_elapsed = 0
         
         # Play sound
         sfx_path = os.path.join(self.base_dir, 'sprites', 'sound_effects', 'purple_blast.wav')
-        self.sfx = pygame.mixer.Sound(sfx_path)
+        self.sfx = ASSETS.sound(sfx_path)
         self.sfx.set_volume(1.0)
         self.sfx.play(fade_ms=0)
 
         # For moving bullet and sliding battle box
-        bullet1_img_orig = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_purple_star_flow', 'spr_knight_bullet_flow_1.png')).convert_alpha()
         bullet1_scale = 2.5
-        self.bullet1_img = pygame.transform.smoothscale(
-            bullet1_img_orig,
-            (int(bullet1_img_orig.get_width() * bullet1_scale), int(bullet1_img_orig.get_height() * bullet1_scale))
-        )
+        self.bullet1_img = ASSETS.load_scaled(os.path.join(self.base_dir, 'sprites', 'spr_knight_purple_star_flow', 'spr_knight_bullet_flow_1.png'), bullet1_scale).copy()
         self.bullet1_img.set_alpha(180)
         self.battle_box_slide_px = 90
         self.battle_box_slide_duration = 3000
         self.battle_box_slide_start = self.battle_box_rect.left
 
         # For star bullets
-        star_bullet_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_0.png')).convert_alpha()
-        star_bullet_img = pygame.transform.smoothscale(star_bullet_img, (int(star_bullet_img.get_width() * 1.5), int(star_bullet_img.get_height() * 1.5)))
+        star_bullet_img = ASSETS.load_scaled(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_0.png'), 1.5)
         self.star_bullets = []
         self.star_bullets_spawned = False
         self.star_bullet_base_speed = 700
         self.star_bullet_duration = 3000
         self.num_star_bullets = 20
-        self.star_attack_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'star_attack.wav'))
+        self.star_attack_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'star_attack.wav'))
 
         # Add a phase for star bullet reversal
         self.star_reverse_duration = 1000
@@ -183,18 +512,17 @@ class Attack1:
 
         # Load star bullet animation frames
         self.star_bullet_img_0 = star_bullet_img
-        self.star_bullet_img_1 = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_1.png')).convert_alpha()
-        self.star_bullet_img_1 = pygame.transform.smoothscale(self.star_bullet_img_1, (int(self.star_bullet_img_1.get_width() * 1.5), int(self.star_bullet_img_1.get_height() * 1.5)))
-        self.star_bullet_img_2 = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_2.png')).convert_alpha()
-        self.star_bullet_img_2 = pygame.transform.smoothscale(self.star_bullet_img_2, (int(self.star_bullet_img_2.get_width() * 1.5), int(self.star_bullet_img_2.get_height() * 1.5)))
-        self.star_bullet_img_3 = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_3.png')).convert_alpha()
-        self.star_bullet_img_3 = pygame.transform.smoothscale(self.star_bullet_img_3, (int(self.star_bullet_img_3.get_width() * 2), int(self.star_bullet_img_3.get_height() * 2)))
+        self.star_bullet_img_1 = ASSETS.load_scaled(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_1.png'), 1.5)
+        self.star_bullet_img_2 = ASSETS.load_scaled(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_2.png'), 1.5)
+        self.star_bullet_img_3 = ASSETS.load_scaled(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_3.png'), 2)
         
         # Load starchild projectiles (up and down) with scale
-        starchild_img_up = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_starchild', 'spr_knight_starchild_up.png')).convert_alpha()
-        starchild_img_up = pygame.transform.smoothscale(starchild_img_up, (int(starchild_img_up.get_width() * 1.2 * self.starchild_scale), int(starchild_img_up.get_height() * 1.2 * self.starchild_scale)))
-        starchild_img_down = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_starchild', 'spr_knight_starchild_down.png')).convert_alpha()
-        starchild_img_down = pygame.transform.smoothscale(starchild_img_down, (int(starchild_img_down.get_width() * 1.2 * self.starchild_scale), int(starchild_img_down.get_height() * 1.2 * self.starchild_scale)))
+        starchild_up_path = os.path.join(self.base_dir, 'sprites', 'spr_knight_starchild', 'spr_knight_starchild_up.png')
+        starchild_down_path = os.path.join(self.base_dir, 'sprites', 'spr_knight_starchild', 'spr_knight_starchild_down.png')
+        w, h = ASSETS.image_size(starchild_up_path)
+        starchild_img_up = ASSETS.load(starchild_up_path, (int(w * 1.2 * self.starchild_scale), int(h * 1.2 * self.starchild_scale)))
+        w, h = ASSETS.image_size(starchild_down_path)
+        starchild_img_down = ASSETS.load(starchild_down_path, (int(w * 1.2 * self.starchild_scale), int(h * 1.2 * self.starchild_scale)))
         self.starchild_img_up = starchild_img_up
         self.starchild_img_down = starchild_img_down
         self.starchilds = []
@@ -207,425 +535,23 @@ class Attack1:
         self.starchilds_pending_explosion = False
         self.starchilds_exploded = False
         self.starchilds_display_start = None
+        self.starchild_rotated = {}
+        self.star_bullet_start_time = 0
+        self.invincible = False
         
         self.screen_rect = self.screen.get_rect()
 
-    def run(self):
-        global knight_trail, trail_length, trail_alphas
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                    running = False
-
-            # Draw background
-            bg_img_scaled = pygame.transform.scale(self.bg_img, (self.screen.get_width(), self.screen.get_height()))
-            self.screen.blit(bg_img_scaled, (0, 0))
-
-            # Draw Kris's idle animation (define kris_rect first)
-            kris_img = self.kris_idle_frames[self.kris_frame_idx]
-            kris_rect = kris_img.get_rect()
-            kris_rect.left = 350  # 350px from left
-            kris_rect.centery = self.screen_height // 2 - 100  
-            self.screen.blit(kris_img, kris_rect)
-
-            # Draw fountain animation (cycling 4 frames), now kris_rect is defined
-            fountain_img = self.fountain_scaled_frames[self.fountain_frame_idx]
-            fountain_rect = fountain_img.get_rect()
-            fountain_rect.left = kris_rect.left + kris_rect.width + 100  # 100px to the right of Kris
-            fountain_rect.top = 0  # top of the screen
-            # Adjust height so bottom is 100px above Kris
-            desired_bottom = kris_rect.centery - kris_rect.height // 2 - 100
-            if fountain_rect.height > desired_bottom:
-                # Crop the bottom if needed
-                crop_height = desired_bottom
-                cropped_img = pygame.Surface((fountain_rect.width, crop_height), pygame.SRCALPHA)
-                cropped_img.blit(fountain_img, (0, 0), (0, 0, fountain_rect.width, crop_height))
-                fountain_img = cropped_img
-                fountain_rect = fountain_img.get_rect()
-                fountain_rect.left = kris_rect.left + kris_rect.width + 100
-                fountain_rect.top = 0
-            self.screen.blit(fountain_img, fountain_rect)
-
-            # Draw Susie's idle animation
-            susie_img = self.susie_idle_frames[self.susie_frame_idx]
-            susie_rect = susie_img.get_rect()
-            susie_rect.left = kris_rect.left - 120
-            susie_rect.centery = kris_rect.centery + 100  # 100px below Kris
-            self.screen.blit(susie_img, susie_rect)
-
-            # Draw Ralsei's idle animation
-            ralsei_img = self.ralsei_idle_frames[self.ralsei_frame_idx]
-            ralsei_rect = ralsei_img.get_rect()
-            ralsei_rect.left = susie_rect.left - 10  # 30px to the left of Susie
-            ralsei_rect.centery = susie_rect.centery + 100  # 100px below Susie
-            self.screen.blit(ralsei_img, ralsei_rect)
-
-            # Draw battle box (black square with green border)
-            pygame.draw.rect(self.screen, self.battle_box_color, self.battle_box_rect)
-            pygame.draw.rect(self.screen, self.battle_box_border_color, self.battle_box_rect, self.battle_box_border)
-
-            # Handle player movement
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
-                self.player_x -= self.player_speed
-            if keys[pygame.K_RIGHT]:
-                self.player_x += self.player_speed
-            if keys[pygame.K_UP]:
-                self.player_y -= self.player_speed
-            if keys[pygame.K_DOWN]:
-                self.player_y += self.player_speed
-            # Clamp player position to inside the battle box
-            playable_rect = self.battle_box_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
-            self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
-            self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
-
-            # Collision detection for star bullets and starchilds
-            player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-            player_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
-            hit_this_frame = False
-            # Star bullets (during triangle, reverse, star_reverse)
-            if self.attack_phase in ('triangle', 'reverse', 'star_reverse'):
-                for bullet in self.star_bullets:
-                    if bullet.get('x') is not None and bullet.get('y') is not None:
-                        r = self.star_bullet_img_0.get_width() // 3
-                        dx = bullet['x'] - player_center[0]
-                        dy = bullet['y'] - player_center[1]
-                        if dx * dx + dy * dy < r * r:
-                            hit_this_frame = True
-                            break
-            # Starchilds (after explosion)
-            for sc in self.starchilds:
-                if pygame.time.get_ticks() >= sc['spawn_time']:
-                    sc['x'] += sc['vx'] / 60.0
-                    sc['y'] += sc['vy'] / 60.0
-                    # Select the correct image and rotation
-                    if sc['img'] == 'up':
-                        base_img = self.starchild_img_up
-                    else:
-                        base_img = self.starchild_img_down
-                    rotated_img = pygame.transform.rotate(base_img, sc['angle'])
-                    rect = rotated_img.get_rect(center=(int(sc['x']), int(sc['y'])))
-                    if self.screen_rect.colliderect(rect):
-                        self.screen.blit(rotated_img, rect)
-                    # Use full rect for hitbox
-                    if rect.collidepoint(player_center):
-                        hit_this_frame = True
-                        break
-            # Invincibility logic
-            if pygame.time.get_ticks() < self.invincible_until:
-                invincible = True
-            else:
-                invincible = False
-            if hit_this_frame and not invincible:
-                self.player_lives = max(0, self.player_lives - 1)
-                self.invincible_until = pygame.time.get_ticks() + 1000  # 1 second invincibility
-                invincible = True
-
-            # Draw lives counter
-            lives_surf = self.font.render(f"LIVES: {self.player_lives}", True, (255, 255, 255))
-            self.screen.blit(lives_surf, (50, 50))
-
-            # Draw player heart (flashing if invincible)
-            if invincible:
-                # Alternate every 100ms
-                if ((pygame.time.get_ticks() // 100) % 2) == 0:
-                    heart_draw_img = self.heart_img_0
-                else:
-                    heart_draw_img = self.heart_img_1
-            else:
-                heart_draw_img = self.heart_img_0
-            self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
-
-            # Draw the Knight and its trail depending on attack_phase
-            if self.attack_phase == 'triangle':
-                now = pygame.time.get_ticks()
-                elapsed = now - self.triangle_start_time
-                # Slide the battle box left over 3 seconds
-                slide_offset = int(self.battle_box_slide_px * min(elapsed / self.battle_box_slide_duration, 1.0))
-                self.battle_box_rect.left = self.battle_box_slide_start - slide_offset
-                # Redraw the triangle points and fill to match the new box position
-                # Do NOT move the Knight with the battle box
-                # triangle_knight_rect.left and centery remain fixed
-                triangle_tip = (self.triangle_knight_rect.left, self.triangle_knight_rect.centery)
-                triangle_bottom = (0, self.screen_height)
-                triangle_top = (0, -50)
-                triangle_points = [triangle_tip, triangle_bottom, triangle_top]
-                xs = [p[0] for p in triangle_points]
-                ys = [p[1] for p in triangle_points]
-                triangle_min_x, triangle_max_x = min(xs), max(xs)
-                triangle_min_y, triangle_max_y = min(ys), max(ys)
-                triangle_width = triangle_max_x - triangle_min_x
-                triangle_height = triangle_max_y - triangle_min_y
-                # Recreate fill surface for the triangle
-                flow0 = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_purple_star_flow', 'spr_knight_bullet_flow_0.png')).convert_alpha()
-                flow0.set_alpha(150)
-                stretched_img = pygame.transform.smoothscale(flow0, (triangle_width, triangle_height))
-                fill_surf = pygame.Surface((triangle_width, triangle_height), pygame.SRCALPHA)
-                fill_surf.blit(stretched_img, (0, 0))
-                mask_surf = pygame.Surface((triangle_width, triangle_height), pygame.SRCALPHA)
-                tri_points = [(x - triangle_min_x, y - triangle_min_y) for (x, y) in triangle_points]
-                pygame.draw.polygon(mask_surf, (255, 255, 255, 255), tri_points)
-                fill_surf.blit(mask_surf, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-                self.triangle_fill_surf = fill_surf
-                # Draw the filled triangle
-                self.screen.blit(self.triangle_fill_surf, (triangle_min_x, triangle_min_y))
-                # Animate bullet1 starting 10px to the left of the Knight's tip and moving left at 2x speed
-                bullet1_start_x = triangle_tip[0] - self.bullet1_img.get_width() // 2 - 10
-                bullet1_end_x = -self.bullet1_img.get_width()  # Move out of bounds to the left
-                bullet1_progress = min(elapsed / 1500, 1.0)  # 1.5 seconds for 2x speed
-                bullet1_x = int(bullet1_start_x + (bullet1_end_x - bullet1_start_x) * bullet1_progress)
-                # Place bullet lower, closer to the vertical center of the triangle (e.g., 0.55 from tip to bottom)
-                bullet1_y = int(triangle_tip[1] + (triangle_bottom[1] - triangle_tip[1]) * 0.55)
-                self.screen.blit(self.bullet1_img, (bullet1_x, bullet1_y - self.bullet1_img.get_height() // 2))
-
-                # Spawn star bullets with random delays and play sound for each
-                if not self.star_bullets_spawned:
-                    self.star_bullets.clear()
-                    spawn_times = sorted([random.uniform(0, 3000) for _ in range(self.num_star_bullets)])
-                    for st in spawn_times:
-                        target_x = -50
-                        target_y = random.uniform(-100, self.screen_height + 100)
-                        dx = target_x - triangle_tip[0]
-                        dy = target_y - triangle_tip[1]
-                        speed_factor = random.uniform(1, 1.75)
-                        duration = self.star_bullet_duration / 1000.0 / speed_factor
-                        vx = dx / duration
-                        vy = dy / duration
-                        self.star_bullets.append({'x': triangle_tip[0], 'y': triangle_tip[1], 'vx': vx, 'vy': vy, 'spawn_time': st, 'active': False})
-                    self.star_bullets_spawned = True
-                    star_bullet_start_time = now
-                # Update and draw star bullets
-                for bullet in self.star_bullets:
-                    t = now - star_bullet_start_time
-                    if not bullet['active'] and t >= bullet['spawn_time']:
-                        bullet['active'] = True
-                        # Play sound for each star spawn
-                        self.star_attack_sfx.play()
-                        bullet['start_x'] = triangle_tip[0]
-                        bullet['start_y'] = triangle_tip[1]
-                    if bullet['active']:
-                        dt = t - bullet['spawn_time']
-                        if dt < self.star_bullet_duration:
-                            bullet['x'] = bullet['start_x'] + bullet['vx'] * (dt / 1000.0)
-                            bullet['y'] = bullet['start_y'] + bullet['vy'] * (dt / 1000.0)
-                            # Only draw the default star bullet sprite during the forward phase
-                            self.screen.blit(self.star_bullet_img_0, (int(bullet['x'] - self.star_bullet_img_0.get_width() // 2), int(bullet['y'] - self.star_bullet_img_0.get_height() // 2)))
-                # Update and draw the trail for the pointing Knight
-                self.knight_point_trail.insert(0, (self.triangle_knight_img.copy(), self.triangle_knight_rect.copy()))
-                if len(self.knight_point_trail) > trail_length:
-                    self.knight_point_trail.pop()
-                for i, (img, rect) in enumerate(reversed(self.knight_point_trail)):
-                    img = img.copy()
-                    img.set_alpha(trail_alphas[i])
-                    rect = rect.copy()
-                    rect.left += 40 + i * 10
-                    self.screen.blit(img, rect)
-                # Draw the Knight sprite (pointing frame)
-                self.screen.blit(self.triangle_knight_img, self.triangle_knight_rect)
-                if elapsed > 3000:  # 3 seconds for triangle phase
-                    self.attack_phase = 'reverse'
-                    self.knight_reverse_start = pygame.time.get_ticks()
-                    self.knight_reverse_frames = list(reversed(self.knight_point_frames))
-                    self.knight_reverse_idx = 0
-                    # Prepare for star reversal
-                    for bullet in self.star_bullets:
-                        bullet['orig_vx'] = bullet['vx']
-                        bullet['orig_vy'] = bullet['vy']
-                        bullet['reverse_x'] = bullet['x']
-                        bullet['reverse_y'] = bullet['y']
-                    self.star_reverse_start = 0
-            elif self.attack_phase == 'reverse':
-                now = pygame.time.get_ticks()
-                reverse_elapsed = now - self.knight_reverse_start
-                frame_time = self.knight_reverse_duration / max(1, len(self.knight_reverse_frames))
-                self.knight_reverse_idx = min(int(reverse_elapsed // frame_time), len(self.knight_reverse_frames) - 1)
-                knight_img = self.knight_reverse_frames[self.knight_reverse_idx]
-                knight_rect = knight_img.get_rect()
-                knight_rect.left = self.triangle_knight_rect.left
-                knight_rect.centery = self.triangle_knight_rect.centery
-                # Update and draw the trail for the reverse animation
-                self.knight_point_trail.insert(0, (knight_img.copy(), knight_rect.copy()))
-                if len(self.knight_point_trail) > trail_length:
-                    self.knight_point_trail.pop()
-                for i, (img, rect) in enumerate(reversed(self.knight_point_trail)):
-                    img = img.copy()
-                    img.set_alpha(trail_alphas[i])
-                    rect = rect.copy()
-                    rect.left += 40 + i * 10
-                    self.screen.blit(img, rect)
-                self.screen.blit(knight_img, knight_rect)
-                # Draw the star bullets at their last position from the triangle phase
-                for bullet in self.star_bullets:
-                    if bullet.get('x') is not None and bullet.get('y') is not None:
-                        # Only draw the default star bullet sprite during the reverse phase
-                        self.screen.blit(self.star_bullet_img_0, (int(bullet['x'] - self.star_bullet_img_0.get_width() // 2), int(bullet['y'] - self.star_bullet_img_0.get_height() // 2)))
-                if self.knight_reverse_idx == len(self.knight_reverse_frames) - 1:
-                    self.attack_phase = 'star_reverse'
-                    self.star_reverse_start = pygame.time.get_ticks()
-                    for bullet in self.star_bullets:
-                        bullet['vx'] = -bullet['orig_vx']
-                        bullet['vy'] = -bullet['orig_vy']
-                        bullet['x'] = bullet['reverse_x']
-                        bullet['y'] = bullet['reverse_y']
-                        bullet['spawn_time'] = self.star_reverse_start
-                    self.knight_idle_timer = pygame.time.get_ticks()
-            elif self.attack_phase == 'star_reverse':
-                now = pygame.time.get_ticks()
-                reverse_elapsed = now - self.star_reverse_start
-                for bullet in self.star_bullets:
-                    if bullet.get('vx') is not None:
-                        # Use reverse_elapsed for all bullets in this phase
-                        dt = min(reverse_elapsed, self.star_reverse_duration)
-                        bullet['x'] = bullet['reverse_x'] + bullet['vx'] * (dt / 1000.0)
-                        bullet['y'] = bullet['reverse_y'] + bullet['vy'] * (dt / 1000.0)
-                        # Animate star bullet: 0 -> 1 -> 2 only during the backward phase
-                        star_anim_img = self.star_bullet_img_0
-                        if dt > self.star_reverse_duration * 0.33:
-                            star_anim_img = self.star_bullet_img_1
-                        if dt > self.star_reverse_duration * 0.66:
-                            star_anim_img = self.star_bullet_img_2
-                        if dt > self.star_reverse_duration * 0.9:
-                            star_anim_img = self.star_bullet_img_3
-                        self.screen.blit(star_anim_img, (int(bullet['x'] - star_anim_img.get_width() // 2), int(bullet['y'] - star_anim_img.get_height() // 2)))
-                # Draw starchilds
-                for sc in self.starchilds:
-                    if now >= sc['spawn_time']:
-                        sc['x'] += sc['vx'] / 60.0
-                        sc['y'] += sc['vy'] / 60.0
-                        # Select the correct image and rotation
-                        if sc['img'] == 'up':
-                            base_img = self.starchild_img_up
-                        else:
-                            base_img = self.starchild_img_down
-                        rotated_img = pygame.transform.rotate(base_img, sc['angle'])
-                        rect = rotated_img.get_rect(center=(int(sc['x']), int(sc['y'])))
-                        if self.screen_rect.colliderect(rect):
-                            self.screen.blit(rotated_img, rect)
-                        # Use full rect for hitbox
-                        if rect.collidepoint(player_center):
-                            hit_this_frame = True
-                            break
-                if reverse_elapsed >= self.star_reverse_duration and not self.starchilds_exploded:
-                    # Only trigger starchild explosion once, after both phases are done
-                    for bullet in self.star_bullets:
-                        if not bullet.get('exploded'):
-                            bullet['exploded'] = True
-                            scx, scy = bullet['x'], bullet['y']
-                            now_spawn = now
-                            # Early group: up, down-right (down -45°), down-left (down +45°)
-                            # up
-                            self.starchilds.append({'x': scx, 'y': scy, 'vx': 0, 'vy': -self.starchild_speed, 'spawn_time': now_spawn + self.starchild_delay_early, 'img': 'up', 'angle': 0})
-                            # down-right
-                            angle = 45
-                            vx = self.starchild_speed * math.sin(math.radians(45))
-                            vy = self.starchild_speed * math.cos(math.radians(45))
-                            self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_early, 'img': 'down', 'angle': angle})
-                            # down-left
-                            angle = -45
-                            vx = -self.starchild_speed * math.sin(math.radians(45))
-                            vy = self.starchild_speed * math.cos(math.radians(45))
-                            self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_early, 'img': 'down', 'angle': angle})
-                            # Late group: down, up-right (up +45°), up-left (up -45°)
-                            # down
-                            self.starchilds.append({'x': scx, 'y': scy, 'vx': 0, 'vy': self.starchild_speed, 'spawn_time': now_spawn + self.starchild_delay_late, 'img': 'down', 'angle': 0})
-                            # up-right
-                            angle = -45
-                            vx = self.starchild_speed * math.sin(math.radians(45))
-                            vy = -self.starchild_speed * math.cos(math.radians(45))
-                            self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_late, 'img': 'up', 'angle': angle})
-                            # up-left
-                            angle = 45
-                            vx = -self.starchild_speed * math.sin(math.radians(45))
-                            vy = -self.starchild_speed * math.cos(math.radians(45))
-                            self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_late, 'img': 'up', 'angle': angle})
-                    self.starchilds_exploded = True
-                    self.star_bullets.clear()
-                    self.starchilds_display_start = now
-                # After explosion, display starchilds for 1 second before switching to idle
-                if self.starchilds_exploded and self.starchilds_display_start is not None:
-                    if now - self.starchilds_display_start > 1500:
-                        # Clear starchilds before switching to idle, before any drawing
-                        self.starchilds.clear()
-                        self.attack_phase = 'idle'
-            elif self.attack_phase == 'idle':
-                self.knight_idle_allowed = True
-                if not self.idle_redraw_once:
-                    draw_main_scene(
-                        self.screen, self.bg_img, self.fountain_scaled_frames, self.fountain_frame_idx,
-                        self.kris_idle_frames, self.kris_frame_idx, self.kris_rect,
-                        self.susie_idle_frames, self.susie_frame_idx, self.susie_rect,
-                        self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
-                        self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
-                        self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, False
-                    )
-                    pygame.display.flip()
-                    self.idle_redraw_once = True
-                if self.knight_idle_allowed:
-                    # Only draw the idle Knight and its trail if attack_phase == 'idle'
-                    float_offset = int(20 * math.sin(pygame.time.get_ticks() / 267))
-                    knight_idle_rect = self.knight_idle_img.get_rect()
-                    knight_idle_rect.centery = self.kris_rect.centery + 20  # 20px lower than Kris
-                    knight_idle_rect.left = self.battle_box_rect.right + 40
-                    knight_idle_rect.top += float_offset
-                    trail_img = self.knight_idle_img.copy()
-                    trail_img.set_alpha(50)  # Adjust for desired faintness
-                    trail_rect = knight_idle_rect.copy()
-                    trail_rect.left += 40  # Adjust offset as desired
-                    self.screen.blit(trail_img, trail_rect)
-
-                    # Insert the current state at the start of the trail
-                    knight_trail.insert(0, (self.knight_idle_img.copy(), knight_idle_rect.copy()))
-                    if len(knight_trail) > trail_length:
-                        knight_trail.pop()
-
-                    # Draw the trail (oldest last, most faded)
-                    for i, (img, rect) in enumerate(reversed(knight_trail)):
-                        img = img.copy()
-                        img.set_alpha(trail_alphas[i])
-                        rect = rect.copy()
-                        rect.left += 40 + i * 10  # Each copy further to the right for a wave effect
-                        self.screen.blit(img, rect)
-                    # Draw the main Knight sprite LAST
-                    self.screen.blit(self.knight_idle_img, knight_idle_rect)
-
-            pygame.display.flip()
-
-            # Advance fountain frame
-            self.fountain_anim_timer += 1
-            if self.fountain_anim_timer >= self.fountain_anim_speed:
-                self.fountain_frame_idx = (self.fountain_frame_idx + 1) % self.fountain_frame_count
-                self.fountain_anim_timer = 0
-
-            # Advance Kris idle frame
-            self.kris_anim_timer += 1
-            if self.kris_anim_timer >= self.kris_anim_speed:
-                self.kris_frame_idx = (self.kris_frame_idx + 1) % self.kris_frame_count
-                self.kris_anim_timer = 0
-
-            # Advance Susie idle frame
-            self.susie_anim_timer += 1
-            if self.susie_anim_timer >= self.susie_anim_speed:
-                self.susie_frame_idx = (self.susie_frame_idx + 1) % self.susie_frame_count
-                self.susie_anim_timer = 0
-
-            # Advance Ralsei idle frame
-            self.ralsei_anim_timer += 1
-            if self.ralsei_anim_timer >= self.ralsei_anim_speed:
-                self.ralsei_frame_idx = (self.ralsei_frame_idx + 1) % self.ralsei_frame_count
-                self.ralsei_anim_timer = 0
-
-            self.clock.tick(60)  # 60 FPS
-
-            # If the attack phase is 'idle' and the idle redraw has happened, end the loop
-            if self.attack_phase == 'idle' and self.idle_redraw_once:
-                running = False
-
-    def update(self, dt, total_time, keys):
-        now = total_time * 1000  # convert to milliseconds
-        self.time_ms = now
+    def get_starchild_img(self, sc):
+        # Starchilds only ever use a few angles, so rotate each sprite once and reuse it
+        key = (sc['img'], sc['angle'])
+        if key not in self.starchild_rotated:
+            base_img = self.starchild_img_up if sc['img'] == 'up' else self.starchild_img_down
+            self.starchild_rotated[key] = pygame.transform.rotate(base_img, sc['angle'])
+        return self.starchild_rotated[key]
 
+    def update(self, dt):
         # Handle player movement
+        keys = self.get_keys()
         if keys[pygame.K_LEFT]:
             self.player_x -= self.player_speed
         if keys[pygame.K_RIGHT]:
@@ -634,15 +560,15 @@ class Attack1:
             self.player_y -= self.player_speed
         if keys[pygame.K_DOWN]:
             self.player_y += self.player_speed
-
-        # Clamp player inside battle box
+        # Clamp player position to inside the battle box
         playable_rect = self.battle_box_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
         self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
         self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
 
+        # Collision detection for star bullets and starchilds
         player_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
         hit_this_frame = False
-
+        # Star bullets (during triangle, reverse, star_reverse)
         if self.attack_phase in ('triangle', 'reverse', 'star_reverse'):
             for bullet in self.star_bullets:
                 if bullet.get('x') is not None and bullet.get('y') is not None:
@@ -652,145 +578,351 @@ class Attack1:
                     if dx * dx + dy * dy < r * r:
                         hit_this_frame = True
                         break
-
+        # Starchilds (after explosion)
         for sc in self.starchilds:
-            if now >= sc['spawn_time']:
-                sc['x'] += sc['vx'] * dt
-                sc['y'] += sc['vy'] * dt
-                rect = pygame.Rect(sc['x'], sc['y'], 1, 1)
+            if self.game_clock.get_ticks() >= sc['spawn_time']:
+                sc['x'] += sc['vx'] / 60.0
+                sc['y'] += sc['vy'] / 60.0
+                # Use full rect for hitbox
+                rect = self.get_starchild_img(sc).get_rect(center=(int(sc['x']), int(sc['y'])))
                 if rect.collidepoint(player_center):
                     hit_this_frame = True
                     break
-
-        if now < self.invincible_until:
-            invincible = True
-        else:
-            invincible = False
-
-        if hit_this_frame and not invincible:
+        # Invincibility logic
+        self.invincible = self.game_clock.get_ticks() < self.invincible_until
+        if hit_this_frame and not self.invincible:
             self.player_lives = max(0, self.player_lives - 1)
-            self.invincible_until = now + 1000
-
-        # Update animation timers
+            self.invincible_until = self.game_clock.get_ticks() + 1000  # 1 second invincibility
+            self.invincible = True
+
+        if self.attack_phase == 'triangle':
+            now = self.game_clock.get_ticks()
+            elapsed = now - self.triangle_start_time
+            self.triangle_elapsed = elapsed
+            # Slide the battle box left over 3 seconds
+            # Do NOT move the Knight with the battle box
+            slide_offset = int(self.battle_box_slide_px * min(elapsed / self.battle_box_slide_duration, 1.0))
+            self.battle_box_rect.left = self.battle_box_slide_start - slide_offset
+            triangle_tip = self.triangle_tip
+            # Spawn star bullets with random delays and play sound for each
+            if not self.star_bullets_spawned:
+                self.star_bullets.clear()
+                for st, target_y, speed_factor in self.pattern['stars']:
+                    target_x = -50
+                    dx = target_x - triangle_tip[0]
+                    dy = target_y - triangle_tip[1]
+                    duration = self.star_bullet_duration / 1000.0 / speed_factor
+                    vx = dx / duration
+                    vy = dy / duration
+                    self.star_bullets.append({'x': triangle_tip[0], 'y': triangle_tip[1], 'vx': vx, 'vy': vy, 'spawn_time': st, 'active': False})
+                self.star_bullets_spawned = True
+                self.star_bullet_start_time = now
+            # Update star bullets
+            for bullet in self.star_bullets:
+                t = now - self.star_bullet_start_time
+                if not bullet['active'] and t >= bullet['spawn_time']:
+                    bullet['active'] = True
+                    # Play sound for each star spawn
+                    self.star_attack_sfx.play()
+                    bullet['start_x'] = triangle_tip[0]
+                    bullet['start_y'] = triangle_tip[1]
+                if bullet['active']:
+                    bullet_dt = t - bullet['spawn_time']
+                    if bullet_dt < self.star_bullet_duration:
+                        bullet['x'] = bullet['start_x'] + bullet['vx'] * (bullet_dt / 1000.0)
+                        bullet['y'] = bullet['start_y'] + bullet['vy'] * (bullet_dt / 1000.0)
+            if elapsed > 3000:  # 3 seconds for triangle phase
+                self.attack_phase = 'reverse'
+                self.knight_reverse_start = self.game_clock.get_ticks()
+                self.knight_reverse_frames = list(reversed(self.knight_point_frames))
+                self.knight_reverse_idx = 0
+                # Prepare for star reversal
+                for bullet in self.star_bullets:
+                    bullet['orig_vx'] = bullet['vx']
+                    bullet['orig_vy'] = bullet['vy']
+                    bullet['reverse_x'] = bullet['x']
+                    bullet['reverse_y'] = bullet['y']
+                self.star_reverse_start = 0
+        elif self.attack_phase == 'reverse':
+            now = self.game_clock.get_ticks()
+            reverse_elapsed = now - self.knight_reverse_start
+            frame_time = self.knight_reverse_duration / max(1, len(self.knight_reverse_frames))
+            self.knight_reverse_idx = min(int(reverse_elapsed // frame_time), len(self.knight_reverse_frames) - 1)
+            if self.knight_reverse_idx == len(self.knight_reverse_frames) - 1:
+                self.attack_phase = 'star_reverse'
+                self.star_reverse_start = self.game_clock.get_ticks()
+                for bullet in self.star_bullets:
+                    bullet['vx'] = -bullet['orig_vx']
+                    bullet['vy'] = -bullet['orig_vy']
+                    bullet['x'] = bullet['reverse_x']
+                    bullet['y'] = bullet['reverse_y']
+                    bullet['spawn_time'] = self.star_reverse_start
+                self.knight_idle_timer = self.game_clock.get_ticks()
+        elif self.attack_phase == 'star_reverse':
+            now = self.game_clock.get_ticks()
+            reverse_elapsed = now - self.star_reverse_start
+            for bullet in self.star_bullets:
+                if bullet.get('vx') is not None:
+                    # Use reverse_elapsed for all bullets in this phase
+                    bullet_dt = min(reverse_elapsed, self.star_reverse_duration)
+                    bullet['x'] = bullet['reverse_x'] + bullet['vx'] * (bullet_dt / 1000.0)
+                    bullet['y'] = bullet['reverse_y'] + bullet['vy'] * (bullet_dt / 1000.0)
+                    # Animate star bullet: 0 -> 1 -> 2 only during the backward phase
+                    star_anim_img = self.star_bullet_img_0
+                    if bullet_dt > self.star_reverse_duration * 0.33:
+                        star_anim_img = self.star_bullet_img_1
+                    if bullet_dt > self.star_reverse_duration * 0.66:
+                        star_anim_img = self.star_bullet_img_2
+                    if bullet_dt > self.star_reverse_duration * 0.9:
+                        star_anim_img = self.star_bullet_img_3
+                    bullet['img'] = star_anim_img
+            # Move starchilds
+            for sc in self.starchilds:
+                if now >= sc['spawn_time']:
+                    sc['x'] += sc['vx'] / 60.0
+                    sc['y'] += sc['vy'] / 60.0
+            if reverse_elapsed >= self.star_reverse_duration and not self.starchilds_exploded:
+                # Only trigger starchild explosion once, after both phases are done
+                for bullet in self.star_bullets:
+                    if not bullet.get('exploded'):
+                        bullet['exploded'] = True
+                        scx, scy = bullet['x'], bullet['y']
+                        now_spawn = now
+                        # Early group: up, down-right (down -45°), down-left (down +45°)
+                        # up
+                        self.starchilds.append({'x': scx, 'y': scy, 'vx': 0, 'vy': -self.starchild_speed, 'spawn_time': now_spawn + self.starchild_delay_early, 'img': 'up', 'angle': 0})
+                        # down-right
+                        angle = 45
+                        vx = self.starchild_speed * math.sin(math.radians(45))
+                        vy = self.starchild_speed * math.cos(math.radians(45))
+                        self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_early, 'img': 'down', 'angle': angle})
+                        # down-left
+                        angle = -45
+                        vx = -self.starchild_speed * math.sin(math.radians(45))
+                        vy = self.starchild_speed * math.cos(math.radians(45))
+                        self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_early, 'img': 'down', 'angle': angle})
+                        # Late group: down, up-right (up +45°), up-left (up -45°)
+                        # down
+                        self.starchilds.append({'x': scx, 'y': scy, 'vx': 0, 'vy': self.starchild_speed, 'spawn_time': now_spawn + self.starchild_delay_late, 'img': 'down', 'angle': 0})
+                        # up-right
+                        angle = -45
+                        vx = self.starchild_speed * math.sin(math.radians(45))
+                        vy = -self.starchild_speed * math.cos(math.radians(45))
+                        self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_late, 'img': 'up', 'angle': angle})
+                        # up-left
+                        angle = 45
+                        vx = -self.starchild_speed * math.sin(math.radians(45))
+                        vy = -self.starchild_speed * math.cos(math.radians(45))
+                        self.starchilds.append({'x': scx, 'y': scy, 'vx': vx, 'vy': vy, 'spawn_time': now_spawn + self.starchild_delay_late, 'img': 'up', 'angle': angle})
+                self.starchilds_exploded = True
+                self.star_bullets.clear()
+                self.starchilds_display_start = now
+            # After explosion, display starchilds for 1 second before switching to idle
+            if self.starchilds_exploded and self.starchilds_display_start is not None:
+                if now - self.starchilds_display_start > 1500:
+                    # Clear starchilds before switching to idle, before any drawing
+                    self.starchilds.clear()
+                    self.attack_phase = 'idle'
+                    self.knight_idle_allowed = True
+
+        # Advance fountain frame
         self.fountain_anim_timer += 1
         if self.fountain_anim_timer >= self.fountain_anim_speed:
             self.fountain_frame_idx = (self.fountain_frame_idx + 1) % self.fountain_frame_count
             self.fountain_anim_timer = 0
 
+        # Advance Kris idle frame
         self.kris_anim_timer += 1
         if self.kris_anim_timer >= self.kris_anim_speed:
             self.kris_frame_idx = (self.kris_frame_idx + 1) % self.kris_frame_count
             self.kris_anim_timer = 0
 
+        # Advance Susie idle frame
         self.susie_anim_timer += 1
         if self.susie_anim_timer >= self.susie_anim_speed:
             self.susie_frame_idx = (self.susie_frame_idx + 1) % self.susie_frame_count
             self.susie_anim_timer = 0
 
+        # Advance Ralsei idle frame
         self.ralsei_anim_timer += 1
         if self.ralsei_anim_timer >= self.ralsei_anim_speed:
             self.ralsei_frame_idx = (self.ralsei_frame_idx + 1) % self.ralsei_frame_count
             self.ralsei_anim_timer = 0
 
-        # Handle attack phase updates
-        self.update_attack_phase(dt, now)
+    def compose_scene(self, layer, kris_img, fountain_img, susie_img, ralsei_img):
+        # Draw Kris's idle animation (define kris_rect first)
+        kris_rect = kris_img.get_rect()
+        kris_rect.left = 350  # 350px from left
+        kris_rect.centery = self.screen_height // 2 - 100
+        layer.blit(kris_img, kris_rect)
 
-    def draw(self, screen):
-        # Draw background
-        bg_img_scaled = pygame.transform.scale(self.bg_img, (self.screen.get_width(), self.screen.get_height()))
-        screen.blit(bg_img_scaled, (0, 0))
+        # Draw fountain animation (cycling 4 frames), now kris_rect is defined
+        fountain_rect = fountain_img.get_rect()
+        fountain_rect.left = kris_rect.left + kris_rect.width + 100  # 100px to the right of Kris
+        fountain_rect.top = 0  # top of the screen
+        # Adjust height so bottom is 100px above Kris
+        desired_bottom = kris_rect.centery - kris_rect.height // 2 - 100
+        if fountain_rect.height > desired_bottom:
+            # Crop the bottom if needed (an area blit draws the same pixels as a cropped copy)
+            fountain_rect.height = desired_bottom
+        layer.blit(fountain_img, fountain_rect, (0, 0, fountain_rect.width, fountain_rect.height))
+
+        # Draw Susie's idle animation
+        susie_rect = susie_img.get_rect()
+        susie_rect.left = kris_rect.left - 120
+        susie_rect.centery = kris_rect.centery + 100  # 100px below Kris
+        layer.blit(susie_img, susie_rect)
+
+        # Draw Ralsei's idle animation
+        ralsei_rect = ralsei_img.get_rect()
+        ralsei_rect.left = susie_rect.left - 10  # 30px to the left of Susie
+        ralsei_rect.centery = susie_rect.centery + 100  # 100px below Susie
+        layer.blit(ralsei_img, ralsei_rect)
 
-        # Draw Kris
-        kris_img = self.kris_idle_frames[self.kris_frame_idx]
-        self.kris_rect = kris_img.get_rect()
-        self.kris_rect.left = 350
-        self.kris_rect.centery = self.screen_height // 2 - 100
-        screen.blit(kris_img, self.kris_rect)
+    def draw(self):
+        global knight_trail, trail_length, trail_alphas
+        if self.attack_phase == 'idle':
+            draw_main_scene(
+                self.screen, self.bg_img, self.fountain_scaled_frames, self.fountain_frame_idx,
+                self.kris_idle_frames, self.kris_frame_idx, self.kris_rect,
+                self.susie_idle_frames, self.susie_frame_idx, self.susie_rect,
+                self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
+                self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
+                self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, False, game_clock=self.game_clock
+            )
+            self.idle_redraw_once = True
+            # Only draw the idle Knight and its trail if attack_phase == 'idle'
+            float_offset = int(20 * math.sin(self.game_clock.get_ticks() / 267))
+            knight_idle_rect = self.knight_idle_img.get_rect()
+            knight_idle_rect.centery = self.kris_rect.centery + 20  # 20px lower than Kris
+            knight_idle_rect.left = self.battle_box_rect.right + 40
+            knight_idle_rect.top += float_offset
+            trail_rect = knight_idle_rect.copy()
+            trail_rect.left += 40  # Adjust offset as desired
+            self.screen.blit(ASSETS.translucent(self.knight_idle_img, 50), trail_rect)  # Adjust alpha for desired faintness
+
+            # Add the current state to the trail
+            knight_trail.add(self.knight_idle_img, knight_idle_rect)
+
+            # Draw the trail (oldest last, most faded), each copy further to the right for a wave effect
+            knight_trail.draw(self.screen, trail_alphas)
+            # Draw the main Knight sprite LAST
+            self.screen.blit(self.knight_idle_img, knight_idle_rect)
+            return
 
-        # Draw Fountain
+        # Background, Kris, the fountain, Susie and Ralsei, composited once per frame combination
+        kris_img = self.kris_idle_frames[self.kris_frame_idx]
         fountain_img = self.fountain_scaled_frames[self.fountain_frame_idx]
-        fountain_rect = fountain_img.get_rect()
-        fountain_rect.left = self.kris_rect.left + self.kris_rect.width + 100
-        desired_bottom = self.kris_rect.centery - self.kris_rect.height // 2 - 100
-        if fountain_rect.height > desired_bottom:
-            crop_height = desired_bottom
-            cropped_img = pygame.Surface((fountain_rect.width, crop_height), pygame.SRCALPHA)
-            cropped_img.blit(fountain_img, (0, 0), (0, 0, fountain_rect.width, crop_height))
-            fountain_img = cropped_img
-            fountain_rect = fountain_img.get_rect()
-            fountain_rect.left = self.kris_rect.left + self.kris_rect.width + 100
-        screen.blit(fountain_img, fountain_rect)
-
-        # Draw Susie
         susie_img = self.susie_idle_frames[self.susie_frame_idx]
-        self.susie_rect = susie_img.get_rect()
-        self.susie_rect.left = self.kris_rect.left - 120
-        self.susie_rect.centery = self.kris_rect.centery + 100
-        screen.blit(susie_img, self.susie_rect)
-
-        # Draw Ralsei
         ralsei_img = self.ralsei_idle_frames[self.ralsei_frame_idx]
-        self.ralsei_rect = ralsei_img.get_rect()
-        self.ralsei_rect.left = self.susie_rect.left - 10
-        self.ralsei_rect.centery = self.susie_rect.centery + 100
-        screen.blit(ralsei_img, self.ralsei_rect)
+        blit_scene_layer(self.screen, 'Attack1', self.bg_img, (kris_img, fountain_img, susie_img, ralsei_img, self.screen_height),
+                         lambda layer: self.compose_scene(layer, kris_img, fountain_img, susie_img, ralsei_img))
 
-        # Battle box
-        pygame.draw.rect(screen, self.battle_box_color, self.battle_box_rect)
-        pygame.draw.rect(screen, self.battle_box_border_color, self.battle_box_rect, self.battle_box_border)
+        # Draw battle box (black square with green border)
+        pygame.draw.rect(self.screen, self.battle_box_color, self.battle_box_rect)
+        pygame.draw.rect(self.screen, self.battle_box_border_color, self.battle_box_rect, self.battle_box_border)
 
-        # Lives counter
+        # Draw starchilds
+        for sc in self.starchilds:
+            if self.game_clock.get_ticks() >= sc['spawn_time']:
+                rotated_img = self.get_starchild_img(sc)
+                rect = rotated_img.get_rect(center=(int(sc['x']), int(sc['y'])))
+                if self.screen_rect.colliderect(rect):
+                    self.screen.blit(rotated_img, rect)
+
+        # Draw lives counter
         lives_surf = self.font.render(f"LIVES: {self.player_lives}", True, (255, 255, 255))
-        screen.blit(lives_surf, (50, 50))
+        self.screen.blit(lives_surf, (50, 50))
 
-        # Player heart
-        invincible = self.time_ms < self.invincible_until
-        if invincible:
-            heart_draw_img = self.heart_img_0 if ((self.time_ms // 100) % 2) == 0 else self.heart_img_1
+        # Draw player heart (flashing if invincible)
+        if self.invincible:
+            # Alternate every 100ms
+            if ((self.game_clock.get_ticks() // 100) % 2) == 0:
+                heart_draw_img = self.heart_img_0
+            else:
+                heart_draw_img = self.heart_img_1
         else:
             heart_draw_img = self.heart_img_0
-        screen.blit(heart_draw_img, (self.player_x, self.player_y))
-
-        # Attack-specific drawing (bullets, Knight, trails, etc.)
-        self.draw_attack_phase(screen)
-
-    def update_attack_phase(self, now, keys):
-        if self.attack_phase == 'intro':
-            if now - self.attack_start_time > 2500:
-                self.attack_phase = 'attacking'
-                self.bullets = []
-                self.attack_start_time = now
-
-        elif self.attack_phase == 'attacking':
-            for bullet in self.bullets:
-                bullet.update()
-            self.bullets = [b for b in self.bullets if not b.dead]
+        self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
 
-            self.player.update(keys)
+        # Draw the Knight and its trail depending on attack_phase
+        if self.attack_phase == 'triangle':
+            triangle_tip = self.triangle_tip
+            triangle_bottom = (0, self.screen_height)
+            # Draw the filled triangle
+            self.screen.blit(self.triangle_fill_surf, self.triangle_fill_pos)
+            # Animate bullet1 starting 10px to the left of the Knight's tip and moving left at 2x speed
+            bullet1_start_x = triangle_tip[0] - self.bullet1_img.get_width() // 2 - 10
+            bullet1_end_x = -self.bullet1_img.get_width()  # Move out of bounds to the left
+            bullet1_progress = min(self.triangle_elapsed / 1500, 1.0)  # 1.5 seconds for 2x speed
+            bullet1_x = int(bullet1_start_x + (bullet1_end_x - bullet1_start_x) * bullet1_progress)
+            # Place bullet lower, closer to the vertical center of the triangle (e.g., 0.55 from tip to bottom)
+            bullet1_y = int(triangle_tip[1] + (triangle_bottom[1] - triangle_tip[1]) * 0.55)
+            self.screen.blit(self.bullet1_img, (bullet1_x, bullet1_y - self.bullet1_img.get_height() // 2))
+            # Draw star bullets
+            for bullet in self.star_bullets:
+                if bullet['active'] and self.game_clock.get_ticks() - self.star_bullet_start_time - bullet['spawn_time'] < self.star_bullet_duration:
+                    # Only draw the default star bullet sprite during the forward phase
+                    self.screen.blit(self.star_bullet_img_0, (int(bullet['x'] - self.star_bullet_img_0.get_width() // 2), int(bullet['y'] - self.star_bullet_img_0.get_height() // 2)))
+            # Update and draw the trail for the pointing Knight
+            self.knight_point_trail.add(self.triangle_knight_img, self.triangle_knight_rect)
+            self.knight_point_trail.draw(self.screen, trail_alphas)
+            # Draw the Knight sprite (pointing frame)
+            self.screen.blit(self.triangle_knight_img, self.triangle_knight_rect)
+        elif self.attack_phase == 'reverse':
+            knight_img = self.knight_reverse_frames[self.knight_reverse_idx]
+            knight_rect = knight_img.get_rect()
+            knight_rect.left = self.triangle_knight_rect.left
+            knight_rect.centery = self.triangle_knight_rect.centery
+            # Update and draw the trail for the reverse animation
+            self.knight_point_trail.add(knight_img, knight_rect)
+            self.knight_point_trail.draw(self.screen, trail_alphas)
+            self.screen.blit(knight_img, knight_rect)
+            # Draw the star bullets at their last position from the triangle phase
+            for bullet in self.star_bullets:
+                if bullet.get('x') is not None and bullet.get('y') is not None:
+                    # Only draw the default star bullet sprite during the reverse phase
+                    self.screen.blit(self.star_bullet_img_0, (int(bullet['x'] - self.star_bullet_img_0.get_width() // 2), int(bullet['y'] - self.star_bullet_img_0.get_height() // 2)))
+        elif self.attack_phase == 'star_reverse':
+            for bullet in self.star_bullets:
+                star_anim_img = bullet.get('img', self.star_bullet_img_0)
+                self.screen.blit(star_anim_img, (int(bullet['x'] - star_anim_img.get_width() // 2), int(bullet['y'] - star_anim_img.get_height() // 2)))
 
-            # Temporary: switch to idle after 10 seconds
-            if now - self.attack_start_time > 10000:
-                self.attack_phase = 'idle'
-                self.idle_redraw_once = False
+    def run(self):
+        running = True
+        while running:
+            dt = self.game_clock.tick(self.clock, 60)  # 60 FPS
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
 
-        elif self.attack_phase == 'idle':
-            self.player.update(keys)
-            self.idle_redraw_once = True
+            self.update(dt)
+            self.draw()
+            present(self.screen)
 
-    def draw_attack_phase(self, screen):
-        if self.attack_phase == 'intro':
-            screen.blit(self.knight_intro_frame, self.knight_intro_rect)
+            # If the attack phase is 'idle' and the idle redraw has happened, end the loop
+            if self.is_done():
+                running = False
 
-        elif self.attack_phase == 'attacking':
-            for bullet in self.bullets:
-                bullet.draw(screen)
-            self.player.draw(screen)
+    def iter_bullets(self):
+        hitting = self.attack_phase in ('triangle', 'reverse', 'star_reverse')
+        moving = self.attack_phase in ('triangle', 'star_reverse')
+        r = self.star_bullet_img_0.get_width() // 3
+        for bullet in self.star_bullets:
+            if bullet.get('x') is not None and bullet.get('y') is not None:
+                v = 1 / 60.0 if moving and bullet['active'] else 0
+                yield (bullet['x'], bullet['y'], bullet['vx'] * v, bullet['vy'] * v, 2 * r, 2 * r, hitting)
+        now = self.game_clock.get_ticks()
+        for sc in self.starchilds:
+            w, h = self.get_starchild_img(sc).get_size()
+            yield (sc['x'], sc['y'], sc['vx'] / 60.0, sc['vy'] / 60.0, w, h, now >= sc['spawn_time'])
 
-        elif self.attack_phase == 'idle':
-            self.player.draw(screen)
+    def is_done(self):
+        return self.attack_phase == 'idle'
 
 
-class Attack2:
+class Attack2(BaseAttack):
+    snapshot_flat = frozenset(('swords',))
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
     kris_idle_frames, kris_frame_idx, kris_rect,
     susie_idle_frames, susie_frame_idx, susie_rect,
@@ -801,9 +933,13 @@ class Attack2:
     fountain_anim_speed=16, fountain_frame_count=4,
     kris_anim_speed=8, kris_frame_count=None,
     susie_anim_speed=8, susie_frame_count=None,
-                 ralsei_anim_speed=8, ralsei_frame_count=None, show_wheel=False):
+                 ralsei_anim_speed=8, ralsei_frame_count=None, show_wheel=False, game_clock=None, seed=None, input_source=None):
         
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.fountain_scaled_frames = fountain_scaled_frames
         self.fountain_frame_idx = fountain_frame_idx
@@ -868,63 +1004,75 @@ class Attack2:
         self.swords = []
         self.attack_duration = 7000  # ms
         self.sword_interval = 700  # ms
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = self.game_clock.get_ticks()
         self.next_sword_time = self.start_time
         self.sword_idx = 0
         self.num_swords = 8
         self.directions = ['up', 'down', 'left', 'right']
         self.spawn_sides = []
+        self.pattern = self.get_pattern()
         
         # Animation timers
         self.fountain_anim_timer = 0
         self.kris_anim_timer = 0
         self.susie_anim_timer = 0
         self.ralsei_anim_timer = 0
+
+    def pattern_key(self):
+        return super().pattern_key() + (self.num_swords, tuple(self.directions), self.battle_box_rect.size)
+
+    def generate_pattern(self):
+        # A shuffled, non-repeating side list for sword spawns
+        sides = []
+        last_side = None
+        while len(sides) < self.num_swords:
+            side = self.rng.choice(self.directions)
+            if side != last_side:
+                sides.append(side)
+                last_side = side
+        # A random offset along each side (avoid edges)
+        offsets = []
+        for side in sides:
+            if side in ('up', 'down'):
+                offsets.append(self.rng.randint(30, self.battle_box_rect.width - 30))
+            else:
+                offsets.append(self.rng.randint(30, self.battle_box_rect.height - 30))
+        return {'sides': tuple(sides), 'offsets': tuple(offsets)}
     
     def load_assets(self):
-        # Load sword sprites
-        self.sword_imgs = {
-            'up': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_up.png')).convert_alpha(),
-            'down': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_down.png')).convert_alpha(),
-            'left': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_left.png')).convert_alpha(),
-            'right': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_right.png')).convert_alpha(),
-        }
-        self.sword_imgs_red = {
-            'up': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_up_red.png')).convert_alpha(),
-            'down': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_down_red.png')).convert_alpha(),
-            'left': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_left_red.png')).convert_alpha(),
-            'right': pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword', 'spr_knight_sword_right_red.png')).convert_alpha(),
-        }
+        # Load sword sprites, made larger
+        sword_dir = os.path.join(self.base_dir, 'sprites', 'spr_knight_sword')
+        sword_scale = 1.5
+        self.sword_imgs = {}
+        self.sword_imgs_red = {}
+        for k in ('up', 'down', 'left', 'right'):
+            self.sword_imgs[k] = ASSETS.load_scaled(os.path.join(sword_dir, f'spr_knight_sword_{k}.png'), sword_scale)
+            # Also scale the red versions, to the size of the normal ones
+            self.sword_imgs_red[k] = ASSETS.load(os.path.join(sword_dir, f'spr_knight_sword_{k}_red.png'), self.sword_imgs[k].get_size())
         
         # Load sound
-        self.sword_shoot_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'sword_shoot.wav'))
+        self.sword_shoot_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'sword_shoot.wav'))
         
         # Load sword slash sprites (vertical and horizontal)
-        self.slash_img_vert = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword_shoot', 'spr_rk_sword_shoot_vert.png')).convert_alpha()
-        self.slash_img_horiz = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword_shoot', 'spr_rk_sword_shoot_horiz.png')).convert_alpha()
-        
-        # Make swords larger
-        sword_scale = 1.5
-        for k in self.sword_imgs:
-            w, h = self.sword_imgs[k].get_size()
-            self.sword_imgs[k] = pygame.transform.smoothscale(self.sword_imgs[k], (int(w * sword_scale), int(h * sword_scale)))
-            # Also scale the red versions
-            w_red, h_red = self.sword_imgs_red[k].get_size()
-            self.sword_imgs_red[k] = pygame.transform.smoothscale(self.sword_imgs_red[k], (int(w * sword_scale), int(h * sword_scale)))
+        self.slash_img_vert = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword_shoot', 'spr_rk_sword_shoot_vert.png'))
+        self.slash_img_horiz = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_sword_shoot', 'spr_rk_sword_shoot_horiz.png'))
         
         self.margin = int(0.5 * max(self.sword_imgs['up'].get_width(), self.sword_imgs['up'].get_height()))
         
         # Wheel asset loading
         if self.show_wheel:
             img_path = os.path.join(self.base_dir, 'sprites', 'spr_rk_swordwheel', 'spr_rk_swordwheel_0.png')
-            img = pygame.image.load(img_path).convert_alpha()
-            self.wheel_base_img = pygame.transform.smoothscale(img, (350, 350))
+            self.wheel_base_img = ASSETS.load(img_path, (350, 350))
+            # The wheel turns 4 degrees a frame, so a 4 degree bank has every angle it is drawn at
+            self.wheel_bank = ASSETS.rotations(self.wheel_base_img, step=4, trim=True, prerender=True)
             self.wheel_frame_count = 1
             self.wheel_frame_idx = 0
             self.wheel_anim_timer = 0
 
     # Sword data structure
     class Sword:
+        # Mutated in place by update(), the other attributes are only ever replaced
+        snapshot_copied = ('attack2', 'pos', 'rect', 'line_rect')
         def __init__(self, attack2_instance, spawn_time, pos, direction):
             self.attack2 = attack2_instance
             self.spawn_time = spawn_time
@@ -1017,7 +1165,7 @@ class Attack2:
                 slash = pygame.transform.scale(self.attack2.slash_img_vert, (length, 1))
                 screen.blit(slash, (x0, y))
     def handle_player_movement(self):
-        keys = pygame.key.get_pressed()
+        keys = self.get_keys()
         if keys[pygame.K_LEFT]:
             self.player_x -= self.player_speed
         if keys[pygame.K_RIGHT]:
@@ -1032,7 +1180,8 @@ class Attack2:
         self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
 
     def update(self, dt):
-        now = pygame.time.get_ticks()
+        self.handle_player_movement()
+        now = self.game_clock.get_ticks()
         
         # Advance animation timers and frame indices
         self.fountain_anim_timer += 1
@@ -1053,30 +1202,19 @@ class Attack2:
             self.ralsei_anim_timer = 0
         
         # Spawn swords
-        # Prepare a shuffled, non-repeating side list for sword spawns
         if self.sword_idx == 0:
-            self.spawn_sides = []
-            last_side = None
-            while len(self.spawn_sides) < self.num_swords:
-                side = random.choice(self.directions)
-                if side != last_side:
-                    self.spawn_sides.append(side)
-                    last_side = side
+            self.spawn_sides = list(self.pattern['sides'])
         
         if self.sword_idx < self.num_swords and now >= self.next_sword_time:
             side = self.spawn_sides[self.sword_idx]
-            # Pick a random offset along the side (avoid edges)
+            offset = self.pattern['offsets'][self.sword_idx]
             if side == 'up':
-                offset = random.randint(30, self.battle_box_rect.width - 30)
                 pos = (self.battle_box_rect.left + offset, self.battle_box_rect.top - self.margin)
             elif side == 'down':
-                offset = random.randint(30, self.battle_box_rect.width - 30)
                 pos = (self.battle_box_rect.left + offset, self.battle_box_rect.bottom + self.margin)
             elif side == 'left':
-                offset = random.randint(30, self.battle_box_rect.height - 30)
                 pos = (self.battle_box_rect.left - self.margin, self.battle_box_rect.top + offset)
             elif side == 'right':
-                offset = random.randint(30, self.battle_box_rect.height - 30)
                 pos = (self.battle_box_rect.right + self.margin, self.battle_box_rect.top + offset)
             self.swords.append(self.Sword(self, now, pos, side))
             self.sword_idx += 1
@@ -1127,10 +1265,6 @@ class Attack2:
                     break
         # Sword wheel collision (Attack8/Attack2 with show_wheel)
         if self.show_wheel:
-            # Rotate wheel
-            rotated = pygame.transform.rotate(self.wheel_base_img, self.wheel_angle)
-            wheel_rect = rotated.get_rect(center=(int(self.wheel_pos[0]), int(self.wheel_pos[1])))
-
             # Get wheel center
             wheel_cx, wheel_cy = int(self.wheel_pos[0]), int(self.wheel_pos[1])
             player_cx = self.player_x + self.heart_size // 2
@@ -1148,13 +1282,13 @@ class Attack2:
                 hit_this_frame = True
         
         # Invincibility logic
-        if pygame.time.get_ticks() < self.invincible_until:
+        if self.game_clock.get_ticks() < self.invincible_until:
             invincible = True
         else:
             invincible = False
         if hit_this_frame and not invincible:
             self.player_lives = max(0, self.player_lives - 1)
-            self.invincible_until = pygame.time.get_ticks() + 1000  # 1 second invincibility
+            self.invincible_until = self.game_clock.get_ticks() + 1000  # 1 second invincibility
         
         # --- Wheel animation and follow logic ---
         if self.show_wheel:
@@ -1173,43 +1307,30 @@ class Attack2:
                 self.wheel_pos[1] += dy / dist * move_dist
 
     def draw(self):
-        # Draw background
-        bg_img_scaled = pygame.transform.scale(self.bg_img, (self.screen.get_width(), self.screen.get_height()))
-        self.screen.blit(bg_img_scaled, (0, 0))
-        
-        # Draw scene (heroes, box, etc.)
+        # Draw scene (background, heroes, box, etc.)
         draw_main_scene(
             self.screen, self.bg_img, self.fountain_scaled_frames, self.fountain_frame_idx,
             self.kris_idle_frames, self.kris_frame_idx, self.kris_rect,
             self.susie_idle_frames, self.susie_frame_idx, self.susie_rect,
             self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
             self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
-            self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, False
+            self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, False, game_clock=self.game_clock
         )
         
         # --- Knight idle animation and trail (added for Attack2) ---
-        float_offset = int(20 * math.sin(pygame.time.get_ticks() / 267))
+        float_offset = int(20 * math.sin(self.game_clock.get_ticks() / 267))
         knight_idle_rect = self.knight_idle_img.get_rect()
         knight_idle_rect.centery = self.kris_rect.centery + 20
         knight_idle_rect.left = self.battle_box_rect.right + 40
         knight_idle_rect.top += float_offset
-        trail_img = self.knight_idle_img.copy()
-        trail_img.set_alpha(50)
         trail_rect = knight_idle_rect.copy()
         trail_rect.left += 40
-        self.screen.blit(trail_img, trail_rect)
+        self.screen.blit(ASSETS.translucent(self.knight_idle_img, 50), trail_rect)
         
         # Note: knight_trail and trail_alphas are global variables, so we need to access them
         global knight_trail, trail_length, trail_alphas
-        knight_trail.insert(0, (self.knight_idle_img.copy(), knight_idle_rect.copy()))
-        if len(knight_trail) > trail_length:
-            knight_trail.pop()
-        for i, (img, rect) in enumerate(reversed(knight_trail)):
-            img = img.copy()
-            img.set_alpha(trail_alphas[i])
-            rect = rect.copy()
-            rect.left += 40 + i * 10
-            self.screen.blit(img, rect)
+        knight_trail.add(self.knight_idle_img, knight_idle_rect)
+        knight_trail.draw(self.screen, trail_alphas)
         self.screen.blit(self.knight_idle_img, knight_idle_rect)
         # --- End knight idle animation and trail ---
         
@@ -1225,8 +1346,8 @@ class Attack2:
         self.screen.blit(lives_surf, (50, 50))
         
         # Draw player heart (flashing if invincible)
-        if pygame.time.get_ticks() < self.invincible_until:
-            if ((pygame.time.get_ticks() // 100) % 2) == 0:
+        if self.game_clock.get_ticks() < self.invincible_until:
+            if ((self.game_clock.get_ticks() // 100) % 2) == 0:
                 heart_draw_img = self.heart_img_0
             else:
                 heart_draw_img = self.heart_img_1
@@ -1236,31 +1357,40 @@ class Attack2:
         
         # --- Wheel drawing ---
         if self.show_wheel:
-            rotated = pygame.transform.rotate(self.wheel_base_img, self.wheel_angle)
-            wheel_rect = rotated.get_rect(center=(int(self.wheel_pos[0]), int(self.wheel_pos[1])))
+            rotated, wheel_rect = self.wheel_bank.frame(self.wheel_angle, (int(self.wheel_pos[0]), int(self.wheel_pos[1])))
             self.screen.blit(rotated, wheel_rect)
-            
-
-        
-        pygame.display.flip()
 
     def run(self):
         running = True
         while self.state != 'done' and running:
-            dt = self.clock.tick(60)
+            dt = self.game_clock.tick(self.clock, 60)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                     pygame.quit()
                     sys.exit()
             
-            self.handle_player_movement()
             self.update(dt)
             self.draw()
+            present(self.screen)
+
+    def iter_bullets(self):
+        for sword in self.swords:
+            yield (sword.rect.centerx, sword.rect.centery, 0, 0, sword.rect.width, sword.rect.height, 1)
+            if sword.timer >= 0.9:
+                if sword.direction in ('up', 'down'):
+                    yield (int(sword.pos[0]), self.battle_box_rect.centery, 0, 0, 48, self.battle_box_rect.height, 1)
+                else:
+                    yield (self.battle_box_rect.centerx, int(sword.pos[1]), 0, 0, self.battle_box_rect.width, 48, 1)
+        if self.show_wheel:
+            # Outer edge of the sword ring
+            d = 2 * (self.wheel_base_img.get_width() // 2 - 10)
+            yield (self.wheel_pos[0], self.wheel_pos[1], 0, 0, d, d, 1)
 
     def is_done(self):
         return self.state == 'done'
 
-class Attack3:
+class Attack3(BaseAttack):
+    snapshot_flat = frozenset(('bullets',))
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
                  kris_idle_frames, kris_frame_idx, kris_rect,
                  susie_idle_frames, susie_frame_idx, susie_rect,
@@ -1269,8 +1399,12 @@ class Attack3:
                  heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                  knight_idle_img, show_knight_idle, clock,
                  knight_trail, trail_length, trail_alphas,
-                 cut_mode='vertical', cycles=7, base_dir=None, player_speed=1, cut_modes=None):
+                 cut_mode='vertical', cycles=7, base_dir=None, player_speed=1, cut_modes=None, game_clock=None, seed=None, input_source=None):
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.fountain_scaled_frames = fountain_scaled_frames
         self.fountain_frame_idx = fountain_frame_idx
@@ -1309,41 +1443,43 @@ class Attack3:
         self.state_timer = 0
         self.cycle_count = 0
         self.player_speed = player_speed
+        # Animation timers for idle anims
+        self.fountain_anim_timer = 0
+        self.kris_anim_timer = 0
+        self.susie_anim_timer = 0
+        self.ralsei_anim_timer = 0
         # Handle cut_modes list for random slash directions
         self.cut_modes = cut_modes
         if self.cut_modes is None:
             # Default: all vertical cuts (for Attack3 compatibility)
             self.cut_modes = ['vertical'] * cycles
+        self.pattern = self.get_pattern()
         self.load_assets()
         self.reset_state()
-        self.box_cut_slash_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'box_cut_slash.wav'))
+        self.box_cut_slash_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'box_cut_slash.wav'))
         self.box_cut_slash_played = False
 
     def load_assets(self):
         # Knight attack animation (scale to idle size)
         knight_attack_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_attack_ol_center')
         idle_size = self.knight_idle_img.get_size()
-        self.knight_attack_frames = [pygame.transform.smoothscale(
-            pygame.image.load(os.path.join(knight_attack_dir, f'spr_roaringknight_attack_ol_center_{i}.png')).convert_alpha(),
-            idle_size) for i in range(6)]
+        self.knight_attack_frames = [
+            ASSETS.load(os.path.join(knight_attack_dir, f'spr_roaringknight_attack_ol_center_{i}.png'), idle_size)
+            for i in range(6)]
         # Load both vertical and horizontal cut animations
         cut_dir_vert = os.path.join(self.base_dir, 'sprites', 'spr_knight_cut_box', 'spr_knight_cut_box_vert')
         cut_dir_horiz = os.path.join(self.base_dir, 'sprites', 'spr_knight_cut_box', 'spr_knight_cut_box_horiz')
-        self.cut_frames_vert = [pygame.image.load(os.path.join(cut_dir_vert, f'spr_knight_cut_box_vert_{i}.png')).convert_alpha() for i in range(4)]
-        self.cut_frames_horiz = [pygame.image.load(os.path.join(cut_dir_horiz, f'spr_knight_cut_box_horiz_{i}.png')).convert_alpha() for i in range(4)]
+        self.cut_frames_vert = [ASSETS.load(os.path.join(cut_dir_vert, f'spr_knight_cut_box_vert_{i}.png')) for i in range(4)]
+        self.cut_frames_horiz = [ASSETS.load(os.path.join(cut_dir_horiz, f'spr_knight_cut_box_horiz_{i}.png')) for i in range(4)]
         # Set initial cut frames based on current mode
         self.cut_frames = self.cut_frames_vert if self.cut_mode == 'vertical' else self.cut_frames_horiz
         # Tooth bullets (scale 1.5x)
         tooth_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_tooth')
-        orig_left = pygame.image.load(os.path.join(tooth_dir, 'spr_roaringknight_tooth_left.png')).convert_alpha()
-        orig_right = pygame.image.load(os.path.join(tooth_dir, 'spr_roaringknight_tooth_right.png')).convert_alpha()
-        orig_up = pygame.image.load(os.path.join(tooth_dir, 'spr_roaringknight_tooth_up.png')).convert_alpha()
-        orig_down = pygame.image.load(os.path.join(tooth_dir, 'spr_roaringknight_tooth_down.png')).convert_alpha()
         scale = 1.5
-        self.tooth_left = pygame.transform.smoothscale(orig_left, (int(orig_left.get_width()*scale), int(orig_left.get_height()*scale)))
-        self.tooth_right = pygame.transform.smoothscale(orig_right, (int(orig_right.get_width()*scale), int(orig_right.get_height()*scale)))
-        self.tooth_up = pygame.transform.smoothscale(orig_up, (int(orig_up.get_width()*scale), int(orig_up.get_height()*scale)))
-        self.tooth_down = pygame.transform.smoothscale(orig_down, (int(orig_down.get_width()*scale), int(orig_down.get_height()*scale)))
+        self.tooth_left = ASSETS.load_scaled(os.path.join(tooth_dir, 'spr_roaringknight_tooth_left.png'), scale)
+        self.tooth_right = ASSETS.load_scaled(os.path.join(tooth_dir, 'spr_roaringknight_tooth_right.png'), scale)
+        self.tooth_up = ASSETS.load_scaled(os.path.join(tooth_dir, 'spr_roaringknight_tooth_up.png'), scale)
+        self.tooth_down = ASSETS.load_scaled(os.path.join(tooth_dir, 'spr_roaringknight_tooth_down.png'), scale)
 
     def reset_state(self):
         self.state = 'knight_anim'
@@ -1370,7 +1506,7 @@ class Attack3:
         self.box_cut_slash_played = False  # Reset sound flag for each slash
 
     def handle_player_movement(self):
-        keys = pygame.key.get_pressed()
+        keys = self.get_keys()
         if keys[pygame.K_LEFT]:
             self.player_x -= self.player_speed
         if keys[pygame.K_RIGHT]:
@@ -1389,10 +1525,27 @@ class Attack3:
         self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
 
     def update(self, dt):
+        # --- Advance animation timers and frame indices ---
+        self.fountain_anim_timer += 1
+        if self.fountain_anim_timer >= 16:
+            self.fountain_frame_idx = (self.fountain_frame_idx + 1) % len(self.fountain_scaled_frames)
+            self.fountain_anim_timer = 0
+        self.kris_anim_timer += 1
+        if self.kris_anim_timer >= 8:
+            self.kris_frame_idx = (self.kris_frame_idx + 1) % len(self.kris_idle_frames)
+            self.kris_anim_timer = 0
+        self.susie_anim_timer += 1
+        if self.susie_anim_timer >= 8:
+            self.susie_frame_idx = (self.susie_frame_idx + 1) % len(self.susie_idle_frames)
+            self.susie_anim_timer = 0
+        self.ralsei_anim_timer += 1
+        if self.ralsei_anim_timer >= 8:
+            self.ralsei_frame_idx = (self.ralsei_frame_idx + 1) % len(self.ralsei_idle_frames)
+            self.ralsei_anim_timer = 0
         self.state_timer += dt
         self.handle_player_movement()  # Always allow movement, every frame, every state
         # --- Bullet collision with player ---
-        now = pygame.time.get_ticks()
+        now = self.game_clock.get_ticks()
         if self.state in ('box_move', 'bullets'):
             player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
             for bullet in self.bullets:
@@ -1411,7 +1564,7 @@ class Attack3:
         # --- End bullet collision ---
         if self.state == 'knight_anim':
             frame_duration = 1000 // len(self.knight_attack_frames)
-            self.knight_frame_idx = min(self.state_timer // frame_duration, len(self.knight_attack_frames) - 1)
+            self.knight_frame_idx = min(int(self.state_timer // frame_duration), len(self.knight_attack_frames) - 1)
             # Play slash sound at second last frame
             if (self.knight_frame_idx == len(self.knight_attack_frames) - 2) and not self.box_cut_slash_played:
                 self.box_cut_slash_sfx.play()
@@ -1421,8 +1574,8 @@ class Attack3:
                 self.state_timer = 0
         elif self.state == 'cut_anim':
             frame_duration = 250 // len(self.cut_frames)
-            self.cut_frame_idx = min(self.state_timer // frame_duration, len(self.cut_frames) - 1)
-            if self.cut_frame_idx == 2 and not self.cut_anim_done:
+            self.cut_frame_idx = min(int(self.state_timer // frame_duration), len(self.cut_frames) - 1)
+            if self.cut_frame_idx >= 2 and not self.cut_anim_done:
                 self.split_box()
                 self.cut_anim_done = True
             if self.state_timer >= 250:
@@ -1517,6 +1670,14 @@ class Attack3:
         self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
         self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
 
+    def pattern_key(self):
+        return super().pattern_key() + (self.cycles,)
+
+    def generate_pattern(self):
+        # Which 3 of the 7 teeth on each side are fast, per cycle
+        return {'fast_teeth': tuple((tuple(self.rng.sample(range(7), 3)), tuple(self.rng.sample(range(7), 3)))
+                                    for _ in range(self.cycles))}
+
     def spawn_bullets(self):
         self.bullets = []
         w, h = self.battle_box_rect.width, self.battle_box_rect.height
@@ -1528,8 +1689,7 @@ class Attack3:
                 left_bullets.append({'x': self.boxes[0].right + 50, 'y': y, 'vx': -2.5, 'img': self.tooth_left})
                 right_bullets.append({'x': self.boxes[1].left - 70, 'y': y, 'vx': 2.5, 'img': self.tooth_right})
             # Randomly pick 3 on each side to double speed
-            left_fast = random.sample(range(7), 3)
-            right_fast = random.sample(range(7), 3)
+            left_fast, right_fast = self.pattern['fast_teeth'][self.cycle_count]
             for i in left_fast:
                 left_bullets[i]['vx'] *= 3
             for i in right_fast:
@@ -1543,8 +1703,7 @@ class Attack3:
             for x in x_positions:
                 top_bullets.append({'x': x, 'y': self.boxes[0].bottom + 50, 'vy': -2.5, 'img': self.tooth_up})
                 bottom_bullets.append({'x': x, 'y': self.boxes[1].top - 50, 'vy': 2.5, 'img': self.tooth_down})
-            top_fast = random.sample(range(7), 3)
-            bottom_fast = random.sample(range(7), 3)
+            top_fast, bottom_fast = self.pattern['fast_teeth'][self.cycle_count]
             for i in top_fast:
                 top_bullets[i]['vy'] *= 3
             for i in bottom_fast:
@@ -1554,44 +1713,15 @@ class Attack3:
     def run(self):
         # Main loop for the attack, handles events, player movement, and animation
         running = True
-        # Animation timers for idle anims
-        self.fountain_anim_timer = getattr(self, 'fountain_anim_timer', 0)
-        self.kris_anim_timer = getattr(self, 'kris_anim_timer', 0)
-        self.susie_anim_timer = getattr(self, 'susie_anim_timer', 0)
-        self.ralsei_anim_timer = getattr(self, 'ralsei_anim_timer', 0)
         while not self.is_done() and running:
-            dt = self.clock.tick(60)
-            # --- Advance animation timers and frame indices ---
-            self.fountain_anim_timer += 1
-            if self.fountain_anim_timer >= 16:
-                self.fountain_frame_idx = (self.fountain_frame_idx + 1) % len(self.fountain_scaled_frames)
-                self.fountain_anim_timer = 0
-            self.kris_anim_timer += 1
-            if self.kris_anim_timer >= 8:
-                self.kris_frame_idx = (self.kris_frame_idx + 1) % len(self.kris_idle_frames)
-                self.kris_anim_timer = 0
-            self.susie_anim_timer += 1
-            if self.susie_anim_timer >= 8:
-                self.susie_frame_idx = (self.susie_frame_idx + 1) % len(self.susie_idle_frames)
-                self.susie_anim_timer = 0
-            self.ralsei_anim_timer += 1
-            if self.ralsei_anim_timer >= 8:
-                self.ralsei_frame_idx = (self.ralsei_frame_idx + 1) % len(self.ralsei_idle_frames)
-                self.ralsei_anim_timer = 0
+            dt = self.game_clock.tick(self.clock, 60)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                     pygame.quit()
                     sys.exit()
-            # Clamp to current playable area
-            if self.state in ('box_move', 'bullets') and self.boxes:
-                playable_rect = self.boxes[0] if self.player_in_left else self.boxes[1]
-            else:
-                playable_rect = self.battle_box_rect
-            playable_rect = playable_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
-            self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
-            self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
             self.update(dt)
             self.draw()
+            present(self.screen)
 
     def draw(self):
         # Always draw the main scene (idle anims always play)
@@ -1606,7 +1736,7 @@ class Attack3:
                 self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
                 offscreen_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
                 self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.invincible,
-                None, False, self.clock
+                None, False, self.clock, game_clock=self.game_clock
             )
         else:
             draw_main_scene(
@@ -1616,7 +1746,7 @@ class Attack3:
                 self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
                 self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
                 self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.invincible,
-                None, False, self.clock
+                None, False, self.clock, game_clock=self.game_clock
             )
         # Draw knight attack animation and trail (replace idle)
         if self.state == 'knight_anim':
@@ -1624,15 +1754,8 @@ class Attack3:
             knight_rect = knight_img.get_rect()
             knight_rect.left = self.battle_box_rect.right + 40
             knight_rect.centery = self.kris_rect.centery + 20
-            self.knight_trail.insert(0, (knight_img.copy(), knight_rect.copy()))
-            if len(self.knight_trail) > self.trail_length:
-                self.knight_trail.pop()
-            for i, (img, rect) in enumerate(reversed(self.knight_trail)):
-                img = img.copy()
-                img.set_alpha(self.trail_alphas[i])
-                rect = rect.copy()
-                rect.left += 40 + i * 10
-                self.screen.blit(img, rect)
+            self.knight_trail.add(knight_img, knight_rect)
+            self.knight_trail.draw(self.screen, self.trail_alphas)
             self.screen.blit(knight_img, knight_rect)
         # Draw cut animation (thinner slash)
         if self.state == 'cut_anim':
@@ -1670,13 +1793,20 @@ class Attack3:
                     self.screen.blit(bullet['img'], (int(bullet['x']), int(bullet['y'])))
                 else:
                     self.screen.blit(bullet['img'], (int(bullet['x']), int(bullet['y'])))
-        pygame.display.flip()
+
+    def iter_bullets(self):
+        hitting = self.state in ('box_move', 'bullets')
+        for bullet in self.bullets:
+            w, h = bullet['img'].get_size()
+            yield (int(bullet['x']) + w // 2, int(bullet['y']) + h // 2, bullet.get('vx', 0), bullet.get('vy', 0),
+                   w - int(w * 0.2), h - int(h * 0.2), hitting)
 
     def is_done(self):
         return self.state == 'done'
 
 # --- Attack4: Sword Tunnel ---
 class SwordTunnelSword:
+    snapshot_copied = ('heart_rect', 'trail')  # update() replaces its numbers
     def __init__(self, x, y, direction, speed, up_img, down_img, up_img_red, down_img_red, heart_rect, trail_length=6, trail_alphas=None):
         self.x = x
         self.y = y
@@ -1687,21 +1817,16 @@ class SwordTunnelSword:
         self.up_img_red = up_img_red
         self.down_img_red = down_img_red
         self.heart_rect = heart_rect
-        self.trail = []
+        self.trail = None  # Trail of the sword as drawn, made by the first draw() (headless runs never need one)
         self.trail_length = trail_length
         self.trail_alphas = trail_alphas or [120, 90, 60, 40, 25, 10]
         self.red = False
-        self.angle = 0
         self._red_state = False  # Track if currently red
         self._red_triggered = False  # Track if red was triggered
 
     def update(self, dt, heart_rect, final_phase=False, heart_center=None):
         self.x -= self.speed * dt / 16.67
 
-        self.trail.insert(0, (self.x, self.y))
-        if len(self.trail) > self.trail_length:
-            self.trail.pop()
-
         sword_rect = self.get_rect()
         heart_center_x = heart_rect.centerx
         sword_center_x = sword_rect.centerx
@@ -1714,6 +1839,11 @@ class SwordTunnelSword:
                 self._red_state = False
         self.red = self._red_state
 
+    def image(self):
+        if self.direction == 'up':
+            return self.up_img_red if self.red else self.up_img
+        return self.down_img_red if self.red else self.down_img
+
     def get_rect(self):
         img = self.up_img
         rect = img.get_rect()
@@ -1721,24 +1851,18 @@ class SwordTunnelSword:
         return rect
 
     def draw(self, screen):
-        img = self.up_img if self.direction == 'up' else self.down_img
-        img_red = self.up_img_red if self.direction == 'up' else self.down_img_red
-        for i, (tx, ty) in enumerate(reversed(self.trail)):
-            timg = img_red if self.red else img
-            timg = pygame.transform.rotate(timg, self.angle)
-            timg = timg.copy()
-            timg.set_alpha(self.trail_alphas[i])
-            rect = timg.get_rect()
-            rect.center = (int(tx), int(ty))
-            screen.blit(timg, rect)
-        main_img = img_red if self.red else img
-        main_img = pygame.transform.rotate(main_img, self.angle)
-        rect = main_img.get_rect()
-        rect.center = (int(self.x), int(self.y))
-        screen.blit(main_img, rect)
-
-
-class Attack4:
+        img = self.image()
+        rect = img.get_rect(center=(int(self.x), int(self.y)))
+        if self.trail is None:
+            self.trail = Trail(self.trail_length)
+        self.trail.add(img, rect)
+        # Afterimages in place, oldest first, all in the sword's current colour
+        self.trail.draw(screen, self.trail_alphas, offset=0, spacing=0, image=img)
+        screen.blit(img, rect)
+
+
+class Attack4(BaseAttack):
+    snapshot_flat = frozenset(('swords',))
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
                  kris_idle_frames, kris_frame_idx, kris_rect,
                  susie_idle_frames, susie_frame_idx, susie_rect,
@@ -1746,8 +1870,12 @@ class Attack4:
                  battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
                  heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                  knight_idle_img, show_knight_idle, clock,
-                 base_dir=None, player_speed=2):
+                 base_dir=None, player_speed=2, game_clock=None, seed=None, input_source=None):
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.fountain_scaled_frames = fountain_scaled_frames
         self.fountain_frame_idx = fountain_frame_idx
@@ -1783,7 +1911,14 @@ class Attack4:
         self.attack_duration = 10000  # ms
         self.spawn_interval = self.attack_duration / self.sword_pairs
         self.last_spawn_time = 0
-        self.start_time = 0
+        self.start_time = None
+        self.timeout_duration = 15000  # 15 seconds timeout
+        self.state = 'running'
+        # Animation timers for idle anims
+        self.fountain_anim_timer = 0
+        self.kris_anim_timer = 0
+        self.susie_anim_timer = 0
+        self.ralsei_anim_timer = 0
         self.trail_length = 6
         self.trail_alphas = [120, 90, 60, 40, 25, 10]
         self.final_phase = False
@@ -1831,177 +1966,183 @@ class Attack4:
     def load_assets(self):
         # Load sword sprites and scale them 3x
         tunnel_dir = os.path.join(self.base_dir, 'sprites', 'spr_knight_sword_tunnel')
-        up_img = pygame.image.load(os.path.join(tunnel_dir, 'spr_knight_longsword_up.png')).convert_alpha()
-        down_img = pygame.image.load(os.path.join(tunnel_dir, 'spr_knight_longsword_down.png')).convert_alpha()
-        up_img_red = pygame.image.load(os.path.join(tunnel_dir, 'spr_knight_longsword_up_red.png')).convert_alpha()
-        down_img_red = pygame.image.load(os.path.join(tunnel_dir, 'spr_knight_longsword_down_red.png')).convert_alpha()
         scale = 1.5
-        self.up_img = pygame.transform.smoothscale(up_img, (up_img.get_width()*scale, up_img.get_height()*scale))
-        self.down_img = pygame.transform.smoothscale(down_img, (down_img.get_width()*scale, down_img.get_height()*scale))
-        self.up_img_red = pygame.transform.smoothscale(up_img_red, (up_img_red.get_width()*scale, up_img_red.get_height()*scale))
-        self.down_img_red = pygame.transform.smoothscale(down_img_red, (down_img_red.get_width()*scale, down_img_red.get_height()*scale))
+        self.up_img = ASSETS.load_scaled(os.path.join(tunnel_dir, 'spr_knight_longsword_up.png'), scale)
+        self.down_img = ASSETS.load_scaled(os.path.join(tunnel_dir, 'spr_knight_longsword_down.png'), scale)
+        self.up_img_red = ASSETS.load_scaled(os.path.join(tunnel_dir, 'spr_knight_longsword_up_red.png'), scale)
+        self.down_img_red = ASSETS.load_scaled(os.path.join(tunnel_dir, 'spr_knight_longsword_down_red.png'), scale)
+
+    def next_sword_pair(self):
+        # Position of the next sword pair along the wave, shared with SwordTunnelBatch
+        # Apply wave offset smoothly
+        self.wave_time += 0.5  # slower wave movement
+        offset_raw = math.sin(self.wave_time * 0.2)
+        self.current_offset = offset_raw * self.wave_amplitude
+        heart_offset = int(self.current_offset * (self.heart_size / 2))  # Larger offset multiplier
+
+        # Set up sword positions with the wave offset
+        gap = 2 * self.heart_size  # Proper gap for dodgeability
+        # Center the sword pair in the battle box
+        base_center_y = self.battle_box_rect.centery
+        # Position the UP sword above center
+        # Get half-height of sword images
+        up_half = self.up_img.get_height() // 2
+        down_half = self.down_img.get_height() // 2
+
+        # Center the swords around the gap using .center alignment
+        up_y = base_center_y - gap // 2 - up_half + heart_offset
+        down_y = base_center_y + gap // 2 + down_half + heart_offset
+
+
+        # Only clamp if the pair would go completely out of bounds
+        # If down sword would go above the box, shift both down
+        if down_y < self.battle_box_rect.top:
+            shift = self.battle_box_rect.top - down_y
+            down_y += shift
+            up_y += shift
+        # If up sword would go below the box, shift both up  
+        if up_y + self.up_img.get_height() > self.battle_box_rect.bottom:
+            shift = (up_y + self.up_img.get_height()) - self.battle_box_rect.bottom
+            up_y -= shift
+            down_y -= shift
+
+        x = self.battle_box_rect.right + 30
+        speed = 16
+        return x, up_y, down_y, speed
+
+    def update(self, dt):
+        # --- Advance animation timers and frame indices ---
+        self.fountain_anim_timer += 1
+        if self.fountain_anim_timer >= 16:
+            self.fountain_frame_idx = (self.fountain_frame_idx + 1) % len(self.fountain_scaled_frames)
+            self.fountain_anim_timer = 0
+        self.kris_anim_timer += 1
+        if self.kris_anim_timer >= 8:
+            self.kris_frame_idx = (self.kris_frame_idx + 1) % len(self.kris_idle_frames)
+            self.kris_anim_timer = 0
+        self.susie_anim_timer += 1
+        if self.susie_anim_timer >= 8:
+            self.susie_frame_idx = (self.susie_frame_idx + 1) % len(self.susie_idle_frames)
+            self.susie_anim_timer = 0
+        self.ralsei_anim_timer += 1
+        if self.ralsei_anim_timer >= 8:
+            self.ralsei_frame_idx = (self.ralsei_frame_idx + 1) % len(self.ralsei_idle_frames)
+            self.ralsei_anim_timer = 0
+        now = self.game_clock.get_ticks()
+        if self.start_time is None:
+            self.start_time = now
+            self.last_spawn_time = now
+        elapsed = now - self.start_time
+        # Player movement
+        keys = self.get_keys()
+        if keys[pygame.K_LEFT]:
+            self.player_x -= self.player_speed
+        if keys[pygame.K_RIGHT]:
+            self.player_x += self.player_speed
+        if keys[pygame.K_UP]:
+            self.player_y -= self.player_speed
+        if keys[pygame.K_DOWN]:
+            self.player_y += self.player_speed
+        # Clamp player to battle box
+        playable_rect = self.battle_box_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
+        self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
+        self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
+        # Spawn swords
+        if elapsed < self.attack_duration and self.sword_spawn_count < self.sword_pairs:
+            if now - self.last_spawn_time >= self.spawn_interval:
+                x, up_y, down_y, speed = self.next_sword_pair()
+                heart_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
+
+                up_sword = SwordTunnelSword(x, down_y, 'up', speed, self.up_img, self.down_img,
+                                            self.up_img_red, self.down_img_red, heart_rect,
+                                            self.trail_length, self.trail_alphas)
+
+                down_sword = SwordTunnelSword(x, up_y, 'down', speed, self.up_img, self.down_img,
+                                              self.up_img_red, self.down_img_red, heart_rect,
+                                              self.trail_length, self.trail_alphas)
+
+                self.swords.append(up_sword)
+                self.swords.append(down_sword)
+                self.last_spawn_time = now
+                self.sword_spawn_count += 1
+
+        # Update swords
+        heart_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
+        heart_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
+        for sword in self.swords:
+            sword.update(dt, heart_rect, self.final_phase, heart_center)
+        # Remove swords that have left the screen
+        self.swords = [
+            s for s in self.swords
+                if -200 < s.x < self.screen.get_width() + 200 and -200 < s.y < self.screen.get_height() + 200
+        ]
+
+        # Invincibility logic
+        now2 = self.game_clock.get_ticks()
+        if now2 < self.invincible_until:
+            self.invincible = True
+        else:
+            self.invincible = False
+        # Collision detection
+        for sword in self.swords:
+            sword_rect = sword.get_rect()
+            # Create hitbox that's 85% of the sprite size
+            hitbox_width = int(sword_rect.width * 0.85)
+            hitbox_height = int(sword_rect.height * 0.85)
+            hitbox_x = sword_rect.centerx - hitbox_width // 2
+            hitbox_y = sword_rect.centery - hitbox_height // 2
+            hitbox = pygame.Rect(hitbox_x, hitbox_y, hitbox_width, hitbox_height)
+            heart_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
+            if hitbox.colliderect(heart_rect):
+                if now2 > self.invincible_until:
+                    self.player_lives = max(0, self.player_lives - 1)
+                    self.invincible_until = now2 + 1000
+                    self.invincible = True
+
+        # End the wave when all swords are gone after spawning ends
+        if self.sword_spawn_count >= self.sword_pairs and not self.swords:
+            self.state = 'done'
+
+        # Timeout fallback to prevent infinite loops
+        if elapsed > self.timeout_duration:
+            self.state = 'done'
+
+    def draw(self):
+        draw_main_scene(
+            self.screen, self.bg_img, self.fountain_scaled_frames, self.fountain_frame_idx,
+            self.kris_idle_frames, self.kris_frame_idx, self.kris_rect,
+            self.susie_idle_frames, self.susie_frame_idx, self.susie_rect,
+            self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
+            self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
+            self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.invincible,
+            self.knight_idle_img, self.show_knight_idle, self.clock, game_clock=self.game_clock
+        )
+        # Draw swords
+        for sword in self.swords:
+            sword.draw(self.screen)
 
     def run(self):
-        running = True
-        self.start_time = pygame.time.get_ticks()
-        self.last_spawn_time = self.start_time
         dt = 16
-        timeout_duration = 15000  # 15 seconds timeout
-        # Animation timers for idle anims
-        self.fountain_anim_timer = getattr(self, 'fountain_anim_timer', 0)
-        self.kris_anim_timer = getattr(self, 'kris_anim_timer', 0)
-        self.susie_anim_timer = getattr(self, 'susie_anim_timer', 0)
-        self.ralsei_anim_timer = getattr(self, 'ralsei_anim_timer', 0)
-        while running:
-            # --- Advance animation timers and frame indices ---
-            self.fountain_anim_timer += 1
-            if self.fountain_anim_timer >= 16:
-                self.fountain_frame_idx = (self.fountain_frame_idx + 1) % len(self.fountain_scaled_frames)
-                self.fountain_anim_timer = 0
-            self.kris_anim_timer += 1
-            if self.kris_anim_timer >= 8:
-                self.kris_frame_idx = (self.kris_frame_idx + 1) % len(self.kris_idle_frames)
-                self.kris_anim_timer = 0
-            self.susie_anim_timer += 1
-            if self.susie_anim_timer >= 8:
-                self.susie_frame_idx = (self.susie_frame_idx + 1) % len(self.susie_idle_frames)
-                self.susie_anim_timer = 0
-            self.ralsei_anim_timer += 1
-            if self.ralsei_anim_timer >= 8:
-                self.ralsei_frame_idx = (self.ralsei_frame_idx + 1) % len(self.ralsei_idle_frames)
-                self.ralsei_anim_timer = 0
-            now = pygame.time.get_ticks()
-            elapsed = now - self.start_time
+        while not self.is_done():
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                     pygame.quit()
                     sys.exit()
-            # Player movement
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
-                self.player_x -= self.player_speed
-            if keys[pygame.K_RIGHT]:
-                self.player_x += self.player_speed
-            if keys[pygame.K_UP]:
-                self.player_y -= self.player_speed
-            if keys[pygame.K_DOWN]:
-                self.player_y += self.player_speed
-            # Clamp player to battle box
-            playable_rect = self.battle_box_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
-            self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
-            self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
-            # Spawn swords
-            if elapsed < self.attack_duration and self.sword_spawn_count < self.sword_pairs:
-                if now - self.last_spawn_time >= self.spawn_interval:
-                    # Apply wave offset smoothly
-                    self.wave_time += 0.5  # slower wave movement
-                    offset_raw = math.sin(self.wave_time * 0.2)
-                    self.current_offset = offset_raw * self.wave_amplitude
-                    heart_offset = int(self.current_offset * (self.heart_size / 2))  # Larger offset multiplier
-
-                    # Set up sword positions with the wave offset
-                    gap = 2 * self.heart_size  # Proper gap for dodgeability
-                    # Center the sword pair in the battle box
-                    base_center_y = self.battle_box_rect.centery
-                    # Position the UP sword above center
-                    # Get half-height of sword images
-                    up_half = self.up_img.get_height() // 2
-                    down_half = self.down_img.get_height() // 2
-
-                    # Center the swords around the gap using .center alignment
-                    up_y = base_center_y - gap // 2 - up_half + heart_offset
-                    down_y = base_center_y + gap // 2 + down_half + heart_offset
-
-
-                    # Only clamp if the pair would go completely out of bounds
-                    # If down sword would go above the box, shift both down
-                    if down_y < self.battle_box_rect.top:
-                        shift = self.battle_box_rect.top - down_y
-                        down_y += shift
-                        up_y += shift
-                    # If up sword would go below the box, shift both up  
-                    if up_y + self.up_img.get_height() > self.battle_box_rect.bottom:
-                        shift = (up_y + self.up_img.get_height()) - self.battle_box_rect.bottom
-                        up_y -= shift
-                        down_y -= shift
-
-                    x = self.battle_box_rect.right + 30
-                    speed = 16
-                    heart_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-
-                    up_sword = SwordTunnelSword(x, down_y, 'up', speed, self.up_img, self.down_img,
-                                                self.up_img_red, self.down_img_red, heart_rect,
-                                                self.trail_length, self.trail_alphas)
-
-                    down_sword = SwordTunnelSword(x, up_y, 'down', speed, self.up_img, self.down_img,
-                                                  self.up_img_red, self.down_img_red, heart_rect,
-                                                  self.trail_length, self.trail_alphas)
-
-                    self.swords.append(up_sword)
-                    self.swords.append(down_sword)
-                    self.last_spawn_time = now
-                    self.sword_spawn_count += 1
-
-            # Update swords
-            heart_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-            heart_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
-            for sword in self.swords:
-                sword.update(dt, heart_rect, self.final_phase, heart_center)
-            # Remove swords that have left the screen
-            self.swords = [
-                s for s in self.swords
-                    if -200 < s.x < self.screen.get_width() + 200 and -200 < s.y < self.screen.get_height() + 200
-            ]
+            self.update(dt)
+            self.draw()
+            present(self.screen)
+            dt = self.game_clock.tick(self.clock, 60)
 
-            # Invincibility logic
-            now2 = pygame.time.get_ticks()
-            if now2 < self.invincible_until:
-                self.invincible = True
-            else:
-                self.invincible = False
-            # Collision detection
-            hit_this_frame = False
-            for sword in self.swords:
-                sword_rect = sword.get_rect()
-                # Create hitbox that's 85% of the sprite size
-                hitbox_width = int(sword_rect.width * 0.85)
-                hitbox_height = int(sword_rect.height * 0.85)
-                hitbox_x = sword_rect.centerx - hitbox_width // 2
-                hitbox_y = sword_rect.centery - hitbox_height // 2
-                hitbox = pygame.Rect(hitbox_x, hitbox_y, hitbox_width, hitbox_height)
-                heart_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-                if hitbox.colliderect(heart_rect):
-                    if now2 > self.invincible_until:
-                        self.player_lives = max(0, self.player_lives - 1)
-                        self.invincible_until = now2 + 1000
-                        self.invincible = True
-            # Draw everything
-            draw_main_scene(
-                self.screen, self.bg_img, self.fountain_scaled_frames, self.fountain_frame_idx,
-                self.kris_idle_frames, self.kris_frame_idx, self.kris_rect,
-                self.susie_idle_frames, self.susie_frame_idx, self.susie_rect,
-                self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
-                self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
-                self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.invincible,
-                self.knight_idle_img, self.show_knight_idle, self.clock
-            )
-            # Draw swords
-            for sword in self.swords:
-                sword.draw(self.screen)
-            
-            # End the wave when all swords are gone after spawning ends
-            if self.sword_spawn_count >= self.sword_pairs and not self.swords:
-                    running = False
+    def iter_bullets(self):
+        w, h = self.up_img.get_size()
+        for sword in self.swords:
+            yield (int(sword.x), int(sword.y), -sword.speed, 0, int(w * 0.85), int(h * 0.85), 1)
 
-            # Timeout fallback to prevent infinite loops
-            if elapsed > timeout_duration:
-                running = False
-                
-            pygame.display.flip()
-            dt = self.clock.tick(60)
+    def is_done(self):
+        return self.state == 'done'
 
 # --- Attack5: Spinning Slash ---
-class Attack5:
+class Attack5(BaseAttack):
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
                  kris_idle_frames, kris_frame_idx, kris_rect,
                  susie_idle_frames, susie_frame_idx, susie_rect,
@@ -2009,8 +2150,12 @@ class Attack5:
                  battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
                  heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                  knight_idle_img, show_knight_idle, clock,
-                 base_dir=None, player_speed=2, sequences=None):
+                 base_dir=None, player_speed=2, sequences=None, game_clock=None, seed=None, input_source=None):
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.fountain_scaled_frames = fountain_scaled_frames
         self.fountain_frame_idx = fountain_frame_idx
@@ -2071,49 +2216,89 @@ class Attack5:
         self.slash_spin_slowdown_timer = 0
         self.slash_spin_slowdown_duration = 1000  # ms to slow down (increased from 500ms)
         self.slash_position = None  # Store random position for non-centered slashes
+        self.pattern = self.get_pattern()
         
         # Load assets
         self.load_assets()
         
         # Load sound effect
         try:
-            self.spinslash_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spinslash.wav'))
+            self.spinslash_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spinslash.wav'))
         except:
             self.spinslash_sfx = None
         
         # Trail setup
         self.trail_length = 10
         self.trail_alphas = [255 // (i + 2) for i in range(self.trail_length)]
-        self.knight_trail = []
+        self.knight_trail = Trail(self.trail_length)
 
         self.rotated_slash = None
 
+    def pattern_key(self):
+        # The slash positions are absolute, so the whole box is part of the key
+        return super().pattern_key() + (len(self.sequences), tuple(self.battle_box_rect))
+
+    def generate_pattern(self):
+        # Random positions for the non-centered slashes (from the second slash on)
+        margin = 50  # pixels from edge
+        min_x = self.battle_box_rect.left + margin
+        max_x = self.battle_box_rect.right - margin
+        min_y = self.battle_box_rect.top + margin
+        max_y = self.battle_box_rect.bottom - margin
+        positions = [None]
+        for _ in range(1, len(self.sequences)):
+            positions.append((self.rng.randint(min_x, max_x), self.rng.randint(min_y, max_y)))
+        return {'slash_positions': tuple(positions)}
+
     def load_assets(self):
         # Load knight attack animation frames
         knight_attack_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_attack_ol_center')
         idle_size = self.knight_idle_img.get_size()
         self.knight_attack_frames = []
         for i in range(6):
-            frame = pygame.image.load(os.path.join(knight_attack_dir, f'spr_roaringknight_attack_ol_center_{i}.png')).convert_alpha()
-            self.knight_attack_frames.append(pygame.transform.smoothscale(frame, idle_size))
+            self.knight_attack_frames.append(ASSETS.load(os.path.join(knight_attack_dir, f'spr_roaringknight_attack_ol_center_{i}.png'), idle_size))
         
         # Load slash sprites
         slash_dir = os.path.join(self.base_dir, 'sprites', 'spr_rk_spinslash')
         self.slash_sprites = {}
+        # Slashes are drawn at 300% of the battle box size (larger for more dodgeable gaps when clipped)
+        slash_size = (int(self.battle_box_rect.width * 3), int(self.battle_box_rect.height * 3))
+        self.slash_scaled = {}
+        self.slash_banks = {}  # (red_sprite, white) -> RotationBank, see slash_frame()
         for red_sprite, white_sprite in self.sequences:
             try:
-                red_img = pygame.image.load(os.path.join(slash_dir, red_sprite)).convert_alpha()
-                white_img = pygame.image.load(os.path.join(slash_dir, white_sprite)).convert_alpha()
+                red_img = ASSETS.load(os.path.join(slash_dir, red_sprite))
+                white_img = ASSETS.load(os.path.join(slash_dir, white_sprite))
                 self.slash_sprites[red_sprite] = (red_img, white_img)
+                self.slash_scaled[red_sprite] = (ASSETS.load(os.path.join(slash_dir, red_sprite), slash_size),
+                                                 ASSETS.load(os.path.join(slash_dir, white_sprite), slash_size))
             except pygame.error as e:
                 print(f"Error: {e}")
                 # Create a fallback sprite if loading fails
                 fallback = pygame.Surface((64, 64), pygame.SRCALPHA)
                 fallback.fill((255, 0, 0, 128))  # Red semi-transparent
                 self.slash_sprites[red_sprite] = (fallback, fallback)
+                scaled_fallback = pygame.transform.smoothscale(fallback, slash_size)
+                self.slash_scaled[red_sprite] = (scaled_fallback, scaled_fallback)
+
+    def slash_frame(self, red_sprite, white):
+        """
+        The current slash rotated to slash_angle and its rect at slash_position. The white one stands still during the damage phase, so it is
+        rotated once at its exact angle; the spinning red one comes in 2 degree steps, each rotated once. Every spin runs the same
+        angles (about 21 steps), so the banks keep a whole spin for the later sequences and resets.
+        Frames are cropped to twice the box, which covers the box from any slash_position inside it (drawing clips to the box).
+        """
+        key = (red_sprite, white)
+        bank = self.slash_banks.get(key)
+        if bank is None:
+            scaled = self.slash_scaled[red_sprite][1 if white else 0]
+            crop = (2 * self.battle_box_rect.width, 2 * self.battle_box_rect.height)
+            bank = self.slash_banks[key] = ASSETS.rotations(scaled, step=None if white else 2, crop=crop, trim=True,
+                                                            max_frames=2 if white else 24)
+        return bank.frame(self.slash_angle, self.slash_position)
     
     def handle_player_movement(self):
-        keys = pygame.key.get_pressed()
+        keys = self.get_keys()
         if keys[pygame.K_LEFT]:
             self.player_x -= self.player_speed
         if keys[pygame.K_RIGHT]:
@@ -2133,7 +2318,7 @@ class Attack5:
         self.handle_player_movement()
         
         # Update knight animation
-        self.knight_frame_idx = min(self.state_timer // self.knight_anim_speed, len(self.knight_attack_frames) - 1)
+        self.knight_frame_idx = min(int(self.state_timer // self.knight_anim_speed), len(self.knight_attack_frames) - 1)
         
         # Check if we should start a new sequence
         if self.state == 'knight_anim' and self.knight_frame_idx >= 1 and not self.slash_active:
@@ -2199,15 +2384,7 @@ class Attack5:
         
         # Generate random position for non-centered slashes (starting from second slash)
         if self.current_sequence > 0:
-            margin = 50  # pixels from edge
-            min_x = self.battle_box_rect.left + margin
-            max_x = self.battle_box_rect.right - margin
-            min_y = self.battle_box_rect.top + margin
-            max_y = self.battle_box_rect.bottom - margin
-            
-            random_x = random.randint(min_x, max_x)
-            random_y = random.randint(min_y, max_y)
-            self.slash_position = (random_x, random_y)
+            self.slash_position = self.pattern['slash_positions'][self.current_sequence]
         else:
             # First slash uses center position
             self.slash_position = self.battle_box_rect.center
@@ -2241,30 +2418,18 @@ class Attack5:
             self.knight_frame_idx = 0
     
     def check_collision(self):
-        now = pygame.time.get_ticks()
+        now = self.game_clock.get_ticks()
         if now <= self.invincible_until:
             return
         
-        # Get current slash sprite
+        # Get current slash sprite (white during damage phase), at 300% of battle box size and rotated
         red_sprite, white_sprite = self.sequences[self.current_sequence]
-        slash_img = self.slash_sprites[red_sprite][1]  # Use white sprite during damage phase
-        
-        # Create a surface to check collision
-        # Scale slash to 300% of battle box size and rotate it
-        scale_factor = 3
-        scaled_width = int(self.battle_box_rect.width * scale_factor)
-        scaled_height = int(self.battle_box_rect.height * scale_factor)
-        scaled_slash = pygame.transform.smoothscale(slash_img, (scaled_width, scaled_height))
-        self.rotated_slash = pygame.transform.rotate(scaled_slash, self.slash_angle)
+        self.rotated_slash, slash_rect = self.slash_frame(red_sprite, True)
         
         # Get player position
         player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
         player_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
         
-        # Calculate where the rotated slash is positioned (same as in draw method)
-        slash_rect = self.rotated_slash.get_rect()
-        slash_rect.center = self.slash_position
-        
         # Check if player rectangle overlaps with the slash rectangle
         if player_rect.colliderect(slash_rect):
             # Additional check: sample multiple points in the player area
@@ -2286,7 +2451,7 @@ class Attack5:
                     0 <= rel_y < self.rotated_slash.get_height()):
                     try:
                         pixel_alpha = self.rotated_slash.get_at((int(rel_x), int(rel_y)))[3]
-                        if pixel_alpha > 100:  # Only hit if pixel has significant alpha (actual slash line)
+                        if pixel_alpha > HIT_ALPHA:  # Only hit if pixel has significant alpha (actual slash line)
                             hit_detected = True
                             break
                     except (IndexError, ValueError):
@@ -2305,7 +2470,7 @@ class Attack5:
             self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
             self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
             self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.invincible,
-            None, False, self.clock
+            None, False, self.clock, game_clock=self.game_clock
         )
         # Draw knight attack animation
         if self.state != 'done':
@@ -2314,19 +2479,9 @@ class Attack5:
             knight_rect.left = self.battle_box_rect.right + 40
             knight_rect.centery = self.kris_rect.centery + 20
             # --- Knight sprite trail logic ---
-            self.knight_trail.insert(0, (knight_img.copy(), knight_rect.copy()))
-            if len(self.knight_trail) > self.trail_length:
-                self.knight_trail.pop()
-
-            for i, (img, rect) in enumerate(reversed(self.knight_trail)):
-                if i < len(self.trail_alphas):
-                    # Create a separate copy for alpha modification
-                    trail_img = img.copy()
-                    trail_img.set_alpha(self.trail_alphas[i])
-                    # Draw with a slight offset to simulate motion blur
-                    offset_rect = rect.copy()
-                    offset_rect.left -= i * 2  # Adjust offset as needed
-                    self.screen.blit(trail_img, offset_rect)
+            self.knight_trail.add(knight_img, knight_rect)
+            # Draw with a slight offset to simulate motion blur
+            self.knight_trail.draw(self.screen, self.trail_alphas, offset=0, spacing=-2)
 
             # Draw the main knight sprite
             self.screen.blit(knight_img, knight_rect)
@@ -2334,23 +2489,10 @@ class Attack5:
         # Draw slash if active
         if self.slash_active and self.current_sequence < len(self.sequences):
             red_sprite, white_sprite = self.sequences[self.current_sequence]
-            red_img, white_img = self.slash_sprites[red_sprite]
-            
-            # Use white sprite during damage phase, red sprite during warning and spinning phases
-            slash_img = white_img if self.slash_damage_active else red_img
-            
-            # Scale to 300% of battle box size (larger for more dodgeable gaps when clipped)
-            scale_factor = 3
-            scaled_width = int(self.battle_box_rect.width * scale_factor)
-            scaled_height = int(self.battle_box_rect.height * scale_factor)
-            scaled_slash = pygame.transform.smoothscale(slash_img, (scaled_width, scaled_height))
             
-            # Rotate the slash
-            rotated_slash = pygame.transform.rotate(scaled_slash, self.slash_angle)
-            
-            # Position the rotated slash
-            slash_rect = rotated_slash.get_rect()
-            slash_rect.center = self.slash_position
+            # Use white sprite during damage phase, red sprite during warning and spinning phases,
+            # scaled to 300% of battle box size and rotated
+            rotated_slash, slash_rect = self.slash_frame(red_sprite, self.slash_damage_active)
             
             # Create a clipping area for the battle box
             clip_rect = self.screen.get_clip()
@@ -2361,13 +2503,11 @@ class Attack5:
             
             # Restore clipping
             self.screen.set_clip(clip_rect)
-        
-        pygame.display.flip()
     
     def run(self):
         running = True
         while not self.is_done() and running:
-            dt = self.clock.tick(60)
+            dt = self.game_clock.tick(self.clock, 60)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                     pygame.quit()
@@ -2375,12 +2515,32 @@ class Attack5:
             
             self.update(dt)
             self.draw()
+            present(self.screen)
     
+    def slash_hazard(self):
+        """(Surface, rect) of the slash while it does damage, else None."""
+        if not self.slash_damage_active or self.slash_position is None or self.current_sequence >= len(self.sequences):
+            return None
+        red_sprite, white_sprite = self.sequences[self.current_sequence]
+        return self.slash_frame(red_sprite, True)
+
+    def iter_bullets(self):
+        # The slash is checked per pixel, its rotated bounds are the closest box
+        hazard = self.slash_hazard()
+        if hazard is not None:
+            rect = hazard[1]
+            yield (rect.centerx, rect.centery, 0, 0, rect.width, rect.height, 1)
+
+    def iter_hazard_shapes(self):
+        hazard = self.slash_hazard()
+        if hazard is not None:
+            yield hazard
+
     def is_done(self):
         return self.state == 'done'
 
 # --- Attack7: Random Cut Attack (based on Attack3) ---
-class Attack7:
+class Attack7(BaseAttack):
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
                  kris_idle_frames, kris_frame_idx, kris_rect,
                  susie_idle_frames, susie_frame_idx, susie_rect,
@@ -2389,11 +2549,15 @@ class Attack7:
                  heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                  knight_idle_img, show_knight_idle, clock,
                  knight_trail, trail_length, trail_alphas,
-                 cycles=7, base_dir=None, player_speed=1):
-        # Generate random cut modes for each cycle
-        cut_modes = []
-        for _ in range(cycles):
-            cut_modes.append(random.choice(['vertical', 'horizontal']))
+                 cycles=7, base_dir=None, player_speed=1, game_clock=None, seed=None, input_source=None):
+        self.screen = screen  # Attack3 draws on it, step(render=True) presents it
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
+        self.cycles = cycles
+        # Random cut modes for each cycle
+        self.pattern = self.get_pattern()
+        cut_modes = list(self.pattern['cut_modes'])
         
         # Create Attack3 instance with random cut modes
         self.attack3 = Attack3(
@@ -2405,9 +2569,37 @@ class Attack7:
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
             knight_trail, trail_length, trail_alphas,
-            cut_mode='vertical', cycles=cycles, base_dir=base_dir, player_speed=player_speed, cut_modes=cut_modes
+            cut_mode='vertical', cycles=cycles, base_dir=base_dir, player_speed=player_speed, cut_modes=cut_modes,
+            game_clock=game_clock, seed=seed, input_source=self.input_source
         )
+        self.game_clock = self.attack3.game_clock
+        self.heart_size = heart_size
+
+    def pattern_key(self):
+        return super().pattern_key() + (self.cycles,)
+
+    def generate_pattern(self):
+        return {'cut_modes': tuple(self.rng.choice(['vertical', 'horizontal']) for _ in range(self.cycles))}
     
+    def set_action(self, action):
+        super().set_action(action)
+        self.attack3.set_action(self.action)
+
+    def current_lives(self):
+        return self.attack3.player_lives
+
+    def get_observation(self):
+        # Attack3 fills this attack's buffers, so they survive reset() rebuilding it
+        self.attack3.observation = self.observation
+        self.observation = self.attack3.get_observation()
+        return self.observation
+
+    def update(self, dt):
+        self.attack3.update(dt)
+
+    def draw(self):
+        self.attack3.draw()
+
     def run(self):
         self.attack3.run()
     
@@ -2420,7 +2612,7 @@ class Attack8(Attack2):
         super().__init__(*args, **kwargs)
 
 # --- Attack10: Slash Wheel ---
-class Attack10:
+class Attack10(BaseAttack):
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
                  kris_idle_frames, kris_frame_idx, kris_rect,
                  susie_idle_frames, susie_frame_idx, susie_rect,
@@ -2428,8 +2620,12 @@ class Attack10:
                  battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
                  heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                  knight_idle_img, show_knight_idle, clock,
-                 base_dir=None, player_speed=2):
+                 base_dir=None, player_speed=2, game_clock=None, seed=None, input_source=None):
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.fountain_scaled_frames = fountain_scaled_frames
         self.fountain_frame_idx = fountain_frame_idx
@@ -2459,15 +2655,16 @@ class Attack10:
         self.show_knight_idle = show_knight_idle
         self.clock = clock
         self.base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
-        self.prepare_sprite = pygame.image.load("sprites/spr_roaringknight_flurry/spr_roaringknight_flurry_prepare.png").convert_alpha() # full path because it didn't load otherwise for some reason
+        self.prepare_sprite = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_flurry', 'spr_roaringknight_flurry_prepare.png'))
         self.player_speed = player_speed
         self.state = 'attack9'  # 'attack9' or 'slash_wheel'
         self.attack9 = None
+        self.slashwheel_hazard = None  # (Surface, rect) of the active slash, hit-tested per pixel
         self.slash_wheel_done = False
         self.play_slashwheel_sfx_cycle = 0
         # --- Knight sprite trail (ghost afterimage) ---
-        self.knight_trail = []
         self.trail_length = 10
+        self.knight_trail = Trail(self.trail_length)
         self.trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5][:self.trail_length]
         self.load_assets()
 
@@ -2475,30 +2672,31 @@ class Attack10:
         # Flurry animation
         flurry_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_flurry')
         # Load and scale flurry frames to match knight idle size (3x)
-        knight_idle_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_idle.png')).convert_alpha()
-        knight_target_size = (int(knight_idle_img.get_width() * 3), int(knight_idle_img.get_height() * 3))
-        self.flurry_frames = [pygame.transform.smoothscale(
-            pygame.image.load(os.path.join(flurry_dir, f'spr_roaringknight_flurry_{i}.png')).convert_alpha(),
-            knight_target_size
-        ) for i in range(3)]
+        knight_idle_w, knight_idle_h = ASSETS.image_size(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_idle.png'))
+        knight_target_size = (int(knight_idle_w * 3), int(knight_idle_h * 3))
+        self.flurry_frames = [
+            ASSETS.load(os.path.join(flurry_dir, f'spr_roaringknight_flurry_{i}.png'), knight_target_size)
+            for i in range(3)]
         # Load prepare sprite
-        self.prepare_sprite = pygame.transform.smoothscale(
-            pygame.image.load(os.path.join(flurry_dir, 'spr_roaringknight_flurry_prepare.png')).convert_alpha(),
-            knight_target_size
-        )
+        self.prepare_sprite = ASSETS.load(os.path.join(flurry_dir, 'spr_roaringknight_flurry_prepare.png'), knight_target_size)
         self.flurry_frame_idx = 0
         self.flurry_anim_timer = 0
         self.flurry_anim_speed = 4  # frames per sprite
         # Slash sprite
         spinslash_dir = os.path.join(self.base_dir, 'sprites', 'spr_rk_spinslash')
-        self.spinslash_img = pygame.image.load(os.path.join(spinslash_dir, 'spr_rk_spinslash_red.png')).convert_alpha()
+        self.spinslash_img = ASSETS.load(os.path.join(spinslash_dir, 'spr_rk_spinslash_red.png'))
+        # The spinning slash is 1.5x the battle box wide and drawn clipped to the box, so its bank keeps just that part
+        spin_w = int(self.battle_box_rect.width * 1.5)
+        spin_h = int(self.spinslash_img.get_height() * (spin_w / self.spinslash_img.get_width()))
+        spinslash_scaled = ASSETS.load(os.path.join(spinslash_dir, 'spr_rk_spinslash_red.png'), (spin_w, spin_h))
+        self.spinslash_bank = ASSETS.rotations(spinslash_scaled, step=2, crop=self.battle_box_rect.size, trim=True, prerender=True)
         # --- NEW: Load alt slash animation frames for marks ---
         slash_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_slash_red_alt')
         self.slash_anim_frames = []
         for i in range(5, 10):
             frame_path = os.path.join(slash_dir, f'spr_roaringknight_slash_red_alt_{i}.png')
             if os.path.exists(frame_path):
-                self.slash_anim_frames.append(pygame.image.load(frame_path).convert_alpha())
+                self.slash_anim_frames.append(ASSETS.load(frame_path))
         self.slash_anim_frames_count = len(self.slash_anim_frames)
         self.slash_anim_advance_per_frame = 2  # 2 frames per game frame
         # For scaling
@@ -2519,24 +2717,37 @@ class Attack10:
         self.slash_scale = int(self.box_side * 1.5)
         self.frame_counter = 0
         # Ensure spinslash sound effect is loaded
-        self.spinslash_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spinslash.wav'))
+        self.spinslash_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spinslash.wav'))
         # Add slash state sequence for the slash wheel phase
         self.slashwheel_slash_states = ['0', '1', 'trail']
         # Initialize SFX played flag for slash wheel
         self.slashwheel_sfx_played = False
         # Load slash wheel sprites
         slashwheel_dir = os.path.join(self.base_dir, 'sprites', 'spr_rk_slashwheel')
-        self.slashwheel_img_0 = pygame.image.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_0.png')).convert_alpha()
-        self.slashwheel_img_1 = pygame.image.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_1.png')).convert_alpha()
-        self.slashwheel_img_trail = pygame.image.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_trail.png')).convert_alpha()
+        self.slashwheel_img_0 = ASSETS.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_0.png'))
+        self.slashwheel_img_1 = ASSETS.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_1.png'))
+        self.slashwheel_img_trail = ASSETS.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_trail.png'))
         # Set scale for slash wheel sprites
         self.slashwheel_scale_w = int(self.battle_box_rect.width * 2.82) # (multiplied by square root of 8, which is the length of the diagonal of the battle box)
         self.slashwheel_scale_h = max(8, int(self.battle_box_rect.width // 6))
         # For the trail: very thin, very tall
         self.slashwheel_trail_w = max(2, int(self.battle_box_rect.width // 50))
         self.slashwheel_trail_h = int(self.battle_box_rect.width * 2.82)
+        # Slash wheel angles depend on where the spin stops, so each is rotated on first use. The second turn
+        # repeats the first one's angles, so the banks keep a turn's worth of slashes
+        slash_size = (self.slashwheel_scale_w, self.slashwheel_scale_h)
+        turn = int(360 / self.slash_wheel_angle_step)
+        self.slashwheel_banks = {
+            '0': ASSETS.rotations(ASSETS.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_0.png'), slash_size),
+                                  step=None, trim=True, max_frames=turn),
+            '1': ASSETS.rotations(ASSETS.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_1.png'), slash_size),
+                                  step=None, trim=True, max_frames=turn),
+            'trail': ASSETS.rotations(ASSETS.load(os.path.join(slashwheel_dir, 'spr_rk_slashwheel_trail.png'),
+                                                  (self.slashwheel_trail_h, self.slashwheel_trail_w)),
+                                      step=None, crop=self.battle_box_rect.size, trim=True, max_frames=turn),
+        }
 
-    def run(self):
+    def start_attack9(self):
         # Part 1: Attack9 logic (reuse Attack5)
         self.attack9 = Attack5(
             self.screen, self.bg_img, self.fountain_scaled_frames, self.fountain_frame_idx,
@@ -2546,7 +2757,8 @@ class Attack10:
             self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
             self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.invincible,
             self.knight_idle_img, self.show_knight_idle, self.clock,
-            base_dir=self.base_dir, player_speed=self.player_speed,
+            base_dir=self.base_dir, player_speed=self.player_speed, game_clock=self.game_clock, seed=self.seed,
+            input_source=self.input_source,
             sequences=[
                 ('spr_rk_spinslash4_red.png', 'spr_rk_spinslash4.png'),
                 ('spr_rk_spinslash4_red.png', 'spr_rk_spinslash4.png'),
@@ -2555,20 +2767,35 @@ class Attack10:
                 ('spr_rk_spinslash4_red.png', 'spr_rk_spinslash4.png')
             ]
         )
-        self.attack9.run()
-        self.player_lives = self.attack9.player_lives
+        self.attack9.set_action(self.action)
+
+    def set_action(self, action):
+        super().set_action(action)
+        if self.attack9 is not None:
+            self.attack9.set_action(self.action)
+
+    def current_lives(self):
+        if self.state == 'attack9' and self.attack9 is not None:
+            return self.attack9.player_lives
+        return self.player_lives
+
+    def get_observation(self):
+        # The heart lives in Attack9 until the slash wheel starts, it writes into this attack's buffers
+        if self.state == 'attack9' and self.attack9 is not None:
+            self.attack9.observation = self.observation
+            self.observation = self.attack9.get_observation()
+            return self.observation
+        return super().get_observation()
+
+    def start_slash_wheel(self):
         # Part 2: Slash Wheel
         self.state = 'slash_wheel'
-        self.run_slash_wheel()
-
-    def run_slash_wheel(self):
-        # Wait for the spin to finish, then start the slash sequence
-        running = True
         self.flurry_anim_timer = 0
         self.flurry_frame_idx = 0
         self.wheel_angle = 0.0
         self.spin_speed = 400
         self.wheel_angle_total = 0.0
+        self.spin_end_angle = 360 * 2
         self.slashwheel_state = 'spin'
         self.slashwheel_spin_stopped_angle = None
         self.slashwheel_slashes = []
@@ -2578,128 +2805,157 @@ class Attack10:
         self.slashwheel_slash_start_time = 0
         self.slashwheel_prev_slash = None
         self.slashwheel_prev_trail_time = 0
-        spin_end_angle = 360 * 2
-        frame_counter = 0
-        self.slashwheel_slash_start_frame = frame_counter  # Initialize before loop
+        self.slashwheel_draw_args = None
+        self.frame_counter = 0
+        self.slashwheel_slash_start_frame = self.frame_counter
         self.last_slash_sound_played = (-1, -1)  # (slash_index, state_idx) for sound effect logic
-        while running:
-            dt = self.clock.tick(60)
-            now = pygame.time.get_ticks()
-            frame_counter += 1
+
+    def update(self, dt):
+        if self.state == 'attack9':
+            if self.attack9 is None:
+                self.start_attack9()
+            self.attack9.update(dt)
+            if self.attack9.is_done():
+                self.player_lives = self.attack9.player_lives
+                self.start_slash_wheel()
+        elif self.state == 'slash_wheel':
+            self.update_slash_wheel(dt)
+
+    def draw(self):
+        if self.state == 'attack9' or self.slashwheel_draw_args is None:
+            self.attack9.draw()
+        else:
+            self.draw_slashwheel(self.game_clock.get_ticks(), **self.slashwheel_draw_args)
+
+    def run(self):
+        running = True
+        while running and not self.is_done():
+            dt = self.game_clock.tick(self.clock, 60)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                     pygame.quit()
                     sys.exit()
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
-                self.player_x -= self.player_speed
-            if keys[pygame.K_RIGHT]:
-                self.player_x += self.player_speed
-            if keys[pygame.K_UP]:
-                self.player_y -= self.player_speed
-            if keys[pygame.K_DOWN]:
-                self.player_y += self.player_speed
-            playable_rect = self.battle_box_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
-            self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
-            self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
-            self.flurry_anim_timer += 1
-            if self.flurry_anim_timer >= self.flurry_anim_speed:
-                self.flurry_frame_idx = (self.flurry_frame_idx + 1) % len(self.flurry_frames)
-                self.flurry_anim_timer = 0
-            # --- Collision logic for slash wheel phase ---
-            if self.slashwheel_state == 'slash':
-                # Only check collision during the '1' (active) state
-                if self.slashwheel_current_index < self.slash_wheel_max_slashes:
-                    angle = (self.slashwheel_spin_stopped_angle + self.slashwheel_current_index * self.slash_wheel_angle_step) % 360
-                    state = self.slashwheel_slash_states[self.slashwheel_slash_state_idx]
-                    if state == '1':
-                        # Get the slash image and transform it as in _draw_slashwheel_colored
-                        img = self.slashwheel_img_1
-                        scaled = pygame.transform.smoothscale(img, (self.slashwheel_scale_w, self.slashwheel_scale_h))
-                        rotated = pygame.transform.rotate(scaled, angle)
-                        rect = rotated.get_rect(center=self.battle_box_rect.center)
-                        player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-                        player_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
-                        # Only check if player is not invincible
-                        if now > getattr(self, 'invincible_until', 0):
-                            if player_rect.colliderect(rect):
-                                # Sample points in the player rect for pixel-perfect alpha check
-                                hit_detected = False
-                                sample_points = [
-                                    (player_center[0], player_center[1]),
-                                    (player_rect.left + 5, player_rect.top + 5),
-                                    (player_rect.right - 5, player_rect.top + 5),
-                                    (player_rect.left + 5, player_rect.bottom - 5),
-                                    (player_rect.right - 5, player_rect.bottom - 5)
-                                ]
-                                for px, py in sample_points:
-                                    rel_x = px - rect.left
-                                    rel_y = py - rect.top
-                                    if (0 <= rel_x < rotated.get_width() and 0 <= rel_y < rotated.get_height()):
-                                        try:
-                                            pixel_alpha = rotated.get_at((int(rel_x), int(rel_y)))[3]
-                                            if pixel_alpha > 100:
-                                                hit_detected = True
-                                                break
-                                        except (IndexError, ValueError):
-                                            continue
-                                if hit_detected:
-                                    self.player_lives = max(0, self.player_lives - 1)
-                                    self.invincible_until = now + 1000  # 1 second invincibility
-                                    self.invincible = True
-            if self.slashwheel_state == 'spin':
-                self.wheel_angle_total += self.spin_speed * dt / 1000.0
-                self.wheel_angle = self.wheel_angle_total % 360
-                self.draw_slashwheel(now, spinning=True)
-                if self.wheel_angle_total >= spin_end_angle:
-                    self.slashwheel_state = 'slash'
-                    self.slashwheel_spin_stopped_angle = self.wheel_angle % 360
-                    self.slashwheel_slash_start_time = now
-                    self.slashwheel_current_index = 0
-                    self.slashwheel_slash_state_idx = 0
-                    self.slashwheel_prev_slash = None
-                    self.slashwheel_prev_trail_time = 0
-            elif self.slashwheel_state == 'slash':
-                # State machine for each slash
-                if self.slashwheel_current_index >= self.slash_wheel_max_slashes and not self.slashwheel_trails:
-                    self.slashwheel_state = 'done'
-                    continue
-                # Handle trail expiration
-                self.slashwheel_trails = [(a, f) for (a, f) in self.slashwheel_trails if now - f < 1]
-                # Handle new slash
-                if self.slashwheel_current_index < self.slash_wheel_max_slashes:
-                    angle = (self.slashwheel_spin_stopped_angle + self.slashwheel_current_index * self.slash_wheel_angle_step) % 360
-                    state = self.slashwheel_slash_states[self.slashwheel_slash_state_idx]
-                    if state == '0':
-                        self.draw_slashwheel(now, spinning=False, slash_angle=angle, slash_state='0', prev_trail=self.slashwheel_prev_slash)
-                        if self.slashwheel_slash_state_idx_timer(frame_counter):
-                            self.slashwheel_slash_state_idx = 1
-                            self.slashwheel_slash_start_frame = frame_counter
-                    elif state == '1':
-                        self.draw_slashwheel(now, spinning=False, slash_angle=angle, slash_state='1', prev_trail=self.slashwheel_prev_slash)
-                        if self.slashwheel_slash_state_idx_timer(frame_counter):
-                            self.slashwheel_slash_state_idx = 2
-                            self.slashwheel_slash_start_frame = frame_counter
-                    elif state == 'trail':
-                        if self.slashwheel_prev_slash is not None:
-                            self.slashwheel_trails.append((self.slashwheel_prev_slash, frame_counter))
-                        self.draw_slashwheel(now, spinning=False, slash_angle=angle, slash_state='trail', prev_trail=None)
-                        if self.slashwheel_slash_state_idx_timer(frame_counter):
-                            self.slashwheel_current_index += 1
-                            self.slashwheel_slash_state_idx = 0
-                            self.slashwheel_slash_start_frame = frame_counter
-                            self.slashwheel_prev_slash = angle
-                            if self.play_slashwheel_sfx_cycle == 0:
-                                self.spinslash_sfx.play()
-                                self.play_slashwheel_sfx_cycle += 1
-                            if self.play_slashwheel_sfx_cycle >= 3:
-                                self.play_slashwheel_sfx_cycle = 0
-                            else:
-                                self.play_slashwheel_sfx_cycle += 1
-                else:
-                    self.draw_slashwheel(now, spinning=False, slash_angle=None, slash_state=None, prev_trail=None)
-            elif self.slashwheel_state == 'done':
-                running = False
+            self.update(dt)
+            self.draw()
+            present(self.screen)
+
+    def update_slash_wheel(self, dt):
+        now = self.game_clock.get_ticks()
+        self.frame_counter += 1
+        frame_counter = self.frame_counter
+        keys = self.get_keys()
+        if keys[pygame.K_LEFT]:
+            self.player_x -= self.player_speed
+        if keys[pygame.K_RIGHT]:
+            self.player_x += self.player_speed
+        if keys[pygame.K_UP]:
+            self.player_y -= self.player_speed
+        if keys[pygame.K_DOWN]:
+            self.player_y += self.player_speed
+        playable_rect = self.battle_box_rect.inflate(-2 * self.battle_box_border, -2 * self.battle_box_border)
+        self.player_x = max(playable_rect.left, min(self.player_x, playable_rect.right - self.heart_size))
+        self.player_y = max(playable_rect.top, min(self.player_y, playable_rect.bottom - self.heart_size))
+        self.flurry_anim_timer += 1
+        if self.flurry_anim_timer >= self.flurry_anim_speed:
+            self.flurry_frame_idx = (self.flurry_frame_idx + 1) % len(self.flurry_frames)
+            self.flurry_anim_timer = 0
+        # --- Collision logic for slash wheel phase ---
+        self.slashwheel_hazard = None
+        if self.slashwheel_state == 'slash':
+            # Only check collision during the '1' (active) state
+            if self.slashwheel_current_index < self.slash_wheel_max_slashes:
+                angle = self.slashwheel_angle(self.slashwheel_current_index)
+                state = self.slashwheel_slash_states[self.slashwheel_slash_state_idx]
+                if state == '1':
+                    # Get the slash image transformed as in _draw_slashwheel_colored
+                    rotated, rect = self.slashwheel_banks['1'].frame(angle, self.battle_box_rect.center)
+                    self.slashwheel_hazard = (rotated, rect)
+                    player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
+                    player_center = (self.player_x + self.heart_size // 2, self.player_y + self.heart_size // 2)
+                    # Only check if player is not invincible
+                    if now > getattr(self, 'invincible_until', 0):
+                        if player_rect.colliderect(rect):
+                            # Sample points in the player rect for pixel-perfect alpha check
+                            hit_detected = False
+                            sample_points = [
+                                (player_center[0], player_center[1]),
+                                (player_rect.left + 5, player_rect.top + 5),
+                                (player_rect.right - 5, player_rect.top + 5),
+                                (player_rect.left + 5, player_rect.bottom - 5),
+                                (player_rect.right - 5, player_rect.bottom - 5)
+                            ]
+                            for px, py in sample_points:
+                                rel_x = px - rect.left
+                                rel_y = py - rect.top
+                                if (0 <= rel_x < rotated.get_width() and 0 <= rel_y < rotated.get_height()):
+                                    try:
+                                        pixel_alpha = rotated.get_at((int(rel_x), int(rel_y)))[3]
+                                        if pixel_alpha > HIT_ALPHA:
+                                            hit_detected = True
+                                            break
+                                    except (IndexError, ValueError):
+                                        continue
+                            if hit_detected:
+                                self.player_lives = max(0, self.player_lives - 1)
+                                self.invincible_until = now + 1000  # 1 second invincibility
+                                self.invincible = True
+        if self.slashwheel_state == 'spin':
+            self.wheel_angle_total += self.spin_speed * dt / 1000.0
+            self.wheel_angle = self.wheel_angle_total % 360
+            self.slashwheel_draw_args = {'spinning': True}
+            if self.wheel_angle_total >= self.spin_end_angle:
+                self.slashwheel_state = 'slash'
+                self.slashwheel_spin_stopped_angle = self.wheel_angle % 360
+                self.slashwheel_slash_start_time = now
+                self.slashwheel_current_index = 0
+                self.slashwheel_slash_state_idx = 0
+                self.slashwheel_prev_slash = None
+                self.slashwheel_prev_trail_time = 0
+        elif self.slashwheel_state == 'slash':
+            # State machine for each slash
+            if self.slashwheel_current_index >= self.slash_wheel_max_slashes and not self.slashwheel_trails:
+                self.slashwheel_state = 'done'
+                self.state = 'done'
+                return
+            # Handle trail expiration
+            self.slashwheel_trails = [(a, f) for (a, f) in self.slashwheel_trails if now - f < 1]
+            # Handle new slash
+            if self.slashwheel_current_index < self.slash_wheel_max_slashes:
+                angle = self.slashwheel_angle(self.slashwheel_current_index)
+                state = self.slashwheel_slash_states[self.slashwheel_slash_state_idx]
+                if state == '0':
+                    self.slashwheel_draw_args = {'slash_angle': angle, 'slash_state': '0', 'prev_trail': self.slashwheel_prev_slash}
+                    if self.slashwheel_slash_state_idx_timer(frame_counter):
+                        self.slashwheel_slash_state_idx = 1
+                        self.slashwheel_slash_start_frame = frame_counter
+                elif state == '1':
+                    self.slashwheel_draw_args = {'slash_angle': angle, 'slash_state': '1', 'prev_trail': self.slashwheel_prev_slash}
+                    if self.slashwheel_slash_state_idx_timer(frame_counter):
+                        self.slashwheel_slash_state_idx = 2
+                        self.slashwheel_slash_start_frame = frame_counter
+                elif state == 'trail':
+                    if self.slashwheel_prev_slash is not None:
+                        self.slashwheel_trails.append((self.slashwheel_prev_slash, frame_counter))
+                    self.slashwheel_draw_args = {'slash_angle': angle, 'slash_state': 'trail'}
+                    if self.slashwheel_slash_state_idx_timer(frame_counter):
+                        self.slashwheel_current_index += 1
+                        self.slashwheel_slash_state_idx = 0
+                        self.slashwheel_slash_start_frame = frame_counter
+                        self.slashwheel_prev_slash = angle
+                        if self.play_slashwheel_sfx_cycle == 0:
+                            self.spinslash_sfx.play()
+                            self.play_slashwheel_sfx_cycle += 1
+                        if self.play_slashwheel_sfx_cycle >= 3:
+                            self.play_slashwheel_sfx_cycle = 0
+                        else:
+                            self.play_slashwheel_sfx_cycle += 1
+            else:
+                self.slashwheel_draw_args = {}
+
+    def slashwheel_angle(self, index):
+        # Counted within one turn, so the second turn lands on exactly the first one's angles and reuses their banked frames
+        index %= int(360 / self.slash_wheel_angle_step)
+        return (self.slashwheel_spin_stopped_angle + index * self.slash_wheel_angle_step) % 360
 
     def slashwheel_slash_state_idx_timer(self, frame_counter):
         # Returns True if 1 frame has passed since last state change
@@ -2712,8 +2968,8 @@ class Attack10:
             self.susie_idle_frames, self.susie_frame_idx, self.susie_rect,
             self.ralsei_idle_frames, self.ralsei_frame_idx, self.ralsei_rect,
             self.battle_box_rect, self.battle_box_color, self.battle_box_border_color, self.battle_box_border,
-            self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, pygame.time.get_ticks() < getattr(self, 'invincible_until', 0),
-            None, False, self.clock
+            self.heart_img_0, self.heart_img_1, self.player_x, self.player_y, self.heart_size, self.font, self.player_lives, self.game_clock.get_ticks() < getattr(self, 'invincible_until', 0),
+            None, False, self.clock, game_clock=self.game_clock
         )
         # Use prepare sprite during spinning phase, otherwise use flurry animation
         knight_img = self.prepare_sprite if spinning else self.flurry_frames[self.flurry_frame_idx]
@@ -2721,28 +2977,13 @@ class Attack10:
         knight_rect.left = self.battle_box_rect.right + 40
         knight_rect.centery = self.kris_rect.centery + 20
         # --- Knight sprite trail logic ---
-        self.knight_trail.insert(0, (knight_img.copy(), knight_rect.copy()))
-        if len(self.knight_trail) > self.trail_length:
-            self.knight_trail.pop()
-        for i, (img, rect) in enumerate(reversed(self.knight_trail)):
-            if i >= len(self.trail_alphas):
-                break
-            img = img.copy()
-            img.set_alpha(self.trail_alphas[i])
-            rect = rect.copy()
-            rect.left += 40 + i * 10
-            self.screen.blit(img, rect)
+        self.knight_trail.add(knight_img, knight_rect)
+        self.knight_trail.draw(self.screen, self.trail_alphas)
         # Draw the main knight sprite
         self.screen.blit(knight_img, knight_rect)
         # Draw spinning phase
         if spinning:
-            orig_slash_w, orig_slash_h = self.spinslash_img.get_width(), self.spinslash_img.get_height()
-            new_slash_w = int(self.battle_box_rect.width * 1.5)
-            scale_factor = new_slash_w / orig_slash_w
-            new_slash_h = int(orig_slash_h * scale_factor)
-            scaled_slash = pygame.transform.smoothscale(self.spinslash_img, (new_slash_w, new_slash_h))
-            rotated_slash = pygame.transform.rotate(scaled_slash, self.wheel_angle)
-            slash_rect = rotated_slash.get_rect(center=self.battle_box_rect.center)
+            rotated_slash, slash_rect = self.spinslash_bank.frame(self.wheel_angle, self.battle_box_rect.center)
             prev_clip = self.screen.get_clip()
             self.screen.set_clip(self.battle_box_rect)
             self.screen.blit(rotated_slash, slash_rect)
@@ -2755,18 +2996,15 @@ class Attack10:
             # Draw current slash
             if slash_angle is not None and slash_state is not None:
                 if slash_state == '0':
-                    self._draw_slashwheel_colored(slash_angle, self.slashwheel_img_0)
+                    self._draw_slashwheel_colored(slash_angle, self.slashwheel_banks['0'])
                 elif slash_state == '1':
-                    self._draw_slashwheel_colored(slash_angle, self.slashwheel_img_1)
+                    self._draw_slashwheel_colored(slash_angle, self.slashwheel_banks['1'])
                 elif slash_state == 'trail':
                     self._draw_slashwheel_trail(slash_angle)
-        pygame.display.flip()
 
-    def _draw_slashwheel_colored(self, angle, img):
-        # Scale and rotate
-        scaled = pygame.transform.smoothscale(img, (self.slashwheel_scale_w, self.slashwheel_scale_h))
-        rotated = pygame.transform.rotate(scaled, angle)
-        rect = rotated.get_rect(center=self.battle_box_rect.center)
+    def _draw_slashwheel_colored(self, angle, bank):
+        # Scaled and rotated
+        rotated, rect = bank.frame(angle, self.battle_box_rect.center)
         # Draw outside the box as normal
         self.screen.blit(rotated, rect)
         # Recolor inside the box using a temporary surface for the battle box
@@ -2782,21 +3020,32 @@ class Attack10:
         self.screen.blit(temp_surf, box.topleft)
 
     def _draw_slashwheel_trail(self, angle):
-        # Scale and rotate the trail to be long and thin in the same direction as the main slashes
-        scaled = pygame.transform.smoothscale(self.slashwheel_img_trail, (self.slashwheel_trail_h, self.slashwheel_trail_w))
-        rotated = pygame.transform.rotate(scaled, angle)
-        rect = rotated.get_rect(center=self.battle_box_rect.center)
+        # The trail scaled long and thin and rotated in the same direction as the main slashes (box part only)
+        rotated, rect = self.slashwheel_banks['trail'].frame(angle, self.battle_box_rect.center)
         # Only draw inside the box using a temporary surface
         box = self.battle_box_rect
         temp_surf = pygame.Surface((box.width, box.height), pygame.SRCALPHA)
         temp_surf.blit(rotated, (-(box.left - rect.left), -(box.top - rect.top)))
         self.screen.blit(temp_surf, box.topleft)
 
+    def iter_bullets(self):
+        if self.slashwheel_hazard is not None:
+            hitbox = self.slashwheel_hazard[1]
+            yield (hitbox.centerx, hitbox.centery, 0, 0, hitbox.width, hitbox.height, 1)
+
+    def iter_hazard_shapes(self):
+        if self.state == 'attack9' and self.attack9 is not None:
+            return self.attack9.iter_hazard_shapes()
+        return iter(() if self.slashwheel_hazard is None else (self.slashwheel_hazard,))
+
     def is_done(self):
         return self.state == 'done'
 
 
-class FinalAttackSequence:
+class FinalAttackSequence(BaseAttack):
+    max_bullets = 256  # Up to 31 roar stars with 6 starchilds each
+    snapshot_shared = BaseAttack.snapshot_shared | {'spiral1_pos', 'spiral2_pos'}  # laid out once in __init__
+    snapshot_flat = frozenset(('stars', 'active_spiral_stars'))
     def load_anim_frames(self, folder_name, numeric_sort=False):
         """
         Helper method to load animation frames from a folder.
@@ -2808,14 +3057,14 @@ class FinalAttackSequence:
         """
         folder_path = os.path.join(self.base_dir, 'sprites', folder_name)
         files = [
-            os.path.join(folder_path, f) for f in os.listdir(folder_path)
+            os.path.join(folder_path, f) for f in ASSETS.list_dir(folder_path)
             if f.lower().endswith(('.png', '.jpg', '.jpeg'))
         ]
         if numeric_sort:
             files.sort(key=lambda x: int(''.join(filter(str.isdigit, os.path.basename(x))) or 0))
         else:
             files = sorted(files)
-        return [pygame.image.load(f).convert_alpha() for f in files]
+        return ASSETS.load_frames(files)
 
     def __init__(self, screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
                  kris_idle_frames, kris_frame_idx, kris_rect,
@@ -2824,7 +3073,7 @@ class FinalAttackSequence:
                  battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
                  heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                  knight_idle_img, show_knight_idle, clock,
-                 base_dir=None, player_speed=2):
+                 base_dir=None, player_speed=2, game_clock=None, seed=None, input_source=None):
         self.base_dir = base_dir
         self.flourish_frames = self.load_anim_frames('spr_roaringknight_front_flourish', numeric_sort=True)
         self.flourish_animating = False
@@ -2833,6 +3082,10 @@ class FinalAttackSequence:
         self.roar_channel = None
 
         self.screen = screen
+        self.game_clock = game_clock or RealClock()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input_source = input_source or KeyboardInput()
         self.bg_img = bg_img
         self.bg_img_initial = bg_img.copy()
         self.fountain_scaled_frames = fountain_scaled_frames
@@ -2874,8 +3127,8 @@ class FinalAttackSequence:
         self.box_center = self.battle_box_rect.center
         self.screen_rect = self.screen.get_rect()
         # Load knight and glow sprites
-        self.knight_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_0.png')).convert_alpha()
-        self.knight_glow_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_glow.png')).convert_alpha()
+        self.knight_img = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_0.png'))
+        self.knight_glow_img = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_glow.png'))
         self.knight_pos = (self.screen_rect.centerx, self.screen_rect.centery - 100)
         self.knight_glow_layers = 3
         self.knight_glow_scales = [1.5, 2.0, 2.5]
@@ -2891,12 +3144,14 @@ class FinalAttackSequence:
         self.stars = []
         self.spiral_stars = []
         # Phases 1+2 (star attack) setup
-        self.star_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_0.png')).convert_alpha()
+        self.star_img = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star', 'spr_knight_bullet_star_0.png'))
         self.last_star_spawn = 0
         self.star_spawn_interval = 250  # ms between spawns
         self.star_scale = 4.0  # 400%
         self.spiral_star_scale = 2.5 # 250%
         self.min_star_scale = 1.2  # Minimum scale for stars
+        # Stars shrink every frame, so they are drawn from 64 prescaled sizes between the smallest and largest
+        self.star_ladder = ASSETS.scale_ladder(self.star_img, self.min_star_scale, max(self.star_scale, self.spiral_star_scale))
         self.star_duration = 1200  # ms, faster star movement
         self.spiral_star_duration = 300  # ms, faster spiral stars
         self.phase1_duration = 4000  # ms
@@ -2904,7 +3159,7 @@ class FinalAttackSequence:
         self.phase1_timer = 0
         self.stars = []
         # Load star absorb sound effect
-        self.absorb_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spr_knight_absorb_stars.wav'))
+        self.absorb_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spr_knight_absorb_stars.wav'))
         self.absorb_sfx_played = False
         # Transition animation
         self.flourish_paused = False
@@ -2915,27 +3170,24 @@ class FinalAttackSequence:
         self.flourish_fadein = False
         # Load flourish frames (do this once, not every frame)
         flourish_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_flourish')
-        flourish_files = sorted([os.path.join(flourish_dir, f) for f in os.listdir(flourish_dir) if f.endswith('.png')])
+        flourish_files = sorted([os.path.join(flourish_dir, f) for f in ASSETS.list_dir(flourish_dir) if f.endswith('.png')])
         scale_factor = 2.25
 
         # Use the original knight image as the reference for size
-        orig_knight_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_0.png')).convert_alpha()
-        target_size = (int(orig_knight_img.get_width() * scale_factor), int(orig_knight_img.get_height() * scale_factor))
+        orig_w, orig_h = ASSETS.image_size(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_0.png'))
+        target_size = (int(orig_w * scale_factor), int(orig_h * scale_factor))
 
-        self.flourish_frames = [
-            pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), target_size)
-            for f in flourish_files
-        ]
+        self.flourish_frames = ASSETS.load_frames(flourish_files, target_size)
         self.flourish_frame_idx = 0
         self.flourish_anim_timer = 0
         self.flourish_anim_speed = 100  # ms per frame
         # Roar sequence 
         # After flourish frame setup
         roar_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_roar')
-        roar_files = sorted([os.path.join(roar_dir, f) for f in os.listdir(roar_dir) if f.endswith('.png')])
-        self.roar_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), target_size) for f in roar_files]
+        roar_files = sorted([os.path.join(roar_dir, f) for f in ASSETS.list_dir(roar_dir) if f.endswith('.png')])
+        self.roar_frames = ASSETS.load_frames(roar_files, target_size)
         self.roar_anim_speed = 200  # ms per frame
-        self.roar_sfx = pygame.mixer.Sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spr_knight_roar.wav'))
+        self.roar_sfx = ASSETS.sound(os.path.join(self.base_dir, 'sprites', 'sound_effects', 'spr_knight_roar.wav'))
         self.roar_sfx_played = False
         self.roar_duration = 4500  # ms, 4.5 seconds
         self.roar_star_spawn_interval = 250  # ms between spawns, doubled for longer delay
@@ -2945,13 +3197,13 @@ class FinalAttackSequence:
         star_anim_dir = os.path.join(self.base_dir, 'sprites', 'spr_knight_bullet_star')
         self.star_transform_frames = []
         for i in range(4):  # 4 frames in the animation
-            frame = pygame.image.load(os.path.join(star_anim_dir, f'spr_knight_bullet_star_{i}.png')).convert_alpha()
+            frame = ASSETS.load(os.path.join(star_anim_dir, f'spr_knight_bullet_star_{i}.png'))
             self.star_transform_frames.append(frame)
             
         # Load starchild sprites
         starchild_dir = os.path.join(self.base_dir, 'sprites', 'spr_knight_starchild')
-        self.starchild_up = pygame.image.load(os.path.join(starchild_dir, 'spr_knight_starchild_up.png')).convert_alpha()
-        self.starchild_down = pygame.image.load(os.path.join(starchild_dir, 'spr_knight_starchild_down.png')).convert_alpha()
+        self.starchild_up = ASSETS.load(os.path.join(starchild_dir, 'spr_knight_starchild_up.png'))
+        self.starchild_down = ASSETS.load(os.path.join(starchild_dir, 'spr_knight_starchild_down.png'))
         
         self.roar_star_img = self.star_img
         self.roar_star_min_scale = self.min_star_scale * 0.25  # 25% of the original size
@@ -2974,27 +3226,24 @@ class FinalAttackSequence:
         self.screen_width = self.screen.get_width()
         self.state6_start_time = None
         self.explosion_time_recorded = False
-        self.diagonal_slash_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_front_slash.png')).convert_alpha()
         self.front_slash_knight_frames = [ 
-            pygame.image.load(f"sprites/spr_roaringknight_front_slash/spr_roaringknight_front_slash_{i}.png").convert_alpha() 
+            ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', f'spr_roaringknight_front_slash_{i}.png'))
             for i in range(6) 
             ]
-        self.knight_trail_img = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_5.png')).convert_alpha() # final frame of the slash animation
+        self.knight_trail_img = ASSETS.load(os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash', 'spr_roaringknight_front_slash_5.png')) # final frame of the slash animation
         # Load raw
-        self.diagonal_slash_img_raw = pygame.image.load(os.path.join(self.base_dir, 'sprites', 'spr_front_slash.png')).convert_alpha()
+        diagonal_slash_path = os.path.join(self.base_dir, 'sprites', 'spr_front_slash.png')
+        self.diagonal_slash_img_raw = ASSETS.load(diagonal_slash_path)
         # Scale it
         self.target_height = self.screen_height * 2
         self.scale_factor = self.target_height / self.diagonal_slash_img_raw.get_height()
         self.target_width = int(self.diagonal_slash_img_raw.get_width() * self.scale_factor)
-        self.diagonal_slash_img = pygame.transform.smoothscale(self.diagonal_slash_img_raw, (self.target_width, self.target_height))
+        self.diagonal_slash_img = ASSETS.load(diagonal_slash_path, (self.target_width, self.target_height))
         self.slash_duration = 500 # ms
         front_slash_dir = os.path.join(self.base_dir, 'sprites', 'spr_roaringknight_front_slash')
-        front_slash_files = sorted([os.path.join(front_slash_dir, f) for f in os.listdir(front_slash_dir) if f.endswith('.png')])
+        front_slash_files = sorted([os.path.join(front_slash_dir, f) for f in ASSETS.list_dir(front_slash_dir) if f.endswith('.png')])
         
-        self.front_slash_frames = [
-            pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), target_size)
-            for f in front_slash_files
-        ]
+        self.front_slash_frames = ASSETS.load_frames(front_slash_files, target_size)
         self.front_slash_frame_idx = 0
         self.front_slash_anim_timer = 0
         self.front_slash_anim_speed = 200  # ms per frame
@@ -3003,22 +3252,62 @@ class FinalAttackSequence:
         self.split_offset = 0
         self.pre_split_surface = None
         self.knight_y = self.knight_pos[1]
-        self.knight_trail = []
         self.trail_length = 13
+        self.knight_trail = Trail(self.trail_length)
         self.trail_alphas = [80, 75, 70, 65, 60, 55, 50, 45, 40, 35, 30, 25, 20]
         self.rise_start_time = 0
         self.front_slash_anim_done = False
+        self.knight_rising = False
+        self.slash_progress = 0.0
+        # Per-run state, previously locals of run()
+        self.start_time = None
+        self.aura_anim_timer = 0  # For animated aura
+        self.bg_alpha = 255
+        self.knight_progress = 0.0
+        self.flourish_alpha = 255
+        self.active_spiral_stars = []
+        self.phase1_start_time = None
+        self.phase2_start_time = None
+        self.spiral1_pos, self.spiral2_pos = self.build_spiral_positions()
+        self.frame_state = self.state
+        self.done = False
+        self.phase1_total_stars = 20  # Or however many you want in phase 1
+        self.pattern = self.get_pattern()
+
+    def pattern_key(self):
+        return super().pattern_key() + (self.phase1_total_stars, self.roar_duration, self.screen_rect.size)
+
+    def generate_pattern(self):
+        w, h = self.screen_rect.width, self.screen_rect.height
+        # Phase 1 stars: a random perimeter point and a curve offset (angle, radius) each
+        phase1_stars = []
+        for _ in range(self.phase1_total_stars):
+            edge = self.rng.choice(['top','bottom','left','right'])
+            if edge == 'top':
+                x, y = self.rng.randint(0, w), 0
+            elif edge == 'bottom':
+                x, y = self.rng.randint(0, w), h
+            elif edge == 'left':
+                x, y = 0, self.rng.randint(0, h)
+            else:
+                x, y = w, self.rng.randint(0, h)
+            phase1_stars.append((x, y, self.rng.uniform(0, 2*math.pi), self.rng.uniform(80, 200)))
+        # Roar stars: end points on the bottom/left/right edges, as many as the fastest spawn rate allows
+        roar_stars = []
+        for _ in range(int(self.roar_duration / 150) + 1):
+            edge = self.rng.choice(['bottom', 'left', 'right'])
+            if edge == 'bottom':
+                roar_stars.append((self.rng.randint(0, w), h))
+            elif edge == 'left':
+                roar_stars.append((0, self.rng.randint(0, h)))
+            else:
+                roar_stars.append((w, self.rng.randint(0, h)))
+        return {'phase1_stars': tuple(phase1_stars), 'roar_stars': tuple(roar_stars)}
 
         
 
-    def run(self):
-        running = True
-        clock = self.clock or pygame.time.Clock()
-        start_time = pygame.time.get_ticks()
-        self.aura_anim_timer = 0  # For animated aura
+    def build_spiral_positions(self):
         w,h = self.screen_rect.width, self.screen_rect.height
-        phase1_start_time = None
-        phase2_start_time = None
         # Number of segments
         N = 36  # for width
         M = 24  # for height
@@ -3052,498 +3341,460 @@ class FinalAttackSequence:
         # Right edge (bottom to top)
         for i in range(1, M-1):
             spiral2_pos.append((w, h - h * i / (M-1)))
-        blacked_out = False
-        while running:
-            dt = clock.tick(60)
-            now = pygame.time.get_ticks() - start_time
-            self.aura_anim_timer += dt
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-            # Handle player input (movement) during attack phases (every frame, not just on events)
-            if self.state >= 1:
-                keys = pygame.key.get_pressed()
-                speed = self.player_speed
-                if keys[pygame.K_LEFT]:
-                    self.player_x -= speed
-                if keys[pygame.K_RIGHT]:
-                    self.player_x += speed
-                if keys[pygame.K_UP]:
-                    self.player_y -= speed
-                if keys[pygame.K_DOWN]:
-                    self.player_y += speed
-                    # Clamp to screen bounds
-                    self.player_x = max(0, min(self.player_x, self.screen_rect.width - self.heart_size))
-                    self.player_y = max(0, min(self.player_y, self.screen_rect.height - self.heart_size))
-            # Fade out background in sync with box
-            if self.state == 0:
-                progress = min(1.0, now / self.box_expand_duration)
-                self.box_scale = 1.0 + (self.box_target_scale - 1.0) * progress
-                self.box_alpha = int(255 * (1.0 - progress))
-                self.bg_alpha = self.box_alpha  # Sync bg fade with box
-                self.draw_fading_bg()
-                self.draw_expanding_box()
-                self.draw_heart()
-                if progress >= 1.0:
-                    # Erase everything and fill black before continuing
-                    self.screen.fill((0, 0, 0))
-                    pygame.display.flip()
-                    blacked_out = True
-                    self.state = 1
-                    self.timer = now
-                    continue  # Skip the rest of this frame to ensure black fill
-            elif self.state == 1:
-                # Knight fade in and drift down
-                knight_fade_time = 1000  # ms
-                knight_progress = min(1.0, (now - self.timer) / knight_fade_time)
-                if blacked_out:
-                    self.screen.fill((0, 0, 0))
-                else:
-                    self.draw_fading_bg(final=True)
-                self.draw_knight_with_aura(fade=knight_progress)
-                self.draw_heart()
-                if knight_progress >= 1.0:
-                    self.state = 2  # Ready for phase 1
-
-            elif self.state == 2:
-                # PHASE 1: Stars spawn and move toward knight
-                if phase1_start_time is None:
-                    phase1_start_time = now
-                    self.phase1_star_count = 0  # Track how many stars have spawned
-                    self.phase1_total_stars = 20  # Or however many you want in this phase
-                    self.phase1_base_duration = self.star_duration
-                    self.phase1_base_interval = self.star_spawn_interval
-                    # Play absorb sound effect once for the duration of phase 1 + phase 2
-                    if not self.absorb_sfx_played:
-                        total_duration = self.phase1_duration + self.phase2_duration
-                        self.absorb_sfx.play(maxtime=total_duration)
-                        self.absorb_sfx_played = True
-                self.draw_fading_bg(final=True)
-                self.draw_knight_with_aura(fade=1.0)
-                invincible = hasattr(self, 'invincible_until') and pygame.time.get_ticks() < self.invincible_until
-                if invincible:
-                    if ((pygame.time.get_ticks() // 100) % 2) == 0:
-                        heart_draw_img = self.heart_img_0
-                    else:
-                        heart_draw_img = self.heart_img_1
-                else:
-                    heart_draw_img = self.heart_img_0
-                self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
-                # Spawn stars at random perimeter points
-                if (now - self.last_star_spawn > self.star_spawn_interval and
-                    self.phase1_star_count < self.phase1_total_stars and
-                    now - phase1_start_time < self.phase1_duration):
-                    w, h = self.screen_rect.width, self.screen_rect.height
-                    edge = random.choice(['top','bottom','left','right'])
-                    if edge == 'top':
-                        x = random.randint(0, w)
-                        y = 0
-                    elif edge == 'bottom':
-                        x = random.randint(0, w)
-                        y = h
-                    elif edge == 'left':
-                        x = 0
-                        y = random.randint(0, h)
-                    else:
-                        x = w
-                        y = random.randint(0, h)
-                    start_pos = (x, y)
-                    end_pos = self.knight_pos
-                    # Curve offset: pick a control point between start and end, offset by up to 200px
-                    mx, my = (x + end_pos[0]) / 2, (y + end_pos[1]) / 2
-                    offset_angle = random.uniform(0, 2*math.pi)
-                    offset_radius = random.uniform(80, 200)
-                    cx = mx + offset_radius * math.cos(offset_angle)
-                    cy = my + offset_radius * math.sin(offset_angle)
-                    # Make each next star faster (lower duration)
-                    star_duration = max(350, int(self.phase1_base_duration * (0.96 ** self.phase1_star_count)))
-                    star = self.Star(self.star_img, start_pos, end_pos, (cx, cy), self.star_scale, self.min_star_scale, star_duration)
-                    self.stars.append(star)
-                    # Reduce interval for next star, min 50ms
-                    self.star_spawn_interval = max(50, int(self.phase1_base_interval * (0.96 ** self.phase1_star_count)))
-                    self.last_star_spawn = now
-                    self.phase1_star_count += 1
-                player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-                hit_this_frame = False
-                # Update and draw stars
-                for star in self.stars:
-                    star.update(pygame.time.get_ticks())
-                    star.draw(self.screen)
-                    if not hasattr(self, 'invincible_until') or pygame.time.get_ticks() >= self.invincible_until:
-                        if star.get_hitbox().colliderect(player_rect):
-                            hit_this_frame = True
-                # Remove finished stars
-                self.stars = [s for s in self.stars if not s.done]
-                # Handle hit and invincibility
-                if hit_this_frame and not invincible:
-                    self.player_lives = max(0, self.player_lives - 1)
-                    self.invincible_until = pygame.time.get_ticks() + 1000  # 1 second invincibility
-                if now - phase1_start_time > self.phase1_duration:
-                    self.state = 3  # Next phase
-
-            elif self.state == 3:
-                # PHASE 2: Spiral stars
-                if phase2_start_time is None:
-                    phase2_start_time = now
-                    self.spiral_stars_spawned = False
-                    w, h = self.screen_rect.width, self.screen_rect.height
-                    knight_pos = self.knight_pos # I forgot why it's here but there's an error when I remove it
-                    # User-defined spiral positions (4 pairs)
-                    self.spiral_star_pairs = list(zip(spiral1_pos, spiral2_pos))
-                    self.spiral_star_spawn_idx = 0
-                    self.spiral_star_spawn_interval = 30  # ms between pairs
-                    self.spiral_star_last_spawn = now
-                    self.active_spiral_stars = []
-                    self.spiral_stars_spawned = True
-                # Draw phase 2
-                self.screen.fill((0, 0, 0))
-                self.draw_knight_with_aura(fade=1.0)
-                invincible = hasattr(self, 'invincible_until') and pygame.time.get_ticks() < self.invincible_until
-                if invincible:
-                    if ((pygame.time.get_ticks() // 100) % 2) == 0:
-                        heart_draw_img = self.heart_img_0
-                    else:
-                        heart_draw_img = self.heart_img_1
-                else:
-                    heart_draw_img = self.heart_img_0
-                self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
-                now_abs = pygame.time.get_ticks()
-                # Spawn next pair if needed
-                if self.spiral_stars_spawned and self.spiral_star_spawn_idx < len(self.spiral_star_pairs):
-                    if now_abs - self.spiral_star_last_spawn >= self.spiral_star_spawn_interval or self.spiral_star_spawn_idx == 0:
-                        pair = self.spiral_star_pairs[self.spiral_star_spawn_idx]
-                        for start_pos in pair:
-                            star = self.SpiralStar(self.star_img, start_pos, self.knight_pos, self.spiral_star_scale, self.min_star_scale, self.spiral_star_duration)
-                            self.active_spiral_stars.append(star)
-                        self.spiral_star_spawn_idx += 1
-                        self.spiral_star_last_spawn = now_abs
-                player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
-                hit_this_frame = False        
-                # Update and draw all active spiral stars
-                for star in self.active_spiral_stars:
-                    star.update(now_abs)
-                    star.draw(self.screen)
-                    if not hasattr(self, 'invincible_until') or pygame.time.get_ticks() >= self.invincible_until:
-                        if star.get_hitbox().colliderect(player_rect):
-                            hit_this_frame = True
-                # Remove finished spiral stars
-                self.active_spiral_stars = [s for s in self.active_spiral_stars if not s.done]
-                # Handle hit and invincibility
-                if hit_this_frame and not invincible:
-                    self.player_lives = max(0, self.player_lives - 1)
-                    self.invincible_until = pygame.time.get_ticks() + 1000  # 1 second invincibility
-                # End phase after last pair is spawned and all stars are done
-                if self.spiral_star_spawn_idx >= len(self.spiral_star_pairs) and not self.active_spiral_stars:
-                    self.state = 4  # Next phase
-
-            elif self.state == 4:
-                # Clear all stars
-                self.stars = []
-                self.spiral_stars = []
-                self.active_spiral_stars = []
-                self.screen.fill((0, 0, 0))  # Or draw your background if needed
+        return spiral1_pos, spiral2_pos
 
-                # Animate the flourish
-                now_ticks = pygame.time.get_ticks()
-                if not hasattr(self, 'flourish_anim_start'):
-                    self.flourish_anim_start = now_ticks
-                    self.flourish_frame_idx = 0
+    def update(self, dt):
+        if self.start_time is None:
+            self.start_time = self.game_clock.get_ticks()
+        now = self.game_clock.get_ticks() - self.start_time
+        self.aura_anim_timer += dt
+        # draw() renders the state this frame was simulated in, even if it advanced below
+        self.frame_state = self.state
+        # Handle player input (movement) during attack phases (every frame, not just on events)
+        if self.state >= 1:
+            keys = self.get_keys()
+            speed = self.player_speed
+            if keys[pygame.K_LEFT]:
+                self.player_x -= speed
+            if keys[pygame.K_RIGHT]:
+                self.player_x += speed
+            if keys[pygame.K_UP]:
+                self.player_y -= speed
+            if keys[pygame.K_DOWN]:
+                self.player_y += speed
+                # Clamp to screen bounds
+                self.player_x = max(0, min(self.player_x, self.screen_rect.width - self.heart_size))
+                self.player_y = max(0, min(self.player_y, self.screen_rect.height - self.heart_size))
+        # Fade out background in sync with box
+        if self.state == 0:
+            progress = min(1.0, now / self.box_expand_duration)
+            self.box_scale = 1.0 + (self.box_target_scale - 1.0) * progress
+            self.box_alpha = int(255 * (1.0 - progress))
+            self.bg_alpha = self.box_alpha  # Sync bg fade with box
+            if progress >= 1.0:
+                self.state = 1
+                self.timer = now
+        elif self.state == 1:
+            # Knight fade in and drift down
+            knight_fade_time = 1000  # ms
+            self.knight_progress = min(1.0, (now - self.timer) / knight_fade_time)
+            if self.knight_progress >= 1.0:
+                self.state = 2  # Ready for phase 1
+
+        elif self.state == 2:
+            # PHASE 1: Stars spawn and move toward knight
+            if self.phase1_start_time is None:
+                self.phase1_start_time = now
+                self.phase1_star_count = 0  # Track how many stars have spawned
+                self.phase1_base_duration = self.star_duration
+                self.phase1_base_interval = self.star_spawn_interval
+                # Play absorb sound effect once for the duration of phase 1 + phase 2
+                if not self.absorb_sfx_played:
+                    total_duration = self.phase1_duration + self.phase2_duration
+                    self.absorb_sfx.play(maxtime=total_duration)
+                    self.absorb_sfx_played = True
+            invincible = hasattr(self, 'invincible_until') and self.game_clock.get_ticks() < self.invincible_until
+            # Spawn stars at random perimeter points
+            if (now - self.last_star_spawn > self.star_spawn_interval and
+                self.phase1_star_count < self.phase1_total_stars and
+                now - self.phase1_start_time < self.phase1_duration):
+                x, y, offset_angle, offset_radius = self.pattern['phase1_stars'][self.phase1_star_count]
+                start_pos = (x, y)
+                end_pos = self.knight_pos
+                # Curve offset: pick a control point between start and end, offset by up to 200px
+                mx, my = (x + end_pos[0]) / 2, (y + end_pos[1]) / 2
+                cx = mx + offset_radius * math.cos(offset_angle)
+                cy = my + offset_radius * math.sin(offset_angle)
+                # Make each next star faster (lower duration)
+                star_duration = max(350, int(self.phase1_base_duration * (0.96 ** self.phase1_star_count)))
+                star = self.Star(self.star_ladder, start_pos, end_pos, (cx, cy), self.star_scale, self.min_star_scale, star_duration, game_clock=self.game_clock)
+                self.stars.append(star)
+                # Reduce interval for next star, min 50ms
+                self.star_spawn_interval = max(50, int(self.phase1_base_interval * (0.96 ** self.phase1_star_count)))
+                self.last_star_spawn = now
+                self.phase1_star_count += 1
+            player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
+            hit_this_frame = False
+            # Update stars
+            for star in self.stars:
+                star.update(self.game_clock.get_ticks())
+                if not hasattr(self, 'invincible_until') or self.game_clock.get_ticks() >= self.invincible_until:
+                    if star.get_hitbox().colliderect(player_rect):
+                        hit_this_frame = True
+            # Remove finished stars
+            self.stars = [s for s in self.stars if not s.done]
+            # Handle hit and invincibility
+            if hit_this_frame and not invincible:
+                self.player_lives = max(0, self.player_lives - 1)
+                self.invincible_until = self.game_clock.get_ticks() + 1000  # 1 second invincibility
+            if now - self.phase1_start_time > self.phase1_duration:
+                self.state = 3  # Next phase
+
+        elif self.state == 3:
+            # PHASE 2: Spiral stars
+            if self.phase2_start_time is None:
+                self.phase2_start_time = now
+                self.spiral_stars_spawned = False
+                # User-defined spiral positions (4 pairs)
+                self.spiral_star_pairs = list(zip(self.spiral1_pos, self.spiral2_pos))
+                self.spiral_star_spawn_idx = 0
+                self.spiral_star_spawn_interval = 30  # ms between pairs
+                self.spiral_star_last_spawn = now
+                self.active_spiral_stars = []
+                self.spiral_stars_spawned = True
+            invincible = hasattr(self, 'invincible_until') and self.game_clock.get_ticks() < self.invincible_until
+            now_abs = self.game_clock.get_ticks()
+            # Spawn next pair if needed
+            if self.spiral_stars_spawned and self.spiral_star_spawn_idx < len(self.spiral_star_pairs):
+                if now_abs - self.spiral_star_last_spawn >= self.spiral_star_spawn_interval or self.spiral_star_spawn_idx == 0:
+                    pair = self.spiral_star_pairs[self.spiral_star_spawn_idx]
+                    for start_pos in pair:
+                        star = self.SpiralStar(self.star_ladder, start_pos, self.knight_pos, self.spiral_star_scale, self.min_star_scale, self.spiral_star_duration, game_clock=self.game_clock)
+                        self.active_spiral_stars.append(star)
+                    self.spiral_star_spawn_idx += 1
+                    self.spiral_star_last_spawn = now_abs
+            player_rect = pygame.Rect(self.player_x, self.player_y, self.heart_size, self.heart_size)
+            hit_this_frame = False        
+            # Update all active spiral stars
+            for star in self.active_spiral_stars:
+                star.update(now_abs)
+                if not hasattr(self, 'invincible_until') or self.game_clock.get_ticks() >= self.invincible_until:
+                    if star.get_hitbox().colliderect(player_rect):
+                        hit_this_frame = True
+            # Remove finished spiral stars
+            self.active_spiral_stars = [s for s in self.active_spiral_stars if not s.done]
+            # Handle hit and invincibility
+            if hit_this_frame and not invincible:
+                self.player_lives = max(0, self.player_lives - 1)
+                self.invincible_until = self.game_clock.get_ticks() + 1000  # 1 second invincibility
+            # End phase after last pair is spawned and all stars are done
+            if self.spiral_star_spawn_idx >= len(self.spiral_star_pairs) and not self.active_spiral_stars:
+                self.state = 4  # Next phase
+
+        elif self.state == 4:
+            # Clear all stars
+            self.stars = []
+            self.spiral_stars = []
+            self.active_spiral_stars = []
+
+            # Animate the flourish
+            now_ticks = self.game_clock.get_ticks()
+            if not hasattr(self, 'flourish_anim_start'):
+                self.flourish_anim_start = now_ticks
+                self.flourish_frame_idx = 0
+                self.flourish_paused = False
+                self.flourish_pause_start = 0
+                self.flourish_fadein = False
+                self.flourish_fadein_start = 0
+
+            # Handle pause and fade logic
+            if self.flourish_frame_idx == 5 and not self.flourish_paused:
+                # Start pause
+                self.flourish_paused = True
+                self.flourish_pause_start = now_ticks
+
+            if self.flourish_paused:
+                # During pause, fade out completely, then fade in to 75%
+                pause_elapsed = now_ticks - self.flourish_pause_start
+                if pause_elapsed < self.flourish_pause_duration:
+                    self.flourish_alpha = 0  # Fully transparent
+                elif pause_elapsed < self.flourish_pause_duration + self.flourish_fadein_duration:
+                    self.flourish_fadein = True
+                    self.flourish_fadein_start = self.flourish_pause_start + self.flourish_pause_duration
+                    # Fade in from 0 to 191 (75%)
+                    fadein_elapsed = pause_elapsed - self.flourish_pause_duration
+                    self.flourish_alpha = int(191 * (fadein_elapsed / self.flourish_fadein_duration))
+                else:
+                    # End pause and fade-in, set frame 5 to 75% alpha, resume animation
                     self.flourish_paused = False
-                    self.flourish_pause_start = 0
                     self.flourish_fadein = False
-                    self.flourish_fadein_start = 0
-
-                # Handle pause and fade logic
-                if self.flourish_frame_idx == 5 and not self.flourish_paused:
-                    # Start pause
-                    self.flourish_paused = True
-                    self.flourish_pause_start = now_ticks
-
-                if self.flourish_paused:
-                    # During pause, fade out completely, then fade in to 75%
-                    pause_elapsed = now_ticks - self.flourish_pause_start
-                    if pause_elapsed < self.flourish_pause_duration:
-                        alpha = 0  # Fully transparent
-                    elif pause_elapsed < self.flourish_pause_duration + self.flourish_fadein_duration:
-                        self.flourish_fadein = True
-                        self.flourish_fadein_start = self.flourish_pause_start + self.flourish_pause_duration
-                        # Fade in from 0 to 191 (75%)
-                        fadein_elapsed = pause_elapsed - self.flourish_pause_duration
-                        alpha = int(191 * (fadein_elapsed / self.flourish_fadein_duration))
-                    else:
-                        # End pause and fade-in, set frame 5 to 75% alpha, resume animation
-                        self.flourish_paused = False
-                        self.flourish_fadein = False
-                        alpha = 191
-                        # Advance to next frame after fade-in
-                        self.flourish_anim_start += (self.flourish_pause_duration + self.flourish_fadein_duration)
-                        self.flourish_frame_idx += 1
-                else:
-                    # Normal frame advancement
-                    if now_ticks - self.flourish_anim_start > self.flourish_frame_idx * self.flourish_anim_speed:
-                        self.flourish_frame_idx += 1
-
-                    # Determine alpha for current frame
-                    if self.flourish_frame_idx <= 1:
-                        alpha = 255
-                    elif 2 <= self.flourish_frame_idx < 5:
-                        # Fade from 255 to 51 over frames 2-5
-                        alpha = int(255 - ((self.flourish_frame_idx - 2) / 3) * (255 - 51))
-                    elif self.flourish_frame_idx == 5:
-                        alpha = 191 if not self.flourish_fadein else alpha  # 75% after fade-in
-                    else:
-                        alpha = 255
-
-                if self.flourish_frame_idx >= len(self.flourish_frames) - 1:
-                    self.flourish_frame_idx = len(self.flourish_frames) - 1
-                    if not self.roar_sfx_played:
-                        self.roar_sfx.play()
-                        self.roar_sfx_played = True
-                    self.state = 5
-
-                flourish_img = self.flourish_frames[self.flourish_frame_idx].copy()
-                flourish_img.set_alpha(alpha)
-                flourish_rect = flourish_img.get_rect(center=self.knight_pos)
-                self.screen.blit(flourish_img, flourish_rect)
-
-                # Draw the heart (with invincibility flash)
-                invincible = hasattr(self, 'invincible_until') and pygame.time.get_ticks() < self.invincible_until
-                if invincible:
-                    if ((pygame.time.get_ticks() // 100) % 2) == 0:
-                        heart_draw_img = self.heart_img_0
-                    else:
-                        heart_draw_img = self.heart_img_1
+                    self.flourish_alpha = 191
+                    # Advance to next frame after fade-in
+                    self.flourish_anim_start += (self.flourish_pause_duration + self.flourish_fadein_duration)
+                    self.flourish_frame_idx += 1
+            else:
+                # Normal frame advancement
+                if now_ticks - self.flourish_anim_start > self.flourish_frame_idx * self.flourish_anim_speed:
+                    self.flourish_frame_idx += 1
+
+                # Determine alpha for current frame
+                if self.flourish_frame_idx <= 1:
+                    self.flourish_alpha = 255
+                elif 2 <= self.flourish_frame_idx < 5:
+                    # Fade from 255 to 51 over frames 2-5
+                    self.flourish_alpha = int(255 - ((self.flourish_frame_idx - 2) / 3) * (255 - 51))
+                elif self.flourish_frame_idx == 5:
+                    self.flourish_alpha = 191 if not self.flourish_fadein else self.flourish_alpha  # 75% after fade-in
                 else:
-                    heart_draw_img = self.heart_img_0
-                self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
-
-            elif self.state == 5:
-                self.screen.fill((0, 0, 0))
-                now_ticks = pygame.time.get_ticks()
-                if not hasattr(self, 'roar_anim_start'):
-                    self.roar_anim_start = now_ticks
-                    self.roar_phase_start_time = now_ticks
-                    self.roar_star_count = 0
-                
-                # Check if roar has ended
-                roar_elapsed = now_ticks - self.roar_anim_start
-                if roar_elapsed >= self.roar_duration and not self.stars_returning:
-                    self.stars_returning = True
-                    for star in self.roar_stars:
-                        star.state = 'slight_return'
-                        star.starchild_up_img = self.starchild_up
-                        star.starchild_down_img = self.starchild_down
-                        star.state = 'slight_return'
-                        star.return_start = now_ticks
-                        star.transform_frames = self.star_transform_frames
-                    
-                    # After star return starts, handle reverse flourish
-                    if not self.reverse_flourish_started:
-                        self.reverse_flourish_started = True
-                        self.reverse_flourish_start_time = now_ticks
-                        # Create reverse frames (reverse the flourish animation)
-                        self.reverse_flourish_frames = self.flourish_frames[::-1]
-                        self.reverse_flourish_frame_idx = 0
-                        self.reverse_flourish_anim_speed = 150  # Slowed down from 100 to 150ms per frame to match star return duration
+                    self.flourish_alpha = 255
+
+            if self.flourish_frame_idx >= len(self.flourish_frames) - 1:
+                self.flourish_frame_idx = len(self.flourish_frames) - 1
+                if not self.roar_sfx_played:
+                    self.roar_sfx.play()
+                    self.roar_sfx_played = True
+                self.state = 5
+
+        elif self.state == 5:
+            now_ticks = self.game_clock.get_ticks()
+            if not hasattr(self, 'roar_anim_start'):
+                self.roar_anim_start = now_ticks
+                self.roar_phase_start_time = now_ticks
+                self.roar_star_count = 0
+            
+            # Check if roar has ended
+            roar_elapsed = now_ticks - self.roar_anim_start
+            if roar_elapsed >= self.roar_duration and not self.stars_returning:
+                self.stars_returning = True
+                for star in self.roar_stars:
+                    star.state = 'slight_return'
+                    star.starchild_up_img = self.starchild_up
+                    star.starchild_down_img = self.starchild_down
+                    star.state = 'slight_return'
+                    star.return_start = now_ticks
+                    star.transform_frames = self.star_transform_frames
                 
-                # Handle reverse flourish animation
-                reverse_flourish_done = False
-                if self.reverse_flourish_started:
-                    reverse_elapsed = now_ticks - self.reverse_flourish_start_time
-                    if reverse_elapsed > self.reverse_flourish_frame_idx * self.reverse_flourish_anim_speed:
-                        self.reverse_flourish_frame_idx += 1
-                    
-                    if self.reverse_flourish_frame_idx >= len(self.reverse_flourish_frames):
-                        reverse_flourish_done = True
-                        # Always draw the last frame after animation is done
-                        reverse_img = self.reverse_flourish_frames[-1]
-                        reverse_rect = reverse_img.get_rect(center=self.knight_pos)
-                        self.screen.blit(reverse_img, reverse_rect)
-                    else:
-                        # Draw reverse flourish
-                        reverse_img = self.reverse_flourish_frames[self.reverse_flourish_frame_idx]
-                        reverse_rect = reverse_img.get_rect(center=self.knight_pos)
-                        self.screen.blit(reverse_img, reverse_rect)
+                # After star return starts, handle reverse flourish
+                if not self.reverse_flourish_started:
+                    self.reverse_flourish_started = True
+                    self.reverse_flourish_start_time = now_ticks
+                    # Create reverse frames (reverse the flourish animation)
+                    self.reverse_flourish_frames = self.flourish_frames[::-1]
+                    self.reverse_flourish_frame_idx = 0
+                    self.reverse_flourish_anim_speed = 150  # Slowed down from 100 to 150ms per frame to match star return duration
+            
+            # Handle reverse flourish animation
+            reverse_flourish_done = False
+            if self.reverse_flourish_started:
+                reverse_elapsed = now_ticks - self.reverse_flourish_start_time
+                if reverse_elapsed > self.reverse_flourish_frame_idx * self.reverse_flourish_anim_speed:
+                    self.reverse_flourish_frame_idx += 1
                 
-                # Spawn stars at intervals, only during the first 8 seconds of the roar
-                if roar_elapsed < self.roar_duration:
-                    # Calculate accelerating spawn interval and star duration
-                    acceleration = self.roar_acceleration_factor ** self.roar_star_count
-                    current_spawn_interval = max(150, int(self.roar_base_spawn_interval * acceleration))
-                    current_star_duration = max(800, int(self.roar_base_duration * acceleration))
-                    
-                    if now_ticks - self.last_roar_star_spawn > current_spawn_interval:
-                        # Pick a random point on the outline of the battle box
-                        w, h = self.screen_rect.width, self.screen_rect.height
-                        edge = random.choice(['bottom', 'left', 'right'])
-                        if edge == 'bottom':
-                            x = random.randint(0, w)
-                            y = h
-                        elif edge == 'left':
-                            x = 0
-                            y = random.randint(0, h)
-                        else:
-                            x = w
-                            y = random.randint(0, h)
-                        end_pos = (x, y)
-                        start_pos = self.knight_pos
-                        star = self.RoarStar(self.roar_star_img, start_pos, end_pos, self.roar_star_min_scale, self.roar_star_max_scale, current_star_duration)
-                        self.roar_stars.append(star)
-                        self.last_roar_star_spawn = now_ticks
-                        self.roar_star_count += 1    
+                if self.reverse_flourish_frame_idx >= len(self.reverse_flourish_frames):
+                    reverse_flourish_done = True
+            
+            # Spawn stars at intervals, only during the first 8 seconds of the roar
+            if roar_elapsed < self.roar_duration:
+                # Calculate accelerating spawn interval and star duration
+                acceleration = self.roar_acceleration_factor ** self.roar_star_count
+                current_spawn_interval = max(150, int(self.roar_base_spawn_interval * acceleration))
+                current_star_duration = max(800, int(self.roar_base_duration * acceleration))
                 
-                # Draw the heart (with invincibility flash)
-                invincible = hasattr(self, 'invincible_until') and pygame.time.get_ticks() < self.invincible_until
-                if invincible:
-                    if ((pygame.time.get_ticks() // 100) % 2) == 0:
-                        heart_draw_img = self.heart_img_0
-                    else:
-                        heart_draw_img = self.heart_img_1
-                else:
-                    heart_draw_img = self.heart_img_0
-                # Always update and draw all roar stars
-                for star in self.roar_stars:
-                    star.update(now_ticks)
-                    star.draw(self.screen)
-                # Remove finished stars
-                self.roar_stars = [s for s in self.roar_stars if not s.done]
-                # Heart rect for collision (scaled image assumed)
-                hit_this_frame = False
-                heart_rect = heart_draw_img.get_rect(topleft=(self.player_x, self.player_y))
-
-                # Check collision with all roar stars and their starchilds
-                for star in self.roar_stars:
-                    hitbox = star.get_hitbox()
-                    if hitbox and hitbox.colliderect(heart_rect):
-                        hit_this_frame = True
+                if now_ticks - self.last_roar_star_spawn > current_spawn_interval:
+                    # Pick a random point on the outline of the battle box
+                    roar_stars = self.pattern['roar_stars']
+                    end_pos = roar_stars[self.roar_star_count % len(roar_stars)]
+                    start_pos = self.knight_pos
+                    star = self.RoarStar(self.roar_star_img, start_pos, end_pos, self.roar_star_min_scale, self.roar_star_max_scale, current_star_duration, game_clock=self.game_clock)
+                    self.roar_stars.append(star)
+                    self.last_roar_star_spawn = now_ticks
+                    self.roar_star_count += 1    
+            
+            invincible = hasattr(self, 'invincible_until') and self.game_clock.get_ticks() < self.invincible_until
+            # Always update all roar stars
+            for star in self.roar_stars:
+                star.update(now_ticks)
+            # Remove finished stars
+            self.roar_stars = [s for s in self.roar_stars if not s.done]
+            # Heart rect for collision (scaled image assumed)
+            hit_this_frame = False
+            heart_rect = self.heart_img_0.get_rect(topleft=(self.player_x, self.player_y))
 
-                    if star.state == 'exploded':
-                        for starchild in star.starchilds:
-                            sc_hitbox = starchild.get_hitbox()
-                            if sc_hitbox and sc_hitbox.colliderect(heart_rect):
-                                hit_this_frame = True
-                # Only end the attack when both reverse flourish and all stars are done
-                if reverse_flourish_done and not self.roar_stars:
-                    self.explosion_time = pygame.time.get_ticks()
-                    self.explosion_time_recorded = True
-                    self.state = 6
-                    self.state6_start_time = pygame.time.get_ticks()
-                # Draw roar animation only if not in reverse flourish
-                if not self.reverse_flourish_started:
-                    frame = ((now_ticks - self.roar_anim_start) // self.roar_anim_speed) % len(self.roar_frames)
-                    roar_img = self.roar_frames[frame]
-                    roar_rect = roar_img.get_rect(center=self.knight_pos)
-                    self.screen.blit(roar_img, roar_rect)
-                if hit_this_frame and not invincible:
-                    self.player_lives = max(0, self.player_lives - 1)
-                    self.invincible_until = pygame.time.get_ticks() + 1000  # 1 second invincibility
-                
-                self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
-
-            elif self.state == 6:
-                now = pygame.time.get_ticks()
-                self.screen.fill((0, 0, 0))  # Clear the screen to black
-                front_slash_img = self.front_slash_frames[0]
-                front_slash_rect = front_slash_img.get_rect(center=self.knight_pos)
-                invincible = hasattr(self, 'invincible_until') and pygame.time.get_ticks() < self.invincible_until
-                if invincible:
-                    if ((pygame.time.get_ticks() // 100) % 2) == 0:
-                        heart_draw_img = self.heart_img_0
-                    else:
-                        heart_draw_img = self.heart_img_1
-                else:
-                    heart_draw_img = self.heart_img_0
+            # Check collision with all roar stars and their starchilds
+            for star in self.roar_stars:
+                hitbox = star.get_hitbox()
+                if hitbox and hitbox.colliderect(heart_rect):
+                    hit_this_frame = True
 
-                time_since_explosion = now - self.explosion_time
-                progress = min(1.0, time_since_explosion / self.slash_duration)
-                print(f"Progress: {progress}")
+                if star.state == 'exploded':
+                    for starchild in star.starchilds:
+                        sc_hitbox = starchild.get_hitbox()
+                        if sc_hitbox and sc_hitbox.colliderect(heart_rect):
+                            hit_this_frame = True
+            # Only end the attack when both reverse flourish and all stars are done
+            if reverse_flourish_done and not self.roar_stars:
+                self.explosion_time = self.game_clock.get_ticks()
+                self.explosion_time_recorded = True
+                self.state = 6
+                self.state6_start_time = self.game_clock.get_ticks()
+            if hit_this_frame and not invincible:
+                self.player_lives = max(0, self.player_lives - 1)
+                self.invincible_until = self.game_clock.get_ticks() + 1000  # 1 second invincibility
+
+        elif self.state == 6:
+            now = self.game_clock.get_ticks()
+            time_since_explosion = now - self.explosion_time
+            progress = min(1.0, time_since_explosion / self.slash_duration)
+            self.slash_progress = progress
+
+            if progress >= 0.5:
+                if now - self.front_slash_anim_timer >= self.front_slash_anim_speed:
+                    self.front_slash_frame_idx += 1
+                    self.front_slash_anim_timer = now
+                if self.front_slash_frame_idx >= (len(self.front_slash_frames) - 1):
+                    self.front_slash_frame_idx = len(self.front_slash_frames) - 2  # hold on last frame (not glow image) for exit sequence
+                    if not self.front_slash_anim_done:
+                        self.front_slash_anim_done = True
+                        self.rise_start_time = now
+                front_slash_img = self.front_slash_frames[self.front_slash_frame_idx]
+            else:
+                front_slash_img = self.front_slash_frames[0]  # idle frame
 
-                # Determine width scaling (only in second half)
-                if progress < 0.5:
-                    scale_x = 1.0
-                else:
-                    shrink_progress = (progress - 0.5) / 0.5
-                    scale_x = 1.0 - 0.7 * shrink_progress
-
-                if progress >= 0.5:
-                    if now - self.front_slash_anim_timer >= self.front_slash_anim_speed:
-                        self.front_slash_frame_idx += 1
-                        self.front_slash_anim_timer = now
-                    if self.front_slash_frame_idx >= (len(self.front_slash_frames) - 1):
-                        self.front_slash_frame_idx = len(self.front_slash_frames) - 2  # hold on last frame (not glow image) for exit sequence
-                        if not self.front_slash_anim_done:
-                            self.front_slash_anim_done = True
-                            self.rise_start_time = now
-                    front_slash_img = self.front_slash_frames[self.front_slash_frame_idx]
-                else:
-                    front_slash_img = self.front_slash_frames[0]  # idle frame
+            if progress >= 1.0:
+                if not self.front_slash_anim_done:
+                    self.front_slash_anim_done = True
+                    self.rise_start_time = now
+                self.knight_rising = now - self.rise_start_time >= 500
+                if self.knight_rising:
+                    rise_speed = 8  # pixels per frame
+                    self.knight_y -= rise_speed
 
-                
-                scaled_width = max(1, int(self.target_width * scale_x))
-                scaled_surf = pygame.transform.smoothscale(self.diagonal_slash_img, (scaled_width, self.target_height))
-                
-                dx = 0.10 * self.screen_width
-                dy = self.screen_height
-                angle = -math.degrees(math.atan2(dy, dx)) + 90
-                rotated_slash = pygame.transform.rotate(scaled_surf, angle)
+                    # Add current position to the trail
+                    self.knight_trail.add(front_slash_img, front_slash_img.get_rect(center=(self.knight_pos[0], self.knight_y)))
+
+                    # Exit when fully offscreen
+                    if self.knight_y + front_slash_img.get_height() < 0:
+                        self.done = True
+
+    def draw(self):
+        if self.frame_state == 0:
+            self.draw_fading_bg()
+            self.draw_expanding_box()
+            self.draw_heart()
+        elif self.frame_state == 1:
+            self.screen.fill((0, 0, 0))
+            self.draw_knight_with_aura(fade=self.knight_progress)
+            self.draw_heart()
+        elif self.frame_state == 2:
+            self.draw_fading_bg(final=True)
+            self.draw_knight_with_aura(fade=1.0)
+            self.screen.blit(self._heart_draw_img(), (self.player_x, self.player_y))
+            for star in self.stars:
+                star.draw(self.screen)
+        elif self.frame_state == 3:
+            self.screen.fill((0, 0, 0))
+            self.draw_knight_with_aura(fade=1.0)
+            self.screen.blit(self._heart_draw_img(), (self.player_x, self.player_y))
+            for star in self.active_spiral_stars:
+                star.draw(self.screen)
+        elif self.frame_state == 4:
+            self.screen.fill((0, 0, 0))  # Or draw your background if needed
+            flourish_img = self.flourish_frames[self.flourish_frame_idx].copy()
+            flourish_img.set_alpha(self.flourish_alpha)
+            flourish_rect = flourish_img.get_rect(center=self.knight_pos)
+            self.screen.blit(flourish_img, flourish_rect)
+            self.screen.blit(self._heart_draw_img(), (self.player_x, self.player_y))
+        elif self.frame_state == 5:
+            self.screen.fill((0, 0, 0))
+            if self.reverse_flourish_started:
+                # Always draw the last frame after animation is done
+                reverse_idx = min(self.reverse_flourish_frame_idx, len(self.reverse_flourish_frames) - 1)
+                reverse_img = self.reverse_flourish_frames[reverse_idx]
+                reverse_rect = reverse_img.get_rect(center=self.knight_pos)
+                self.screen.blit(reverse_img, reverse_rect)
+            for star in self.roar_stars:
+                star.draw(self.screen)
+            # Draw roar animation only if not in reverse flourish
+            if not self.reverse_flourish_started:
+                frame = ((self.game_clock.get_ticks() - self.roar_anim_start) // self.roar_anim_speed) % len(self.roar_frames)
+                roar_img = self.roar_frames[frame]
+                roar_rect = roar_img.get_rect(center=self.knight_pos)
+                self.screen.blit(roar_img, roar_rect)
+            self.screen.blit(self._heart_draw_img(), (self.player_x, self.player_y))
+        elif self.frame_state == 6:
+            self.screen.fill((0, 0, 0))  # Clear the screen to black
+            progress = self.slash_progress
+            front_slash_rect = self.front_slash_frames[0].get_rect(center=self.knight_pos)
+            if progress >= 0.5:
+                front_slash_img = self.front_slash_frames[self.front_slash_frame_idx]
+            else:
+                front_slash_img = self.front_slash_frames[0]  # idle frame
 
+            # Determine width scaling (only in second half)
+            if progress < 0.5:
+                scale_x = 1.0
+            else:
+                shrink_progress = (progress - 0.5) / 0.5
+                scale_x = 1.0 - 0.7 * shrink_progress
 
-                # Now crop it vertically from the bottom
-                crop_progress = min(1.0, progress / 0.5)  # goes from 0 to 1 in the first half
-                visible_height = int(rotated_slash.get_height() * crop_progress)
-                if visible_height <= 0:
-                    pass
-                cropped_surf = pygame.Surface((rotated_slash.get_width(), visible_height), pygame.SRCALPHA)
-                cropped_surf.blit(rotated_slash, (0, 0), area=pygame.Rect(0, 0, rotated_slash.get_width(), visible_height))
+            scaled_width = max(1, int(self.target_width * scale_x))
+            scaled_surf = pygame.transform.smoothscale(self.diagonal_slash_img, (scaled_width, self.target_height))
+            
+            dx = 0.10 * self.screen_width
+            dy = self.screen_height
+            angle = -math.degrees(math.atan2(dy, dx)) + 90
+            rotated_slash = pygame.transform.rotate(scaled_surf, angle)
+
+            # Now crop it vertically from the bottom
+            crop_progress = min(1.0, progress / 0.5)  # goes from 0 to 1 in the first half
+            visible_height = int(rotated_slash.get_height() * crop_progress)
+            cropped_surf = pygame.Surface((rotated_slash.get_width(), visible_height), pygame.SRCALPHA)
+            cropped_surf.blit(rotated_slash, (0, 0), area=pygame.Rect(0, 0, rotated_slash.get_width(), visible_height))
+
+            # Draw
+            target_center_x = 0.5 * self.screen_width
+            target_center_y = self.screen_height // 2
+            rotated_rect = cropped_surf.get_rect(center=(target_center_x, target_center_y))
+            self.screen.blit(cropped_surf, rotated_rect.topleft)
+
+            if not self.knight_rising:
+                self.screen.blit(front_slash_img, front_slash_rect)
+            else:
+                # Draw trail (downwards), trail_alphas run from the newest entry
+                alphas = self.trail_alphas[:len(self.knight_trail)][::-1]
+                self.knight_trail.draw(self.screen, alphas, offset=0, spacing=0, image=front_slash_img, oldest_on_top=True)
 
-                # Draw
-                target_center_x = 0.5 * self.screen_width
-                target_center_y = self.screen_height // 2
-                rotated_rect = cropped_surf.get_rect(center=(target_center_x, target_center_y))
+                # Draw the knight (main image)
+                main_knight_rect = front_slash_img.get_rect(center=(self.knight_pos[0], self.knight_y))
+                self.screen.blit(front_slash_img, main_knight_rect)
+            self.screen.blit(self._heart_draw_img(), (self.player_x, self.player_y))
 
-                if not hasattr(self, 'rise_start_time') and self.front_slash_frame_idx >= len(self.front_slash_frames) - 2:
-                    self.rise_start_time = pygame.time.get_ticks()
+        # Draw lives counter
+        lives_surf = self.font.render(f"LIVES: {self.player_lives}", True, (255, 255, 255))
+        self.screen.blit(lives_surf, (50, 50))
 
+    def run(self):
+        running = True
+        clock = self.clock or pygame.time.Clock()
+        while running and not self.is_done():
+            dt = self.game_clock.tick(clock, 60)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+            self.update(dt)
+            self.draw()
+            present(self.screen)
+
+    def iter_bullets(self):
+        for star in self.stars:
+            yield self.star_row(star, self.state == 2)
+        for star in self.active_spiral_stars:
+            yield self.star_row(star, self.state == 3)
+        hitting = self.state == 5
+        for star in self.roar_stars:
+            if star.state in ('moving_out', 'slight_return'):
+                yield self.star_row(star, hitting)
+            elif star.state == 'exploded':
+                for sc in star.starchilds:
+                    yield (sc.pos[0], sc.pos[1], sc.direction[0] * sc.speed, sc.direction[1] * sc.speed,
+                           sc.img.get_width() * 2, sc.img.get_height() * 2, hitting)
+
+    def star_row(self, star, hitting):
+        # Same size as the star's get_hitbox(), without scaling the image
+        w, h = star.size()
+        return (star.current_pos[0], star.current_pos[1], star.velocity[0], star.velocity[1], w, h, hitting)
 
-                self.screen.blit(cropped_surf, rotated_rect.topleft)
-                if progress < 1.0:
-                    self.screen.blit(front_slash_img, front_slash_rect)
-                else:
-                    if not self.front_slash_anim_done:
-                        self.front_slash_anim_done = True
-                        self.rise_start_time = now
-                    if now - self.rise_start_time < 500:
-                        self.screen.blit(front_slash_img, front_slash_rect)
-                    else:
-                        rise_speed = 8  # pixels per frame
-                        self.knight_y -= rise_speed
-
-                        # Add current position to the trail
-                        self.knight_trail.insert(0, self.knight_y)
-                        if len(self.knight_trail) > self.trail_length:
-                            self.knight_trail.pop()
-
-                        # Draw trail (downwards)
-                        for i, trail_y in enumerate(self.knight_trail):
-                            if i < len(self.trail_alphas):
-                                trail_surf = front_slash_img.copy()
-                                trail_surf.set_alpha(self.trail_alphas[i])
-                                trail_rect = trail_surf.get_rect(center=(self.knight_pos[0], trail_y))
-                                self.screen.blit(trail_surf, trail_rect)
-
-                        # Draw the knight (main image)
-                        main_knight_rect = front_slash_img.get_rect(center=(self.knight_pos[0], self.knight_y))
-                        self.screen.blit(front_slash_img, main_knight_rect)
-                        
-                        # Optional: exit when fully offscreen
-                        if self.knight_y + front_slash_img.get_height() < 0:
-                            running = False
-                self.screen.blit(heart_draw_img, (self.player_x, self.player_y))
-            
-            # Draw lives counter
-            lives_surf = self.font.render(f"LIVES: {self.player_lives}", True, (255, 255, 255))
-            self.screen.blit(lives_surf, (50, 50))
-            pygame.display.flip()
+    def is_done(self):
+        return self.done
+
+    def _heart_draw_img(self):
+        # Heart sprite for this frame (with invincibility flash)
+        invincible = hasattr(self, 'invincible_until') and self.game_clock.get_ticks() < self.invincible_until
+        if invincible:
+            if ((self.game_clock.get_ticks() // 100) % 2) == 0:
+                return self.heart_img_0
+            return self.heart_img_1
+        return self.heart_img_0
 
     def draw_fading_bg(self, final=False):
         # Fade out bg_img using alpha
@@ -3614,15 +3865,18 @@ class FinalAttackSequence:
         return (x2 - x1)*(py - y1) - (y2 - y1)*(px - x1)
 
     class Star:
-        def __init__(self, img, start_pos, end_pos, curve_offset, star_scale, min_star_scale, duration=1200):
-            self.img = img
+        snapshot_copied = ()  # update() replaces its tuples and numbers
+        def __init__(self, ladder, start_pos, end_pos, curve_offset, star_scale, min_star_scale, duration=1200, game_clock=None):
+            self.ladder = ladder  # ScaleLadder of the star sprite
             self.start_pos = start_pos
             self.end_pos = end_pos
             self.curve_offset = curve_offset  # (cx, cy) for control point
-            self.spawn_time = pygame.time.get_ticks()
+            self.game_clock = game_clock or RealClock()
+            self.spawn_time = self.game_clock.get_ticks()
             self.duration = duration
             self.done = False
             self.current_pos = start_pos
+            self.velocity = (0, 0)  # Movement over the last update
             self.star_scale = star_scale
             self.min_star_scale = min_star_scale
             self.scale = star_scale
@@ -3634,32 +3888,34 @@ class FinalAttackSequence:
             cx, cy = self.curve_offset
             bx = (1-t)**2 * x0 + 2*(1-t)*t*cx + t**2 * x1
             by = (1-t)**2 * y0 + 2*(1-t)*t*cy + t**2 * y1
+            self.velocity = (bx - self.current_pos[0], by - self.current_pos[1])
             self.current_pos = (bx, by)
             self.scale = self.star_scale - (self.star_scale - self.min_star_scale) * t
             if t >= 1.0:
                 self.done = True
+        def size(self):
+            return self.ladder.frame(self.scale).get_size()
         def draw(self, screen):
-            img = pygame.transform.smoothscale(self.img, (
-                int(self.img.get_width() * self.scale),
-                int(self.img.get_height() * self.scale)))
+            img = self.ladder.frame(self.scale)
             rect = img.get_rect(center=(int(self.current_pos[0]), int(self.current_pos[1])))
             screen.blit(img, rect)
         def get_hitbox(self):
-            img_w = int(self.img.get_width() * self.scale)
-            img_h = int(self.img.get_height() * self.scale)
-            rect = pygame.Rect(0, 0, img_w, img_h)
+            rect = pygame.Rect((0, 0), self.size())
             rect.center = (int(self.current_pos[0]), int(self.current_pos[1]))
             return rect
 
     class SpiralStar:
-        def __init__(self, img, start_pos, end_pos, star_scale, min_star_scale, duration=1200):
-            self.img = img
+        snapshot_copied = ()
+        def __init__(self, ladder, start_pos, end_pos, star_scale, min_star_scale, duration=1200, game_clock=None):
+            self.ladder = ladder  # ScaleLadder of the star sprite
             self.start_pos = start_pos
             self.end_pos = end_pos
-            self.spawn_time = pygame.time.get_ticks()
+            self.game_clock = game_clock or RealClock()
+            self.spawn_time = self.game_clock.get_ticks()
             self.duration = duration
             self.done = False
             self.current_pos = start_pos
+            self.velocity = (0, 0)  # Movement over the last update
             self.star_scale = star_scale
             self.min_star_scale = min_star_scale
             self.scale = star_scale
@@ -3670,32 +3926,33 @@ class FinalAttackSequence:
             x1, y1 = self.end_pos
             bx = x0 + (x1 - x0) * t
             by = y0 + (y1 - y0) * t
+            self.velocity = (bx - self.current_pos[0], by - self.current_pos[1])
             self.current_pos = (bx, by)
             self.scale = self.star_scale - (self.star_scale - self.min_star_scale) * t
             if t >= 1.0:
                 self.done = True
+        def size(self):
+            return self.ladder.frame(self.scale).get_size()
         def draw(self, screen):
-            img = pygame.transform.smoothscale(self.img, (
-                int(self.img.get_width() * self.scale),
-                int(self.img.get_height() * self.scale)))
+            img = self.ladder.frame(self.scale)
             rect = img.get_rect(center=(int(self.current_pos[0]), int(self.current_pos[1])))
             screen.blit(img, rect)
         def get_hitbox(self):
-            img_w = int(self.img.get_width() * self.scale)
-            img_h = int(self.img.get_height() * self.scale)
-            rect = pygame.Rect(0, 0, img_w, img_h)
+            rect = pygame.Rect((0, 0), self.size())
             rect.center = (int(self.current_pos[0]), int(self.current_pos[1]))
             return rect
 
     class RoarStar:
-        def __init__(self, img, start_pos, end_pos, min_scale, max_scale, duration):
+        def __init__(self, img, start_pos, end_pos, min_scale, max_scale, duration, game_clock=None):
             self.img = img
             self.start_pos = start_pos
             self.end_pos = end_pos
-            self.spawn_time = pygame.time.get_ticks()
+            self.game_clock = game_clock or RealClock()
+            self.spawn_time = self.game_clock.get_ticks()
             self.duration = duration
             self.done = False
             self.current_pos = start_pos
+            self.velocity = (0, 0)  # Movement over the last update
             self.min_scale = min_scale
             self.max_scale = max_scale * 0.85 
             self.scale = min_scale
@@ -3718,7 +3975,7 @@ class FinalAttackSequence:
         def start_return(self, transform_frames, starchild_up_img, starchild_down_img):
             if self.state == 'moving_out':
                 self.state = 'slight_return'
-                self.return_start = pygame.time.get_ticks()
+                self.return_start = self.game_clock.get_ticks()
                 self.transform_frames = transform_frames
                 # Store images for starchild creation
                 self.starchild_up_img = starchild_up_img
@@ -3728,7 +3985,7 @@ class FinalAttackSequence:
                 self.done = True
                 
         def create_starchilds(self):
-            now = pygame.time.get_ticks() if hasattr(pygame, 'time') else 0
+            now = self.game_clock.get_ticks()
             scx, scy = self.current_pos
             speed = getattr(self, 'starchild_speed', 8)
 
@@ -3749,6 +4006,9 @@ class FinalAttackSequence:
 
             self.state = 'exploded'
 
+        def size(self):
+            return int(self.img.get_width() * self.scale), int(self.img.get_height() * self.scale)
+
         def get_hitbox(self):
             if self.state in ['moving_out', 'slight_return']:
                 img = pygame.transform.smoothscale(
@@ -3792,6 +4052,7 @@ class FinalAttackSequence:
 
             
         def update(self, now):
+            prev_pos = self.current_pos
             if self.state == 'moving_out':
                 t = min(1.0, (now - self.spawn_time) / self.duration)
                 grow_t = max(0.0, t) ** 0.25  # More gradual growth
@@ -3871,6 +4132,7 @@ class FinalAttackSequence:
                 self.starchilds = [s for s in self.starchilds if not s.done]
                 if not self.starchilds:
                     self.done = True
+            self.velocity = (self.current_pos[0] - prev_pos[0], self.current_pos[1] - prev_pos[1])
                     
         def draw(self, screen):
             if self.state in ['moving_out', 'slight_return']:
@@ -3899,53 +4161,75 @@ class FinalAttackSequence:
                 for starchild in self.starchilds:
                     starchild.draw(screen)
 
-def make_attack_for_debug(attack_name):
+def run_headless(attack, dt=1000 / 60, max_frames=None):
+    """
+    Steps an attack's update() at a fixed timestep with no drawing, flipping or frame limiting.
+    The attack must be built with a VirtualClock, which is advanced by dt per frame.
+    Returns the number of frames simulated.
+    """
+    if not isinstance(attack.game_clock, VirtualClock):
+        raise ValueError("run_headless needs an attack built with game_clock=VirtualClock()")
+    frames = 0
+    while not attack.is_done():
+        if max_frames is not None and frames >= max_frames:
+            break
+        attack.update(dt)
+        attack.game_clock.advance(dt)
+        frames += 1
+    return frames
+
+def make_attack_for_debug(attack_name, headless=False, game_clock=None, seed=None, input_source=None):
     """
     Helper for debugging: returns a ready-to-run attack instance for the given attack_name (e.g., 'Attack1').
     Sets up a minimal environment and loads all required assets.
+    With headless=True no window or audio device is opened and the attack gets a VirtualClock, for use with run_headless.
+    A seed makes the attack's random pattern reproducible, and input_source (default KeyboardInput) steers the heart.
     """
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
     pygame.init()
+    if game_clock is None:
+        game_clock = VirtualClock() if headless else RealClock()
     screen_width, screen_height = 1920, 1080
     screen = pygame.display.set_mode((screen_width, screen_height))
     base_dir = os.path.dirname(os.path.abspath(__file__))
     bg_path = os.path.join(base_dir, 'sprites', 'spr_knight_snow_bg.png')
-    bg_img = pygame.image.load(bg_path).convert()
-    bg_img = pygame.transform.scale(bg_img, (screen_width, screen_height))
+    bg_img = ASSETS.load(bg_path, (screen_width, screen_height), filter='scale', alpha=False)
     # Fountain
     fountain_dir = os.path.join(base_dir, 'sprites', 'spr_fountainbg')
     fountain_files = [os.path.join(fountain_dir, f'spr_cc_fountainbg_{i}.png') for i in range(4)]
-    fountain_frames = [pygame.image.load(f).convert_alpha() for f in fountain_files]
     fountain_width = 600
-    orig_w, orig_h = fountain_frames[0].get_width(), fountain_frames[0].get_height()
+    orig_w, orig_h = ASSETS.image_size(fountain_files[0])
     scale_factor = fountain_width / orig_w
-    fountain_scaled_frames = [pygame.transform.smoothscale(frame, (fountain_width, int(orig_h * scale_factor))) for frame in fountain_frames]
+    fountain_scaled_frames = ASSETS.load_frames(fountain_files, (fountain_width, int(orig_h * scale_factor)))
     fountain_frame_idx = 0
     # Kris
     kris_idle_dir = os.path.join(base_dir, 'sprites', 'spr_krisb_idle')
-    kris_idle_files = sorted([os.path.join(kris_idle_dir, f) for f in os.listdir(kris_idle_dir) if f.lower().endswith('.png')])
-    kris_base_img = pygame.image.load(kris_idle_files[0]).convert_alpha()
-    kris_target_size = (kris_base_img.get_width() * 3, kris_base_img.get_height() * 3)
-    kris_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), kris_target_size) for f in kris_idle_files]
+    kris_idle_files = sorted([os.path.join(kris_idle_dir, f) for f in ASSETS.list_dir(kris_idle_dir) if f.lower().endswith('.png')])
+    kris_base_w, kris_base_h = ASSETS.image_size(kris_idle_files[0])
+    kris_target_size = (kris_base_w * 3, kris_base_h * 3)
+    kris_idle_frames = ASSETS.load_frames(kris_idle_files, kris_target_size)
     kris_frame_idx = 0
     kris_rect = kris_idle_frames[0].get_rect()
     kris_rect.left = 350
     kris_rect.centery = screen_height // 2 - 100
     # Susie
     susie_idle_dir = os.path.join(base_dir, 'sprites', 'spr_susieb_idle')
-    susie_idle_files = sorted([os.path.join(susie_idle_dir, f) for f in os.listdir(susie_idle_dir) if f.lower().endswith('.png')])
-    susie_base_img = pygame.image.load(susie_idle_files[0]).convert_alpha()
-    susie_target_size = (susie_base_img.get_width() * 3, susie_base_img.get_height() * 3)
-    susie_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), susie_target_size) for f in susie_idle_files]
+    susie_idle_files = sorted([os.path.join(susie_idle_dir, f) for f in ASSETS.list_dir(susie_idle_dir) if f.lower().endswith('.png')])
+    susie_base_w, susie_base_h = ASSETS.image_size(susie_idle_files[0])
+    susie_target_size = (susie_base_w * 3, susie_base_h * 3)
+    susie_idle_frames = ASSETS.load_frames(susie_idle_files, susie_target_size)
     susie_frame_idx = 0
     susie_rect = susie_idle_frames[0].get_rect()
     susie_rect.left = kris_rect.left - 120
     susie_rect.centery = kris_rect.centery + 100
     # Ralsei
     ralsei_idle_dir = os.path.join(base_dir, 'sprites', 'spr_ralsei_idle')
-    ralsei_idle_files = sorted([os.path.join(ralsei_idle_dir, f) for f in os.listdir(ralsei_idle_dir) if f.lower().endswith('.png')])
-    ralsei_idle_orig = pygame.image.load(ralsei_idle_files[0]).convert_alpha()
-    ralsei_target_size = (int(ralsei_idle_orig.get_width() * 3), int(ralsei_idle_orig.get_height() * 3))
-    ralsei_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), ralsei_target_size) for f in ralsei_idle_files]
+    ralsei_idle_files = sorted([os.path.join(ralsei_idle_dir, f) for f in ASSETS.list_dir(ralsei_idle_dir) if f.lower().endswith('.png')])
+    ralsei_w, ralsei_h = ASSETS.image_size(ralsei_idle_files[0])
+    ralsei_target_size = (int(ralsei_w * 3), int(ralsei_h * 3))
+    ralsei_idle_frames = ASSETS.load_frames(ralsei_idle_files, ralsei_target_size)
     ralsei_frame_idx = 0
     ralsei_rect = ralsei_idle_frames[0].get_rect()
     ralsei_rect.left = susie_rect.left - 10
@@ -3959,13 +4243,10 @@ def make_attack_for_debug(attack_name):
     battle_box_rect = pygame.Rect((screen_width - battle_box_width) // 2 + 50, (screen_height - battle_box_height) // 2 + 20, battle_box_width, battle_box_height)
     # Heart
     heart_size = 32
-    heart_img_0 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png')).convert_alpha()
-    heart_img_0 = pygame.transform.smoothscale(heart_img_0, (heart_size, heart_size))
-    heart_img_1 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png')).convert_alpha()
-    heart_img_1 = pygame.transform.smoothscale(heart_img_1, (heart_size, heart_size))
+    heart_img_0 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png'), (heart_size, heart_size))
+    heart_img_1 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png'), (heart_size, heart_size))
     # Knight idle
-    knight_idle_img = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png')).convert_alpha()
-    knight_idle_img = pygame.transform.smoothscale(knight_idle_img, (int(knight_idle_img.get_width() * 3), int(knight_idle_img.get_height() * 3)))
+    knight_idle_img = ASSETS.load_scaled(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png'), 3)
     # Player
     player_x = battle_box_rect.left + battle_box_width // 2 - heart_size // 2
     player_y = battle_box_rect.top + battle_box_height // 2 - heart_size // 2
@@ -3974,8 +4255,8 @@ def make_attack_for_debug(attack_name):
     clock = pygame.time.Clock()
     invincible = False
     show_knight_idle = True
-    knight_trail = []
     trail_length = 10
+    knight_trail = Trail(trail_length)
     trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
     player_speed = 5
     # For attacks that need PreAttack1
@@ -3984,11 +4265,11 @@ def make_attack_for_debug(attack_name):
     knight_point_frames = [knight_idle_img]
     triangle_knight_img = knight_idle_img
     triangle_knight_rect = knight_idle_img.get_rect()
-    triangle_start_time = pygame.time.get_ticks()
+    triangle_start_time = game_clock.get_ticks()
     knight_reverse_duration = 500
     invincible_until = 0
     # For Attacks 1, 6
-    knight_point_trail = []
+    knight_point_trail = Trail(trail_length)
     # For Attack 2,8
     base_dir = base_dir
     # For Attacks 3,7
@@ -4005,7 +4286,7 @@ def make_attack_for_debug(attack_name):
             clock, player_speed,
             screen_height, base_dir, knight_point_trail,
             16, 4, 8, len(kris_idle_frames), 8, len(susie_idle_frames), 8, len(ralsei_idle_frames),
-            0, 0, 0, 0, invincible_until, triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img)
+            0, 0, 0, 0, invincible_until, triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack2':
         return Attack2(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4013,7 +4294,7 @@ def make_attack_for_debug(attack_name):
             ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-            clock, player_speed, base_dir, knight_idle_img)
+            clock, player_speed, base_dir, knight_idle_img, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack3':
         return Attack3(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4022,7 +4303,7 @@ def make_attack_for_debug(attack_name):
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            knight_trail, trail_length, trail_alphas)
+            knight_trail, trail_length, trail_alphas, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack4':
         return Attack4(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4031,7 +4312,7 @@ def make_attack_for_debug(attack_name):
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            base_dir=base_dir, player_speed=player_speed)
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack5':
         return Attack5(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4040,7 +4321,7 @@ def make_attack_for_debug(attack_name):
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            base_dir=base_dir, player_speed=player_speed)
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack6':
         return Attack1(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4052,7 +4333,7 @@ def make_attack_for_debug(attack_name):
             clock, player_speed,
             screen_height, base_dir, knight_point_trail,
             16, 4, 8, len(kris_idle_frames), 8, len(susie_idle_frames), 8, len(ralsei_idle_frames),
-            0, 0, 0, 0, invincible_until, triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img, starchild_scale=1.2)
+            0, 0, 0, 0, invincible_until, triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img, starchild_scale=1.2, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack7':
         return Attack7(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4061,7 +4342,7 @@ def make_attack_for_debug(attack_name):
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            knight_trail, trail_length, trail_alphas)
+            knight_trail, trail_length, trail_alphas, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack8':
         return Attack8(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4069,7 +4350,7 @@ def make_attack_for_debug(attack_name):
             ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-            clock, 5, base_dir, knight_idle_img, show_wheel=True)
+            clock, 5, base_dir, knight_idle_img, show_wheel=True, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack9':
         return Attack5(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4079,7 +4360,7 @@ def make_attack_for_debug(attack_name):
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
             base_dir=base_dir, player_speed=player_speed,
-            sequences=[('spr_rk_spinslash4_red.png', 'spr_rk_spinslash4.png')]*5)
+            sequences=[('spr_rk_spinslash4_red.png', 'spr_rk_spinslash4.png')]*5, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Attack10':
         return Attack10(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4088,7 +4369,7 @@ def make_attack_for_debug(attack_name):
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            base_dir=base_dir, player_speed=player_speed)
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, seed=seed, input_source=input_source)
     elif attack_name == 'Final':
         return FinalAttackSequence(screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
             kris_idle_frames, kris_frame_idx, kris_rect,
@@ -4097,7 +4378,7 @@ def make_attack_for_debug(attack_name):
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
             knight_idle_img, show_knight_idle, clock,
-            base_dir=base_dir)
+            base_dir=base_dir, game_clock=game_clock, seed=seed, input_source=input_source)
     else:
         raise ValueError(f"Unknown attack name: {attack_name}")
 
@@ -0,0 +1,127 @@
+import pygame
+
+# Dirty-rectangle presentation.
+# The game draws on a DirtyScreen, an offscreen copy of the display that remembers the rectangle of
+# every blit, fill and pygame.draw call on it. present() then copies only those rectangles (and the
+# ones drawn the frame before, to erase them) to the display and calls pygame.display.update(rects),
+# instead of flipping the whole screen every frame.
+# The background and party come from blit_scene_layer(), which only reports the sprites that changed,
+# so a battle frame sends the box, the bullets, the heart, the Knight and its trail and the lives counter.
+# A draw covering the whole screen (a fade, the black screen, a full background blit) falls back to a flip.
+# On a plain display Surface present() is just pygame.display.flip().
+
+DRAW_FUNCTIONS = ['rect', 'line', 'lines', 'aaline', 'aalines', 'polygon', 'circle', 'ellipse', 'arc']
+
+class DirtySurface(pygame.Surface):
+    """Surface remembering the rectangles drawn on it since the last take_dirty()."""
+    def __init__(self, size, like):
+        super().__init__(size, 0, like)
+        self.bounds = self.get_rect()
+        self.dirty = []
+        self.full = False
+
+    def mark(self, rect):
+        rect = self.bounds.clip(rect)
+        if rect.width and rect.height:
+            self.dirty.append(rect)
+            if rect == self.bounds:
+                self.full = True
+
+    def mark_full(self):
+        self.full = True
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        rect = super().blit(source, dest, area, special_flags)
+        self.mark(rect)
+        return rect
+
+    def blits(self, blit_sequence, doreturn=1):
+        rects = super().blits(blit_sequence, 1)
+        for rect in rects:
+            self.mark(rect)
+        return rects if doreturn else None
+
+    def fill(self, color, rect=None, special_flags=0):
+        rect = super().fill(color, rect, special_flags)
+        self.mark(rect)
+        return rect
+
+    def take_dirty(self):
+        """(rectangles drawn, whether one covered the whole Surface) since the last call."""
+        dirty, full = self.dirty, self.full
+        self.dirty, self.full = [], False
+        return dirty, full
+
+
+class DirtyScreen(DirtySurface):
+    """
+    Offscreen copy of display to draw on instead of it, presented with present(screen).
+    Frames whose rectangles add up to more than max_area of the screen are flipped whole.
+    """
+    def __init__(self, display, max_area=0.5):
+        super().__init__(display.get_size(), display)
+        self.display = display
+        self.max_area = max_area
+        self.previous = []
+        self.full = True  # the display starts out with none of it
+        track_draw_calls()
+
+    def blit_base(self, layer, changed=None):
+        """Blits a screen-sized base layer, of which only the rectangles in changed are new (all of it with None)."""
+        super(DirtySurface, self).blit(layer, (0, 0))
+        if changed is None:
+            self.mark_full()
+        else:
+            for rect in changed:
+                self.mark(rect)
+
+    def present(self):
+        dirty, full = self.take_dirty()
+        rects = merge_rects(dirty + self.previous)
+        self.previous = dirty
+        if not full and sum(rect.width * rect.height for rect in rects) > self.max_area * self.bounds.width * self.bounds.height:
+            full = True
+        if full:
+            self.display.blit(self, (0, 0))
+            pygame.display.flip()
+        else:
+            for rect in rects:
+                self.display.blit(self, rect, rect)
+            pygame.display.update(rects)
+
+
+def present(screen):
+    """pygame.display.flip(), or only what changed when drawing on a DirtyScreen."""
+    if isinstance(screen, DirtyScreen):
+        screen.present()
+    else:
+        pygame.display.flip()
+
+def merge_rects(rects):
+    """Unions overlapping rectangles, so stacked draws (the Knight's trail, the box and its border) count once."""
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+def track_draw_calls():
+    # pygame.draw functions return the rectangle they touched but can't be overridden on the Surface,
+    # so they are wrapped once to report it when drawing on a DirtySurface
+    if getattr(pygame.draw, 'tracks_dirty', False):
+        return
+    for name in DRAW_FUNCTIONS:
+        setattr(pygame.draw, name, tracked_draw(getattr(pygame.draw, name)))
+    pygame.draw.tracks_dirty = True
+
+def tracked_draw(draw):
+    def tracked(surface, *args, **kwargs):
+        rect = draw(surface, *args, **kwargs)
+        if isinstance(surface, DirtySurface):
+            surface.mark(rect)
+        return rect
+    return tracked
@@ -7,23 +7,34 @@ import math
 import random
 from classes import *
 from PreAttacks import *
+from asset_prefetch import *
 
 global music_started
 music_started = False
-knight_trail = []
 trail_length = 10
+knight_trail = Trail(trail_length)
 trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
 
 OUTLINE_COLOR = (39, 41, 63, 255)  # RGBA for outline
 
-def full_game():
+def full_game(game_clock=None, input_source=None, asset_budget_mb=None, dirty_rects=False):
     pygame.init()
     pygame.mixer.init()
+    # One game clock shared by every pre-attack and attack (pass a ScaledClock to fast-forward)
+    game_clock = game_clock or RealClock()
+    # One input source steering the heart throughout (e.g. RecordedInput to replay a run)
+    input_source = input_source or KeyboardInput()
+    # Cap on the scaled sprites kept in memory, for low-memory machines (None keeps them all)
+    if asset_budget_mb is not None:
+        ASSETS.budget_bytes = int(asset_budget_mb * 1024 * 1024)
 
     # Get user's screen size
     info = pygame.display.Info()
     screen_width, screen_height = info.current_w, info.current_h
     screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
+    # Present only the changed rectangles instead of flipping the whole screen every frame
+    if dirty_rects:
+        screen = DirtyScreen(screen)
     pygame.display.set_caption("IT'S THE KNIGHT!!!")
 
     # Paths
@@ -33,23 +44,18 @@ def full_game():
     fountain_files = [
         os.path.join(fountain_dir, f'spr_cc_fountainbg_{i}.png') for i in range(4)
     ]
-    fountain_frames = [pygame.image.load(f).convert_alpha() for f in fountain_files]
     # Scale fountain frames to width 600px, keep aspect ratio
     fountain_width = 600
-    orig_w, orig_h = fountain_frames[0].get_width(), fountain_frames[0].get_height()
+    orig_w, orig_h = ASSETS.image_size(fountain_files[0])
     scale_factor = fountain_width / orig_w
-    fountain_scaled_frames = [
-        pygame.transform.smoothscale(frame, (fountain_width, int(orig_h * scale_factor)))
-        for frame in fountain_frames
-    ]
+    fountain_scaled_frames = ASSETS.load_frames(fountain_files, (fountain_width, int(orig_h * scale_factor)))
     fountain_frame_count = 4
     fountain_frame_idx = 0
     fountain_anim_speed = 16  # frames per sprite 
     fountain_anim_timer = 0
 
     # Load and scale background
-    bg_img = pygame.image.load(bg_path).convert()
-    bg_img = pygame.transform.scale(bg_img, (screen_width, screen_height))
+    bg_img = ASSETS.load(bg_path, (screen_width, screen_height), filter='scale', alpha=False)
 
     # Animation setup
     order = [0, 1, 2, 3]
@@ -62,13 +68,12 @@ def full_game():
     # Load Kris's idle animation frames
     kris_idle_dir = os.path.join(base_dir, 'sprites', 'spr_krisb_idle')
     kris_idle_files = sorted([
-        os.path.join(kris_idle_dir, f) for f in os.listdir(kris_idle_dir)
+        os.path.join(kris_idle_dir, f) for f in ASSETS.list_dir(kris_idle_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    kris_base_img = pygame.image.load(kris_idle_files[0]).convert_alpha()
-    kris_base_size = kris_base_img.get_size()
+    kris_base_size = ASSETS.image_size(kris_idle_files[0])
     kris_target_size = (kris_base_size[0] * 3, kris_base_size[1] * 3)
-    kris_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), kris_target_size) for f in kris_idle_files]
+    kris_idle_frames = ASSETS.load_frames(kris_idle_files, kris_target_size)
     kris_frame_count = len(kris_idle_frames)
     kris_frame_idx = 0
     kris_anim_speed = 8  # frames per sprite
@@ -77,13 +82,12 @@ def full_game():
     # Load Susie's idle animation frames
     susie_idle_dir = os.path.join(base_dir, 'sprites', 'spr_susieb_idle')
     susie_idle_files = sorted([
-        os.path.join(susie_idle_dir, f) for f in os.listdir(susie_idle_dir)
+        os.path.join(susie_idle_dir, f) for f in ASSETS.list_dir(susie_idle_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    susie_base_img = pygame.image.load(susie_idle_files[0]).convert_alpha()
-    susie_base_size = susie_base_img.get_size()
+    susie_base_size = ASSETS.image_size(susie_idle_files[0])
     susie_target_size = (susie_base_size[0] * 3, susie_base_size[1] * 3)
-    susie_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), susie_target_size) for f in susie_idle_files]
+    susie_idle_frames = ASSETS.load_frames(susie_idle_files, susie_target_size)
     susie_frame_count = len(susie_idle_frames)
     susie_frame_idx = 0
     susie_anim_speed = 8  # frames per sprite
@@ -92,12 +96,12 @@ def full_game():
     # Load Ralsei's idle animation frames
     ralsei_idle_dir = os.path.join(base_dir, 'sprites', 'spr_ralsei_idle')
     ralsei_idle_files = sorted([
-        os.path.join(ralsei_idle_dir, f) for f in os.listdir(ralsei_idle_dir)
+        os.path.join(ralsei_idle_dir, f) for f in ASSETS.list_dir(ralsei_idle_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    ralsei_idle_orig = pygame.image.load(ralsei_idle_files[0]).convert_alpha()
-    ralsei_target_size = (int(ralsei_idle_orig.get_width() * 3), int(ralsei_idle_orig.get_height() * 3))
-    ralsei_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), ralsei_target_size) for f in ralsei_idle_files]
+    ralsei_w, ralsei_h = ASSETS.image_size(ralsei_idle_files[0])
+    ralsei_target_size = (int(ralsei_w * 3), int(ralsei_h * 3))
+    ralsei_idle_frames = ASSETS.load_frames(ralsei_idle_files, ralsei_target_size)
     ralsei_frame_count = len(ralsei_idle_frames)
     ralsei_frame_idx = 0
     ralsei_anim_speed = 8  # frames per sprite
@@ -118,17 +122,14 @@ def full_game():
     original_battle_box_rect = battle_box_rect.copy()
 
     # Load knight idle sprite
-    knight_idle_img = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png')).convert_alpha()
-    knight_idle_img = pygame.transform.smoothscale(knight_idle_img, (int(knight_idle_img.get_width() * 3), int(knight_idle_img.get_height() * 3)))
+    knight_idle_img = ASSETS.load_scaled(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png'), 3)
     # Load heart sprite
     heart_size = 32  # scale heart to 32x32 px
-    heart_img_0 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png')).convert_alpha()
-    heart_img_0 = pygame.transform.smoothscale(heart_img_0, (heart_size, heart_size))
-    heart_img_1 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png')).convert_alpha()
-    heart_img_1 = pygame.transform.smoothscale(heart_img_1, (heart_size, heart_size))
+    heart_img_0 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png'), (heart_size, heart_size))
+    heart_img_1 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png'), (heart_size, heart_size))
     heart_img = heart_img_0
-    knight_trail = []
     trail_length = 10
+    knight_trail = Trail(trail_length)
     trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
     invincible_until = 0
     # Player position (center of battle box)
@@ -158,65 +159,84 @@ def full_game():
 
     player_lives = 999
 
+    # Decodes each attack's sprites on a worker thread while the one before it plays
+    prefetcher = AssetPrefetcher()
+    prefetcher.prefetch('Attack1')
+    # The intro's spare frame time loads every attack's sprites, Attack1's first. Under a memory budget
+    # only Attack1's, the prefetcher brings in the rest one attack ahead.
+    if ASSETS.budget_bytes is None:
+        preloader = AssetPreloader(['Attack1', 'Attack2', 'Attack3', 'Attack4', 'Attack5', 'Attack6',
+                                    'Attack7', 'Attack8', 'Attack9', 'Attack10', 'Final'])
+    else:
+        preloader = AssetPreloader(['Attack1'])
+
     # Call the intro cutscene before the main loop
-    player_x, player_y = play_battle_intro(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_rect, susie_idle_frames, susie_rect,
-        ralsei_idle_frames, ralsei_rect, battle_box_rect, base_dir,
-        kris_target_size, susie_target_size, ralsei_target_size,
-        kris_frame_idx, susie_frame_idx, ralsei_frame_idx,
-        battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-        fountain_anim_speed, fountain_frame_count,
-        kris_anim_speed, kris_frame_count,
-        susie_anim_speed, susie_frame_count,
-        ralsei_anim_speed, ralsei_frame_count,
-        fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer
-    )
+    with ASSETS.track('Intro'):
+        player_x, player_y = play_battle_intro(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_rect, susie_idle_frames, susie_rect,
+            ralsei_idle_frames, ralsei_rect, battle_box_rect, base_dir,
+            kris_target_size, susie_target_size, ralsei_target_size,
+            kris_frame_idx, susie_frame_idx, ralsei_frame_idx,
+            battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
+            fountain_anim_speed, fountain_frame_count,
+            kris_anim_speed, kris_frame_count,
+            susie_anim_speed, susie_frame_count,
+            ralsei_anim_speed, ralsei_frame_count,
+            fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer, game_clock=game_clock, input_source=input_source,
+            preloader=preloader
+        )
+    # The intro's own animations aren't needed again
+    ASSETS.release('Intro')
 
-    knight_point_trail = []  # Trail for the pointing Knight
+    knight_point_trail = Trail(trail_length)  # Trail for the pointing Knight
     
     # Start Attack 1
-    knight_point_img, knight_point_rect, knight_point_frames, player_x, player_y, \
-    triangle_knight_img, triangle_knight_rect, triangle_start_time, knight_reverse_duration, knight_idle_img, \
-    fountain_frame_idx, kris_frame_idx, susie_frame_idx, ralsei_frame_idx, \
-    fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer = PreAttack1(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_rect, battle_box_rect, knight_idle_img, clock,
-        battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        player_speed=player_speed
-    )
+    with ASSETS.track('Attack1'):
+        knight_point_img, knight_point_rect, knight_point_frames, player_x, player_y, \
+        triangle_knight_img, triangle_knight_rect, triangle_start_time, knight_reverse_duration, knight_idle_img, \
+        fountain_frame_idx, kris_frame_idx, susie_frame_idx, ralsei_frame_idx, \
+        fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer = PreAttack1(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_rect, battle_box_rect, knight_idle_img, clock,
+            battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
 
     # Start Attack 1 (call Attack1 with all required arguments)
-    attack1 = Attack1(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-        knight_point_img, knight_point_rect, knight_point_frames,
-        clock, player_speed,
-        screen_height, base_dir, knight_point_trail,
-        fountain_anim_speed, fountain_frame_count,
-        kris_anim_speed, kris_frame_count,
-        susie_anim_speed, susie_frame_count,
-        ralsei_anim_speed, ralsei_frame_count,
-        fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer,
-        invincible_until,
-        triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img
-    )
+    with ASSETS.track('Attack1'):
+        attack1 = Attack1(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
+            knight_point_img, knight_point_rect, knight_point_frames,
+            clock, player_speed,
+            screen_height, base_dir, knight_point_trail,
+            fountain_anim_speed, fountain_frame_count,
+            kris_anim_speed, kris_frame_count,
+            susie_anim_speed, susie_frame_count,
+            ralsei_anim_speed, ralsei_frame_count,
+            fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer,
+            invincible_until,
+            triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack2')
     attack1.run()
     player_lives = attack1.player_lives
+    del attack1  # let its Surfaces go once the cache drops them too
 
     # After Attack1(), before PreAttack2(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     invincible = False
     show_knight_idle = True
@@ -231,30 +251,33 @@ def full_game():
         heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
         knight_idle_img, show_knight_idle, clock,
         knight_idle_left, knight_idle_centery,
-        anim_duration=2000, player_speed=player_speed
+        anim_duration=2000, player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
     # --- Start Attack2 ---
-    attack2 = Attack2(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-        clock, player_speed, base_dir, knight_idle_img,
-        fountain_anim_speed=16, fountain_frame_count=4,
-        kris_anim_speed=8, kris_frame_count=None,
-        susie_anim_speed=8, susie_frame_count=None,
-                 ralsei_anim_speed=8, ralsei_frame_count=None, show_wheel=False
-    )
+    with ASSETS.track('Attack2'):
+        attack2 = Attack2(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
+            clock, player_speed, base_dir, knight_idle_img,
+            fountain_anim_speed=16, fountain_frame_count=4,
+            kris_anim_speed=8, kris_frame_count=None,
+            susie_anim_speed=8, susie_frame_count=None,
+                     ralsei_anim_speed=8, ralsei_frame_count=None, show_wheel=False, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack3')
     attack2.run()
     player_lives = attack2.player_lives
+    del attack2
 
     # After Attack2(), before PreAttack3(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     battle_box_rect, player_x, player_y = PreAttack3(
         screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
@@ -264,27 +287,30 @@ def full_game():
         battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
         heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
         knight_idle_img, show_knight_idle, clock,
-        anim_duration=2000, player_speed=player_speed
+        anim_duration=2000, player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
     # --- Start Attack3 ---
-    attack3 = Attack3(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        knight_trail, trail_length, trail_alphas,
-        cut_mode='vertical', cycles=7, player_speed=player_speed
-    )
+    with ASSETS.track('Attack3'):
+        attack3 = Attack3(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            knight_trail, trail_length, trail_alphas,
+            cut_mode='vertical', cycles=7, player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack4')
     attack3.run()
     player_lives = attack3.player_lives
+    del attack3
 
     # 0.5 second of idle animation before Attack4
-    idle_start = pygame.time.get_ticks()
-    while pygame.time.get_ticks() - idle_start < 500:
+    idle_start = game_clock.get_ticks()
+    while game_clock.get_ticks() - idle_start < 500:
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
@@ -296,10 +322,10 @@ def full_game():
             ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False,
-            knight_idle_img, show_knight_idle, clock
+            knight_idle_img, show_knight_idle, clock, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
 
     # --- Attack4 here ---
     # Setup for Attack4: knight goes through the pointing animation (PreAttack1)
@@ -314,27 +340,30 @@ def full_game():
         kris_idle_frames, kris_frame_idx, kris_rect,
         susie_idle_frames, susie_frame_idx, susie_rect,
         ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        player_speed=player_speed
+        player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
     # --- Start Attack4 ---
-    attack4 = Attack4(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        base_dir=base_dir, player_speed=player_speed
-    )
+    with ASSETS.track('Attack4'):
+        attack4 = Attack4(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack5')
     attack4.run()
     player_lives = attack4.player_lives
+    del attack4
 
     # After Attack4(), before Attack5(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     # --- Attack5: Spinning Slash ---
     battle_box_rect, player_x, player_y = PreAttack5(
@@ -345,26 +374,29 @@ def full_game():
         battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
         heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
         knight_idle_img, show_knight_idle, clock,
-        anim_duration=2000, player_speed=player_speed
+        anim_duration=2000, player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
-    attack5 = Attack5(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        base_dir=base_dir, player_speed=player_speed
-    )
+    with ASSETS.track('Attack5'):
+        attack5 = Attack5(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack6')
     attack5.run()
     player_lives = attack5.player_lives
+    del attack5
 
     # After Attack5(), before Attack6(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     # Reset battle box to default size before Attack6 (same logic as before Attack3)
     battle_box_rect, player_x, player_y = PreAttack3(
@@ -375,7 +407,7 @@ def full_game():
         battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
         heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
         knight_idle_img, show_knight_idle, clock,
-        anim_duration=2000, player_speed=player_speed
+        anim_duration=2000, player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
     # --- Attack6: Attack1 with 20% larger starchilds ---
@@ -391,55 +423,61 @@ def full_game():
         kris_idle_frames, kris_frame_idx, kris_rect,
         susie_idle_frames, susie_frame_idx, susie_rect,
         ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        player_speed=player_speed
+        player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
-    attack6 = Attack1(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-        knight_point_img, knight_point_rect, knight_point_frames,
-        clock, player_speed,
-        screen_height, base_dir, knight_point_trail,
-        fountain_anim_speed, fountain_frame_count,
-        kris_anim_speed, kris_frame_count,
-        susie_anim_speed, susie_frame_count,
-        ralsei_anim_speed, ralsei_frame_count,
-        fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer,
-        invincible_until,
-        triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img,
-        starchild_scale=1.2
-    )
+    with ASSETS.track('Attack6'):
+        attack6 = Attack1(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
+            knight_point_img, knight_point_rect, knight_point_frames,
+            clock, player_speed,
+            screen_height, base_dir, knight_point_trail,
+            fountain_anim_speed, fountain_frame_count,
+            kris_anim_speed, kris_frame_count,
+            susie_anim_speed, susie_frame_count,
+            ralsei_anim_speed, ralsei_frame_count,
+            fountain_anim_timer, kris_anim_timer, susie_anim_timer, ralsei_anim_timer,
+            invincible_until,
+            triangle_start_time, triangle_knight_img, triangle_knight_rect, knight_reverse_duration, knight_idle_img,
+            starchild_scale=1.2, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack7')
     attack6.run()
     player_lives = attack6.player_lives
+    del attack6
 
     # After Attack6(), before Attack7(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     # --- Attack7: Random Cut Attack ---
-    attack7 = Attack7(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        knight_trail, trail_length, trail_alphas,
-        cycles=7, base_dir=base_dir, player_speed=player_speed
-    )
+    with ASSETS.track('Attack7'):
+        attack7 = Attack7(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            knight_trail, trail_length, trail_alphas,
+            cycles=7, base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack8')
     attack7.run()
     player_lives = attack7.attack3.player_lives
+    del attack7
 
     # After Attack7(), before PreAttack2(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     invincible = False
     show_knight_idle = True
@@ -454,31 +492,34 @@ def full_game():
         heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
         knight_idle_img, show_knight_idle, clock,
         knight_idle_left, knight_idle_centery,
-        anim_duration=2000, player_speed=player_speed
+        anim_duration=2000, player_speed=player_speed, game_clock=game_clock, input_source=input_source
     )
 
     # --- Attack8: Sword Wheel ---
-    attack8 = Attack8(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
-        clock, 5, base_dir, knight_idle_img,
-        show_wheel=True
-    )
+    with ASSETS.track('Attack8'):
+        attack8 = Attack8(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives,
+            clock, 5, base_dir, knight_idle_img,
+            show_wheel=True, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Attack9')
     attack8.run()
     player_lives = attack8.player_lives
+    del attack8
 
     # After Attack8(), before Attack9(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
 # 0.5 second of idle animation before Attack4
-    idle_start = pygame.time.get_ticks()
-    while pygame.time.get_ticks() - idle_start < 500:
+    idle_start = game_clock.get_ticks()
+    while game_clock.get_ticks() - idle_start < 500:
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
@@ -490,10 +531,10 @@ def full_game():
             ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False,
-            knight_idle_img, show_knight_idle, clock
+            knight_idle_img, show_knight_idle, clock, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
 
     # Define Attack9 sequences (all using the last slash from Attack5)
     attack9_sequences = [
@@ -504,28 +545,31 @@ def full_game():
         ('spr_rk_spinslash4_red.png', 'spr_rk_spinslash4.png')
     ]
 
-    attack9 = Attack5(  # Reusing the same Attack5 class
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        base_dir=base_dir, player_speed=player_speed,
-        sequences=attack9_sequences  # Pass the custom sequences here
-    )
+    with ASSETS.track('Attack9'):
+        attack9 = Attack5(  # Reusing the same Attack5 class
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            base_dir=base_dir, player_speed=player_speed,
+            sequences=attack9_sequences, game_clock=game_clock, input_source=input_source  # Pass the custom sequences here
+        )
+    prefetcher.prefetch('Attack10')
     attack9.run()
     player_lives = attack9.player_lives
+    del attack9
 
     # After Attack9(), before Attack10(), clear the screen with the background
     bg_img_scaled = pygame.transform.scale(bg_img, (screen.get_width(), screen.get_height()))
     screen.blit(bg_img_scaled, (0, 0))
-    pygame.display.flip()
+    present(screen)
 
     # 0.5 second of idle animation before Attack4
-    idle_start = pygame.time.get_ticks()
-    while pygame.time.get_ticks() - idle_start < 500:
+    idle_start = game_clock.get_ticks()
+    while game_clock.get_ticks() - idle_start < 500:
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                 pygame.quit()
@@ -537,37 +581,42 @@ def full_game():
             ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
             battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
             heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, False,
-            knight_idle_img, show_knight_idle, clock
+            knight_idle_img, show_knight_idle, clock, game_clock=game_clock
         )
-        pygame.display.flip()
-        clock.tick(60)
+        present(screen)
+        game_clock.tick(clock, 60)
 
     # --- Attack10: Slash Wheel ---
-    attack10 = Attack10(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        base_dir=base_dir, player_speed=player_speed
-    )
+    with ASSETS.track('Attack10'):
+        attack10 = Attack10(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
+    prefetcher.prefetch('Final')
     attack10.run()
     player_lives = attack10.player_lives
+    del attack10
 
     # --- Final Attack Sequence ---
-    final_attack = FinalAttackSequence(
-        screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
-        kris_idle_frames, kris_frame_idx, kris_rect,
-        susie_idle_frames, susie_frame_idx, susie_rect,
-        ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
-        battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
-        heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
-        knight_idle_img, show_knight_idle, clock,
-        base_dir=base_dir, player_speed=player_speed
-    )
+    with ASSETS.track('Final'):
+        final_attack = FinalAttackSequence(
+            screen, bg_img, fountain_scaled_frames, fountain_frame_idx,
+            kris_idle_frames, kris_frame_idx, kris_rect,
+            susie_idle_frames, susie_frame_idx, susie_rect,
+            ralsei_idle_frames, ralsei_frame_idx, ralsei_rect,
+            battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
+            heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
+            knight_idle_img, show_knight_idle, clock,
+            base_dir=base_dir, player_speed=player_speed, game_clock=game_clock, input_source=input_source
+        )
     final_attack.run()
 
+    prefetcher.stop()
     pygame.quit()
     sys.exit()
@@ -0,0 +1,45 @@
+import pygame
+
+# Game time sources for the attacks and pre-attacks.
+# Everything that used to call pygame.time.get_ticks() asks its clock instead, so the
+# same attack can run on the wall clock, fast-forwarded, or stepped by hand.
+
+class RealClock:
+    """Wall clock game time, same as pygame.time.get_ticks()."""
+    def get_ticks(self):
+        return pygame.time.get_ticks()
+
+    def tick(self, frame_clock, fps=60):
+        return frame_clock.tick(fps)
+
+
+class ScaledClock:
+    """Wall clock game time sped up by scale (e.g. 2, 8 or 16 for fast-forward)."""
+    def __init__(self, scale=2.0):
+        self.scale = scale
+        self.origin = pygame.time.get_ticks()
+
+    def get_ticks(self):
+        return self.origin + int((pygame.time.get_ticks() - self.origin) * self.scale)
+
+    def tick(self, frame_clock, fps=60):
+        # Frame deltas from pygame.time.Clock.tick() are real ms, stretch them to game ms
+        return frame_clock.tick(fps) * self.scale
+
+
+class VirtualClock:
+    """Game time that only moves when advanced, for fixed-step and headless runs."""
+    def __init__(self, start=0):
+        self.time = start
+
+    def get_ticks(self):
+        return int(self.time)
+
+    def tick(self, frame_clock, fps=60):
+        # Windowed runs still advance virtual time by the real frame delta
+        dt = frame_clock.tick(fps)
+        self.advance(dt)
+        return dt
+
+    def advance(self, dt):
+        self.time += dt
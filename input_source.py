@@ -0,0 +1,90 @@
+import json
+import pygame
+
+# Where the heart's movement keys come from.
+# Attacks and pre-attacks ask their input source for the key state each frame instead of
+# calling pygame.key.get_pressed(), so bots, replays and batch runs can steer the heart
+# without a window or an SDL event queue.
+
+# Heart moves as (dx, dy): still, the four directions, then the four diagonals
+ACTIONS = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+def action_keys(action):
+    """Key state for an action, either an ACTIONS index or a (dx, dy) pair. None presses nothing."""
+    if action is None:
+        action = (0, 0)
+    elif isinstance(action, int):
+        action = ACTIONS[action]
+    dx, dy = action
+    return {pygame.K_LEFT: dx < 0, pygame.K_RIGHT: dx > 0, pygame.K_UP: dy < 0, pygame.K_DOWN: dy > 0}
+
+def keys_action(keys):
+    """ACTIONS index for a key state. Opposite keys cancel out, like they do in the movement code."""
+    dx = int(bool(keys[pygame.K_RIGHT])) - int(bool(keys[pygame.K_LEFT]))
+    dy = int(bool(keys[pygame.K_DOWN])) - int(bool(keys[pygame.K_UP]))
+    return ACTIONS.index((dx, dy))
+
+
+class KeyboardInput:
+    """The real keyboard, same as pygame.key.get_pressed()."""
+    def get_keys(self, attack=None):
+        return pygame.key.get_pressed()
+
+
+class ScriptedInput:
+    """
+    Plays a fixed list of actions, one each time the keys are read (once a frame while the heart can move).
+    After the last one the heart stands still, or the script starts over with loop=True.
+    """
+    def __init__(self, actions, loop=False):
+        self.actions = list(actions)
+        self.loop = loop
+        self.frame = 0
+
+    def get_keys(self, attack=None):
+        if self.frame >= len(self.actions):
+            if not self.loop or not self.actions:
+                return action_keys(None)
+            self.frame = 0
+        action = self.actions[self.frame]
+        self.frame += 1
+        return action_keys(action)
+
+
+class RecordedInput(ScriptedInput):
+    """Replays an input log written by InputRecorder.save()."""
+    def __init__(self, path, loop=False):
+        with open(path) as f:
+            super().__init__(json.load(f)['actions'], loop)
+
+
+class InputRecorder:
+    """
+    Passes another input source through and logs the action of every frame,
+    e.g. InputRecorder(KeyboardInput()) while playing, then save() for RecordedInput.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.actions = []
+
+    def get_keys(self, attack=None):
+        keys = self.source.get_keys(attack)
+        self.actions.append(keys_action(keys))
+        return keys
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'actions': self.actions}, f)
+
+
+class PolicyInput:
+    """
+    Asks policy(observation) for an action every frame. The observation is the attack's
+    observe(), or None when there is no attack (pre-attacks).
+    """
+    def __init__(self, policy):
+        self.policy = policy
+
+    def get_keys(self, attack=None):
+        observation = attack.observe() if attack is not None else None
+        return action_keys(self.policy(observation))
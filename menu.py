@@ -11,8 +11,8 @@ from game import full_game
 
 global music_started
 music_started = False
-knight_trail = []
 trail_length = 10
+knight_trail = Trail(trail_length)
 trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
 
 OUTLINE_COLOR = (39, 41, 63, 255)  # RGBA for outline
@@ -21,7 +21,7 @@ def draw_text(text, font, surface, x, y, color=(255, 255, 255)):
     text_obj = font.render(text, True, color)
     surface.blit(text_obj, (x, y))
 
-def main():
+def main(dirty_rects=False):
     pygame.init()
     pygame.mixer.init()
 
@@ -29,6 +29,9 @@ def main():
     info = pygame.display.Info()
     screen_width, screen_height = info.current_w, info.current_h
     screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
+    # Present only the changed rectangles instead of flipping the whole screen every frame
+    if dirty_rects:
+        screen = DirtyScreen(screen)
     pygame.display.set_caption("IT'S THE KNIGHT!!!")
 
     # Paths
@@ -38,23 +41,18 @@ def main():
     fountain_files = [
         os.path.join(fountain_dir, f'spr_cc_fountainbg_{i}.png') for i in range(4)
     ]
-    fountain_frames = [pygame.image.load(f).convert_alpha() for f in fountain_files]
     # Scale fountain frames to width 600px, keep aspect ratio
     fountain_width = 600
-    orig_w, orig_h = fountain_frames[0].get_width(), fountain_frames[0].get_height()
+    orig_w, orig_h = ASSETS.image_size(fountain_files[0])
     scale_factor = fountain_width / orig_w
-    fountain_scaled_frames = [
-        pygame.transform.smoothscale(frame, (fountain_width, int(orig_h * scale_factor)))
-        for frame in fountain_frames
-    ]
+    fountain_scaled_frames = ASSETS.load_frames(fountain_files, (fountain_width, int(orig_h * scale_factor)))
     fountain_frame_count = 4
     fountain_frame_idx = 0
     fountain_anim_speed = 16  # frames per sprite 
     fountain_anim_timer = 0
 
     # Load and scale background
-    bg_img = pygame.image.load(bg_path).convert()
-    bg_img = pygame.transform.scale(bg_img, (screen_width, screen_height))
+    bg_img = ASSETS.load(bg_path, (screen_width, screen_height), filter='scale', alpha=False)
 
     # Animation setup
     order = [0, 1, 2, 3]
@@ -67,13 +65,12 @@ def main():
     # Load Kris's idle animation frames
     kris_idle_dir = os.path.join(base_dir, 'sprites', 'spr_krisb_idle')
     kris_idle_files = sorted([
-        os.path.join(kris_idle_dir, f) for f in os.listdir(kris_idle_dir)
+        os.path.join(kris_idle_dir, f) for f in ASSETS.list_dir(kris_idle_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    kris_base_img = pygame.image.load(kris_idle_files[0]).convert_alpha()
-    kris_base_size = kris_base_img.get_size()
+    kris_base_size = ASSETS.image_size(kris_idle_files[0])
     kris_target_size = (kris_base_size[0] * 3, kris_base_size[1] * 3)
-    kris_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), kris_target_size) for f in kris_idle_files]
+    kris_idle_frames = ASSETS.load_frames(kris_idle_files, kris_target_size)
     kris_frame_count = len(kris_idle_frames)
     kris_frame_idx = 0
     kris_anim_speed = 8  # frames per sprite
@@ -82,13 +79,12 @@ def main():
     # Load Susie's idle animation frames
     susie_idle_dir = os.path.join(base_dir, 'sprites', 'spr_susieb_idle')
     susie_idle_files = sorted([
-        os.path.join(susie_idle_dir, f) for f in os.listdir(susie_idle_dir)
+        os.path.join(susie_idle_dir, f) for f in ASSETS.list_dir(susie_idle_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    susie_base_img = pygame.image.load(susie_idle_files[0]).convert_alpha()
-    susie_base_size = susie_base_img.get_size()
+    susie_base_size = ASSETS.image_size(susie_idle_files[0])
     susie_target_size = (susie_base_size[0] * 3, susie_base_size[1] * 3)
-    susie_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), susie_target_size) for f in susie_idle_files]
+    susie_idle_frames = ASSETS.load_frames(susie_idle_files, susie_target_size)
     susie_frame_count = len(susie_idle_frames)
     susie_frame_idx = 0
     susie_anim_speed = 8  # frames per sprite
@@ -97,12 +93,12 @@ def main():
     # Load Ralsei's idle animation frames
     ralsei_idle_dir = os.path.join(base_dir, 'sprites', 'spr_ralsei_idle')
     ralsei_idle_files = sorted([
-        os.path.join(ralsei_idle_dir, f) for f in os.listdir(ralsei_idle_dir)
+        os.path.join(ralsei_idle_dir, f) for f in ASSETS.list_dir(ralsei_idle_dir)
         if f.lower().endswith(('.png', '.jpg', '.jpeg'))
     ])
-    ralsei_idle_orig = pygame.image.load(ralsei_idle_files[0]).convert_alpha()
-    ralsei_target_size = (int(ralsei_idle_orig.get_width() * 3), int(ralsei_idle_orig.get_height() * 3))
-    ralsei_idle_frames = [pygame.transform.smoothscale(pygame.image.load(f).convert_alpha(), ralsei_target_size) for f in ralsei_idle_files]
+    ralsei_w, ralsei_h = ASSETS.image_size(ralsei_idle_files[0])
+    ralsei_target_size = (int(ralsei_w * 3), int(ralsei_h * 3))
+    ralsei_idle_frames = ASSETS.load_frames(ralsei_idle_files, ralsei_target_size)
     ralsei_frame_count = len(ralsei_idle_frames)
     ralsei_frame_idx = 0
     ralsei_anim_speed = 8  # frames per sprite
@@ -123,17 +119,14 @@ def main():
     original_battle_box_rect = battle_box_rect.copy()
 
     # Load knight idle sprite
-    knight_idle_img = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png')).convert_alpha()
-    knight_idle_img = pygame.transform.smoothscale(knight_idle_img, (int(knight_idle_img.get_width() * 3), int(knight_idle_img.get_height() * 3)))
+    knight_idle_img = ASSETS.load_scaled(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png'), 3)
     # Load heart sprite
     heart_size = 32  # scale heart to 32x32 px
-    heart_img_0 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png')).convert_alpha()
-    heart_img_0 = pygame.transform.smoothscale(heart_img_0, (heart_size, heart_size))
-    heart_img_1 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png')).convert_alpha()
-    heart_img_1 = pygame.transform.smoothscale(heart_img_1, (heart_size, heart_size))
+    heart_img_0 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png'), (heart_size, heart_size))
+    heart_img_1 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png'), (heart_size, heart_size))
     heart_img = heart_img_0
-    knight_trail = []
     trail_length = 10
+    knight_trail = Trail(trail_length)
     trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
     invincible_until = 0
     # Player position (center of battle box)
@@ -167,13 +160,10 @@ def main():
     battle_box_rect = pygame.Rect((screen_width - battle_box_width) // 2 + 50, (screen_height - battle_box_height) // 2 + 20, battle_box_width, battle_box_height)
     # Heart
     heart_size = 32
-    heart_img_0 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png')).convert_alpha()
-    heart_img_0 = pygame.transform.smoothscale(heart_img_0, (heart_size, heart_size))
-    heart_img_1 = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png')).convert_alpha()
-    heart_img_1 = pygame.transform.smoothscale(heart_img_1, (heart_size, heart_size))
+    heart_img_0 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_0.png'), (heart_size, heart_size))
+    heart_img_1 = ASSETS.load(os.path.join(base_dir, 'sprites', 'spr_heart', 'spr_heart_1.png'), (heart_size, heart_size))
     # Knight idle
-    knight_idle_img = pygame.image.load(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png')).convert_alpha()
-    knight_idle_img = pygame.transform.smoothscale(knight_idle_img, (int(knight_idle_img.get_width() * 3), int(knight_idle_img.get_height() * 3)))
+    knight_idle_img = ASSETS.load_scaled(os.path.join(base_dir, 'sprites', 'spr_roaringknight_idle.png'), 3)
     # Player
     player_x = battle_box_rect.left + battle_box_width // 2 - heart_size // 2
     player_y = battle_box_rect.top + battle_box_height // 2 - heart_size // 2
@@ -182,8 +172,8 @@ def main():
     clock = pygame.time.Clock()
     invincible = False
     show_knight_idle = True
-    knight_trail = []
     trail_length = 10
+    knight_trail = Trail(trail_length)
     trail_alphas = [80, 70, 60, 50, 40, 30, 20, 15, 10, 5]
     player_speed = 5
     # For attacks that need PreAttack1
@@ -196,7 +186,7 @@ def main():
     knight_reverse_duration = 500
     invincible_until = 0
     # For Attacks 1, 6
-    knight_point_trail = []
+    knight_point_trail = Trail(trail_length)
     # For Attack 2,8
     base_dir = base_dir
     knight_idle_left = battle_box_rect.right + 40
@@ -206,10 +196,10 @@ def main():
     title_font = pygame.font.SysFont(None, 72)
 
     player_lives = 999
-    knight_point_trail = []
+    knight_point_trail = Trail(trail_length)
 
     # Load and play background music
-    pygame.mixer.music.load("sprites/sound_effects/findher.ogg")
+    ASSETS.load_music(os.path.join(base_dir, 'sprites', 'sound_effects', 'findher.ogg'))
     pygame.mixer.music.play(-1)
 
     # Base menu
@@ -241,7 +231,7 @@ def main():
         submenu_rects.append((rect, text))
 
     # Load music
-    pygame.mixer.music.load("sprites/sound_effects/findher.ogg")
+    ASSETS.load_music(os.path.join(base_dir, 'sprites', 'sound_effects', 'findher.ogg'))
     pygame.mixer.music.play(-1)
 
     submenu_open = False
@@ -281,7 +271,7 @@ def main():
                 text_rect = text_surface.get_rect(center=rect.center)
                 screen.blit(text_surface, text_rect)
 
-        pygame.display.flip()
+        present(screen)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -294,8 +284,8 @@ def main():
                 for rect, text in button_rects:
                     if rect.collidepoint(pos):
                         if text == "Play Full Game":
-                            full_game()
-                            pygame.mixer.music.load("sprites/sound_effects/findher.ogg")
+                            full_game(dirty_rects=dirty_rects)
+                            ASSETS.load_music(os.path.join(base_dir, 'sprites', 'sound_effects', 'findher.ogg'))
                             pygame.mixer.music.play(-1)
                         elif text == "Choose One Attack":
                             show_submenu = not show_submenu
@@ -427,7 +417,7 @@ def main():
                                                     battle_box_rect, battle_box_color, battle_box_border_color, battle_box_border,
                                                     heart_img_0, heart_img_1, player_x, player_y, heart_size, font, player_lives, invincible,
                                                     knight_idle_img, show_knight_idle, clock, base_dir, player_speed)
-                            pygame.mixer.music.load("sprites/sound_effects/findher.ogg")
+                            ASSETS.load_music(os.path.join(base_dir, 'sprites', 'sound_effects', 'findher.ogg'))
                             pygame.mixer.music.play(-1)
         clock.tick(60)
     pygame.quit()
@@ -0,0 +1,135 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Runs many headless episodes of one attack across worker processes and writes the results to a file.
+# Usage: python rollout_farm.py Attack4 --seeds 0:1000 --policy random --out results.json
+# Policies are 'still', 'random', or 'module:function' taking (observation, rng) and returning an action.
+
+# Per-worker state, set up once by init_worker
+worker_attack = None
+worker_policy = None
+
+
+def still_policy(observation, rng):
+    return 0
+
+
+def random_policy(observation, rng):
+    return rng.randrange(9)
+
+
+POLICIES = {
+    'still': still_policy,
+    'random': random_policy,
+}
+
+
+def load_policy(name):
+    if name in POLICIES:
+        return POLICIES[name]
+    module_name, _, func_name = name.partition(':')
+    if not func_name:
+        raise ValueError(f"Unknown policy: {name} (use one of {', '.join(POLICIES)} or module:function)")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def parse_seeds(text):
+    # '0:100' is a range like Python slicing, '1,5,9' is a list, '7' is a single seed
+    if ':' in text:
+        start, stop = text.split(':')
+        return list(range(int(start), int(stop)))
+    return [int(s) for s in text.split(',')]
+
+
+def init_worker(attack_name, policy_name):
+    # Pygame and the shared scene assets are loaded once per worker, episodes only reset() the attack
+    global worker_attack, worker_policy
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    from classes import make_attack_for_debug
+    worker_attack = make_attack_for_debug(attack_name, headless=True)
+    worker_policy = load_policy(policy_name)
+
+
+def run_episode(seed, max_frames=20000):
+    attack = worker_attack
+    rng = random.Random(seed)
+    observation = attack.reset(seed)
+    frames = 0
+    hits = 0
+    first_hit_frame = None
+    done = False
+    while not done and frames < max_frames:
+        observation, reward, done = attack.step(worker_policy(observation, rng))
+        frames += 1
+        if reward < 0:
+            hits -= reward
+            if first_hit_frame is None:
+                first_hit_frame = frames
+    return {
+        'seed': seed,
+        'frames': frames,
+        'hits': hits,
+        'survived': hits == 0,
+        'frames_survived': first_hit_frame if first_hit_frame is not None else frames,
+        'finished': done,
+    }
+
+
+def summarize(episodes):
+    count = len(episodes)
+    if not count:
+        return {'episodes': 0}
+    return {
+        'episodes': count,
+        'survival_rate': sum(e['survived'] for e in episodes) / count,
+        'mean_hits': sum(e['hits'] for e in episodes) / count,
+        'max_hits': max(e['hits'] for e in episodes),
+        'mean_frames': sum(e['frames'] for e in episodes) / count,
+        'mean_frames_survived': sum(e['frames_survived'] for e in episodes) / count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a policy on an attack over many seeded headless episodes.")
+    parser.add_argument('attack', help="attack name as accepted by make_attack_for_debug, e.g. Attack4 or Final")
+    parser.add_argument('--seeds', default='0:100', help="seed range 'start:stop', list '1,2,3' or single seed")
+    parser.add_argument('--policy', default='random', help="'still', 'random' or module:function")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--max-frames', type=int, default=20000, help="frame cap per episode")
+    parser.add_argument('--out', default=None, help="results file (default <attack>_rollouts.json)")
+    args = parser.parse_args(argv)
+
+    load_policy(args.policy)  # fail early on a bad policy name
+    seeds = parse_seeds(args.seeds)
+    out_path = args.out or f"{args.attack}_rollouts.json"
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.attack, args.policy)) as executor:
+        chunksize = max(1, len(seeds) // (4 * args.workers))
+        episodes = list(executor.map(run_episode, seeds, [args.max_frames] * len(seeds), chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(episodes)
+    summary['elapsed_s'] = round(elapsed, 3)
+    results = {
+        'attack': args.attack,
+        'policy': args.policy,
+        'summary': summary,
+        'episodes': episodes,
+    }
+    with open(out_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"{args.attack} / {args.policy}: {summary['episodes']} episodes in {elapsed:.1f}s, "
+          f"survival {summary.get('survival_rate', 0):.1%}, mean hits {summary.get('mean_hits', 0):.2f} -> {out_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
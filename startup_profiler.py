@@ -0,0 +1,128 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import pygame
+from asset_cache import ASSETS, GAME_DIR
+
+# Times where start-up goes: file reads, PNG decoding, convert_alpha(), smoothscale and
+# mixer.Sound construction per asset folder, font creation, and the time to the first frame.
+# AssetCache reports every step it takes to the attached profiler, grouped by the track() group
+# it happens in (each attack constructor in full_game, the intro) or 'startup' before the first frame.
+# Usage: python startup_profiler.py menu [--first-frame] [--json startup_profile.json]
+#        python startup_profiler.py game [--speed 4]
+# The report is printed and the timeline written when the game exits (or at the first frame with --first-frame).
+
+class StartupProfiler:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.events = []  # one dict per timed step, in the order they finished
+        self.phase = 'startup'
+        self.first_frame_ms = None
+        self.exit_on_first_frame = False
+
+    def now_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    @contextlib.contextmanager
+    def timed(self, category, path, group=None):
+        start_ms = self.now_ms()
+        try:
+            yield
+        finally:
+            self.events.append({
+                'start_ms': round(start_ms, 3),
+                'ms': round(self.now_ms() - start_ms, 3),
+                'phase': group or self.phase,
+                'category': category,
+                'folder': os.path.relpath(os.path.dirname(os.path.abspath(path)), GAME_DIR).replace(os.sep, '/'),
+                'path': os.path.basename(path),
+            })
+
+    def frame_shown(self):
+        if self.first_frame_ms is None:
+            self.first_frame_ms = self.now_ms()
+            self.phase = 'after first frame'
+            if self.exit_on_first_frame:
+                raise SystemExit(0)
+
+    def install(self, cache=ASSETS, exit_on_first_frame=False):
+        """Attaches to cache and wraps the pygame font constructors and display updates."""
+        self.exit_on_first_frame = exit_on_first_frame
+        cache.profiler = self
+        profiler = self
+
+        def timed_font(constructor, category):
+            # Fonts aren't files of the game, they are listed under a 'fonts' folder by name
+            def create(name=None, size=12, *args, **kwargs):
+                with profiler.timed(category, os.path.join(GAME_DIR, 'fonts', str(name))):
+                    return constructor(name, size, *args, **kwargs)
+            return create
+
+        def shown(update):
+            def show(*args):
+                result = update(*args)
+                profiler.frame_shown()
+                return result
+            return show
+
+        pygame.font.SysFont = timed_font(pygame.font.SysFont, 'font')
+        pygame.font.Font = timed_font(pygame.font.Font, 'font')
+        pygame.display.flip = shown(pygame.display.flip)
+        pygame.display.update = shown(pygame.display.update)
+
+    def totals(self, *fields):
+        totals = {}
+        for event in self.events:
+            key = tuple(event[field] for field in fields)
+            count, ms = totals.get(key, (0, 0.0))
+            totals[key] = (count + 1, ms + event['ms'])
+        return sorted(totals.items(), key=lambda item: -item[1][1])
+
+    def report(self, top=25):
+        first_frame = f"{self.first_frame_ms:.1f} ms" if self.first_frame_ms is not None else "not reached"
+        lines = [f"Time to first frame: {first_frame}", "",
+                 f"{'phase':<20} {'step':<10} {'count':>6} {'ms':>9}"]
+        for (phase, category), (count, ms) in self.totals('phase', 'category'):
+            lines.append(f"{phase:<20} {category:<10} {count:>6} {ms:>9.1f}")
+        lines += ["", f"{'folder':<48} {'step':<10} {'count':>6} {'ms':>9}"]
+        for (folder, category), (count, ms) in self.totals('folder', 'category')[:top]:
+            lines.append(f"{folder:<48} {category:<10} {count:>6} {ms:>9.1f}")
+        return '\n'.join(lines)
+
+    def save_json(self, path):
+        summary = [{'phase': phase, 'category': category, 'count': count, 'ms': round(ms, 3)}
+                   for (phase, category), (count, ms) in self.totals('phase', 'category')]
+        with open(path, 'w') as f:
+            json.dump({'first_frame_ms': self.first_frame_ms, 'summary': summary, 'timeline': self.events}, f, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile start-up and asset loading of the menu or the full game.")
+    parser.add_argument('target', choices=['menu', 'game'], help="menu.main or game.full_game")
+    parser.add_argument('--first-frame', action='store_true', help="stop at the first frame shown")
+    parser.add_argument('--speed', type=float, default=1.0, help="game speed for 'game' (ScaledClock)")
+    parser.add_argument('--json', default='startup_profile.json', help="timeline file")
+    args = parser.parse_args(argv)
+
+    profiler = StartupProfiler()
+    profiler.install(exit_on_first_frame=args.first_frame)
+    try:
+        if args.target == 'menu':
+            import menu
+            menu.main()
+        else:
+            import game
+            game.full_game(game_clock=game.ScaledClock(args.speed) if args.speed != 1.0 else None)
+    except SystemExit:
+        pass
+    finally:
+        print(profiler.report())
+        profiler.save_json(args.json)
+        print(f"Timeline -> {args.json}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
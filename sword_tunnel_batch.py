@@ -0,0 +1,147 @@
+import numpy as np
+import pygame
+from classes import ACTIONS
+
+# Vectorized Attack4 sword tunnel for evaluating many hearts at once.
+# The tunnel doesn't depend on the heart, so every heart sees the same swords and only
+# movement, hits and invincibility are tracked per heart. Mirrors Attack4.update frame by frame.
+
+ACTION_DX = np.array([dx for dx, dy in ACTIONS], dtype=np.int32)
+ACTION_DY = np.array([dy for dx, dy in ACTIONS], dtype=np.int32)
+
+
+class SwordTunnelBatch:
+    """
+    Runs n hearts through an Attack4 tunnel in one numpy step per frame.
+    attack is only read for its constructor arguments, the layout, timings and sprite sizes come
+    from a fresh Attack4 built with them, so attack itself isn't touched, e.g.
+        batch = SwordTunnelBatch(make_attack_for_debug('Attack4', headless=True), 10000)
+    """
+    def __init__(self, attack, n, dt=1000 / 60, track_red=False):
+        args, kwargs = attack.init_args
+        # Built again from its arguments like reset() does, rather than resetting the caller's attack
+        tunnel = type(attack)(*[a.copy() if isinstance(a, pygame.Rect) else a for a in args], **kwargs)
+        self.n = n
+        self.dt = dt
+        self.track_red = track_red
+        self.heart_size = tunnel.heart_size
+        self.player_speed = tunnel.player_speed
+        self.start_lives = tunnel.player_lives
+        self.sword_pairs = tunnel.sword_pairs
+        self.spawn_interval = tunnel.spawn_interval
+        self.attack_duration = tunnel.attack_duration
+        self.timeout_duration = tunnel.timeout_duration
+        self.screen_w, self.screen_h = tunnel.screen.get_size()
+        playable_rect = tunnel.battle_box_rect.inflate(-2 * tunnel.battle_box_border, -2 * tunnel.battle_box_border)
+        self.min_x = playable_rect.left
+        self.max_x = playable_rect.right - self.heart_size
+        self.min_y = playable_rect.top
+        self.max_y = playable_rect.bottom - self.heart_size
+        # SwordTunnelSword.get_rect() uses the up sprite for both directions, hitboxes are 85% of it
+        sword_w, sword_h = tunnel.up_img.get_size()
+        self.hitbox_w = int(sword_w * 0.85)
+        self.hitbox_h = int(sword_h * 0.85)
+        # The wave is deterministic, so the whole spawn schedule is taken from the fresh attack up front
+        schedule = [tunnel.next_sword_pair() for _ in range(self.sword_pairs)]
+        self.spawn_x = np.array([s[0] for s in schedule for _ in range(2)], dtype=np.float64)
+        # Same order Attack4 appends them: the 'up' sword sits at down_y, then the 'down' sword at up_y
+        self.spawn_y = np.array([y for s in schedule for y in (s[2], s[1])], dtype=np.int32)
+        self.spawn_speed = np.array([s[3] for s in schedule for _ in range(2)], dtype=np.float64)
+        self.start_x = tunnel.player_x
+        self.start_y = tunnel.player_y
+        self.reset()
+
+    def reset(self):
+        capacity = 2 * self.sword_pairs
+        self.time = 0.0
+        self.start_time = None
+        self.last_spawn_time = 0
+        self.sword_spawn_count = 0
+        self.done = False
+        self.sword_x = np.zeros(capacity, dtype=np.float64)
+        self.sword_alive = np.zeros(capacity, dtype=bool)
+        self.player_x = np.full(self.n, self.start_x, dtype=np.int32)
+        self.player_y = np.full(self.n, self.start_y, dtype=np.int32)
+        self.player_lives = np.full(self.n, self.start_lives, dtype=np.int32)
+        self.invincible_until = np.zeros(self.n, dtype=np.int64)
+        self.hits = np.zeros(self.n, dtype=np.int32)
+        self.red = np.zeros((self.n, capacity), dtype=bool) if self.track_red else None
+
+    def step(self, actions=None):
+        """
+        Advance every heart one frame. actions is an ACTIONS index per heart (or one for all).
+        Returns the boolean mask of hearts that lost a life this frame.
+        """
+        now = int(self.time)
+        if self.start_time is None:
+            self.start_time = now
+            self.last_spawn_time = now
+        elapsed = now - self.start_time
+        # Player movement, clamped to the battle box
+        if actions is not None:
+            actions = np.broadcast_to(np.asarray(actions), (self.n,))
+            self.player_x += ACTION_DX[actions] * self.player_speed
+            self.player_y += ACTION_DY[actions] * self.player_speed
+        np.clip(self.player_x, self.min_x, self.max_x, out=self.player_x)
+        np.clip(self.player_y, self.min_y, self.max_y, out=self.player_y)
+        # Spawn swords
+        if elapsed < self.attack_duration and self.sword_spawn_count < self.sword_pairs:
+            if now - self.last_spawn_time >= self.spawn_interval:
+                i = 2 * self.sword_spawn_count
+                self.sword_x[i:i + 2] = self.spawn_x[i:i + 2]
+                self.sword_alive[i:i + 2] = True
+                if self.red is not None:
+                    self.red[:, i:i + 2] = False
+                self.last_spawn_time = now
+                self.sword_spawn_count += 1
+        # Move swords, then drop the ones that have left the screen
+        alive = np.flatnonzero(self.sword_alive)
+        self.sword_x[alive] -= self.spawn_speed[alive] * self.dt / 16.67
+        x = self.sword_x[alive]
+        y = self.spawn_y[alive]
+        on_screen = (-200 < x) & (x < self.screen_w + 200) & (-200 < y) & (y < self.screen_h + 200)
+        self.sword_alive[alive[~on_screen]] = False
+        alive = alive[on_screen]
+        center_x = np.trunc(self.sword_x[alive]).astype(np.int32)
+        center_y = self.spawn_y[alive]
+        heart_center_x = self.player_x + self.heart_size // 2
+        if self.red is not None and len(alive):
+            # Red from 10px right of the heart's center until 10px left of it
+            red = self.red[:, alive]
+            cx = center_x[None, :]
+            hx = heart_center_x[:, None]
+            self.red[:, alive] = np.where(red, cx >= hx - 10, cx < hx + 10)
+        # Collisions between every heart and every sword hitbox
+        hit = np.zeros(self.n, dtype=bool)
+        if len(alive):
+            left = center_x - self.hitbox_w // 2
+            top = center_y - self.hitbox_h // 2
+            px = self.player_x[:, None]
+            py = self.player_y[:, None]
+            overlap = ((px < left + self.hitbox_w) & (left < px + self.heart_size) &
+                       (py < top + self.hitbox_h) & (top < py + self.heart_size))
+            hit = overlap.any(axis=1) & (now > self.invincible_until)
+            self.player_lives[hit] = np.maximum(0, self.player_lives[hit] - 1)
+            self.invincible_until[hit] = now + 1000
+            self.hits += hit
+        # End the wave when all swords are gone after spawning ends
+        if self.sword_spawn_count >= self.sword_pairs and not self.sword_alive.any():
+            self.done = True
+        if elapsed > self.timeout_duration:
+            self.done = True
+        self.time += self.dt
+        return hit
+
+    def is_done(self):
+        return self.done
+
+    def run(self, policy=None):
+        """
+        Run the whole tunnel. policy(batch) returns the actions for each frame, None stands still.
+        Returns the per-frame hit masks as a (frames, n) array.
+        """
+        masks = []
+        while not self.done:
+            actions = policy(self) if policy is not None else None
+            masks.append(self.step(actions))
+        return np.array(masks)
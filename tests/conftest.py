@@ -0,0 +1,26 @@
+import os
+import sys
+import pygame
+import pytest
+
+# The attacks run headless in the tests, without a window or an audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def display():
+    """A dummy display, which convert() and convert_alpha() need."""
+    pygame.display.init()
+    return pygame.display.set_mode((64, 64))
+
+
+@pytest.fixture
+def sprite_dir(tmp_path):
+    """A folder of small test sprites, sprite_0.png to sprite_3.png, each filled with its own colour."""
+    for i in range(4):
+        surface = pygame.Surface((10, 10), pygame.SRCALPHA)
+        surface.fill((60 * i, 20, 200 - 40 * i, 255))
+        pygame.image.save(surface, str(tmp_path / f'sprite_{i}.png'))
+    return tmp_path
@@ -0,0 +1,275 @@
+import os
+import threading
+import pygame
+import pytest
+import PreAttacks
+from asset_cache import AssetCache, RotationBank, ScaleLadder, atomic_write, surface_bytes
+from dirty_screen import DirtyScreen
+from PreAttacks import blit_scene_layer
+
+SPRITE_BYTES = 20 * 20 * 4  # every test sprite is scaled to 20x20
+
+
+def make_cache(budget_bytes=None):
+    return AssetCache(atlas_dir=None, scaled_cache_dir=None, manifests_path=None, pack_path=None,
+                      budget_bytes=budget_bytes, workers=1)
+
+
+def sprite(sprite_dir, i):
+    return str(sprite_dir / f'sprite_{i}.png')
+
+
+def test_evicts_least_recently_used(display, sprite_dir):
+    cache = make_cache(budget_bytes=3 * SPRITE_BYTES)
+    for i in range(3):
+        cache.load(sprite(sprite_dir, i), (20, 20))
+    cache.load(sprite(sprite_dir, 0), (20, 20))  # sprite_1 is now the least recently used
+    cache.load(sprite(sprite_dir, 3), (20, 20))
+    loaded = {key[0] for key in cache.surfaces if key[1] is not None}
+    assert loaded == {sprite(sprite_dir, i) for i in (0, 2, 3)}
+    assert cache.held_bytes == 3 * SPRITE_BYTES
+    assert cache.evictions == 1
+
+
+def test_unscaled_sprites_are_not_counted(display, sprite_dir):
+    cache = make_cache(budget_bytes=SPRITE_BYTES)
+    for i in range(4):
+        cache.load(sprite(sprite_dir, i))
+    assert cache.held_bytes == 0
+    assert cache.evictions == 0
+
+
+def test_derived_surfaces_count_towards_budget(display, sprite_dir):
+    cache = make_cache(budget_bytes=10 * SPRITE_BYTES)
+    image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    faded = cache.translucent(image, 50)
+    assert cache.translucent(image, 50) is faded
+    assert faded.get_alpha() == 50
+    assert cache.held_bytes == 2 * SPRITE_BYTES
+
+
+def test_derived_dropped_with_source(display, sprite_dir):
+    cache = make_cache(budget_bytes=2 * SPRITE_BYTES)
+    image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    bank = cache.rotations(image, step=90)
+    bank.frame(90, (0, 0))
+    cache.load(sprite(sprite_dir, 1), (20, 20))
+    cache.load(sprite(sprite_dir, 2), (20, 20))  # over budget, sprite_0 and its bank go
+    assert cache.derived == {}
+    assert cache.held_bytes <= 2 * SPRITE_BYTES
+    # Loaded again it gets one new bank, not a second one next to a stale entry
+    image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    assert cache.rotations(image, step=90) is not bank
+    assert len(cache.derived) == 1
+
+
+def test_derived_keyed_on_cache_key(display, sprite_dir):
+    cache = make_cache()
+    image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    bank = cache.rotations(image, step=90)
+    assert cache.rotations(cache.load(sprite(sprite_dir, 0), (20, 20)), step=90) is bank
+    assert cache.rotations(image, step=45) is not bank
+    # A Surface the cache doesn't hold gets a bank that isn't kept
+    assert isinstance(cache.rotations(image.copy(), step=90), RotationBank)
+    assert len(cache.derived[cache.cache_key(sprite(sprite_dir, 0), (20, 20))]) == 2
+
+
+def test_release_drops_derived(display, sprite_dir):
+    cache = make_cache()
+    with cache.track('Intro', save=False):
+        image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    cache.translucent(image, 80)
+    cache.release('Intro')
+    assert cache.held_bytes == 0
+    assert cache.derived == {}
+
+
+@pytest.mark.parametrize('prerender', [False, True])
+def test_rotation_bank_bytes(display, sprite_dir, prerender):
+    cache = make_cache()
+    image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    bank = cache.rotations(image, step=90, prerender=prerender)
+    assert len(bank.frames) == (4 if prerender else 0)
+    assert cache.held_bytes == SPRITE_BYTES + bank.bytes()
+
+
+def test_held_bytes_follow_banks_as_they_fill(display, sprite_dir):
+    cache = make_cache()
+    image = cache.load(sprite(sprite_dir, 0), (20, 20))
+    bank = cache.rotations(image, step=None, max_frames=2)
+    faded = cache.translucent(image, 80)
+    for angle in (10, 20, 30, 40):
+        bank.frame(angle, (0, 0))
+        assert cache.held_bytes == SPRITE_BYTES + bank.bytes() + surface_bytes(faded)
+    # Once dropped, a bank its attack still uses no longer counts
+    cache.drop(cache.cache_key(sprite(sprite_dir, 0), (20, 20)))
+    bank.frame(50, (0, 0))
+    assert cache.held_bytes == 0
+
+
+def test_dedup_hashes_only_shared_sizes(display, sprite_dir):
+    cache = make_cache()
+    first = cache.load(sprite(sprite_dir, 0), (20, 20))
+    other = cache.load(sprite(sprite_dir, 1), (30, 30))
+    # Sizes seen once are never hashed (the 10x10 sources they were scaled from are)
+    assert id(first) not in cache.digests and id(other) not in cache.digests
+    cache.load(sprite(sprite_dir, 2), (20, 20))
+    assert id(first) in cache.digests and id(other) not in cache.digests
+    # The same pixels under another name share the first Surface
+    (sprite_dir / 'copy.png').write_bytes((sprite_dir / 'sprite_0.png').read_bytes())
+    assert cache.load(str(sprite_dir / 'copy.png'), (20, 20)) is first
+    assert cache.dedup_hits == 2  # and its unscaled source the first source
+
+
+def arrow(w=20, h=10):
+    """A sprite whose right end is marked, so rotations can be told apart."""
+    image = pygame.Surface((w, h), pygame.SRCALPHA)
+    image.fill((255, 255, 255, 255))
+    image.fill((255, 0, 0, 255), (w - 2, 0, 2, h))
+    return image
+
+
+@pytest.mark.parametrize('angle, expected', [
+    (44.9, 0), (45.1, 90), (-44.9, 0), (-45.1, 270), (314.9, 270), (315.1, 0), (359.9, 0), (360, 0), (720 + 90, 90),
+])
+def test_rotation_bank_rounds_to_nearest_step(angle, expected):
+    assert RotationBank(arrow(), step=90).quantize(angle) == expected
+
+
+def test_rotation_bank_frames_match_rotate():
+    image = arrow(21, 9)
+    bank = RotationBank(image, step=1)
+    for angle in (0, 30.4, 89.6, 181, 359.7):
+        surface, rect = bank.frame(angle, (100, 50))
+        exact = pygame.transform.rotate(image, round(angle) % 360)
+        assert rect == exact.get_rect(center=(100, 50))
+        assert pygame.image.tobytes(surface, 'RGBA') == pygame.image.tobytes(exact, 'RGBA')
+    # 359.7 and 0 round to the same frame instead of a separate 360
+    assert bank.frame(359.7, (0, 0))[0] is bank.frame(0, (0, 0))[0]
+    assert 360 not in bank.frames
+
+
+def test_rotation_bank_crop_and_trim_keep_placement():
+    image = arrow(40, 6)
+    whole = pygame.transform.rotate(image, 45).get_rect(center=(100, 100))
+    surface, rect = RotationBank(image, step=45, crop=(10, 10)).frame(45, (100, 100))
+    assert surface.get_size() == (10, 10) and rect.size == (10, 10)
+    assert rect.center == whole.center
+    # trim cuts the transparent border, the opaque part stays where it was
+    image = pygame.Surface((20, 20), pygame.SRCALPHA)
+    image.fill((255, 255, 255, 255), (12, 2, 4, 6))
+    rotated = pygame.transform.rotate(image, 90)
+    surface, rect = RotationBank(image, step=90, trim=True).frame(90, (100, 100))
+    assert surface.get_size() == (6, 4)
+    assert rect == rotated.get_bounding_rect().move(rotated.get_rect(center=(100, 100)).topleft)
+
+
+def test_rotation_bank_max_frames():
+    bank = RotationBank(arrow(), step=90, max_frames=2)
+    for angle in (0, 90, 0, 180):
+        bank.frame(angle, (0, 0))
+    assert list(bank.frames) == [0, 180]  # 90 was the least recently used
+    assert bank.bytes() == sum(surface_bytes(frame[0]) for frame in bank.frames.values())
+
+
+@pytest.mark.parametrize('scale, size', [
+    (0.2, 10), (0.5, 10), (0.62, 10), (0.63, 15), (1.0, 20), (1.37, 25), (1.38, 30), (1.5, 30), (3.0, 30),
+])
+def test_scale_ladder_nearest_step(display, scale, size):
+    # Steps at 0.5, 0.75, 1.0, 1.25 and 1.5, out of range scales get the end ones
+    ladder = ScaleLadder(arrow(20, 20), 0.5, 1.5, steps=5)
+    assert ladder.frame(scale).get_size() == (size, size)
+
+
+def test_scale_ladder_sizes_round_down(display):
+    ladder = ScaleLadder(arrow(21, 9), 0.1, 1.0, steps=10)
+    for i, surface in enumerate(ladder.frames):
+        scale = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0][i]
+        assert surface.get_size() == (int(21 * scale), int(9 * scale))
+    assert ladder.frame(1.0).get_size() == (21, 9)
+    assert ladder.bytes() == sum(surface_bytes(surface) for surface in ladder.frames)
+
+
+def test_scaled_blobs_written_from_several_threads(display, sprite_dir, tmp_path):
+    cache = AssetCache(atlas_dir=None, scaled_cache_dir=str(tmp_path / 'scaled'), manifests_path=None,
+                       pack_path=None, workers=1)
+    surface = cache.load(sprite(sprite_dir, 0), (20, 20))
+    blob_path = cache.scaled_blob_path(sprite(sprite_dir, 0), (20, 20), 'smooth', True)
+    # Each thread writes its own temporary file, so none of them renames another's half-written one
+    threads = [threading.Thread(target=cache.write_scaled_blob, args=(blob_path, surface)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert os.listdir(tmp_path / 'scaled') == [os.path.basename(blob_path)]
+    assert os.path.getsize(blob_path) == SPRITE_BYTES
+
+
+def test_atomic_write_leaves_nothing_on_error(tmp_path):
+    path = tmp_path / 'blob'
+    path.write_bytes(b'old')
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write(b'half')
+            raise RuntimeError
+    assert os.listdir(tmp_path) == ['blob']
+    assert path.read_bytes() == b'old'
+
+
+def solid(color, size=(8, 8)):
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    return surface
+
+
+def test_scene_layer_composes_only_when_key_changes(display, monkeypatch):
+    monkeypatch.setattr(PreAttacks, 'scene_layers', {})
+    background = solid((0, 0, 80), display.get_size())
+    composed = []
+
+    def compose(sprite):
+        def draw(layer):
+            composed.append(sprite)
+            layer.blit(sprite, (10, 10))
+        return draw
+
+    red, green = solid((255, 0, 0)), solid((0, 255, 0))
+    for sprite in (red, red, red, green, green):
+        blit_scene_layer(display, 'test', background, (sprite,), compose(sprite))
+        assert display.get_at((12, 12)) == sprite.get_at((0, 0))
+        assert display.get_at((40, 40)) == (0, 0, 80, 255)
+    assert composed == [red, green]
+
+
+def test_scene_layer_reports_only_changed_sprites(display, monkeypatch):
+    monkeypatch.setattr(PreAttacks, 'scene_layers', {})
+    screen = DirtyScreen(display)
+    background = solid((0, 0, 80), display.get_size())
+    red, green = solid((255, 0, 0)), solid((0, 255, 0))
+    blit_scene_layer(screen, 'test', background, (red,), lambda layer: layer.blit(red, (10, 10)))
+    assert screen.take_dirty()[1]  # the first frame sends the whole layer
+    blit_scene_layer(screen, 'test', background, (red,), lambda layer: layer.blit(red, (10, 10)))
+    assert screen.take_dirty() == ([], False)
+    # A new frame of the sprite: its old and new rects, not the background
+    blit_scene_layer(screen, 'test', background, (green,), lambda layer: layer.blit(green, (20, 10)))
+    dirty, full = screen.take_dirty()
+    assert not full and sorted(map(tuple, dirty)) == [(10, 10, 8, 8), (20, 10, 8, 8)]
+
+
+def test_dirty_screen_presents_only_changed_rects(display, monkeypatch):
+    updates = []
+    flips = []
+    monkeypatch.setattr(pygame.display, 'update', lambda rects: updates.append([tuple(rect) for rect in rects]))
+    monkeypatch.setattr(pygame.display, 'flip', lambda: flips.append(True))
+    screen = DirtyScreen(display)
+    screen.present()  # the display starts out with none of it
+    assert flips == [True] and updates == []
+    pygame.draw.rect(screen, (255, 255, 255), (4, 4, 6, 6))
+    screen.present()
+    # Next frame, nothing drawn: the last frame's rect is sent again to erase it
+    screen.present()
+    assert updates == [[(4, 4, 6, 6)], [(4, 4, 6, 6)]]
+    assert display.get_at((5, 5)) == (255, 255, 255, 255)
+    screen.fill((0, 0, 0))
+    screen.present()
+    assert flips == [True, True]
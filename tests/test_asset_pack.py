@@ -0,0 +1,69 @@
+import os
+import pytest
+from asset_cache import GAME_DIR, PACK_MAGIC, AssetCache, AssetPack
+from build_pack import build_pack
+
+
+def make_cache(pack_path):
+    return AssetCache(atlas_dir=None, scaled_cache_dir=None, manifests_path=None, pack_path=pack_path,
+                      workers=1)
+
+
+@pytest.fixture
+def pack_path(sprite_dir, tmp_path):
+    out = str(tmp_path / 'assets.pack')
+    build_pack(out, game_dir=GAME_DIR, sprites_dir=str(sprite_dir))
+    return out
+
+
+def test_reads_index(sprite_dir, pack_path):
+    pack = AssetPack(pack_path)
+    cache = make_cache(pack_path)
+    name = cache.pack_name(sprite_dir / 'sprite_0.png')
+    folder, _, file_name = name.rpartition('/')
+    assert pack.folders[folder] == [f'sprite_{i}.png' for i in range(4)]
+    offset, length, format, mtime_ns = pack.entries[name]
+    assert format == 'png'
+    assert mtime_ns == os.stat(sprite_dir / 'sprite_0.png').st_mtime_ns
+    with open(sprite_dir / 'sprite_0.png', 'rb') as f:
+        data = f.read()
+    assert length == len(data)
+    assert pack.read(name) == data
+    assert pack.read(name, 8) == data[:8]
+
+
+def test_changed_source_read_from_disk(display, sprite_dir, pack_path):
+    path = str(sprite_dir / 'sprite_0.png')
+    cache = make_cache(pack_path)
+    assert cache.in_pack(path)
+    packed_hash = cache.source_hash(path)
+
+    os.replace(sprite_dir / 'sprite_1.png', path)  # edited after the pack was built
+    cache = make_cache(pack_path)
+    assert not cache.in_pack(path)
+    assert cache.source_hash(path) != packed_hash
+    assert cache.image(path).get_at((0, 0)) == (60, 20, 160, 255)  # sprite_1's colour
+    with open(path, 'rb') as f:
+        assert cache.read_bytes(path) == f.read()
+
+
+def test_stale_atlas_entry_ignored(display, sprite_dir):
+    path = str(sprite_dir / 'sprite_0.png')
+    stat = os.stat(path)
+    cache = make_cache(None)
+    key = cache.atlas_key(path)
+    cache.atlas = {'pages': [], 'frames': {key: [0, 0, 0, 10, 10, stat.st_mtime_ns, stat.st_size]}, 'folders': {}}
+    assert cache.atlas_entry(path) is not None
+
+    cache = make_cache(None)
+    cache.atlas = {'pages': [], 'frames': {key: [0, 0, 0, 10, 10, stat.st_mtime_ns - 1, stat.st_size]}, 'folders': {}}
+    assert cache.atlas_entry(path) is None
+    assert cache.needs_decode(cache.cache_key(path))
+    assert cache.image_size(path) == (10, 10)
+
+
+def test_old_pack_ignored(tmp_path):
+    out = tmp_path / 'assets.pack'
+    out.write_bytes(b'RKPACK1\n' + bytes(8))
+    assert PACK_MAGIC != b'RKPACK1\n'
+    assert make_cache(str(out)).asset_pack() is None
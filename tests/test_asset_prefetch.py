@@ -0,0 +1,52 @@
+import os
+import threading
+from asset_cache import AssetCache
+from asset_prefetch import AssetPrefetcher
+
+
+def test_prefetch_skips_atlas_sprites(sprite_dir):
+    cache = AssetCache(atlas_dir=None, scaled_cache_dir=None, manifests_path=None, pack_path=None, workers=1)
+    paths = [str(sprite_dir / f'sprite_{i}.png') for i in range(3)]
+    # sprite_0 is served unscaled from the atlas, so decoding its loose PNG would only duplicate it
+    stat = os.stat(paths[0])
+    frame = [0, 0, 0, 10, 10, stat.st_mtime_ns, stat.st_size]
+    cache.atlas = {'pages': [], 'frames': {cache.atlas_key(paths[0]): frame}, 'folders': {}}
+    keys = [cache.cache_key(paths[0]), cache.cache_key(paths[1]), cache.cache_key(paths[2], (20, 20))]
+    cache.save_manifest('Attack1', keys)
+    prefetcher = AssetPrefetcher(cache)
+    try:
+        assert prefetcher.prefetch('Attack1') == 2
+        prefetcher.wait()
+    finally:
+        prefetcher.stop()
+    assert set(cache.prefetched) == set(keys[1:])
+    assert cache.prefetched[keys[2]].get_size() == (20, 20)
+
+
+def test_prefetch_drops_keys_loaded_meanwhile(display, sprite_dir):
+    cache = AssetCache(atlas_dir=None, scaled_cache_dir=None, manifests_path=None, pack_path=None, workers=1)
+    key = cache.cache_key(str(sprite_dir / 'sprite_0.png'), (20, 20))
+    cache.save_manifest('Attack1', [key])
+    decoding = threading.Event()
+    loaded = threading.Event()
+    decode = cache.decode
+
+    def slow_decode(key):
+        # The main thread loads the key while the worker is still decoding it
+        decoding.set()
+        loaded.wait(5)
+        return decode(key)
+
+    cache.decode = slow_decode
+    prefetcher = AssetPrefetcher(cache)
+    try:
+        prefetcher.prefetch('Attack1')
+        assert decoding.wait(5)
+        cache.decode = decode
+        surface = cache.load_key(key)
+        loaded.set()
+        prefetcher.wait()
+    finally:
+        prefetcher.stop()
+    assert cache.prefetched == {}
+    assert cache.load_key(key) is surface
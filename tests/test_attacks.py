@@ -0,0 +1,388 @@
+import json
+import os
+import numpy as np
+import random
+import subprocess
+import sys
+import pygame
+import pytest
+import rollout_farm
+from asset_cache import ASSETS
+from classes import PATTERN_CACHE, SHARED_STATE_TYPES, BaseAttack, make_attack_for_debug, run_headless
+from game_clock import ScaledClock, VirtualClock
+from input_source import ACTIONS, InputRecorder, PolicyInput, RecordedInput, ScriptedInput, action_keys, keys_action
+
+ATTACK_NAMES = ['Attack1', 'Attack2', 'Attack3', 'Attack4', 'Attack5', 'Attack6', 'Attack7',
+                'Attack8', 'Attack9', 'Attack10', 'Final']
+
+
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_step_renders(name):
+    attack = make_attack_for_debug(name, headless=True, seed=1)
+    attack.reset(1)
+    for i in range(5):
+        observation, reward, done = attack.step(i % 9, render=True)
+    assert reward <= 0
+
+
+@pytest.mark.parametrize('speed', [4, 16, 30])
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_runs_through_at_large_dt(name, speed):
+    # A frame of dt can skip several animation frames at once (ScaledClock, or a slow machine)
+    attack = make_attack_for_debug(name, headless=True, seed=1)
+    run_headless(attack, dt=speed * 1000 / 60, max_frames=5000)
+    assert attack.is_done()
+
+
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_renders_at_large_dt(name):
+    attack = make_attack_for_debug(name, headless=True, seed=1)
+    attack.reset(1)
+    attack.step_dt = 16 * 1000 / 60
+    done = False
+    for i in range(5000):
+        observation, reward, done = attack.step(i % 9, render=True)
+        if done:
+            break
+    assert done
+
+
+def test_virtual_clock_moves_only_when_advanced():
+    clock = VirtualClock()
+    assert clock.get_ticks() == 0
+    clock.advance(1000 / 60)
+    clock.advance(1000 / 60)
+    assert clock.get_ticks() == 33
+
+
+class FrameClock:
+    """Stands in for pygame.time.Clock, every frame taking 16 ms."""
+    def tick(self, fps):
+        return 16
+
+
+def test_scaled_clock_stretches_wall_time(monkeypatch):
+    now = [1000]
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: now[0])
+    clock = ScaledClock(8)
+    now[0] += 100
+    assert clock.get_ticks() == 1000 + 800
+    assert clock.tick(FrameClock()) == 128
+
+
+def test_steps_advance_the_attacks_clock():
+    attack = make_attack_for_debug('Attack4', headless=True, seed=1)
+    attack.reset(1)
+    for _ in range(30):
+        attack.step(0)
+    assert attack.game_clock.get_ticks() == int(30 * attack.step_dt)
+    attack.reset(1)
+    assert attack.game_clock.get_ticks() == 0
+
+
+# Attack3, Attack7, Attack10 and Final run some animations per frame, so their length in game time depends on dt
+@pytest.mark.parametrize('name', ['Attack1', 'Attack2', 'Attack4', 'Attack5', 'Attack6', 'Attack8', 'Attack9'])
+def test_game_time_does_not_depend_on_dt(name):
+    durations = []
+    for dt in (1000 / 60, 2000 / 60):
+        attack = make_attack_for_debug(name, headless=True, seed=1)
+        frames = run_headless(attack, dt=dt, max_frames=5000)
+        assert attack.is_done()
+        durations.append(frames * dt)
+    # Within a few large frames, however many it took to get there
+    assert abs(durations[0] - durations[1]) <= 3 * 2000 / 60
+
+
+def test_rollout_seed_parsing():
+    assert rollout_farm.parse_seeds('2:5') == [2, 3, 4]
+    assert rollout_farm.parse_seeds('1,5,9') == [1, 5, 9]
+    assert rollout_farm.parse_seeds('7') == [7]
+
+
+def test_rollout_episodes_repeat_per_seed():
+    rollout_farm.init_worker('Attack5', 'random')
+    first = rollout_farm.run_episode(3)
+    attack = rollout_farm.worker_attack
+    rollout_farm.run_episode(4)
+    # The worker keeps one attack and resets it per episode
+    assert rollout_farm.worker_attack is attack
+    assert rollout_farm.run_episode(3) == first
+    assert first['finished'] and first['frames_survived'] <= first['frames']
+
+
+def test_rollout_farm_writes_summary(tmp_path):
+    # Run from the command line, the test process has threads that a forked worker could deadlock on
+    out = tmp_path / 'results.json'
+    subprocess.run([sys.executable, 'rollout_farm.py', 'Attack5', '--seeds', '0:3', '--workers', '1', '--policy', 'still',
+                    '--out', str(out)], cwd=os.path.dirname(rollout_farm.__file__), check=True, capture_output=True)
+    results = json.loads(out.read_text())
+    assert [e['seed'] for e in results['episodes']] == [0, 1, 2]
+    assert results['summary']['episodes'] == 3
+    assert results['summary']['survival_rate'] == sum(e['survived'] for e in results['episodes']) / 3
+
+
+def test_action_keys_round_trip():
+    for i, action in enumerate(ACTIONS):
+        assert keys_action(action_keys(i)) == i
+        assert action_keys(action) == action_keys(i)
+    assert keys_action(action_keys(None)) == 0
+
+
+def test_scripted_input_plays_then_stands_still():
+    source = ScriptedInput([2, 4])
+    assert [keys_action(source.get_keys()) for _ in range(4)] == [2, 4, 0, 0]
+    looped = ScriptedInput([2, 4], loop=True)
+    assert [keys_action(looped.get_keys()) for _ in range(5)] == [2, 4, 2, 4, 2]
+
+
+@pytest.mark.parametrize('name', ['Attack2', 'Attack4'])
+def test_input_source_steers_the_heart(name):
+    # step(None) leaves the heart to the input source
+    attack = make_attack_for_debug(name, headless=True, seed=1, input_source=ScriptedInput([2] * 20))
+    attack.reset(1)
+    start_x = attack.player_x
+    for _ in range(20):
+        attack.step(None)
+    assert attack.player_x > start_x
+
+
+def test_recorded_input_replays_an_episode(tmp_path):
+    rng = random.Random(5)
+    recorder = InputRecorder(PolicyInput(lambda observation: rng.randrange(9)))
+    attack = make_attack_for_debug('Attack4', headless=True, seed=1, input_source=recorder)
+    attack.reset(1)
+    expected = rollout(attack, [None] * 300)
+    log = tmp_path / 'input.json'
+    recorder.save(str(log))
+    replay = make_attack_for_debug('Attack4', headless=True, seed=1, input_source=RecordedInput(str(log)))
+    replay.reset(1)
+    assert len(set(recorder.actions)) > 1
+    assert_same_frames(rollout(replay, [None] * 300), expected)
+
+
+def test_reset_reuses_trail_copies():
+    attack = make_attack_for_debug('Attack1', headless=True, seed=1)
+    sizes = []
+    for _ in range(3):
+        attack.reset(1)
+        for i in range(30):
+            attack.step(0, render=True)
+        sizes.append(ASSETS.stats()['translucent_bytes'])
+    assert sizes[0] > 0
+    assert sizes[1] == sizes[0] and sizes[2] == sizes[0]
+
+
+SEEDED_NAMES = ['Attack1', 'Attack2', 'Attack3', 'Attack5', 'Attack7', 'Final']
+
+
+@pytest.mark.parametrize('name', SEEDED_NAMES)
+def test_pattern_depends_only_on_seed(name):
+    attack = make_attack_for_debug(name, headless=True, seed=3)
+    pattern = attack.pattern
+    attack.reset(3)
+    assert attack.pattern is pattern  # served from PATTERN_CACHE
+    PATTERN_CACHE.pop(attack.pattern_key())
+    attack.reset(3)
+    assert attack.pattern == pattern
+    attack.reset(4)
+    assert attack.pattern != pattern
+
+
+def test_cached_pattern_is_generated_once(monkeypatch):
+    unseeded = make_attack_for_debug('Attack2', headless=True)
+    attack = make_attack_for_debug('Attack2', headless=True, seed=11)
+    generated = []
+    generate = type(attack).generate_pattern
+    monkeypatch.setattr(type(attack), 'generate_pattern', lambda self: generated.append(1) or generate(self))
+    PATTERN_CACHE.clear()
+    for _ in range(3):
+        attack.reset()
+    assert len(generated) == 1
+    # Unseeded attacks draw a fresh one every time
+    unseeded.reset()
+    unseeded.reset()
+    assert len(generated) == 3
+
+
+@pytest.mark.parametrize('name', SEEDED_NAMES)
+def test_seeded_episodes_repeat(name):
+    actions = [(i // 5) % 9 for i in range(400)]
+    expected = None
+    for _ in range(2):
+        attack = make_attack_for_debug(name, headless=True, seed=8)
+        attack.reset(8)
+        frames = rollout(attack, actions)
+        if expected is None:
+            expected = frames
+    assert_same_frames(frames, expected)
+
+
+def test_seeded_attacks_leave_global_random_alone():
+    random.seed(0)
+    state = random.getstate()
+    for name in SEEDED_NAMES:
+        attack = make_attack_for_debug(name, headless=True, seed=2)
+        run_headless(attack, max_frames=300)
+    assert random.getstate() == state
+
+
+def rebuilt_with_box(attack, box):
+    args, kwargs = attack.init_args
+    args = [box if isinstance(a, pygame.Rect) and a == attack.battle_box_rect else a for a in args]
+    return type(attack)(*args, **kwargs)
+
+
+@pytest.mark.parametrize('name', ['Attack2', 'Attack5'])
+def test_pattern_key_includes_battle_box(name):
+    attack = make_attack_for_debug(name, headless=True, seed=3)
+    box = attack.battle_box_rect.inflate(-200, -100).move(60, 40)
+    other = rebuilt_with_box(attack, box)
+    assert other.battle_box_rect == box
+    assert other.pattern_key() != attack.pattern_key()
+    if name == 'Attack2':
+        sizes = {'up': box.width, 'down': box.width, 'left': box.height, 'right': box.height}
+        assert all(30 <= offset <= sizes[side] - 30 for side, offset in zip(*other.pattern.values()))
+    else:
+        assert all(box.collidepoint(position) for position in other.pattern['slash_positions'][1:])
+
+
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_observation_arrays_are_reused(name):
+    attack = make_attack_for_debug(name, headless=True, seed=1)
+    observation = attack.reset(1)
+    arrays = {key: array for key, array in observation.items()}
+    assert {key: (array.shape, array.dtype) for key, array in arrays.items()} == {
+        'heart': ((4,), np.float32), 'box': ((4,), np.float32), 'bullets': ((attack.max_bullets, 7), np.float32)}
+    for i in range(60):
+        observation, reward, done = attack.step(i % 9)
+        assert all(observation[key] is array for key, array in arrays.items())
+    # reset() rebuilds the attack but keeps writing into the same buffers
+    observation = attack.reset(1)
+    assert all(observation[key] is array for key, array in arrays.items())
+
+
+def observed(attack):
+    """The attack whose heart and bullets are observed: Attack7 passes on its Attack3's, Attack10 its Attack9's while it runs."""
+    if getattr(attack, 'attack3', None) is not None:
+        return attack.attack3
+    if getattr(attack, 'state', None) == 'attack9' and attack.attack9 is not None:
+        return attack.attack9
+    return attack
+
+
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_observation_matches_attack_state(name):
+    attack = make_attack_for_debug(name, headless=True, seed=1)
+    attack.reset(1)
+    seen_bullets = False
+    for i in range(400):
+        observation, reward, done = attack.step((i // 7) % 9)
+        heart, box, bullets = observation['heart'], observation['box'], observation['bullets']
+        source = observed(attack)
+        assert (heart[:3] == (source.player_x, source.player_y, attack.current_lives())).all()
+        assert (box == tuple(source.battle_box_rect)).all()
+        rows = np.array(list(source.iter_bullets())[:source.max_bullets], dtype=np.float32).reshape(-1, 7)
+        assert (bullets[:len(rows)] == rows).all()
+        assert not bullets[len(rows):].any()
+        seen_bullets |= len(rows) > 0
+        if done:
+            break
+    assert seen_bullets
+
+
+def rollout(attack, actions):
+    frames = []
+    for action in actions:
+        observation, reward, done = attack.step(action)
+        frames.append(({name: array.copy() for name, array in observation.items()}, reward, done))
+        if done:
+            break
+    return frames
+
+
+def assert_same_frames(frames, expected):
+    assert len(frames) == len(expected)
+    for (observation, reward, done), (expected_observation, expected_reward, expected_done) in zip(frames, expected):
+        assert (reward, done) == (expected_reward, expected_done)
+        for name, array in observation.items():
+            assert (array == expected_observation[name]).all(), name
+
+
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_restore_replays_identically(name):
+    actions = [(i // 7) % 9 for i in range(240)]
+    attack = make_attack_for_debug(name, headless=True, seed=3)
+    attack.reset(3)
+    rollout(attack, actions[:60])
+    snapshot = attack.snapshot()
+    expected = rollout(attack, actions[60:])
+    # The same snapshot can be restored again after it was played on from
+    for _ in range(2):
+        attack.restore(snapshot)
+        assert_same_frames(rollout(attack, actions[60:]), expected)
+
+
+def attack_tree(attack):
+    """The attack and the attacks it runs inside it (Attack7's Attack3, Attack10's Attack9)."""
+    yield attack
+    for value in list(attack.__dict__.values()):
+        if isinstance(value, BaseAttack):
+            yield from attack_tree(value)
+
+
+# Written every frame on purpose, the rest of snapshot_shared must only ever be read
+OUTPUT_BUFFERS = {'observation', 'pixel_surface', 'pixel_array'}
+
+
+def shared_contents(value):
+    if hasattr(value, 'getstate'):
+        return value.getstate()
+    if isinstance(value, (list, dict)):
+        return [id(item) for item in (value.values() if isinstance(value, dict) else value)], repr(value)
+    return None
+
+
+@pytest.mark.parametrize('name', ATTACK_NAMES)
+def test_snapshot_lists_match_attributes(name):
+    # snapshot() only copies what the class lists say can change, check those lists against what the attack holds
+    attack = make_attack_for_debug(name, headless=True, seed=3)
+    attack.reset(3)
+    shared = {}
+    done = False
+    for i in range(5000):
+        if i % 15 == 0 or done:
+            for part in attack_tree(attack):
+                for attr in part.snapshot_shared & part.__dict__.keys() - OUTPUT_BUFFERS:
+                    contents = shared_contents(part.__dict__[attr])
+                    assert shared.setdefault((id(part), attr), contents) == contents, f'{attr} changed in place'
+                readonly = {id(part.__dict__[attr]) for attr in part.snapshot_shared & part.__dict__.keys()}
+                for attr in part.snapshot_flat & part.__dict__.keys():
+                    for bullet in part.__dict__[attr]:
+                        state = bullet if type(bullet) is dict else bullet.__dict__
+                        copied = () if type(bullet) is dict else bullet.snapshot_copied
+                        for key, value in state.items():
+                            # Anything mutable the bullet holds is copied, or is one of the attack's read-only attributes
+                            assert (key in copied or isinstance(value, SHARED_STATE_TYPES) or id(value) in readonly), \
+                                f'{attr}: {type(bullet).__name__}.{key} would be shared with the snapshot'
+        if done:
+            break
+        # Drawn before each check too, which is where the trails are filled
+        observation, reward, done = attack.step((i // 7) % 9, render=i % 15 == 14)
+    assert done
+
+
+@pytest.mark.parametrize('name', ['Attack5', 'Attack9', 'Attack10'])
+def test_pixel_observation_draws_slash_shape(name):
+    attack = make_attack_for_debug(name, headless=True, seed=1)
+    attack.pixel_size = (84, 84)
+    attack.reset(1)
+    slash_frames = 0
+    done = False
+    while not done:
+        pixels, reward, done = attack.step(0)
+        if attack.get_observation()['bullets'][0, 6]:
+            slash_frames += 1
+            white = (attack.get_pixel_observation() == 255).all(axis=2).sum()
+            # The slash lines, not their rotated bounds covering the whole frame
+            assert 0 < white < 0.4 * 84 * 84
+    assert slash_frames
@@ -0,0 +1,44 @@
+import random
+import numpy as np
+from classes import ACTIONS, make_attack_for_debug
+from sword_tunnel_batch import SwordTunnelBatch
+
+HEARTS = 6
+
+
+def action_sequences(frames):
+    rng = random.Random(4)
+    # Standing still, each direction held, and random wandering
+    sequences = [[0] * frames] + [[a] * frames for a in (1, 4, 7)]
+    sequences += [[rng.randrange(len(ACTIONS)) for _ in range(frames)] for _ in range(HEARTS - len(sequences))]
+    return np.array(sequences).T
+
+
+def test_matches_attack4_per_heart():
+    attack = make_attack_for_debug('Attack4', headless=True)
+    batch = SwordTunnelBatch(attack, HEARTS)
+    actions = action_sequences(2000)
+    batch_hits = []
+    while not batch.is_done():
+        batch_hits.append(batch.step(actions[len(batch_hits)]))
+    batch_hits = np.array(batch_hits)
+    assert batch_hits.any()
+    for heart in range(HEARTS):
+        attack.reset()
+        hits = []
+        done = False
+        while not done:
+            obs, reward, done = attack.step(int(actions[len(hits), heart]))
+            hits.append(reward < 0)
+        assert hits == batch_hits[:, heart].tolist(), heart
+
+
+def test_leaves_attack_alone():
+    attack = make_attack_for_debug('Attack4', headless=True)
+    attack.reset()
+    for _ in range(100):
+        attack.step(3)
+    before = (attack.game_clock.get_ticks(), attack.sword_spawn_count, len(attack.swords), attack.player_x, attack.player_y)
+    SwordTunnelBatch(attack, 1)
+    after = (attack.game_clock.get_ticks(), attack.sword_spawn_count, len(attack.swords), attack.player_x, attack.player_y)
+    assert after == before
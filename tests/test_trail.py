@@ -0,0 +1,85 @@
+import pygame
+from trail import Trail
+
+
+def rect(x):
+    return pygame.Rect(x, 0, 10, 10)
+
+
+def test_keeps_last_length_in_order():
+    trail = Trail(3)
+    image = object()
+    for x in range(2):
+        trail.add(image, rect(x))
+    assert len(trail) == 2
+    assert [pos for img, pos in trail.oldest_first()] == [(0, 0), (1, 0)]
+    # Wraps around the buffer, dropping the oldest
+    for x in range(2, 7):
+        trail.add(image, rect(x))
+    assert len(trail) == 3
+    assert [pos for img, pos in trail.oldest_first()] == [(4, 0), (5, 0), (6, 0)]
+    assert [pos for img, pos in trail.newest_first()] == [(6, 0), (5, 0), (4, 0)]
+
+
+def test_stores_position_not_rect():
+    trail = Trail(2)
+    moving = rect(5)
+    trail.add(None, moving)
+    moving.x = 50
+    assert trail.newest_first() == [(None, (5, 0))]
+
+
+def test_copy_is_separate():
+    trail = Trail(2)
+    trail.add(None, rect(1))
+    copy = trail.copy()
+    copy.add(None, rect(2))
+    assert trail.newest_first() == [(None, (1, 0))]
+    assert copy.newest_first() == [(None, (2, 0)), (None, (1, 0))]
+
+
+def test_clear():
+    trail = Trail(2)
+    for x in range(3):
+        trail.add(None, rect(x))
+    trail.clear()
+    assert len(trail) == 0 and trail.oldest_first() == []
+    trail.add(None, rect(9))
+    assert trail.oldest_first() == [(None, (9, 0))]
+
+
+def test_draw_oldest_first_with_alphas(display):
+    screen = pygame.Surface((200, 20), pygame.SRCALPHA)
+    image = pygame.Surface((1, 1))
+    image.fill((255, 255, 255))
+    trail = Trail(4)
+    for x in range(4):
+        trail.add(image, rect(x))
+    trail.draw(screen, [255, 255, 255], offset=0, spacing=10)
+    # Oldest first, each 10 px further right, the newest (past the end of alphas) not drawn
+    lit = [x for x in range(200) if screen.get_at((x, 0))[3]]
+    assert lit == [0, 11, 22]
+
+
+def test_draw_with_replacement_image(display):
+    screen = pygame.Surface((20, 20), pygame.SRCALPHA)
+    red = pygame.Surface((1, 1))
+    red.fill((255, 0, 0))
+    trail = Trail(2)
+    for x in range(2):
+        trail.add(pygame.Surface((1, 1)), rect(x))
+    trail.draw(screen, [255, 255], offset=0, spacing=0, image=red)
+    assert screen.get_at((0, 0)) == screen.get_at((1, 0)) == (255, 0, 0, 255)
+
+
+def test_draw_oldest_on_top(display):
+    screen = pygame.Surface((20, 20), pygame.SRCALPHA)
+    trail = Trail(2)
+    for color in ((255, 0, 0), (0, 0, 255)):
+        image = pygame.Surface((1, 1))
+        image.fill(color)
+        trail.add(image, rect(0))
+    trail.draw(screen, [255, 255], offset=0, spacing=0)
+    assert screen.get_at((0, 0)) == (0, 0, 255, 255)
+    trail.draw(screen, [255, 255], offset=0, spacing=0, oldest_on_top=True)
+    assert screen.get_at((0, 0)) == (255, 0, 0, 255)
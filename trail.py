@@ -0,0 +1,53 @@
+from asset_cache import ASSETS
+
+# Afterimage trails of the Knight.
+# A Trail remembers only which sprite was drawn where over the last few frames, in a fixed-size
+# ring buffer, instead of a copy of the sprite per frame. draw() blits the translucent copy of each
+# sprite from ASSETS.translucent(), made once per sprite and alpha, so drawing a trail is only blits.
+
+class Trail:
+    """The last length (sprite, topleft) pairs added, e.g. Trail(10).add(knight_img, knight_rect)."""
+    def __init__(self, length):
+        self.length = length
+        self.entries = [None] * length
+        self.newest = -1  # index of the last entry added
+        self.count = 0
+
+    def add(self, image, rect):
+        """Adds image drawn at rect (its topleft), dropping the oldest entry once the trail is full."""
+        self.newest = (self.newest + 1) % self.length
+        self.entries[self.newest] = (image, tuple(rect.topleft))
+        self.count = min(self.count + 1, self.length)
+
+    def copy(self):
+        """A Trail with the same entries that can be added to separately, e.g. for snapshots."""
+        new = Trail.__new__(Trail)
+        new.__dict__.update(self.__dict__)
+        new.entries = self.entries.copy()
+        return new
+
+    def clear(self):
+        self.entries = [None] * self.length
+        self.newest = -1
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def newest_first(self):
+        return [self.entries[(self.newest - i) % self.length] for i in range(self.count)]
+
+    def oldest_first(self):
+        return self.newest_first()[::-1]
+
+    def draw(self, screen, alphas, offset=40, spacing=10, image=None, oldest_on_top=False):
+        """
+        Blits the entries oldest first (newest first with oldest_on_top), the i-th oldest at alpha alphas[i]
+        and offset + i * spacing pixels to the right of where it was added. Entries past the end of alphas
+        aren't drawn. image (same size as the added ones) replaces every entry's sprite, for trails
+        recoloured with the sprite.
+        """
+        entries = self.oldest_first()[:len(alphas)]
+        for i in (reversed(range(len(entries))) if oldest_on_top else range(len(entries))):
+            added, (x, y) = entries[i]
+            screen.blit(ASSETS.translucent(image or added, alphas[i]), (x + offset + i * spacing, y))